@@ -0,0 +1,200 @@
+"""
+Benchmark: service cold start and per-worker memory
+
+For the OSINT service, risk engine and reports service, in fresh
+interpreters (each run in the service's directory, best of --runs):
+
+- import: time and RSS to import main.py, with lookup libraries, httpx and
+  the like left to load on first use;
+- import + preload: the same followed by main.preload(), i.e. those
+  libraries loaded up front, as main.py used to, plus the OpenAPI schema.
+
+Then --workers worker processes per service, each holding the fully loaded
+app, measured by the memory they add together (proportional set size summed
+over the workers and, where there is one, the preloading parent):
+
+- spawn: every worker imports and preloads on its own, like uvicorn --workers;
+- fork: one process preloads and forks the workers, like gunicorn with
+  preload_app;
+- fork + freeze: as fork, with gc.disable() before loading and gc.freeze()
+  before forking, as grc_shared/gunicorn.conf.py does.
+
+The services run a single worker today, because their state lives in
+process (see grc_shared/gunicorn.conf.py); the multi-worker figures show what forking
+would save once that state is shared. Workers run a full gc.collect()
+before they are measured, as they would soon after starting. Lifespans (PDF pool, history writer) are not run.
+
+--import-profile prints the slowest top-level imports of each service from
+python -X importtime (PYTHONPROFILEIMPORTTIME=1 gives the same raw output
+from a container).
+
+Usage:
+    python benchmarks/cold_start.py [--services osint risk-engine reports] [--runs 5] [--workers 4] [--import-profile 12]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SERVICES = {
+    "osint": "intelligence-layer/osint-service",
+    "risk-engine": "intelligence-layer/risk-engine",
+    "reports": "experience-layer/reports",
+}
+ENVIRONMENT = {
+    "SCORE_HISTORY_URL": "",
+    "REPORT_CACHE_DIR": os.path.join(tempfile.gettempdir(), "grc-report-cache-bench"),
+    "LOG_LEVEL": "WARNING",
+    # The repository root, for grc_shared
+    "PYTHONPATH": os.path.abspath(ROOT),
+}
+
+# Run in a fresh interpreter: import (and optionally preload) main, report seconds and RSS
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import main
+if sys.argv[1] == "preload":
+    main.preload()
+elapsed = time.perf_counter() - start
+rss = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmRSS:"))
+print(json.dumps({"seconds": elapsed, "rss_kb": rss}))
+"""
+
+# A spawned worker: load everything on its own, collect, report ready on
+# stdout and stay alive until stdin closes
+SPAWNED_WORKER = """
+import gc, sys
+import main
+main.preload()
+gc.collect()
+sys.stdout.write("x")
+sys.stdout.flush()
+sys.stdin.read()
+"""
+
+# Run in a fresh interpreter: start the workers in one of the models and
+# report their memory (and the preloading parent's) once each has collected
+WORKERS_SNIPPET = """
+import gc, json, os, subprocess, sys
+mode, workers = sys.argv[1], int(sys.argv[2])
+
+def memory_kb(pid):
+    values = {}
+    for line in open(f"/proc/{pid}/smaps_rollup"):
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == "kB":
+            values[parts[0].rstrip(":")] = int(parts[1])
+    return values["Pss"], values["Private_Clean"] + values["Private_Dirty"]
+
+if mode == "spawn":
+    children = [
+        subprocess.Popen([sys.executable, "-c", sys.argv[3]], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        for _ in range(workers)
+    ]
+    for child in children:
+        child.stdout.read(1)
+    print(json.dumps([memory_kb(child.pid) for child in children]))
+    for child in children:
+        child.stdin.close()
+        child.wait()
+else:
+    if mode == "fork-freeze":
+        gc.disable()
+    import main
+    main.preload()
+    if mode == "fork-freeze":
+        gc.freeze()
+    ready_read, ready_write = os.pipe()
+    hold_read, hold_write = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            gc.enable()
+            gc.collect()
+            os.write(ready_write, b"x")
+            os.read(hold_read, 1)
+            os._exit(0)
+        pids.append(pid)
+    for _ in pids:
+        os.read(ready_read, 1)
+    print(json.dumps([memory_kb(pid) for pid in pids + [os.getpid()]]))
+    os.write(hold_write, b"x" * len(pids))
+    for pid in pids:
+        os.waitpid(pid, 0)
+"""
+
+
+def run_python(service: str, code: str, *argv: str, options=(), stderr: bool = False) -> str:
+    """Output of code run by a fresh interpreter in the service's directory"""
+    result = subprocess.run(
+        [sys.executable, *options, "-c", code, *argv],
+        cwd=os.path.join(ROOT, SERVICES[service]),
+        env={**os.environ, **ENVIRONMENT},
+        capture_output=True, text=True, check=True,
+    )
+    return result.stderr if stderr else result.stdout
+
+
+def cold_import(service: str, mode: str, runs: int):
+    """(best seconds, lowest RSS in MB) to import main.py, with preload() or not"""
+    samples = [json.loads(run_python(service, IMPORT_SNIPPET, mode)) for _ in range(runs)]
+    return min(sample["seconds"] for sample in samples), min(sample["rss_kb"] for sample in samples) / 1024
+
+
+def worker_memory(service: str, mode: str, workers: int):
+    """(PSS, private) MB of the workers, and of the preloading parent for the fork models"""
+    measured = json.loads(run_python(service, WORKERS_SNIPPET, mode, str(workers), SPAWNED_WORKER))
+    return sum(m[0] for m in measured) / 1024, sum(m[1] for m in measured) / 1024
+
+
+def import_profile(service: str, top: int):
+    """Slowest top-level imports: (module, cumulative ms)"""
+    output = run_python(service, "import main", options=("-X", "importtime"), stderr=True)
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level imports of main.py are indented by exactly three spaces
+        if name.startswith("   ") and not name.startswith("    "):
+            entries.append((name.strip(), int(cumulative) / 1000))
+    return sorted(entries, key=lambda entry: -entry[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service cold start and per-worker memory")
+    parser.add_argument("--services", nargs="+", choices=list(SERVICES), default=list(SERVICES))
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per import measurement")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--import-profile", type=int, default=0, metavar="N", help="Print the N slowest imports of each service")
+    args = parser.parse_args()
+
+    print(f"{'service':<13}{'import ms':>11}{'RSS MB':>9}{'+ preload ms':>15}{'RSS MB':>9}")
+    for service in args.services:
+        lazy = cold_import(service, "import", args.runs)
+        eager = cold_import(service, "preload", args.runs)
+        print(f"{service:<13}{lazy[0] * 1000:>11.0f}{lazy[1]:>9.1f}{eager[0] * 1000:>15.0f}{eager[1]:>9.1f}")
+
+    print(f"\n{args.workers} workers, MB in total (PSS / private):")
+    print(f"{'service':<13}{'spawn':>18}{'fork':>18}{'fork + freeze':>18}")
+    for service in args.services:
+        cells = []
+        for mode in ("spawn", "fork", "fork-freeze"):
+            pss, private = worker_memory(service, mode, args.workers)
+            cells.append(f"{pss:.0f} / {private:.0f}")
+        print(f"{service:<13}{cells[0]:>18}{cells[1]:>18}{cells[2]:>18}")
+
+    if args.import_profile:
+        for service in args.services:
+            print(f"\n{service}: slowest imports (cumulative ms)")
+            for name, ms in import_profile(service, args.import_profile):
+                print(f"  {name:<40}{ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
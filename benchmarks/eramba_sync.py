@@ -0,0 +1,360 @@
+"""
+Benchmark: Eramba vendor sync against a SQLite stand-in
+
+Builds a SQLite database with a grc_sync_vendors view over a third_parties
+table of --vendors rows (some without a domain, some with invalid factors)
+and runs the sync worker against it, with the OSINT service (sleeping WHOIS
+and DNS fakes of osint_enrich_concurrency.py) and the risk engine in process
+over ASGI transports. Measures:
+
+- record-at-a-time: per vendor, POST /api/enrich, POST /api/calculate and a
+  single-row UPDATE (what the n8n workflows do), on a sample of vendors;
+- full sync: every vendor, in keyset pages with bulk upserts;
+- resume: a full sync cancelled after --interrupt-pages pages, then an
+  incremental run that must pick up exactly the vendors not yet stored;
+- incremental: --changed vendors modified after the last run;
+- portfolio index: an incremental run loads the (in-process) portfolio index
+  with every scored vendor, the next pushes its changed vendors, and one
+  after the index restarted empty reloads it.
+
+Checks that every valid vendor got a score and every invalid one last_error,
+and that the portfolio index ends up with every scored vendor's latest score.
+
+Usage:
+    python benchmarks/eramba_sync.py [--vendors 50000] [--page-size 1000] [--pages-in-flight 4] [--whois-ms 20] [--dns-ms 5]
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intelligence-layer")
+PORTFOLIO_INDEX = os.path.join(ROOT, "..", "experience-layer", "portfolio-index")
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(ROOT, ".."))
+sys.path.insert(0, os.path.join(ROOT, "eramba-sync"))
+sys.path.insert(0, os.path.join(ROOT, "osint-service"))
+sys.path.insert(0, os.path.join(ROOT, "risk-engine"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Ahead of the benchmarks, whose portfolio_index.py is the index's benchmark
+sys.path.insert(0, PORTFOLIO_INDEX)
+os.environ["SCORE_HISTORY_URL"] = ""
+# The fakes are not a real registry: lift the per-TLD WHOIS rate limit
+os.environ["WHOIS_RATE_PER_TLD"] = "100000"
+os.environ["WHOIS_RATE_BURST"] = "100000"
+
+
+def load_service(name: str, directory: str):
+    """Import a service's main.py under its own module name"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, directory, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+osint = load_service("osint_main", "osint-service")
+risk_engine = load_service("risk_engine_main", "risk-engine")
+portfolio = load_service("portfolio_index_main", PORTFOLIO_INDEX)
+sys.modules["main"] = osint  # osint_enrich_concurrency patches `main`
+
+import eramba_store  # noqa: E402
+import osint_enrich_concurrency  # noqa: E402
+from grc_shared.portfolio_client import PortfolioIndexClient  # noqa: E402
+from portfolio_index import PortfolioIndex, QueryCache  # noqa: E402
+from sync_worker import RiskEngineClient, SyncWorker  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE third_parties (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL, domain TEXT, employee_count INTEGER,
+    company_age_years INTEGER, breach_count INTEGER, cve_count INTEGER, certifications TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0, modified TEXT NOT NULL
+);
+CREATE INDEX third_parties_modified_id ON third_parties (modified, id);
+CREATE VIEW grc_sync_vendors AS
+SELECT id AS vendor_id, name AS vendor_name, domain, employee_count, company_age_years,
+       breach_count, cve_count, certifications AS compliance_certifications, modified
+FROM third_parties WHERE deleted = 0;
+"""
+
+
+def build_database(path: str, vendors: int, seed: int) -> int:
+    """Stand-in Eramba database; returns the number of vendors with invalid factors"""
+    rng = random.Random(seed)
+    rows = []
+    invalid = 0
+    for i in range(1, vendors + 1):
+        breach_count = rng.choice([0, 0, 0, 1, 2, 5])
+        if i % 500 == 0:
+            breach_count = -1
+            invalid += 1
+        rows.append((
+            i,
+            f"Vendor {i}",
+            None if i % 20 == 0 else f"vendor{i % (vendors * 4 // 5 or 1)}.example.com",
+            rng.choice([None, 10, 250, 5000]),
+            rng.choice([None, 1, 5, 15]),
+            breach_count,
+            rng.choice([0, 3, 12]),
+            rng.choice(["", "ISO27001", "ISO27001, SOC2", "SOC 2 Type II;PCI-DSS"]),
+            # Many vendors share a modified second, as after a bulk import
+            f"2025-{1 + i * 12 // (vendors + 1):02d}-15 09:{(i // 60) % 60:02d}:00",
+        ))
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    connection.executemany("INSERT INTO third_parties VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?)", rows)
+    connection.commit()
+    connection.close()
+    return invalid
+
+
+def reset_caches():
+    """Start a run cold: no cached lookups or stored scores"""
+    osint.lookup_cache = osint.EnrichmentCache(max_entries=osint.CACHE_MAX_ENTRIES)
+    risk_engine.score_store.clear()
+
+
+async def record_at_a_time(path: str, sample: int, concurrency: int) -> float:
+    """Vendors/sec syncing one vendor per enrich, calculate and UPDATE round trip"""
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS workflow_scores (vendor_id INTEGER PRIMARY KEY, overall_risk_score INTEGER, risk_level TEXT)"
+    )
+    rows = connection.execute(
+        "SELECT id, domain, breach_count, cve_count FROM third_parties WHERE domain IS NOT NULL AND breach_count >= 0 LIMIT ?",
+        (sample,),
+    ).fetchall()
+    slots = asyncio.Semaphore(concurrency)
+    reset_caches()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=osint.app), base_url="http://osint", timeout=None) as osint_client, \
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=risk_engine.app), base_url="http://risk", timeout=None) as risk:
+        async def one(row):
+            vendor_id, domain, breach_count, cve_count = row
+            async with slots:
+                enrichment = (await osint_client.post("/api/enrich", json={"domain": domain})).json()
+                score = (await risk.post("/api/calculate", json={
+                    "vendor_id": str(vendor_id), "domain": domain, "breach_count": breach_count,
+                    "cve_count": cve_count, "domain_reputation_score": enrichment["reputation_score"],
+                })).json()
+                connection.execute(
+                    "INSERT OR REPLACE INTO workflow_scores VALUES (?, ?, ?)",
+                    (vendor_id, score["overall_risk_score"], score["risk_level"]),
+                )
+                connection.commit()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(row) for row in rows))
+        elapsed = time.perf_counter() - start
+    connection.close()
+    return len(rows) / elapsed
+
+
+def new_worker(path: str, args, observe_stage=None, portfolio_index: bool = False) -> SyncWorker:
+    client = RiskEngineClient("http://risk", transport=httpx.ASGITransport(app=risk_engine.app))
+    index_client = PortfolioIndexClient("http://portfolio", transport=httpx.ASGITransport(app=portfolio.app)) if portfolio_index else None
+    return SyncWorker(
+        eramba_store.SqliteVendorStore(path),
+        client,
+        page_size=args.page_size,
+        pages_in_flight=args.pages_in_flight,
+        enrich_concurrency=args.concurrency,
+        safety_lag=args.safety_lag,
+        observe_stage=observe_stage,
+        portfolio=index_client,
+    )
+
+
+async def close(worker: SyncWorker):
+    await worker.risk_engine.aclose()
+    if worker.portfolio is not None:
+        await worker.portfolio.aclose()
+    worker.store.close()
+
+
+def score_counts(path: str):
+    """(vendors with a score, vendors with last_error, rows in the score table)"""
+    connection = sqlite3.connect(path)
+    scored, failed, rows = connection.execute(
+        "SELECT COUNT(overall_risk_score), COUNT(last_error), COUNT(*) FROM grc_vendor_risk_scores"
+    ).fetchone()
+    connection.close()
+    return scored, failed, rows
+
+
+def clear_scores(path: str):
+    connection = sqlite3.connect(path)
+    connection.execute("DELETE FROM grc_vendor_risk_scores")
+    connection.execute("DELETE FROM grc_sync_checkpoints")
+    connection.commit()
+    connection.close()
+
+
+async def full_sync(path: str, args):
+    reset_caches()
+    worker = new_worker(path, args)
+    run = await worker.run(full=True)
+    await close(worker)
+    return run
+
+
+async def interrupted_sync(path: str, args):
+    """(pages stored before the cancel, the resumed run)"""
+    reset_caches()
+    clear_scores(path)
+    stored = asyncio.Event()
+    pages = 0
+
+    def observe_stage(stage, seconds):
+        nonlocal pages
+        if stage == "sync_write_page":
+            pages += 1
+            if pages == args.interrupt_pages:
+                stored.set()
+
+    worker = new_worker(path, args, observe_stage)
+    task = asyncio.create_task(worker.run(full=True))
+    await stored.wait()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    interrupted = worker.last_run
+    await close(worker)
+
+    worker = new_worker(path, args)
+    resumed = await worker.run()
+    await close(worker)
+    return interrupted, resumed
+
+
+def change_vendors(path: str, count: int, breach_count: int = 0):
+    """Modify count random valid vendors, before the next run's cutoff"""
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "UPDATE third_parties SET breach_count = ?, modified = datetime('now', '-60 seconds')"
+        " WHERE id IN (SELECT id FROM third_parties WHERE breach_count >= 0 ORDER BY random() LIMIT ?)",
+        (breach_count, count),
+    )
+    connection.commit()
+    connection.close()
+
+
+async def incremental_sync(path: str, args):
+    change_vendors(path, args.changed)
+    worker = new_worker(path, args)
+    run = await worker.run()
+    await close(worker)
+    return run
+
+
+def index_mismatches(path: str) -> int:
+    """Scored vendors whose score in the portfolio index differs from the one stored, or is missing"""
+    connection = sqlite3.connect(path)
+    rows = connection.execute(
+        "SELECT vendor_id, overall_risk_score, risk_level FROM grc_vendor_risk_scores WHERE overall_risk_score IS NOT NULL"
+    ).fetchall()
+    connection.close()
+    mismatches = sum(
+        1 for vendor_id, score, level in rows
+        if (portfolio.index.vendor(str(vendor_id)) or {}).get("risk_score") != score
+        or portfolio.index.vendor(str(vendor_id))["risk_level"] != level
+    )
+    return mismatches + abs(len(portfolio.index) - len(rows))
+
+
+async def portfolio_sync(path: str, args):
+    """(vendors loaded, vendors pushed by the next run, loads after the index restarted, mismatches after each step)"""
+    worker = new_worker(path, args, portfolio_index=True)
+    await worker.run()
+    loaded = len(portfolio.index)
+    mismatches = [index_mismatches(path)]
+
+    # Modified values have one-second resolution: keep the changes after the last run's watermark
+    await asyncio.sleep(1)
+    change_vendors(path, args.changed, breach_count=5)
+    pushed = worker.portfolio.vendors_pushed
+    await worker.run()
+    pushed = worker.portfolio.vendors_pushed - pushed
+    mismatches.append(index_mismatches(path))
+
+    # A restart: the index comes back empty, under a new instance
+    portfolio.index = PortfolioIndex()
+    portfolio.query_cache = QueryCache(portfolio.QUERY_CACHE_MAX_ENTRIES)
+    portfolio.INSTANCE = "restarted"
+    loads = worker.portfolio.loads
+    await asyncio.sleep(1)
+    change_vendors(path, args.changed, breach_count=1)
+    await worker.run()
+    mismatches.append(index_mismatches(path))
+    reloads = worker.portfolio.loads - loads
+    await close(worker)
+    return loaded, pushed, reloads, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eramba vendor sync against a SQLite stand-in")
+    parser.add_argument("--vendors", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--pages-in-flight", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=50, help="Enrichments in flight per page")
+    parser.add_argument("--whois-ms", type=float, default=20)
+    parser.add_argument("--dns-ms", type=float, default=5)
+    parser.add_argument("--sample", type=int, default=1000, help="Vendors synced record-at-a-time")
+    parser.add_argument("--interrupt-pages", type=int, default=5)
+    parser.add_argument("--changed", type=int, default=500)
+    parser.add_argument("--safety-lag", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    osint_enrich_concurrency.install_fakes(args.whois_ms, args.dns_ms)
+    risk_engine.osint = risk_engine.pipeline.OsintClient("http://osint", transport=httpx.ASGITransport(app=osint.app))
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "eramba.db")
+        invalid = build_database(path, args.vendors, args.seed)
+        valid = args.vendors - invalid
+        print(f"vendors: {args.vendors} ({invalid} invalid, {args.vendors // 20} without a domain), "
+              f"pages of {args.page_size}, {args.pages_in_flight} in flight")
+
+        workflow_rate = asyncio.run(record_at_a_time(path, args.sample, args.concurrency))
+        print(f"record-at-a-time: {workflow_rate:,.0f} vendors/sec ({args.sample} sampled, "
+              f"{args.vendors / workflow_rate:,.0f}s projected for all)")
+
+        run = asyncio.run(full_sync(path, args))
+        print(f"full sync:        {run['seconds']:.1f}s ({run['vendors_per_second']:,.0f} vendors/sec, {run['pages']} pages), "
+              f"{workflow_rate and run['vendors_per_second'] / workflow_rate:.1f}x")
+        if (run["vendors"], run["scored"], run["failed"]) != (args.vendors, valid, invalid) or score_counts(path) != (valid, invalid, args.vendors):
+            failures.append(f"full sync stored {score_counts(path)}, run {run}")
+
+        interrupted, resumed = asyncio.run(interrupted_sync(path, args))
+        print(f"resume:           cancelled after {interrupted['pages']} pages ({interrupted['vendors']} vendors), "
+              f"resumed run synced {resumed['vendors']} in {resumed['seconds']:.1f}s")
+        if interrupted["status"] != "cancelled" or interrupted["vendors"] + resumed["vendors"] != args.vendors \
+                or score_counts(path) != (valid, invalid, args.vendors):
+            failures.append(f"resume stored {score_counts(path)}, interrupted {interrupted}, resumed {resumed}")
+
+        run = asyncio.run(incremental_sync(path, args))
+        print(f"incremental:      {run['vendors']} changed vendors in {run['seconds']:.2f}s")
+        if run["vendors"] != args.changed or run["failed"]:
+            failures.append(f"incremental run {run}")
+
+        loaded, pushed, reloads, mismatches = asyncio.run(portfolio_sync(path, args))
+        print(f"portfolio index:  loaded {loaded} vendors, next run pushed {pushed}, "
+              f"reloaded {reloads}x after a restart; mismatches {mismatches}")
+        if loaded != valid or pushed != args.changed or reloads != 1 or any(mismatches):
+            failures.append(f"portfolio index loaded {loaded}, reloads {reloads}, mismatches {mismatches}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
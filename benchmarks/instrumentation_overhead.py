@@ -0,0 +1,130 @@
+"""
+Benchmark: cost of the shared /metrics instrumentation
+
+Measures the instrumentation primitives on their own (histogram observe,
+counter increment, a timed stage), the request middleware around a trivial
+ASGI app, and the risk engine's per-vendor scoring with its per-factor stage
+timers on and off. Prints the added time per request next to the time of an
+in-process /api/calculate request, and the cost of rendering /metrics.
+
+Usage:
+    python benchmarks/instrumentation_overhead.py [--iterations 200000] [--requests 2000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "intelligence-layer", "risk-engine"))
+os.environ["SCORE_HISTORY_URL"] = ""
+
+import main as risk_engine  # noqa: E402
+from grc_shared import instrumentation  # noqa: E402
+
+
+def per_call(function, iterations: int, repeat: int = 5) -> float:
+    """Mean seconds per call of function(), best of repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best
+
+
+async def middleware_overhead(requests: int) -> float:
+    """Seconds the middleware adds to one request to a trivial ASGI app"""
+    async def plain(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    wrapped = instrumentation.MetricsMiddleware(plain, instrumentation.ServiceMetrics("bench"))
+    scope = {"type": "http", "method": "GET", "path": "/"}
+
+    async def timed(app):
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(requests):
+                await app(dict(scope), receive, send)
+            best = min(best, (time.perf_counter() - start) / requests)
+        return best
+
+    return await timed(wrapped) - await timed(plain)
+
+
+async def calculate_request_seconds(requests: int) -> float:
+    """Mean seconds of an in-process POST /api/calculate (stored results disabled)"""
+    transport = httpx.ASGITransport(app=risk_engine.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://risk") as client:
+        start = time.perf_counter()
+        for i in range(requests):
+            # A new vendor id each time, so every request is scored
+            response = await client.post("/api/calculate", json={
+                "vendor_id": f"V{i}", "domain": "example.com", "company_age_years": 7,
+                "breach_count": 1, "compliance_certifications": ["ISO27001"],
+            })
+            response.raise_for_status()
+        return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    metrics = instrumentation.ServiceMetrics("bench")
+    observe = per_call(lambda: metrics.observe_stage("whois", 0.0123), args.iterations)
+    inc = per_call(lambda: metrics.requests.inc(("GET", "/api/enrich", "200")), args.iterations)
+
+    def timed_stage():
+        with metrics.stage("template_render"):
+            pass
+    stage = per_call(timed_stage, args.iterations)
+
+    middleware = asyncio.run(middleware_overhead(args.requests))
+
+    factors = risk_engine.VendorRiskFactors(
+        vendor_id="V1", domain="example.com", company_age_years=7, breach_count=1,
+        compliance_certifications=["ISO27001"],
+    )
+    model = risk_engine.scoring_models.current()
+    scoring_iterations = args.iterations // 10
+    timed_scoring = per_call(lambda: risk_engine.score_vendor(factors, model), scoring_iterations)
+    observe_factor = risk_engine.observe_factor
+    risk_engine.observe_factor = lambda step, start: start
+    untimed_scoring = per_call(lambda: risk_engine.score_vendor(factors, model), scoring_iterations)
+    risk_engine.observe_factor = observe_factor
+
+    request = asyncio.run(calculate_request_seconds(args.requests))
+    render_iterations = 200
+    render = per_call(risk_engine.telemetry.render, render_iterations, repeat=1)
+
+    added = middleware + (timed_scoring - untimed_scoring)
+    print(f"histogram observe:    {observe * 1e9:8.0f} ns")
+    print(f"counter increment:    {inc * 1e9:8.0f} ns")
+    print(f"timed stage (with):   {stage * 1e9:8.0f} ns")
+    print(f"request middleware:   {middleware * 1e6:8.2f} us per request")
+    print(f"score_vendor:         {untimed_scoring * 1e6:8.2f} us untimed, {timed_scoring * 1e6:.2f} us with 6 stage timers")
+    print(f"/api/calculate:       {request * 1e6:8.1f} us per in-process request")
+    print(f"added per request:    {added * 1e6:8.2f} us ({added / request:.1%} of /api/calculate)")
+    print(f"render /metrics:      {render * 1e3:8.2f} ms ({len(risk_engine.telemetry.render())} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Benchmark: OSINT enrichment against WHOIS and DNS backends that fail
+
+Starts a fake WHOIS server (TCP) and two fake DNS resolvers (UDP) on
+localhost, points the OSINT service at them (WHOIS_SERVERS, DNS_RESOLVERS)
+and switches them between answering and failing while enriching in-process
+over an ASGI transport; the TLS check is a fake that answers at once.
+Each scenario is checked and timed:
+
+- negative answers: NXDOMAIN and "no WHOIS record" are answers, cached for
+  the negative TTLs, so a repeat asks no backend;
+- resolver failover: the first resolver stops answering, lookups move to the
+  second and, once its breaker opens, stop waiting for the first;
+- WHOIS outage: the server hangs; enrichments without breakers wait out
+  WHOIS_TIMEOUT every time (a repeat of the same domain is answered from the
+  remembered failure), with breakers they fail fast once it opens. Either
+  way the response is flagged degraded and has no reputation score;
+- half-open probing: a failed probe (connection refused) keeps the breaker
+  open for twice as long, a successful one closes it, and a server closing
+  without an answer counts as a failure;
+- all resolvers down: every record type is degraded and lookups are skipped
+  until a probe is due.
+
+Exits with status 1 if a check fails.
+
+Usage:
+    python benchmarks/osint_backend_faults.py [--timeout 0.5] [--threshold 3] [--reset 1.0] [--outage-domains 10]
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+import time
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+import httpx
+
+OSINT_SERVICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intelligence-layer", "osint-service")
+
+WHOIS_RECORD = """   Domain Name: {domain}
+   Registry Domain ID: 1234567_DOMAIN_COM-VRSN
+   Registrar: Fake Registrar, Inc.
+   Updated Date: 2024-01-01T00:00:00Z
+   Creation Date: 2001-01-01T00:00:00Z
+   Registry Expiry Date: 2030-01-01T00:00:00Z
+   Domain Status: clientTransferProhibited
+   Name Server: NS1.EXAMPLE.NET
+   Name Server: NS2.EXAMPLE.NET
+>>> Last update of whois database: 2026-10-01T00:00:00Z <<<
+"""
+WHOIS_NOT_FOUND = 'No match for "{domain}".\r\n>>> Last update of whois database: 2026-10-01T00:00:00Z <<<\r\n'
+
+
+class FakeWhoisServer:
+    """
+    WHOIS over TCP in one of these modes: ok, hang (read the query, never
+    answer), empty (close without answering) or down (not listening).
+    Domains starting with "missing-" are not found.
+    """
+
+    def __init__(self):
+        self.mode = "ok"
+        self.queries = 0
+        self.server = None
+        self.port = None
+
+    async def start(self, port: int = 0):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def set_mode(self, mode: str):
+        if mode == "down" and self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        elif mode != "down" and self.server is None:
+            await self.start(self.port)
+        self.mode = mode
+
+    async def handle(self, reader, writer):
+        query = (await reader.readline()).decode().strip().lstrip("=")
+        self.queries += 1
+        try:
+            if self.mode == "hang":
+                # Until the client gives up
+                await reader.read()
+            elif self.mode == "ok":
+                template = WHOIS_NOT_FOUND if query.startswith("missing-") else WHOIS_RECORD
+                writer.write(template.format(domain=query.upper()).encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+class FakeResolver(asyncio.DatagramProtocol):
+    """
+    DNS over UDP in one of these modes: ok, servfail or drop (no reply).
+    Names starting with "missing-" are NXDOMAIN, names starting with
+    "nomail-" have no MX records.
+    """
+
+    def __init__(self):
+        self.mode = "ok"
+        self.queries = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.queries += 1
+        if self.mode == "drop":
+            return
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        name = question.name.to_text()
+        rdtype = dns.rdatatype.to_text(question.rdtype)
+        if self.mode == "servfail":
+            response.set_rcode(dns.rcode.SERVFAIL)
+        elif name.startswith("missing-"):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif not (rdtype == "MX" and name.startswith("nomail-")):
+            rdata = {"A": "192.0.2.10", "MX": f"10 mail.{name}", "TXT": '"v=spf1 -all"'}.get(rdtype)
+            if rdata is not None:
+                response.answer.append(dns.rrset.from_text(question.name, 300, "IN", rdtype, rdata))
+        self.transport.sendto(response.to_wire(), addr)
+
+
+class Checks:
+    def __init__(self):
+        self.failed = []
+
+    def __call__(self, name: str, ok: bool, detail: str = ""):
+        print(f"  {'PASS' if ok else 'FAIL'}  {name}{f'  ({detail})' if detail else ''}")
+        if not ok:
+            self.failed.append(name)
+
+
+def load_service(args, whois_port: int, resolver_ports):
+    """Import the OSINT service pointed at the fakes"""
+    os.environ.update({
+        "WHOIS_SERVERS": f"com=127.0.0.1:{whois_port}",
+        "DNS_RESOLVERS": ",".join(f"127.0.0.1:{port}" for port in resolver_ports),
+        "WHOIS_TIMEOUT": str(args.timeout),
+        "DNS_TIMEOUT": str(args.timeout),
+        "BREAKER_FAILURE_THRESHOLD": str(args.threshold),
+        "BREAKER_RESET_TIMEOUT": str(args.reset),
+        "BREAKER_MAX_RESET_TIMEOUT": str(args.reset * 8),
+        "LOOKUP_FAILURE_TTL": str(args.reset * 4),
+        "WHOIS_RATE_PER_TLD": "100000",
+        "WHOIS_RATE_BURST": "100000",
+    })
+    # The repository root, for grc_shared
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    sys.path.insert(0, OSINT_SERVICE)
+    spec = importlib.util.spec_from_file_location("osint_main", os.path.join(OSINT_SERVICE, "main.py"))
+    osint = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(osint)
+
+    async def fake_inspect(domain):
+        return {
+            "status": "valid", "has_ssl": True, "not_after": "2030-01-01T00:00:00", "days_remaining": 1000,
+            "key_type": "EC", "key_size": 256,
+        }
+
+    osint.tls_collector.inspect = fake_inspect
+    return osint
+
+
+async def run(args) -> int:
+    whois_server = FakeWhoisServer()
+    await whois_server.start()
+    loop = asyncio.get_running_loop()
+    resolvers = []
+    for _ in range(2):
+        transport, resolver = await loop.create_datagram_endpoint(FakeResolver, local_addr=("127.0.0.1", 0))
+        resolvers.append(resolver)
+    primary, secondary = resolvers
+    osint = load_service(args, whois_server.port, [r.transport.get_extra_info("sockname")[1] for r in resolvers])
+    check = Checks()
+
+    transport = httpx.ASGITransport(app=osint.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://osint", timeout=None) as client:
+        async def enrich(domain):
+            start = time.perf_counter()
+            response = await client.post("/api/enrich", json={"domain": domain})
+            response.raise_for_status()
+            return response.json(), (time.perf_counter() - start) * 1000
+
+        def breaker(backend, port):
+            return getattr(osint, f"{backend}_client").breakers.get(f"127.0.0.1:{port}")
+
+        print("healthy backends")
+        result, ms = await enrich("vendor.com")
+        check("scored, not degraded", result["reputation_score"] is not None and not result["degraded"], f"{ms:.0f} ms")
+        check("WHOIS parsed", result["whois_data"].get("registrar") == "Fake Registrar, Inc.")
+        check("records resolved", result["dns_records"]["A"] == ["192.0.2.10"])
+
+        print("negative answers")
+        queries = whois_server.queries, primary.queries
+        result, ms = await enrich("missing-vendor.com")
+        check("NXDOMAIN and no WHOIS record are not degraded", not result["degraded"] and result["reputation_score"] is not None,
+              f"score {result['reputation_score']}")
+        check("unregistered domain flagged", result["whois_data"].get("registered") is False)
+        result, ms = await enrich("nomail-vendor.com")
+        check("no MX records is an answer", result["dns_records"]["MX"] == [] and not result["degraded"])
+        asked = whois_server.queries, primary.queries
+        await enrich("missing-vendor.com")
+        await enrich("nomail-vendor.com")
+        check("repeats answered from the negative cache", (whois_server.queries, primary.queries) == asked,
+              f"{asked[0] - queries[0]} WHOIS and {asked[1] - queries[1]} DNS queries for both, none for the repeats")
+
+        print("resolver failover (first resolver stops answering)")
+        primary.mode = "drop"
+        latencies = []
+        for i in range(3):
+            result, ms = await enrich(f"failover{i}.com")
+            latencies.append(ms)
+            check(f"failover{i}.com resolved by the second resolver", result["dns_records"]["A"] == ["192.0.2.10"] and not result["degraded"])
+        check("first resolver's breaker opened", breaker("dns", primary.transport.get_extra_info("sockname")[1]).state == "open",
+              f"latencies {', '.join(f'{ms:.0f}' for ms in latencies)} ms")
+        check("later lookups skip it", latencies[-1] < args.timeout * 1000 / 2)
+        primary.mode = "ok"
+
+        print(f"WHOIS outage (server hangs), {args.outage_domains} domains")
+        await whois_server.set_mode("hang")
+        breakers = osint.whois_client.breakers
+        osint.whois_client.breakers = osint.KeyedCircuitBreakers(10 ** 9)
+        start = time.perf_counter()
+        for i in range(args.outage_domains):
+            result, _ = await enrich(f"nobreaker{i}.com")
+        without = (time.perf_counter() - start) * 1000
+        check("degraded without a score", result["degraded_lookups"] == ["whois"] and result["reputation_score"] is None)
+        queries = whois_server.queries
+        result, ms = await enrich(f"nobreaker{args.outage_domains - 1}.com")
+        check("repeat answered from the remembered failure", whois_server.queries == queries and result["degraded"], f"{ms:.1f} ms")
+        osint.whois_client.breakers = breakers
+        queries = whois_server.queries
+        start = time.perf_counter()
+        for i in range(args.outage_domains):
+            result, _ = await enrich(f"outage{i}.com")
+        with_breaker = (time.perf_counter() - start) * 1000
+        state = breaker("whois", whois_server.port)
+        check("degraded without a score", result["degraded_lookups"] == ["whois"] and result["reputation_score"] is None)
+        check(f"breaker opened after {args.threshold} timeouts", state.state == "open" and whois_server.queries - queries == args.threshold,
+              f"{whois_server.queries - queries} queries sent")
+        print(f"  {args.outage_domains} enrichments: {without:,.0f} ms without breakers, {with_breaker:,.0f} ms with")
+        result, ms = await enrich("outage-fast.com")
+        check("open breaker fails fast", ms < args.timeout * 1000 / 5, f"{ms:.1f} ms, {result['whois_data']['error']}")
+
+        print("half-open probing (server refusing connections, then back)")
+        await whois_server.set_mode("down")
+        await asyncio.sleep(state.retry_in() + 0.05)
+        result, ms = await enrich("probe-fails.com")
+        check("failed probe reopens for twice as long", state.state == "open" and state.open_for == args.reset * 2,
+              f"next probe in {state.retry_in():.1f}s")
+        await whois_server.set_mode("ok")
+        await asyncio.sleep(state.retry_in() + 0.05)
+        result, ms = await enrich("probe-succeeds.com")
+        check("successful probe closes the breaker", state.state == "closed" and not result["degraded"], f"{ms:.0f} ms")
+        await whois_server.set_mode("empty")
+        result, ms = await enrich("empty-answer.com")
+        check("connection closed without an answer is a failure", result["degraded_lookups"] == ["whois"] and state.consecutive_failures == 1,
+              result["whois_data"]["error"])
+        await whois_server.set_mode("ok")
+
+        print("all resolvers down")
+        primary.mode = secondary.mode = "servfail"
+        result, ms = await enrich("dark.com")
+        check("every record type degraded", result["degraded_lookups"] == ["A", "MX", "TXT"] and result["reputation_score"] is None,
+              f"{ms:.0f} ms")
+        asked = primary.queries + secondary.queries
+        await enrich("dark.com")
+        check("repeat answered from the remembered failure", primary.queries + secondary.queries == asked)
+        for i in range(args.threshold):
+            await enrich(f"dark{i}.com")
+        asked = primary.queries + secondary.queries
+        result, ms = await enrich("dark-fast.com")
+        check("open breakers skip both resolvers", primary.queries + secondary.queries == asked and result["degraded"], f"{ms:.1f} ms")
+
+        backends = (await client.get("/api/backends")).json()
+        print("backends:")
+        for backend in ("whois", "dns"):
+            for key, stats in backends[backend]["breakers"].items():
+                print(f"  {backend:<6}{key:<18}{stats['state']:<10}failures {stats['failures']:<4}rejected {stats['rejected']:<4}opens {stats['opens']}")
+        print(f"  degraded lookups: {backends['degraded_lookups']}")
+        metrics = (await client.get("/metrics")).text
+        check("breaker metrics exported", "grc_backend_circuit_state{" in metrics and 'event="failure_hits"' in metrics)
+
+    return 1 if check.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSINT enrichment against failing WHOIS and DNS backends")
+    parser.add_argument("--timeout", type=float, default=0.5, help="WHOIS_TIMEOUT and DNS_TIMEOUT (seconds)")
+    parser.add_argument("--threshold", type=int, default=3, help="BREAKER_FAILURE_THRESHOLD")
+    parser.add_argument("--reset", type=float, default=1.0, help="BREAKER_RESET_TIMEOUT (seconds)")
+    parser.add_argument("--outage-domains", type=int, default=10, help="Domains enriched during the WHOIS outage")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Benchmark: the OSINT lookup cache's two tiers against an in-memory Redis
+
+Runs EnrichmentCache with a small in-process LRU over fakeredis and a manual
+clock, with fetches that sleep --fetch-ms, and checks each path of
+get_or_fetch along with the counters it reports:
+
+- tiers: a fresh entry is served from the LRU; an entry evicted from the LRU
+  is served from Redis without fetching and put back in the LRU, and a second
+  cache (another process) sharing the Redis gets it from there too;
+- coalescing: concurrent misses for one key share a single fetch;
+- stale-while-revalidate: an expired entry inside its stale window is served
+  at once while one background refresh fetches the new value; past the stale
+  window it is a miss;
+- failure memo: a fetch failing with cache_for is not repeated until the
+  failure lapses, and a stale entry whose refresh failed is served without
+  scheduling more refreshes;
+- Redis errors: a failing Redis is counted and the LRU keeps serving.
+
+Prints the time of a lookup from each tier. Exits with status 1 if a check
+fails.
+
+Usage:
+    python benchmarks/osint_cache_tiers.py [--entries 100] [--fetch-ms 20] [--lookups 2000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import fakeredis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intelligence-layer", "osint-service"))
+
+from circuit_breaker import BackendUnavailable  # noqa: E402
+from enrichment_cache import EnrichmentCache  # noqa: E402
+
+TTL = 60
+STALE_TTL = 300
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class Backend:
+    """Fetches for keys: sleeps, counts calls per key and fails while failing is set"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = {}
+        self.version = 1
+        self.failing = None
+
+    def fetch(self, key: str, ttl: float = TTL):
+        async def fetch():
+            self.calls[key] = self.calls.get(key, 0) + 1
+            await asyncio.sleep(self.delay)
+            if self.failing is not None:
+                raise self.failing
+            return {"key": key, "version": self.version}, ttl
+        return fetch
+
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("Connection refused")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("Connection refused")
+
+
+class Checks:
+    def __init__(self):
+        self.failed = []
+
+    def __call__(self, name: str, ok: bool, detail: str = ""):
+        print(f"  {'PASS' if ok else 'FAIL'}  {name}{f'  ({detail})' if detail else ''}")
+        if not ok:
+            self.failed.append(name)
+
+
+async def mean_lookup_us(cache: EnrichmentCache, keys, fetch, lookups: int) -> float:
+    start = time.perf_counter()
+    for i in range(lookups):
+        key = keys[i % len(keys)]
+        await cache.get_or_fetch(key, fetch(key), STALE_TTL)
+    return (time.perf_counter() - start) / lookups * 1e6
+
+
+async def run(args) -> int:
+    check = Checks()
+    clock = Clock()
+    redis = fakeredis.FakeAsyncRedis()
+    backend = Backend(args.fetch_ms / 1000)
+    cache = EnrichmentCache(max_entries=args.entries, redis=redis, clock=clock)
+
+    async def lookup(key, stale_ttl=STALE_TTL):
+        start = time.perf_counter()
+        value = await cache.get_or_fetch(key, backend.fetch(key), stale_ttl)
+        return value, (time.perf_counter() - start) * 1000
+
+    print(f"tiers ({args.entries} LRU entries)")
+    keys = [f"whois:vendor{i}.com" for i in range(args.entries + 20)]
+    for key in keys:
+        await lookup(key)
+    check("every key fetched once", backend.total() == len(keys) and cache.stats()["misses"] == len(keys))
+    check("LRU evicted the oldest 20", cache.stats()["evictions"] == 20 and cache.stats()["entries"] == args.entries)
+    value, ms = await lookup(keys[-1])
+    check("fresh entry served from the LRU", cache.stats()["hits"] == 1 and backend.total() == len(keys), f"{ms:.3f} ms")
+    value, ms = await lookup(keys[0])
+    check("evicted entry served from Redis, not fetched", value["key"] == keys[0] and backend.calls[keys[0]] == 1
+          and cache.stats()["redis_hits"] == 1, f"{ms:.3f} ms")
+    await lookup(keys[0])
+    check("and put back in the LRU", cache.stats()["hits"] == 2 and cache.stats()["redis_hits"] == 1)
+    other = EnrichmentCache(max_entries=args.entries, redis=redis, clock=clock)
+    await other.get_or_fetch(keys[5], backend.fetch(keys[5]), STALE_TTL)
+    check("another process's cache gets it from Redis", other.stats()["redis_hits"] == 1 and backend.calls[keys[5]] == 1)
+
+    print("coalescing")
+    fetches = backend.total()
+    await asyncio.gather(*(lookup("dns:A:burst.com") for _ in range(10)))
+    check("10 concurrent misses, one fetch", backend.total() - fetches == 1 and cache.stats()["coalesced"] == 9)
+
+    print(f"stale-while-revalidate (ttl {TTL}s, stale window {STALE_TTL}s)")
+    key = "whois:stale.com"
+    await lookup(key)
+    backend.version = 2
+    clock.advance(TTL + 1)
+    value, ms = await lookup(key)
+    check("expired entry served at once", value["version"] == 1 and ms < args.fetch_ms / 2 and cache.stats()["stale_hits"] == 1,
+          f"{ms:.3f} ms")
+    await lookup(key)
+    await lookup(key)
+    await asyncio.sleep(args.fetch_ms / 1000 * 2)
+    check("one refresh for repeated stale hits", backend.calls[key] == 2 and cache.stats()["refreshes"] == 1
+          and cache.stats()["stale_hits"] == 3)
+    value, _ = await lookup(key)
+    check("refreshed value served fresh", value["version"] == 2 and cache.stats()["stale_hits"] == 3)
+    clock.advance(TTL + STALE_TTL + 1)
+    value, ms = await lookup(key)
+    check("past the stale window it is a miss", backend.calls[key] == 3 and ms >= args.fetch_ms * 0.9, f"{ms:.1f} ms")
+
+    print("failure memo")
+    key = "whois:down.com"
+    backend.failing = BackendUnavailable("WHOIS server 127.0.0.1:43 failed: TimeoutError", cache_for=30)
+    for _ in range(3):
+        try:
+            await lookup(key)
+        except BackendUnavailable:
+            pass
+    check("failure remembered, fetched once", backend.calls[key] == 1 and cache.stats()["failure_hits"] == 2
+          and cache.stats()["failures"] == 1)
+    clock.advance(31)
+    try:
+        await lookup(key)
+    except BackendUnavailable:
+        pass
+    check("fetched again once it lapses", backend.calls[key] == 2)
+    backend.failing = ValueError("unparseable answer")
+    key = "whois:flaky.com"
+    for _ in range(2):
+        try:
+            await lookup(key)
+        except ValueError:
+            pass
+    check("failure without cache_for not remembered", backend.calls[key] == 2)
+
+    key = "dns:MX:degraded.com"
+    backend.failing = None
+    await lookup(key)
+    backend.failing = BackendUnavailable("No resolver answered MX for degraded.com", cache_for=30)
+    clock.advance(TTL + 1)
+    refreshes, refresh_errors = cache.stats()["refreshes"], cache.stats()["refresh_errors"]
+    await lookup(key)
+    await asyncio.sleep(args.fetch_ms / 1000 * 2)
+    for _ in range(5):
+        value, _ = await lookup(key)
+    check("stale entry served while its refresh failure is remembered", value["version"] == 2 and backend.calls[key] == 2
+          and cache.stats()["refreshes"] - refreshes == 1 and cache.stats()["refresh_errors"] - refresh_errors == 1)
+    backend.failing = None
+
+    print("Redis errors")
+    broken = EnrichmentCache(max_entries=args.entries, redis=BrokenRedis(), clock=clock)
+    await broken.get_or_fetch("whois:a.com", backend.fetch("whois:a.com"), STALE_TTL)
+    await broken.get_or_fetch("whois:a.com", backend.fetch("whois:a.com"), STALE_TTL)
+    stats = broken.stats()
+    check("read and write errors counted, LRU still serves", stats["redis_errors"] == 2 and stats["hits"] == 1, str(stats["redis_errors"]))
+
+    stats = cache.stats()
+    print("counters: " + ", ".join(f"{name} {stats[name]}" for name in (
+        "hits", "redis_hits", "stale_hits", "misses", "coalesced", "refreshes", "refresh_errors", "failure_hits", "evictions",
+    )) + f", hit ratio {stats['hit_ratio']:.2%}")
+
+    print(f"lookup time ({args.lookups} lookups)")
+    fresh = EnrichmentCache(max_entries=args.entries, redis=redis, clock=clock)
+    hot = [f"hot{i}.com" for i in range(args.entries // 2)]
+    for key in hot:
+        await fresh.get_or_fetch(key, backend.fetch(key), STALE_TTL)
+    lru_us = await mean_lookup_us(fresh, hot, backend.fetch, args.lookups)
+    # Twice the LRU's size, in order: every lookup misses the LRU and is found in Redis
+    wide = [f"wide{i}.com" for i in range(args.entries * 2)]
+    for key in wide:
+        await fresh.get_or_fetch(key, backend.fetch(key), STALE_TTL)
+    redis_hits = fresh.stats()["redis_hits"]
+    redis_us = await mean_lookup_us(fresh, wide, backend.fetch, args.lookups)
+    check("cycling past the LRU is served from Redis", fresh.stats()["redis_hits"] - redis_hits == args.lookups)
+    print(f"  LRU hit    {lru_us:8.1f} us")
+    print(f"  Redis hit  {redis_us:8.1f} us (fakeredis, no network)")
+    print(f"  miss       {args.fetch_ms * 1000:8.1f} us (the fetch)")
+
+    return 1 if check.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSINT lookup cache tiers, stale-while-revalidate and failure memo")
+    parser.add_argument("--entries", type=int, default=100, help="In-process LRU size")
+    parser.add_argument("--fetch-ms", type=float, default=20, help="Time each fetch sleeps")
+    parser.add_argument("--lookups", type=int, default=2000, help="Lookups per tier timing")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
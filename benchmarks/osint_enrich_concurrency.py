@@ -0,0 +1,98 @@
+"""
+Benchmark: concurrent /api/enrich latency with fake WHOIS/DNS backends
+
+Replaces the WHOIS and DNS clients and the TLS check with deterministic
+fakes that sleep for a configurable latency, fires many concurrent enrich
+calls in-process over an ASGI transport and reports latency percentiles next
+to the slowest single lookup and the serial sum of all five lookups.
+
+Usage:
+    python benchmarks/osint_enrich_concurrency.py [--requests 120] [--whois-ms 400] [--dns-ms 150] [--tls-ms 200]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "intelligence-layer", "osint-service"))
+# The fakes are not a real registry: lift the per-TLD WHOIS rate limit
+os.environ.setdefault("WHOIS_RATE_PER_TLD", "100000")
+os.environ.setdefault("WHOIS_RATE_BURST", "100000")
+
+import main as osint  # noqa: E402
+
+
+def install_fakes(whois_ms: float, dns_ms: float, tls_ms: float = 0):
+    """Swap the WHOIS and DNS clients and the TLS check used by the service for sleeping fakes"""
+    async def fake_whois(domain):
+        await asyncio.sleep(whois_ms / 1000)
+        return {
+            "registrar": "Fake Registrar", "creation_date": "2001-01-01", "expiration_date": "2030-01-01",
+            "name_servers": ["ns1.example.net"], "status": "ok",
+        }
+
+    async def fake_resolve(domain, record_type):
+        await asyncio.sleep(dns_ms / 1000)
+        return [f"{record_type.lower()}.{domain}"], 300, "answer"
+
+    async def fake_inspect(domain):
+        await asyncio.sleep(tls_ms / 1000)
+        return {
+            "status": "valid", "has_ssl": True, "subject": f"CN={domain}",
+            "not_after": "2030-01-01T00:00:00", "days_remaining": 1000, "key_type": "RSA", "key_size": 2048,
+            "protocol_versions": ["TLSv1.2", "TLSv1.3"],
+        }
+
+    osint.whois_client.lookup = fake_whois
+    osint.dns_client.resolve = fake_resolve
+    osint.tls_collector.inspect = fake_inspect
+
+
+async def run(requests: int):
+    transport = httpx.ASGITransport(app=osint.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://osint", timeout=None) as client:
+        async def one(i):
+            start = time.perf_counter()
+            response = await client.post("/api/enrich", json={"domain": f"vendor{i}.example.com"})
+            response.raise_for_status()
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(requests)))
+        return sorted(latencies), time.perf_counter() - start
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent enrich latency with fake lookups")
+    parser.add_argument("--requests", type=int, default=120)
+    parser.add_argument("--whois-ms", type=float, default=400)
+    parser.add_argument("--dns-ms", type=float, default=150)
+    parser.add_argument("--tls-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    install_fakes(args.whois_ms, args.dns_ms, args.tls_ms)
+    latencies, elapsed = asyncio.run(run(args.requests))
+
+    print(f"requests:          {args.requests} concurrent")
+    print(f"slowest lookup:    {max(args.whois_ms, args.dns_ms, args.tls_ms):.0f} ms")
+    print(f"serial lookups:    {args.whois_ms + 3 * args.dns_ms + args.tls_ms:.0f} ms")
+    print(f"p50 latency:       {statistics.median(latencies):.0f} ms")
+    print(f"p99 latency:       {percentile(latencies, 99):.0f} ms")
+    print(f"throughput:        {args.requests / elapsed:,.0f} enrich/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: concurrent TLS certificate inspection against local servers
+
+Generates a throwaway CA and certificates, then serves on 127.0.0.1: a valid
+certificate, an expired one, a self-signed one, a TLS 1.2-only server, a TCP
+server that never completes a handshake, a TCP server that resets every
+connection, and a closed port. Inspects every
+server many times at once with the OSINT service's TLS collector, checks each
+status, protocol versions and cache TTL, and prints wall time next to the
+serial sum of the individual checks.
+
+Usage:
+    python benchmarks/osint_tls_collector.py [--rounds 50] [--handshake-timeout 1.0] [--max-concurrency 200]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import ssl
+import struct
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "intelligence-layer", "osint-service"))
+
+import tls_collector  # noqa: E402
+
+DAY = timedelta(days=1)
+
+
+def make_cert(common_name, issuer_cert=None, issuer_key=None, not_before=None, not_after=None, ca=False):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    now = datetime.now(timezone.utc)
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(issuer_cert.subject if issuer_cert else subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(not_before or now - DAY)
+        .not_valid_after(not_after or now + 90 * DAY)
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+    )
+    if not ca:
+        builder = builder.add_extension(x509.SubjectAlternativeName([x509.DNSName(common_name)]), critical=False)
+    cert = builder.sign(issuer_key or key, hashes.SHA256())
+    return cert, key
+
+
+def write_pem(directory, name, cert, key=None):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+        if key is not None:
+            f.write(key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            ))
+    return path
+
+
+def server_context(pem_path, max_version=None):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(pem_path)
+    if max_version:
+        context.maximum_version = max_version
+    return context
+
+
+async def handle(reader, writer):
+    try:
+        await reader.read()
+    except (ConnectionError, ssl.SSLError):
+        pass
+    writer.close()
+
+
+async def reset(reader, writer):
+    # Linger 0: close() sends a RST instead of a FIN
+    writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    await reader.read(1)
+    writer.transport.abort()
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def start_servers(directory):
+    """{scenario: (port, expected status, expected protocol versions)} and the servers to close"""
+    ca_cert, ca_key = make_cert("Benchmark CA", ca=True)
+    ca_file = write_pem(directory, "ca.pem", ca_cert)
+    now = datetime.now(timezone.utc)
+    valid = write_pem(directory, "valid.pem", *make_cert("localhost", ca_cert, ca_key))
+    expired = write_pem(directory, "expired.pem", *make_cert(
+        "localhost", ca_cert, ca_key, not_before=now - 60 * DAY, not_after=now - 2 * DAY
+    ))
+    self_signed = write_pem(directory, "self_signed.pem", *make_cert("localhost"))
+
+    contexts = {
+        "valid": (server_context(valid), "valid", ["TLSv1.2", "TLSv1.3"]),
+        "expired": (server_context(expired), "expired", ["TLSv1.2", "TLSv1.3"]),
+        "self_signed": (server_context(self_signed), "invalid", ["TLSv1.2", "TLSv1.3"]),
+        "tls12_only": (server_context(valid, ssl.TLSVersion.TLSv1_2), "valid", ["TLSv1.2"]),
+        "no_handshake": (None, "timeout", None),
+    }
+    scenarios, servers = {}, []
+    for name, (context, status, versions) in contexts.items():
+        # Without a context the server reads the ClientHello and never answers
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=context)
+        servers.append(server)
+        scenarios[name] = (server.sockets[0].getsockname()[1], status, versions)
+    server = await asyncio.start_server(reset, "127.0.0.1", 0)
+    servers.append(server)
+    scenarios["reset"] = (server.sockets[0].getsockname()[1], "reset", None)
+    scenarios["closed_port"] = (closed_port(), "no_tls", None)
+    return ca_file, scenarios, servers
+
+
+async def run(args, directory):
+    ca_file, scenarios, servers = await start_servers(directory)
+    collector = tls_collector.TlsCollector(
+        connect_timeout=args.handshake_timeout,
+        handshake_timeout=args.handshake_timeout,
+        max_concurrency=args.max_concurrency,
+        ca_file=ca_file,
+    )
+
+    async def timed(name, port):
+        start = time.perf_counter()
+        info = await collector.inspect("localhost", host="127.0.0.1", port=port)
+        return name, info, time.perf_counter() - start
+
+    # One of each first, for the serial baseline
+    single = [await timed(name, port) for name, (port, _, _) in scenarios.items()]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        timed(name, port) for _ in range(args.rounds) for name, (port, _, _) in scenarios.items()
+    ))
+    elapsed = time.perf_counter() - start
+    for server in servers:
+        server.close()
+    return scenarios, single, results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent TLS inspection against local servers")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--handshake-timeout", type=float, default=1.0)
+    parser.add_argument("--max-concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        scenarios, single, results, elapsed = asyncio.run(run(args, directory))
+
+    failures = []
+    for name, info, _ in results:
+        _, status, versions = scenarios[name]
+        if info["status"] != status or (versions is not None and info.get("protocol_versions") != versions):
+            failures.append(f"{name}: {info}")
+    if failures:
+        print("FAIL:\n  " + "\n  ".join(failures[:5]))
+        sys.exit(1)
+
+    day = 24 * 3600
+    print(f"{'scenario':<14}{'status':<11}{'versions':<20}{'cache ttl':>11}{'check':>10}")
+    for name, info, seconds in single:
+        ttl = tls_collector.cache_ttl(info, 7 * day, day, 3600)
+        versions = ",".join(info.get("protocol_versions") or []) or "-"
+        ttl_text = f"{ttl / 3600:.0f} h" if ttl is not None else "not cached"
+        print(f"{name:<14}{info['status']:<11}{versions:<20}{ttl_text:>11}{seconds * 1000:>8.0f} ms")
+    serial = sum(seconds for _, _, seconds in single) * args.rounds
+    print(f"inspections: {len(results)} concurrent ({args.max_concurrency} connections at most)")
+    print(f"wall time:   {elapsed:.2f}s (serial: {serial:.2f}s, slowest single check: {max(s for _, _, s in single):.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
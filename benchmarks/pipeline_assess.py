@@ -0,0 +1,133 @@
+"""
+Benchmark: assessment pipeline vs. workflow-style orchestration
+
+Runs the OSINT service (with the sleeping WHOIS/DNS fakes of
+osint_enrich_concurrency.py) and the risk engine in-process, connected over
+ASGI transports. Assesses the same vendors two ways:
+
+- workflow: per vendor, POST /api/enrich, copy reputation_score into the
+  factors, POST /api/calculate (what the n8n workflows do), with the same
+  number of vendors in flight as the pipeline;
+- pipeline: one POST /api/assess/batch to the risk engine.
+
+Checks both give the same scores and prints wall time for each. The ASGI
+transport delivers the OSINT bulk stream only once it completes, so the
+overlap of scoring with enrichment seen over real HTTP is not measured here.
+
+Usage:
+    python benchmarks/pipeline_assess.py [--vendors 500] [--concurrency 50] [--whois-ms 40] [--dns-ms 15]
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "intelligence-layer")
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(ROOT, ".."))
+sys.path.insert(0, os.path.join(ROOT, "osint-service"))
+sys.path.insert(0, os.path.join(ROOT, "risk-engine"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ["SCORE_HISTORY_URL"] = ""
+# The fakes are not a real registry: lift the per-TLD WHOIS rate limit
+os.environ["WHOIS_RATE_PER_TLD"] = "100000"
+os.environ["WHOIS_RATE_BURST"] = "100000"
+
+
+def load_service(name: str, directory: str):
+    """Import a service's main.py under its own module name"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, directory, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+osint = load_service("osint_main", "osint-service")
+risk_engine = load_service("risk_engine_main", "risk-engine")
+sys.modules["main"] = osint  # osint_enrich_concurrency patches `main`
+
+import osint_enrich_concurrency  # noqa: E402
+
+
+def synthetic_vendors(count: int):
+    return [
+        {
+            "vendor_id": f"V{i:05d}",
+            "domain": f"vendor{i % (count * 4 // 5 or 1)}.example.com",
+            "company_age_years": i % 30,
+            "employee_count": (i * 37) % 5000,
+            "breach_count": i % 3,
+            "cve_count": i % 12,
+            "compliance_certifications": ["ISO27001"] if i % 2 else [],
+        }
+        for i in range(count)
+    ]
+
+
+async def workflow(risk, osint_client, vendors, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(factors):
+        async with slots:
+            enrichment = (await osint_client.post("/api/enrich", json={"domain": factors["domain"]})).json()
+            body = dict(factors, domain_reputation_score=enrichment["reputation_score"])
+            return (await risk.post("/api/calculate", json=body)).json()
+
+    return await asyncio.gather(*(one(v) for v in vendors))
+
+
+async def run(args):
+    osint_transport = httpx.ASGITransport(app=osint.app)
+    risk_engine.osint = risk_engine.pipeline.OsintClient("http://osint", transport=osint_transport)
+    vendors = synthetic_vendors(args.vendors)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=risk_engine.app), base_url="http://risk", timeout=None) as risk, \
+            httpx.AsyncClient(transport=osint_transport, base_url="http://osint", timeout=None) as osint_client:
+        start = time.perf_counter()
+        workflow_results = await workflow(risk, osint_client, vendors, args.concurrency)
+        workflow_elapsed = time.perf_counter() - start
+
+        # Same lookups again would be cache hits: start both runs cold
+        osint.lookup_cache = osint.EnrichmentCache(max_entries=osint.CACHE_MAX_ENTRIES)
+        risk_engine.score_store.clear()
+
+        start = time.perf_counter()
+        response = await risk.post("/api/assess/batch", json={"vendors": vendors, "concurrency": args.concurrency})
+        pipeline_results = [json.loads(line) for line in response.text.splitlines()]
+        pipeline_elapsed = time.perf_counter() - start
+    await risk_engine.osint.aclose()
+    return workflow_results, workflow_elapsed, pipeline_results, pipeline_elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assessment pipeline vs workflow-style orchestration")
+    parser.add_argument("--vendors", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--whois-ms", type=float, default=40)
+    parser.add_argument("--dns-ms", type=float, default=15)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    osint_enrich_concurrency.install_fakes(args.whois_ms, args.dns_ms)
+    workflow_results, workflow_elapsed, pipeline_results, pipeline_elapsed = asyncio.run(run(args))
+
+    expected = {r["vendor_id"]: r["overall_risk_score"] for r in workflow_results}
+    got = {r["vendor_id"]: r["risk"]["overall_risk_score"] for r in pipeline_results if r["risk"]}
+    if len(pipeline_results) != len(expected) or got != expected:
+        print("FAIL: pipeline scores differ from the workflow's")
+        sys.exit(1)
+
+    domains = len({v["domain"] for v in synthetic_vendors(args.vendors)})
+    print(f"vendors:   {args.vendors} ({domains} distinct domains), {args.concurrency} in flight")
+    print(f"workflow:  {workflow_elapsed:.2f}s ({args.vendors / workflow_elapsed:,.0f} vendors/sec, {args.vendors * 2} requests)")
+    print(f"pipeline:  {pipeline_elapsed:.2f}s ({args.vendors / pipeline_elapsed:,.0f} vendors/sec, 2 requests)")
+    print(f"speedup:   {workflow_elapsed / pipeline_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
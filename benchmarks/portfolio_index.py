@@ -0,0 +1,197 @@
+"""
+Benchmark: portfolio index queries vs scanning the vendor list
+
+Loads --vendors random vendor scores into PortfolioIndex and, for each
+dashboard query (summary, histogram, a page filtered by level, a deep page,
+top-N riskiest), checks the result against a plain scan of the vendor dicts,
+the way the reports service computes its metrics, and prints microseconds per
+query for both. Then times the service itself over a raw ASGI call (no HTTP
+client in the measurement): a query encoded from the index, the same query
+from the response cache, and a poll answered 304 Not Modified. Finally times
+score updates: single vendors (keys re-inserted) and a --batch batch.
+
+Usage:
+    python benchmarks/portfolio_index.py [--vendors 100000] [--requests 2000] [--batch 20000] [--seed 7]
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PORTFOLIO_INDEX = os.path.join(ROOT, "experience-layer", "portfolio-index")
+# The repository root, for grc_shared
+sys.path.insert(0, ROOT)
+sys.path.insert(0, PORTFOLIO_INDEX)
+
+from portfolio_index import MAX_SCORE, RISK_LEVELS, PortfolioIndex  # noqa: E402
+
+LEVEL_FLOORS = [(80, "minimal"), (60, "low"), (40, "medium"), (20, "high"), (0, "critical")]
+
+
+def random_vendor(rng: random.Random, i: int, assessed: datetime) -> dict:
+    score = min(MAX_SCORE, max(0, int(rng.gauss(62, 18))))
+    return {
+        "vendor_id": f"V{i:07d}",
+        "vendor_name": f"Vendor {i}",
+        "domain": f"vendor{i}.example.com",
+        "risk_score": score,
+        "risk_level": next(level for floor, level in LEVEL_FLOORS if score >= floor),
+        "last_assessment": (assessed - timedelta(minutes=rng.randint(0, 60 * 24 * 30))).isoformat(),
+    }
+
+
+def per_call_us(fn, min_seconds: float = 0.2) -> float:
+    """Mean microseconds per call of fn, repeated for at least min_seconds"""
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1e6
+
+
+# The same queries as a scan over the vendor dicts
+
+def scan_summary(vendors):
+    levels = {level: 0 for level in RISK_LEVELS}
+    for vendor in vendors:
+        levels[vendor["risk_level"]] += 1
+    return levels, round(sum(v["risk_score"] for v in vendors) / len(vendors), 1)
+
+
+def scan_histogram(vendors, bin_width):
+    counts = [0] * (MAX_SCORE // bin_width + 1)
+    for vendor in vendors:
+        counts[vendor["risk_score"] // bin_width] += 1
+    return counts
+
+
+def scan_page(vendors, level, descending, limit, offset):
+    selected = [v for v in vendors if level is None or v["risk_level"] == level]
+    selected.sort(key=lambda v: (v["risk_score"], v["vendor_id"]), reverse=descending)
+    return [v["vendor_id"] for v in selected[offset:offset + limit]]
+
+
+async def call(app, path: str, query: bytes = b"", headers=()):
+    """One GET straight through the ASGI app; (status, headers, body)"""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query,
+        "headers": list(headers), "client": ("127.0.0.1", 50000), "server": ("portfolio-index", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+
+async def time_requests(app, requests: int, path: str, query: bytes, headers=()) -> float:
+    """Mean microseconds per request"""
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path, query, headers)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def time_service(vendors, requests: int):
+    """(encoded, cached, not modified) microseconds per /api/portfolio/vendors request"""
+    spec = importlib.util.spec_from_file_location("portfolio_main", os.path.join(PORTFOLIO_INDEX, "main.py"))
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    service.index.replace(vendors)
+    path, query = "/api/portfolio/vendors", b"level=high&limit=50"
+    status, headers, body = await call(service.app, path, query)
+    assert status == 200 and body.startswith(b'{"total":')
+    etag = headers[b"etag"]
+
+    # A new version before every request, so each one encodes its page again
+    start = time.perf_counter()
+    for i in range(requests):
+        service.index.version += 1
+        await call(service.app, path, query)
+    encoded = (time.perf_counter() - start) / requests * 1e6
+    service.index.version -= requests
+    cached = await time_requests(service.app, requests, path, query)
+    assert (await call(service.app, path, query, [(b"if-none-match", etag)]))[0] == 304
+    not_modified = await time_requests(service.app, requests, path, query, [(b"if-none-match", etag)])
+    return encoded, cached, not_modified
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio index queries vs scanning the vendor list")
+    parser.add_argument("--vendors", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000, help="ASGI requests per measurement")
+    parser.add_argument("--batch", type=int, default=20000, help="Vendors per batch update")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+    now = datetime(2026, 10, 1)
+    vendors = [random_vendor(rng, i, now) for i in range(args.vendors)]
+    index = PortfolioIndex()
+    start = time.perf_counter()
+    index.replace(vendors)
+    print(f"vendors: {args.vendors:,}, loaded in {time.perf_counter() - start:.2f}s")
+
+    summary = index.summary()
+    levels, average = scan_summary(vendors)
+    assert summary["risk_levels"] == levels and summary["average_risk_score"] == average
+    assert [b["count"] for b in index.histogram(10)] == scan_histogram(vendors, 10)
+    queries = [
+        ("summary", index.summary, lambda: scan_summary(vendors)),
+        ("histogram (bins of 10)", lambda: index.histogram(10), lambda: scan_histogram(vendors, 10)),
+    ]
+    for label, level, descending, limit, offset in (
+        ("page: high, 50 riskiest", "high", False, 50, 0),
+        ("page: all, 50 safest", None, True, 50, 0),
+        ("page: all, offset 50,000", None, False, 50, min(50000, args.vendors // 2)),
+        ("top 10 riskiest", None, False, 10, 0),
+    ):
+        expected = scan_page(vendors, level, descending, limit, offset)
+        assert [v["vendor_id"] for v in index.page(level, descending, limit, offset)["vendors"]] == expected
+        queries.append((
+            label,
+            lambda level=level, descending=descending, limit=limit, offset=offset: index.page(level, descending, limit, offset),
+            lambda level=level, descending=descending, limit=limit, offset=offset: scan_page(vendors, level, descending, limit, offset),
+        ))
+    print(f"{'query':<28}{'index us':>12}{'scan us':>14}{'speedup':>10}")
+    for label, indexed, scanned in queries:
+        a, b = per_call_us(indexed), per_call_us(scanned, min_seconds=0.5)
+        print(f"{label:<28}{a:>12,.1f}{b:>14,.0f}{b / a:>9,.0f}x")
+
+    encoded, cached, not_modified = asyncio.run(time_service(vendors, args.requests))
+    print(f"service GET /api/portfolio/vendors?level=high&limit=50: {encoded:,.0f} us encoded, "
+          f"{cached:,.0f} us cached, {not_modified:,.0f} us 304")
+
+    updates = [dict(vendor, risk_score=rng.randint(0, MAX_SCORE), last_assessment=now.isoformat()) for vendor in rng.sample(vendors, 2000)]
+    for vendor in updates:
+        vendor["risk_level"] = next(level for floor, level in LEVEL_FLOORS if vendor["risk_score"] >= floor)
+    start = time.perf_counter()
+    for vendor in updates:
+        index.upsert([vendor])
+    single = len(updates) / (time.perf_counter() - start)
+    batch = [dict(vendor, last_assessment=(now + timedelta(hours=1)).isoformat()) for vendor in rng.sample(vendors, min(args.batch, args.vendors))]
+    start = time.perf_counter()
+    result = index.upsert(batch)
+    batched = len(batch) / (time.perf_counter() - start)
+    assert result["updated"] == len(batch)
+    print(f"updates: {single:,.0f} vendors/sec one at a time, {batched:,.0f} vendors/sec in a batch of {len(batch):,}")
+
+
+if __name__ == "__main__":
+    main()
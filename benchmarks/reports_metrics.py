@@ -0,0 +1,114 @@
+"""
+Benchmark: report metrics engine scaling
+
+Times calculate_metrics in the reports service (level counts, percentiles,
+histogram, TLD breakdown, top-N riskiest and trend against a previous period)
+on synthetic portfolios of increasing size, next to the original
+count-and-average loop. Checks that the shared fields match the original loop
+and the percentiles match numpy.percentile, then prints time per vendor at
+each size: a flat figure means the engine scales linearly.
+
+Usage:
+    python benchmarks/reports_metrics.py [--sizes 1000,10000,100000] [--repeat 3] [--seed 7]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "experience-layer", "reports"))
+# Keep the artifact cache created at import out of the default location
+os.environ.setdefault("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "grc-report-cache-bench"))
+
+import main as reports  # noqa: E402
+
+LEVELS = ["critical", "high", "medium", "low", "minimal", "High", "unrated"]
+TLDS = ["com", "io", "net", "org", "co.uk", "de", "fr", "ai", "cloud"]
+
+
+def synthetic_vendors(count: int, seed: int, drift: int = 0):
+    rng = random.Random(seed)
+    return [
+        reports.VendorSummary.model_construct(
+            vendor_id=f"V{i:06d}",
+            vendor_name=f"Vendor {i}",
+            domain=f"vendor{i}.{rng.choice(TLDS)}",
+            risk_score=min(100, max(0, rng.randint(0, 100) + drift)),
+            risk_level=rng.choice(LEVELS),
+            last_assessment="2026-03-31",
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_metrics(vendors):
+    """The original calculate_metrics loop"""
+    risk_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0, "minimal": 0}
+    total_score = 0
+    for vendor in vendors:
+        risk_level = vendor.risk_level.lower()
+        if risk_level in risk_counts:
+            risk_counts[risk_level] += 1
+        total_score += vendor.risk_score
+    total = len(vendors)
+    return {
+        "total_vendors": total,
+        "critical_risk": risk_counts["critical"],
+        "high_risk": risk_counts["high"],
+        "medium_risk": risk_counts["medium"],
+        "low_risk": risk_counts["low"],
+        "minimal_risk": risk_counts["minimal"],
+        "average_risk_score": round(total_score / total if total > 0 else 0, 1),
+    }
+
+
+def best_of(repeat, function, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report metrics engine scaling")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    print(f"{'vendors':>8}  {'legacy loop':>12}  {'engine':>10}  {'engine/vendor':>14}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        vendors = synthetic_vendors(size, args.seed)
+        # Previous period: 95% overlap, scores drifted
+        previous = synthetic_vendors(size, args.seed + 1, drift=-5)[size // 20:]
+
+        legacy, legacy_elapsed = best_of(args.repeat, legacy_metrics, vendors)
+        metrics, engine_elapsed = best_of(args.repeat, reports.calculate_metrics, vendors, previous)
+
+        if any(getattr(metrics, key) != value for key, value in legacy.items()):
+            print(f"FAIL: engine disagrees with the original loop at {size} vendors")
+            sys.exit(1)
+        expected = np.percentile([v.risk_score for v in vendors], reports.metrics_engine.PERCENTILES)
+        if not np.allclose(list(metrics.score_percentiles.values()), expected, atol=0.01):
+            print(f"FAIL: percentiles differ from numpy.percentile at {size} vendors")
+            sys.exit(1)
+
+        print(
+            f"{size:>8}  {legacy_elapsed * 1000:>10.1f}ms  {engine_elapsed * 1000:>8.1f}ms"
+            f"  {engine_elapsed / size * 1e6:>12.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: precompiled certification matcher vs the original nested loop
+
+The original calculate_security_score normalized each certification and then
+scanned the catalog with one substring check per entry. This compares that
+loop with CertificationMatcher over long certification lists, using both the
+original six-entry catalog and the current catalog with aliases (the
+security_posture certifications of the risk engine's scoring model), and
+checks that both agree on the original catalog.
+
+The original loop compared the mixed-case key "FedRAMP" with an upper-cased
+string, so FedRAMP never scored; the agreement check upper-cases the keys.
+
+Usage:
+    python benchmarks/risk_engine_cert_matcher.py [--vendors 20000] [--certs 30] [--seed 7]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "intelligence-layer", "risk-engine"))
+
+import main as risk_engine  # noqa: E402
+from cert_matcher import CertificationMatcher  # noqa: E402
+
+ORIGINAL_CERT_SCORES = {"ISO27001": 7, "SOC2": 7, "PCI-DSS": 6, "HIPAA": 6, "GDPR": 5, "FedRAMP": 8}
+
+ATTESTATIONS = [
+    "ISO27001", "ISO 27001:2013", "ISO/IEC 27001:2022", "SOC2", "SOC 2 Type II", "soc-2 type 1",
+    "PCI-DSS", "PCI DSS v4.0", "HIPAA", "GDPR", "FedRAMP Moderate", "StateRAMP", "HITRUST CSF",
+    "NIST SP 800-53 Rev 5", "NIST CSF 2.0", "CMMC Level 2", "CSA STAR Level 2", "TISAX", "IRAP",
+    "ISO 27701", "ISO 27017", "ISO 27018", "ISO 22301", "Cyber Essentials Plus", "SOC 1 Type 2",
+    "SOC 3", "CCPA", "SOX", "ISO 9001", "Internal pentest 2025", "Vendor questionnaire on file",
+]
+
+
+def legacy_points(certifications, cert_scores):
+    """The original loop from calculate_security_score"""
+    points = 0
+    for cert in certifications:
+        cert_upper = cert.upper().replace(" ", "").replace("-", "")
+        for key, value in cert_scores.items():
+            if key.replace("-", "") in cert_upper:
+                points += value
+                break
+    return points
+
+
+def timed(label, function, portfolio):
+    start = time.perf_counter()
+    total = sum(function(certs) for certs in portfolio)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {len(portfolio) / elapsed:>12,.0f} vendors/sec  (total points {total})")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Certification matcher vs nested loop")
+    parser.add_argument("--vendors", type=int, default=20000)
+    parser.add_argument("--certs", type=int, default=30, help="certifications per vendor")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Mix catalog strings with vendor-specific free text, as real submissions do
+    portfolio = [
+        [rng.choice(ATTESTATIONS) if rng.random() < 0.8 else f"Attestation {rng.randint(0, 10**6)}"
+         for _ in range(args.certs)]
+        for _ in range(args.vendors)
+    ]
+
+    upper_keys = {key.upper(): value for key, value in ORIGINAL_CERT_SCORES.items()}
+    original = CertificationMatcher(upper_keys)
+    mismatches = sum(
+        legacy_points(certs, upper_keys) != original.total_points(certs) for certs in portfolio
+    )
+    if mismatches:
+        print(f"FAIL: matcher disagrees with the original loop for {mismatches} vendors")
+        sys.exit(1)
+
+    print(f"vendors: {args.vendors}, certifications per vendor: {args.certs}")
+    base = timed("loop, original 6-entry catalog", lambda c: legacy_points(c, ORIGINAL_CERT_SCORES), portfolio)
+    timed("matcher, original 6-entry catalog", CertificationMatcher(ORIGINAL_CERT_SCORES).total_points, portfolio)
+    certifications = risk_engine.scoring_models.current().config.security_posture.certifications
+    cert_scores = {c.name: c.points for c in certifications}
+    cert_aliases = {c.name: c.aliases for c in certifications}
+    aliases = [a for names in cert_aliases.values() for a in names]
+    print(f"current catalog: {len(cert_scores)} entries, {len(aliases)} extra aliases")
+    loop = timed("loop, current catalog (no aliases)", lambda c: legacy_points(c, cert_scores), portfolio)
+    current = timed("matcher, current catalog + aliases", CertificationMatcher(cert_scores, cert_aliases).total_points, portfolio)
+    print(f"matcher vs loop on current catalog:     {loop / current:.1f}x")
+    print(f"matcher (current) vs original loop:     {base / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
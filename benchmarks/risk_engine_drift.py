@@ -0,0 +1,119 @@
+"""
+Benchmark: incremental drift alert evaluation
+
+Feeds batches of new scores (a random walk per vendor) through the risk
+engine's drift alert evaluator while server-sent-event style subscribers read
+the alerts in the same event loop. Checks the alerts against a
+straightforward recomputation over each vendor's full score sequence, then
+prints evaluated scores per second and subscriber delivery.
+
+Usage:
+    python benchmarks/risk_engine_drift.py [--vendors 10000] [--updates 200000] [--batch 500] [--subscribers 2] [--seed 7]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "intelligence-layer", "risk-engine"))
+os.environ["SCORE_HISTORY_URL"] = ""
+
+import main as risk_engine  # noqa: E402
+import drift_alerts  # noqa: E402
+
+LEVELS = [level.value for level in risk_engine.RiskLevel]
+
+
+def synthetic_updates(vendors: int, updates: int, seed: int):
+    rng = random.Random(seed)
+    scores = [rng.randint(20, 90) for _ in range(vendors)]
+    results = []
+    for n in range(updates):
+        v = rng.randrange(vendors)
+        scores[v] = min(100, max(0, scores[v] + rng.randint(-6, 5)))
+        results.append(risk_engine.RiskScoreResponse.model_construct(
+            vendor_id=f"V{v:06d}",
+            overall_risk_score=scores[v],
+            risk_level=risk_engine.determine_risk_level(scores[v]),
+            risk_factors={},
+            recommendations=[],
+            calculated_at=str(n),
+            scoring_model_version="bench",
+        ))
+    return results
+
+
+def expected_alerts(results, threshold: int):
+    """Alert counts by type from each vendor's score sequence, one vendor at a time"""
+    sequences = {}
+    for result in results:
+        sequences.setdefault(result.vendor_id, []).append((result.overall_risk_score, result.risk_level.value))
+    counts = {"risk_level_changed": 0, "score_drop": 0}
+    for sequence in sequences.values():
+        baseline = sequence[0][0]
+        for (_, previous_level), (score, level) in zip(sequence, sequence[1:]):
+            counts["risk_level_changed"] += level != previous_level
+            if baseline - score > threshold:
+                counts["score_drop"] += 1
+                baseline = score
+            baseline = max(baseline, score)
+    return counts
+
+
+async def run(args, results):
+    evaluator = drift_alerts.AlertEvaluator(LEVELS, drop_threshold=10, buffer_size=len(results) * 2)
+    evaluator.bind(asyncio.get_running_loop())
+    received = [0] * args.subscribers
+
+    async def subscriber(i):
+        async for batch in evaluator.subscribe(keepalive=0.5):
+            if batch is None:
+                return
+            received[i] += len(batch)
+
+    readers = [asyncio.create_task(subscriber(i)) for i in range(args.subscribers)]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for i in range(0, len(results), args.batch):
+        evaluator.evaluate(results[i:i + args.batch])
+        # Let subscribers run between batches, as between requests
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*readers)
+    return evaluator, elapsed, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drift alert evaluation benchmark")
+    parser.add_argument("--vendors", type=int, default=10000)
+    parser.add_argument("--updates", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--subscribers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = synthetic_updates(args.vendors, args.updates, args.seed)
+    evaluator, elapsed, received = asyncio.run(run(args, results))
+
+    expected = expected_alerts(results, 10)
+    if evaluator.counts != expected:
+        print(f"FAIL: alerts {evaluator.counts} != expected {expected}")
+        sys.exit(1)
+    if any(count != evaluator.last_id for count in received):
+        print(f"FAIL: subscribers received {received} of {evaluator.last_id} alerts")
+        sys.exit(1)
+
+    print(f"updates:     {len(results)} scores for {args.vendors} vendors, batches of {args.batch}")
+    print(f"alerts:      {evaluator.counts}")
+    print(f"evaluated:   {len(results) / elapsed:,.0f} scores/sec ({elapsed:.2f}s, {args.subscribers} subscribers attached)")
+    print(f"delivered:   {received} alerts per subscriber")
+
+
+if __name__ == "__main__":
+    main()
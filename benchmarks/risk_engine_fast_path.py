@@ -0,0 +1,208 @@
+"""
+Benchmark: /api/calculate on the fast path vs the standard FastAPI path
+
+Loads the risk engine twice, with CALCULATE_FAST_PATH on and off, and first
+checks that both answer identically (status, content type and body bytes, with
+calculated_at masked) for randomly generated requests: valid factors across
+every bracket, extreme counts, unknown fields and certification spellings, and
+invalid bodies, malformed JSON, other content types and methods. It also
+compares score_vendor with score_vendor_fast directly under randomly perturbed
+recommendation thresholds. Then it prints requests/sec for both paths over a
+raw ASGI call (no HTTP client in the measurement), for new vendors and for
+resubmitted ones served from stored results.
+
+Usage:
+    python benchmarks/risk_engine_fast_path.py [--cases 3000] [--requests 5000] [--seed 7] [--log]
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RISK_ENGINE = os.path.join(ROOT, "intelligence-layer", "risk-engine")
+# The repository root, for grc_shared
+sys.path.insert(0, ROOT)
+sys.path.insert(0, RISK_ENGINE)
+os.environ["SCORE_HISTORY_URL"] = ""
+
+CERTIFICATIONS = [
+    "ISO27001", "ISO/IEC 27001:2022", "SOC2", "SOC 2 Type II", "PCI-DSS", "HIPAA", "GDPR",
+    "FedRAMP", "CSA STAR", "NIST 800-53", "made-up cert", "",
+]
+TIMESTAMP = re.compile(rb'"calculated_at":"[^"]*"')
+
+
+def load_engine(name: str, fast: bool):
+    """Import the risk engine's main.py under its own name with the fast path on or off"""
+    os.environ["CALCULATE_FAST_PATH"] = "true" if fast else "false"
+    spec = importlib.util.spec_from_file_location(name, os.path.join(RISK_ENGINE, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+fast = load_engine("risk_engine_fast", True)
+standard = load_engine("risk_engine_standard", False)
+
+
+def random_factors(rng: random.Random, i: int) -> dict:
+    """Valid factors, with unknowns, saturating counts and unrecognised certifications"""
+    factors = {
+        "vendor_id": rng.choice([f"V{i}", f"vendör-{i}-🚀", f"v {i}"]),
+        "domain": f"vendor{i}.example.com",
+        "company_age_years": rng.choice([None, 0, 1, 2, 3, 5, 7, 10, 15, 40, 10 ** 6]),
+        "employee_count": rng.choice([None, 0, 1, 10, 49, 50, 250, 5000, 10 ** 7]),
+        "has_ssl": rng.random() > 0.2,
+        "breach_count": rng.choice([0, 0, 1, 2, 3, 5, 50, 10 ** 5]),
+        "cve_count": rng.choice([0, 1, 5, 10, 11, 20, 100, 10 ** 6]),
+        "compliance_certifications": rng.sample(CERTIFICATIONS, rng.randint(0, 5)),
+        "domain_reputation_score": rng.choice([None, 0, 1, 35, 70, 99, 100]),
+        "financial_health_score": rng.choice([None, 0, 20, 55, 90, 100]),
+        "incident_history_score": rng.choice([None, 50]),
+    }
+    for key in rng.sample(list(factors)[2:], rng.randint(0, 3)):
+        del factors[key]
+    if rng.random() < 0.1:
+        factors["unknown_field"] = "ignored"
+    return factors
+
+
+def random_request(rng: random.Random, i: int):
+    """(method, content type, body) for a valid or invalid /api/calculate request"""
+    factors = random_factors(rng, i)
+    kind = rng.random()
+    if kind < 0.75:
+        return "POST", b"application/json", json.dumps(factors).encode()
+    if kind < 0.85:
+        field = rng.choice(["breach_count", "cve_count", "domain_reputation_score", "company_age_years", "has_ssl", "vendor_id"])
+        factors[field] = rng.choice([-1, 101, "abc", "5", None, [], 1.5])
+        return "POST", b"application/json", json.dumps(factors).encode()
+    if kind < 0.9:
+        del factors["vendor_id"]
+        return "POST", b"application/json", json.dumps(factors).encode()
+    if kind < 0.95:
+        return "POST", b"application/json", rng.choice([b"", b"{", b"[]", b'"x"', b"null", b'{"vendor_id": 1}'])
+    if kind < 0.98:
+        return "POST", rng.choice([b"text/plain", b"application/json; charset=utf-8"]), json.dumps(factors).encode()
+    return "GET", b"application/json", b""
+
+
+async def call(app, method: str, content_type: bytes, body: bytes):
+    """One request straight through the ASGI app; (status, content type, body)"""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": method, "scheme": "http",
+        "path": "/api/calculate", "raw_path": b"/api/calculate", "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("risk-engine", 80),
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    headers = dict(messages[0]["headers"])
+    return messages[0]["status"], headers.get(b"content-type"), b"".join(m.get("body", b"") for m in messages[1:])
+
+
+async def check_requests(cases: int, seed: int) -> int:
+    rng = random.Random(seed)
+    mismatches = 0
+    for i in range(cases):
+        request = random_request(rng, i)
+        expected = await call(standard.app, *request)
+        got = await call(fast.app, *request)
+        if (expected[0], expected[1], TIMESTAMP.sub(b"", expected[2])) != (got[0], got[1], TIMESTAMP.sub(b"", got[2])):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"mismatch for {request}:\n  standard {expected}\n  fast     {got}")
+    return mismatches
+
+
+def check_functions(cases: int, seed: int) -> int:
+    """score_vendor vs score_vendor_fast under the active model and perturbed recommendation thresholds"""
+    rng = random.Random(seed)
+    config = fast.scoring_models.current().config
+    models = [fast.scoring_models.current()]
+    for _ in range(5):
+        thresholds = {
+            "high_priority_max_score": rng.randint(0, 100), "security_posture_below": rng.randint(0, 30),
+            "cve_count_above": rng.randint(0, 50), "company_maturity_below": rng.randint(0, 25),
+            "low_risk_min_score": rng.randint(0, 100),
+        }
+        models.append(fast.CompiledModel(config.model_copy(update={"recommendations": config.recommendations.model_copy(update=thresholds)})))
+    mismatches = 0
+    for i in range(cases):
+        factors = fast.VendorRiskFactors(**random_factors(rng, i))
+        model = rng.choice(models)
+        expected = fast.score_vendor(factors, model).model_dump(exclude={"calculated_at"})
+        if fast.score_vendor_fast(factors, model).model_dump(exclude={"calculated_at"}) != expected:
+            mismatches += 1
+    return mismatches
+
+
+async def requests_per_second(engine, bodies, stored: bool, rounds: int = 3) -> float:
+    """Best of rounds; unless stored, results are cleared first so every request is scored"""
+    best = 0.0
+    for _ in range(rounds):
+        if not stored:
+            engine.score_store.clear()
+        start = time.perf_counter()
+        for body in bodies:
+            await call(engine.app, "POST", b"application/json", body)
+        best = max(best, len(bodies) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast vs standard /api/calculate path")
+    parser.add_argument("--cases", type=int, default=3000, help="Random requests checked for equivalence")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--log", action="store_true", help="Keep the per-request INFO log line (the service default)")
+    args = parser.parse_args()
+
+    if args.log:
+        # To a null stream, so the cost is formatting and handling, not the terminal
+        logging.getLogger().handlers = [logging.StreamHandler(open(os.devnull, "w"))]
+        # main.py leaves logging to the gunicorn config, which sets INFO
+        logging.getLogger().setLevel(logging.INFO)
+    else:
+        logging.disable(logging.INFO)
+
+    request_mismatches = asyncio.run(check_requests(args.cases, args.seed))
+    function_mismatches = check_functions(args.cases, args.seed)
+    print(f"equivalence: {args.cases} random requests, {request_mismatches} mismatches; "
+          f"{args.cases} direct scorings, {function_mismatches} mismatches")
+    if request_mismatches or function_mismatches:
+        print("FAIL: the fast path answered differently from the standard path")
+        sys.exit(1)
+
+    rng = random.Random(args.seed + 1)
+    bodies = [json.dumps({**random_factors(rng, i), "vendor_id": f"bench-{i}"}).encode() for i in range(args.requests)]
+    print(f"{'':<22}{'standard':>12}{'fast':>12}{'speedup':>10}")
+    # Stored results are those left by the new-vendor rounds
+    for label, stored in (("new vendors", False), ("stored results", True)):
+        slow_rate = asyncio.run(requests_per_second(standard, bodies, stored))
+        fast_rate = asyncio.run(requests_per_second(fast, bodies, stored))
+        print(f"{label + ' (req/s)':<22}{slow_rate:>12,.0f}{fast_rate:>12,.0f}{fast_rate / slow_rate:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: score history store
+
+Appends synthetic daily scores for a portfolio to a SQLite score history in
+flush-sized batches, then times the three history queries: one vendor's
+history, the portfolio as of a date and the biggest movers between two
+dates. Results are checked against the generated scores.
+
+Usage:
+    python benchmarks/risk_engine_history.py [--vendors 20000] [--days 30] [--batch-size 1000] [--seed 7]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "intelligence-layer", "risk-engine"))
+# The benchmark opens its own store; keep the service's default one closed
+os.environ["SCORE_HISTORY_URL"] = ""
+
+import main as risk_engine  # noqa: E402
+import score_history  # noqa: E402
+
+START = datetime(2026, 1, 1)
+
+
+def daily_scores(vendors: int, days: int, seed: int):
+    """scores[day][vendor]: a random walk per vendor"""
+    rng = random.Random(seed)
+    current = [rng.randint(20, 90) for _ in range(vendors)]
+    scores = []
+    for _ in range(days):
+        current = [min(100, max(0, s + rng.randint(-4, 4))) for s in current]
+        scores.append(current)
+    return scores
+
+
+def result(vendor: int, day: int, score: int):
+    return risk_engine.RiskScoreResponse.model_construct(
+        vendor_id=f"V{vendor:06d}",
+        overall_risk_score=score,
+        risk_level=risk_engine.determine_risk_level(score),
+        risk_factors={name: score // 5 for name in score_history.FACTOR_NAMES},
+        recommendations=[],
+        calculated_at=(START + timedelta(days=day, seconds=vendor % 3600)).isoformat(),
+        scoring_model_version="bench",
+    )
+
+
+def timed(function, *args, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = function(*args)
+    return value, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score history store benchmark")
+    parser.add_argument("--vendors", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    scores = daily_scores(args.vendors, args.days, args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = score_history.ScoreHistory(
+            score_history.SqliteHistoryBackend(os.path.join(directory, "history.db")),
+            batch_size=args.batch_size,
+            flush_interval=3600,
+            max_pending=args.vendors * args.days,
+        )
+        history.start()
+        try:
+            results = [result(v, d, scores[d][v]) for d in range(args.days) for v in range(args.vendors)]
+            start = time.perf_counter()
+            for i in range(0, len(results), args.batch_size):
+                history.append(results[i:i + args.batch_size])
+                history.flush()
+            write_elapsed = time.perf_counter() - start
+            rows = len(results)
+            print(f"write: {rows} rows in {write_elapsed:.2f}s ({rows / write_elapsed:,.0f} rows/s, {args.batch_size} per flush)")
+
+            rng = random.Random(args.seed)
+            sample = [rng.randrange(args.vendors) for _ in range(200)]
+            elapsed = 0.0
+            for v in sample:
+                found, seconds = timed(history.vendor_history, f"V{v:06d}", None, None, 1000)
+                elapsed += seconds
+                if [e["overall_risk_score"] for e in found["entries"]] != [scores[d][v] for d in range(args.days)]:
+                    print(f"FAIL: history of V{v:06d} does not match")
+                    sys.exit(1)
+            print(f"vendor history: {elapsed / len(sample) * 1000:.2f}ms per vendor ({args.days} rows)")
+
+            middle = args.days // 2
+            # Just before day `middle` ends: that day's scores are the latest
+            as_of = START + timedelta(days=middle, hours=23)
+            snapshot, seconds = timed(history.portfolio_as_of, as_of)
+            if [v["overall_risk_score"] for v in snapshot["vendors"]] != scores[middle]:
+                print("FAIL: portfolio snapshot does not match")
+                sys.exit(1)
+            print(f"portfolio as of day {middle}: {snapshot['count']} vendors in {seconds * 1000:.1f}ms")
+
+            first, last = START + timedelta(hours=23), START + timedelta(days=args.days - 1, hours=23)
+            movers, seconds = timed(history.movers, first, last, "down", 20)
+            deltas = sorted(scores[-1][v] - scores[0][v] for v in range(args.vendors))
+            if [m["score_delta"] for m in movers["movers"]] != [d for d in deltas[:20] if d < 0]:
+                print("FAIL: movers do not match")
+                sys.exit(1)
+            print(f"biggest movers day 0 -> {args.days - 1}: {seconds * 1000:.1f}ms (largest drop {deltas[0]})")
+        finally:
+            history.stop()
+
+
+if __name__ == "__main__":
+    main()
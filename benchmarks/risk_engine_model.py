@@ -0,0 +1,155 @@
+"""
+Benchmark: compiled scoring model vs the original hand-written branches
+
+Checks that the compiled default model (scoring_model.json) reproduces the
+original if/elif scoring functions over an exhaustive grid of inputs, then
+times both per call.
+
+Usage:
+    python benchmarks/risk_engine_model.py [--rounds 200000]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "intelligence-layer", "risk-engine"))
+
+import main as risk_engine  # noqa: E402
+
+
+# --- Original hand-written scoring branches -------------------------------
+
+def legacy_maturity_score(company_age, employee_count):
+    score = 0
+    if company_age:
+        if company_age >= 10:
+            score += 12
+        elif company_age >= 5:
+            score += 8
+        elif company_age >= 2:
+            score += 5
+        else:
+            score += 2
+    else:
+        score += 5
+    if employee_count:
+        if employee_count >= 500:
+            score += 8
+        elif employee_count >= 100:
+            score += 6
+        elif employee_count >= 20:
+            score += 4
+        else:
+            score += 2
+    else:
+        score += 3
+    return min(score, 20)
+
+
+def legacy_incident_score(breach_count, cve_count):
+    score = 25
+    score -= min(breach_count * 8, 18)
+    score -= min(cve_count * 2, 7)
+    return max(score, 0)
+
+
+def legacy_scaled(value):
+    value = value or 50
+    return int((value / 100) * 15)
+
+
+def legacy_risk_level(score):
+    if score <= 20:
+        return "critical"
+    elif score <= 40:
+        return "high"
+    elif score <= 60:
+        return "medium"
+    elif score <= 80:
+        return "low"
+    else:
+        return "minimal"
+
+
+# --------------------------------------------------------------------------
+
+def check_equivalence(model):
+    counts = [None, 0, 1, 2, 3, 4, 5, 6, 9, 10, 11, 19, 20, 21, 99, 100, 101, 499, 500, 501, 10**6]
+    for age, employees in itertools.product(counts, counts):
+        assert model.maturity_score(age, employees) == legacy_maturity_score(age, employees), (age, employees)
+    for breaches, cves in itertools.product(range(12), range(12)):
+        assert model.incident_score(breaches, cves) == legacy_incident_score(breaches, cves), (breaches, cves)
+    assert model.incident_score(10**9, 10**9) == legacy_incident_score(10**9, 10**9)
+    for value in [None, *range(101)]:
+        assert model.reputation_points(value) == legacy_scaled(value), value
+        assert model.financial_points(value) == legacy_scaled(value), value
+    for score in range(101):
+        assert model.level_names[model.risk_level_index(score)] == legacy_risk_level(score), score
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled scoring model vs hand-written branches")
+    parser.add_argument("--rounds", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    model = risk_engine.scoring_models.current()
+    check_equivalence(model)
+    print(f"model {model.version}: equivalent to the hand-written branches")
+
+    rng = random.Random(args.seed)
+    inputs = [
+        (
+            rng.choice([None, 0, 1, 3, 7, 15, 40]),
+            rng.choice([None, 0, 10, 50, 250, 5000]),
+            rng.choice([0, 0, 0, 1, 2, 5]),
+            rng.choice([0, 1, 3, 8, 20]),
+            rng.choice([None, 0, 35, 70, 95]),
+            rng.choice([None, 20, 55, 90]),
+        )
+        for _ in range(args.rounds)
+    ]
+
+    def run_legacy():
+        for age, employees, breaches, cves, reputation, financial in inputs:
+            score = (
+                legacy_maturity_score(age, employees)
+                + legacy_incident_score(breaches, cves)
+                + legacy_scaled(reputation)
+                + legacy_scaled(financial)
+            )
+            legacy_risk_level(score)
+
+    def run_compiled():
+        maturity, incident = model.maturity_score, model.incident_score
+        reputation_points, financial_points = model.reputation_points, model.financial_points
+        level_index, level_names = model.risk_level_index, model.level_names
+        for age, employees, breaches, cves, reputation, financial in inputs:
+            score = (
+                maturity(age, employees)
+                + incident(breaches, cves)
+                + reputation_points(reputation)
+                + financial_points(financial)
+            )
+            level_names[level_index(score)]
+
+    legacy = timed(run_legacy)
+    compiled = timed(run_compiled)
+    print(f"hand-written: {args.rounds / legacy:>12,.0f} evaluations/sec")
+    print(f"compiled:     {args.rounds / compiled:>12,.0f} evaluations/sec")
+    print(f"speedup:      {legacy / compiled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
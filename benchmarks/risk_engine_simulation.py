@@ -0,0 +1,134 @@
+"""
+Benchmark: portfolio what-if simulation
+
+Loads a synthetic portfolio through PUT /api/simulation/portfolio and runs a
+sweep of alternative scoring configurations (breach and CVE weights, FedRAMP
+points, risk level cutoffs, FedRAMP as a required certification) through
+POST /api/simulation/run, in-process over an ASGI transport. Checks the
+reported distributions against full batch scoring of every vendor under each
+scenario's model, then prints load and sweep times.
+
+Usage:
+    python benchmarks/risk_engine_simulation.py [--vendors 50000] [--scenarios 100] [--seed 7]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+# The repository root, for grc_shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "intelligence-layer", "risk-engine"))
+
+import main as risk_engine  # noqa: E402
+import simulation  # noqa: E402
+from risk_engine_batch import synthetic_vendors  # noqa: E402
+from scoring_model import compile_model  # noqa: E402
+
+
+def synthetic_scenarios(count: int):
+    """Scenarios cycling through the kinds of question the committee asks"""
+    scenarios = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            scenarios.append({
+                "name": f"breach-weight-{i}",
+                "overrides": {"incident_history": {"breach": {"points_each": 8 + i % 10, "max_deduction": 18 + i % 7}}},
+            })
+        elif kind == 1:
+            scenarios.append({
+                "name": f"cve-weight-{i}",
+                "overrides": {"incident_history": {"cve": {"points_each": 1 + i % 4, "max_deduction": 5 + i % 6}}},
+                "certification_points": {"FedRAMP": 5 + i % 15},
+            })
+        elif kind == 2:
+            shift = i % 6
+            scenarios.append({
+                "name": f"cutoffs-{i}",
+                "overrides": {"risk_levels": [
+                    {"level": "critical", "max_score": 20 + shift},
+                    {"level": "high", "max_score": 40 + shift},
+                    {"level": "medium", "max_score": 60 + shift},
+                    {"level": "low", "max_score": 80 + shift},
+                    {"level": "minimal", "max_score": 100},
+                ]},
+            })
+        else:
+            scenarios.append({
+                "name": f"fedramp-required-{i}",
+                "required_certifications": ["FedRAMP"],
+                "required_certification_level": ["critical", "high", "medium"][i % 3],
+            })
+    return scenarios
+
+
+def expected_distribution(vendors, scenario: dict) -> Counter:
+    """Distribution from scoring every vendor with score_vendor_batch under the scenario model"""
+    base = risk_engine.scoring_models.current()
+    parsed = simulation.SimulationScenario.model_validate(scenario)
+    model = compile_model(simulation.scenario_config(base.config, parsed))
+    factors = [risk_engine.VendorRiskFactors.model_validate(v) for v in vendors]
+    results = risk_engine.score_vendor_batch(factors, model)
+    required = set(parsed.required_certifications)
+    cap = simulation.LEVEL_RANK[parsed.required_certification_level]
+    counts = Counter()
+    for f, result in zip(factors, results):
+        rank = simulation.LEVEL_RANK[result.risk_level.value]
+        if required and not required <= {model.cert_matcher.match(c) for c in f.compliance_certifications}:
+            rank = min(rank, cap)
+        counts[simulation.LEVEL_NAMES[rank]] += 1
+    return counts
+
+
+async def run(vendors, scenarios):
+    transport = httpx.ASGITransport(app=risk_engine.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://risk-engine", timeout=None) as client:
+        start = time.perf_counter()
+        response = await client.put("/api/simulation/portfolio", json={"vendors": vendors})
+        response.raise_for_status()
+        load_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = await client.post("/api/simulation/run", json={"scenarios": scenarios, "max_changed_vendors": 20})
+        response.raise_for_status()
+        sweep_elapsed = time.perf_counter() - start
+    return response.json(), load_elapsed, sweep_elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="What-if simulation sweep over a synthetic portfolio")
+    parser.add_argument("--vendors", type=int, default=50000)
+    parser.add_argument("--scenarios", type=int, default=100)
+    parser.add_argument("--check", type=int, default=8, help="scenarios verified against full batch scoring")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    vendors = synthetic_vendors(args.vendors, args.seed)
+    scenarios = synthetic_scenarios(args.scenarios)
+    report, load_elapsed, sweep_elapsed = asyncio.run(run(vendors, scenarios))
+
+    for scenario, result in zip(scenarios[:args.check], report["scenarios"]):
+        expected = expected_distribution(vendors, scenario)
+        if any(result["distribution"][name] != expected[name] for name in simulation.LEVEL_NAMES):
+            print(f"FAIL: scenario {scenario['name']} distribution differs from batch scoring")
+            sys.exit(1)
+
+    changed = sum(result["changed_count"] for result in report["scenarios"])
+    print(f"vendors:     {args.vendors}")
+    print(f"scenarios:   {args.scenarios} ({args.check} verified against batch scoring)")
+    print(f"load:        {load_elapsed:.2f}s")
+    print(f"sweep:       {sweep_elapsed:.2f}s ({report['elapsed_ms'] / 1000:.2f}s in the engine)")
+    print(f"throughput:  {args.vendors * args.scenarios / sweep_elapsed:,.0f} vendor-scenarios/sec")
+    print(f"changes:     {changed:,} vendor level changes across all scenarios")
+
+
+if __name__ == "__main__":
+    main()
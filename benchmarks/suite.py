@@ -0,0 +1,428 @@
+"""
+Benchmark suite: micro-benchmarks and in-process load tests with a baseline
+
+Micro-benchmarks the scoring, reputation and report metric functions, then
+load-tests the OSINT service, risk engine and reports service in one process
+over ASGI transports. WHOIS, DNS and TLS are replaced by the deterministic
+sleeping fakes of osint_enrich_concurrency.py, so enrichment latency depends
+only on --whois-ms / --dns-ms / --tls-ms.
+
+Results are written as JSON (--output) and compared with a stored baseline
+(--baseline, default benchmarks/baseline.json). A metric regresses when it is
+worse than its baseline value by more than its threshold: the baseline entry's
+own "threshold" if set, otherwise --threshold. Regressions make the exit status
+1. Timings depend on the machine, so record the baseline on the machine that
+runs the comparison (--save-baseline).
+
+Shared and virtual machines drift in speed from run to run. The suite times a
+fixed pure-Python calibration workload before and after the run and stores it
+with the results; CPU-bound metrics are compared against the baseline scaled by
+the calibration ratio (--no-normalize compares raw values). Micro-benchmarks
+time batches of 1,000 vendors and keep the median of 20 runs (5 with
+--quick); load tests run --rounds times and keep the best round.
+
+Usage:
+    python benchmarks/suite.py [--only risk_engine] [--quick] [--output results.json]
+                               [--baseline benchmarks/baseline.json] [--threshold 0.25] [--save-baseline]
+                               [--rounds 3] [--no-normalize] [--whois-ms 40] [--dns-ms 15] [--tls-ms 20]
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCHMARKS, "..")
+for directory in ("intelligence-layer/osint-service", "intelligence-layer/risk-engine", "experience-layer/reports"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
+sys.path.insert(0, BENCHMARKS)
+# The repository root, for grc_shared
+sys.path.insert(0, ROOT)
+os.environ["SCORE_HISTORY_URL"] = ""
+os.environ.setdefault("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "grc-report-cache-bench"))
+# The fakes are not a real registry: lift the per-TLD WHOIS rate limit
+os.environ["WHOIS_RATE_PER_TLD"] = "100000"
+os.environ["WHOIS_RATE_BURST"] = "100000"
+
+DEFAULT_BASELINE = os.path.join(BENCHMARKS, "baseline.json")
+TLDS = ["com", "io", "net", "org", "co.uk", "de"]
+LEVELS = ["critical", "high", "medium", "low", "minimal"]
+CERTIFICATIONS = ["ISO27001", "SOC2 Type II", "PCI DSS", "HIPAA", "GDPR", "ISO 27017"]
+# Vendors per timed call of the per-vendor micro-benchmarks, so a call is long enough to time
+MICRO_BATCH = 1000
+# Allowed slowdown of the sub-microsecond micro-benchmarks
+MICRO_THRESHOLD = 0.6
+
+
+def load_service(name: str, directory: str):
+    """Import a service's main.py under its own module name"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, directory, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+osint = load_service("osint_main", "intelligence-layer/osint-service")
+risk_engine = load_service("risk_engine_main", "intelligence-layer/risk-engine")
+reports = load_service("reports_main", "experience-layer/reports")
+sys.modules["main"] = osint  # osint_enrich_concurrency patches `main`
+
+import osint_enrich_concurrency  # noqa: E402
+
+
+def result(value: float, unit: str, better: str, threshold: Optional[float] = None, scale: bool = True) -> Dict[str, Any]:
+    """A metric entry; scale=False marks metrics bound by sleeps rather than CPU speed"""
+    entry = {"value": round(value, 4), "unit": unit, "better": better}
+    if threshold is not None:
+        entry["threshold"] = threshold
+    if not scale:
+        entry["scale"] = False
+    return entry
+
+
+def calibrate(repeat: int = 11) -> float:
+    """Milliseconds of a fixed dict/JSON/sort workload, median of repeat, as a machine speed reference"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        table = {str(i): i * 2 for i in range(20000)}
+        json.loads(json.dumps(table))
+        sorted(table.values(), reverse=True)
+        runs.append(time.perf_counter() - start)
+    # The median, like the micro-benchmarks, so both follow the machine's typical speed
+    return statistics.median(runs) * 1000
+
+
+# ---------------------------------------------------------------- fixtures
+
+def vendor_factors(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "vendor_id": f"V{i:06d}",
+            "domain": f"vendor{i}.{rng.choice(TLDS)}",
+            "company_age_years": rng.randint(0, 40),
+            "employee_count": rng.randint(0, 20000),
+            "has_ssl": rng.random() < 0.9,
+            "breach_count": rng.randint(0, 4),
+            "cve_count": rng.randint(0, 30),
+            "compliance_certifications": rng.sample(CERTIFICATIONS, rng.randint(0, 3)),
+            "domain_reputation_score": rng.randint(1, 100),
+            "financial_health_score": rng.randint(1, 100),
+        }
+        for i in range(count)
+    ]
+
+
+def report_vendors(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "vendor_id": f"V{i:06d}",
+            "vendor_name": f"Vendor {i}",
+            "domain": f"vendor{i}.{rng.choice(TLDS)}",
+            "risk_score": rng.randint(0, 100),
+            "risk_level": rng.choice(LEVELS),
+            "last_assessment": "2026-03-31",
+        }
+        for i in range(count)
+    ]
+
+
+# ---------------------------------------------------------------- micro-benchmarks
+
+def time_per_call(function: Callable[[], Any], min_seconds: float, repeat: int) -> float:
+    """Median seconds per call over repeat runs of at least min_seconds each"""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+        calls *= 2 if elapsed < min_seconds / 4 else 4
+    # The median rather than the best run: one lucky run would set a baseline later runs rarely match
+    runs = [elapsed / calls]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        runs.append((time.perf_counter() - start) / calls)
+    return statistics.median(runs)
+
+
+def micro_benchmarks(args) -> Dict[str, Dict[str, Any]]:
+    model = risk_engine.scoring_models.current()
+    factors = [risk_engine.VendorRiskFactors(**row) for row in vendor_factors(MICRO_BATCH)]
+    scored = [(f, risk_engine.score_vendor(f, model)) for f in factors]
+    whois = {"registrar": "Fake Registrar", "creation_date": "2001-01-01", "name_servers": ["ns1.example.net"]}
+    dns = {"A": ["192.0.2.1"], "MX": ["mx.example.com"], "TXT": ["v=spf1 -all"]}
+    ssl_info = {"status": "valid", "has_ssl": True, "days_remaining": 90, "key_type": "RSA", "key_size": 2048}
+    vendors = [reports.VendorSummary(**row) for row in report_vendors(args.report_vendors)]
+    previous = [reports.VendorSummary(**row) for row in report_vendors(args.report_vendors, seed=8)]
+
+    def each(function):
+        """Call function once per fixture, so the timing covers varied inputs"""
+        return lambda: [function(item) for item in scored]
+
+    # name: (timed call, function calls it makes, threshold); sub-microsecond
+    # functions move with the interpreter's mood and get a wider threshold
+    cases = {
+        "calculate_maturity_score": (each(lambda s: risk_engine.calculate_maturity_score(
+            s[0].company_age_years, s[0].employee_count, model)), len(scored), MICRO_THRESHOLD),
+        "calculate_security_score": (each(lambda s: risk_engine.calculate_security_score(
+            s[0].has_ssl, s[0].compliance_certifications, model)), len(scored), MICRO_THRESHOLD),
+        "generate_recommendations": (each(lambda s: risk_engine.generate_recommendations(
+            s[0], s[1].risk_factors, s[1].overall_risk_score, model)), len(scored), MICRO_THRESHOLD),
+        "score_vendor": (each(lambda s: risk_engine.score_vendor(s[0], model)), len(scored), None),
+        "calculate_reputation_score": (each(lambda s: osint.calculate_reputation_score(whois, dns, ssl_info)),
+                                       len(scored), MICRO_THRESHOLD),
+        "calculate_metrics": (lambda: reports.calculate_metrics(vendors, previous), 1, None),
+    }
+    results = {}
+    for name, (function, per_call, threshold) in cases.items():
+        seconds = time_per_call(function, args.min_seconds, args.repeat) / per_call
+        results[f"micro.{name}.us"] = result(seconds * 1e6, "us/call", "lower", threshold=threshold)
+    return results
+
+
+# ---------------------------------------------------------------- load tests
+
+async def load(client: httpx.AsyncClient, requests: List[Dict[str, Any]], concurrency: int) -> Dict[str, float]:
+    """Send requests (kwargs for client.request) with concurrency in flight; latency percentiles and throughput"""
+    queue = iter(requests)
+    latencies: List[float] = []
+
+    async def worker():
+        for kwargs in queue:
+            start = time.perf_counter()
+            response = await client.request(**kwargs)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+async def best_of(rounds: int, run: Callable[[], Any]) -> Dict[str, float]:
+    """The round of run() with the highest throughput"""
+    best = None
+    for _ in range(rounds):
+        stats = await run()
+        if best is None or stats["throughput"] > best["throughput"]:
+            best = stats
+    return best
+
+
+def load_results(name: str, stats: Dict[str, float], unit: str = "req/s", scale: bool = True) -> Dict[str, Dict[str, Any]]:
+    return {
+        f"load.{name}.throughput": result(stats["throughput"], unit, "higher", scale=scale),
+        f"load.{name}.p50_ms": result(stats["p50"] * 1000, "ms", "lower", scale=scale),
+        # Tail latency of a few hundred requests is noisy
+        f"load.{name}.p99_ms": result(stats["p99"] * 1000, "ms", "lower", threshold=1.0, scale=scale),
+    }
+
+
+async def load_osint(args) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=osint.app), base_url="http://osint", timeout=None) as client:
+        cold = [{"method": "POST", "url": "/api/enrich", "json": {"domain": f"cold{i}.example.com"}} for i in range(args.requests)]
+
+        async def run_cold():
+            # Every domain misses the cache and waits for the fakes
+            osint.lookup_cache = osint.EnrichmentCache(max_entries=osint.CACHE_MAX_ENTRIES)
+            return await load(client, cold, args.concurrency)
+
+        # Bound by the fakes' sleeps, not by CPU speed
+        results.update(load_results("osint.enrich_cold", await best_of(args.rounds, run_cold), scale=False))
+        # Warm: a few domains, all cached, so this measures the service itself
+        warm = [{"method": "POST", "url": "/api/enrich", "json": {"domain": f"cold{i % 10}.example.com"}} for i in range(args.requests * 4)]
+        stats = await best_of(args.rounds, lambda: load(client, warm, args.concurrency))
+        results.update(load_results("osint.enrich_cached", stats))
+    return results
+
+
+async def load_risk_engine(args) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    vendors = vendor_factors(args.requests * 4 + args.batch_size * 20)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=risk_engine.app), base_url="http://risk", timeout=None) as client:
+        single = [{"method": "POST", "url": "/api/calculate", "json": row} for row in vendors[:args.requests * 4]]
+        batches = [
+            {"method": "POST", "url": "/api/calculate/batch", "json": {"vendors": vendors[i:i + args.batch_size]}}
+            for i in range(0, args.batch_size * 20, args.batch_size)
+        ]
+
+        async def run(requests, concurrency):
+            # Stored scores would turn repeat rounds into cache hits
+            risk_engine.score_store.clear()
+            return await load(client, requests, concurrency)
+
+        stats = await best_of(args.rounds, lambda: run(single, args.concurrency))
+        results.update(load_results("risk_engine.calculate", stats))
+        stats = await best_of(args.rounds, lambda: run(batches, 4))
+        stats["throughput"] *= args.batch_size
+        results.update(load_results("risk_engine.calculate_batch", stats, "vendors/s"))
+    return results
+
+
+async def load_reports(args) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    vendors = report_vendors(args.report_vendors)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=reports.app), base_url="http://reports", timeout=None) as client:
+        metrics = [{"method": "POST", "url": "/api/metrics", "json": {"vendors": vendors}}] * max(args.requests // 4, 10)
+        results.update(load_results("reports.metrics", await best_of(args.rounds, lambda: load(client, metrics, 4))))
+        html = [{"method": "POST", "url": "/api/generate", "json": {"vendors": vendors[:200], "format": "html"}}] * max(args.requests // 10, 10)
+        results.update(load_results("reports.generate_html", await best_of(args.rounds, lambda: load(client, html, 4))))
+    return results
+
+
+# ---------------------------------------------------------------- baseline
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float, speed: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    One row per metric: baseline and current value, relative change and status
+
+    speed is the current calibration time over the baseline's (above 1 when this
+    run's machine is slower); CPU-bound baseline values are scaled by it first.
+    """
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None or not base.get("value"):
+            rows.append({"name": name, "current": current["value"], "status": "new"})
+            continue
+        expected = base["value"]
+        if current.get("scale", True):
+            expected = expected * speed if current["better"] == "lower" else expected / speed
+        change = (current["value"] - expected) / expected
+        # Positive `worse` is a regression in the metric's own direction
+        worse = change if current["better"] == "lower" else -change
+        limit = base.get("threshold", current.get("threshold", threshold))
+        if worse > limit:
+            status = "REGRESSION"
+        elif worse < -limit:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({
+            "name": name, "baseline": round(expected, 4), "current": current["value"],
+            "change": round(change, 4), "threshold": limit, "status": status,
+        })
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]], results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'metric':<46}{'baseline':>12}{'current':>12}{'change':>9}  status")
+    for row in rows:
+        unit = results[row["name"]]["unit"]
+        baseline = f"{row['baseline']:,.2f}" if "baseline" in row else "-"
+        change = f"{row['change']:+.1%}" if "change" in row else ""
+        print(f"{row['name']:<46}{baseline:>12}{row['current']:>12,.2f}{change:>9}  {row['status']} ({unit})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks and in-process load tests, compared with a baseline")
+    parser.add_argument("--only", help="Run only metrics whose name contains this text (e.g. micro, osint, reports)")
+    parser.add_argument("--quick", action="store_true", help="Fewer requests and shorter timings, for a smoke run")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown before a metric regresses")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs of each load test; the best is kept")
+    parser.add_argument("--no-normalize", action="store_true", help="Compare raw values, without the calibration scaling")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--report-vendors", type=int, default=2000)
+    parser.add_argument("--whois-ms", type=float, default=40)
+    parser.add_argument("--dns-ms", type=float, default=15)
+    parser.add_argument("--tls-ms", type=float, default=20)
+    args = parser.parse_args()
+    args.min_seconds, args.repeat = (0.02, 5) if args.quick else (0.05, 20)
+    if args.quick:
+        args.requests = min(args.requests, 100)
+        args.rounds = 1
+
+    logging.disable(logging.INFO)
+    osint_enrich_concurrency.install_fakes(args.whois_ms, args.dns_ms, args.tls_ms)
+
+    def selected(prefix):
+        return not args.only or args.only in prefix
+
+    calibration = calibrate()
+    results: Dict[str, Dict[str, Any]] = {}
+    if selected("micro"):
+        results.update(micro_benchmarks(args))
+    for prefix, run in (("load.osint", load_osint), ("load.risk_engine", load_risk_engine), ("load.reports", load_reports)):
+        if selected(prefix):
+            results.update(asyncio.run(run(args)))
+    if args.only:
+        results = {name: value for name, value in results.items() if args.only in name}
+    # Before and after, so drift during the run is averaged in
+    calibration = round((calibration + calibrate()) / 2, 4)
+
+    document = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "save_baseline", "no_normalize")},
+        "calibration_ms": calibration,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+
+    baseline, speed = {}, 1.0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored["results"]
+        if stored.get("calibration_ms") and not args.no_normalize:
+            speed = calibration / stored["calibration_ms"]
+            print(f"calibration {calibration:.2f} ms vs baseline {stored['calibration_ms']:.2f} ms: "
+                  f"CPU-bound baseline values scaled by {speed:.2f}")
+    rows = compare(results, baseline, args.threshold, speed)
+    print_table(rows, results)
+
+    if args.save_baseline:
+        # Keep per-metric thresholds (and metrics not run this time) from the old baseline
+        merged = dict(baseline)
+        for name, value in results.items():
+            merged[name] = dict(value)
+            if "threshold" in baseline.get(name, {}):
+                merged[name]["threshold"] = baseline[name]["threshold"]
+        with open(args.baseline, "w") as f:
+            json.dump({**document, "results": merged}, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    regressions = [row["name"] for row in rows if row["status"] == "REGRESSION"]
+    if regressions:
+        print(f"FAIL: {len(regressions)} metric(s) regressed beyond their threshold")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
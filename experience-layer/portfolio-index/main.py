@@ -0,0 +1,227 @@
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import AliasChoices, BaseModel, Field
+from typing import Any, Callable, List, Literal, Optional
+from datetime import datetime
+import json
+import logging
+import os
+import uuid
+from grc_shared import instrumentation
+from portfolio_index import PortfolioIndex, QueryCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Encoded query responses kept for the current portfolio version
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+
+# Request rates and latencies, portfolio size and query cache counters for /metrics
+telemetry = instrumentation.ServiceMetrics("portfolio-index")
+
+index = PortfolioIndex()
+query_cache = QueryCache(QUERY_CACHE_MAX_ENTRIES)
+
+# Versions restart from 0 with the process; this keeps ETags from before a restart from matching.
+# Updates answer with it too, so a producer can tell the index restarted empty and reload it
+INSTANCE = uuid.uuid4().hex[:8]
+
+app = FastAPI(
+    title="Portfolio Index",
+    description="Latest vendor risk scores indexed for dashboard queries",
+    version="1.0.0"
+)
+
+app.add_middleware(instrumentation.MetricsMiddleware, metrics=telemetry)
+
+RiskLevelName = Literal["critical", "high", "medium", "low", "minimal"]
+
+class VendorScore(BaseModel):
+    """
+    A vendor's latest score
+
+    Risk engine results (overall_risk_score, calculated_at) are accepted as-is;
+    a vendor_name or domain left out keeps the one already indexed.
+    """
+    vendor_id: str = Field(..., min_length=1)
+    vendor_name: Optional[str] = None
+    domain: str = ""
+    risk_score: int = Field(..., ge=0, le=100, validation_alias=AliasChoices("risk_score", "overall_risk_score"))
+    risk_level: RiskLevelName
+    last_assessment: datetime = Field(..., validation_alias=AliasChoices("last_assessment", "calculated_at"))
+
+class VendorScoresRequest(BaseModel):
+    """Vendor scores to add or update, or the whole portfolio"""
+    vendors: List[VendorScore] = Field(..., max_length=500000)
+
+def current_etag() -> str:
+    return f'W/"{INSTANCE}-{index.version}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match lists etag (compared weakly) or is *"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def conditional_json(request: Request, build: Callable[[], Any]) -> Response:
+    """
+    JSON for the current portfolio version, or 304 if the client has it
+
+    Bodies are cached per version and request, so repeated polls between
+    changes cost a dictionary lookup even without If-None-Match.
+    """
+    etag = current_etag()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        query_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    key = f"{request.url.path}?{request.url.query}"
+    body = query_cache.get(index.version, key)
+    if body is None:
+        body = json.dumps(build(), separators=(",", ":")).encode()
+        query_cache.put(key, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return {
+        "status": "healthy",
+        "service": "portfolio-index",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.put("/api/portfolio")
+async def replace_portfolio(request: VendorScoresRequest):
+    """Replace the whole portfolio with these vendors"""
+    try:
+        result = index.replace(vendor.model_dump(exclude_unset=True) for vendor in request.vendors)
+        logger.info(f"Portfolio replaced: {len(index)} vendors")
+        return {**result, "vendors": len(index), "version": index.version, "instance": INSTANCE}
+
+    except Exception as e:
+        logger.error(f"Error replacing portfolio: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error replacing portfolio: {str(e)}")
+
+@app.post("/api/portfolio/vendors")
+async def upsert_vendors(request: VendorScoresRequest):
+    """
+    Add or update vendor scores
+
+    Scores older than the one held for a vendor are skipped as stale, and
+    identical ones leave the portfolio version (and ETag) unchanged.
+    """
+    try:
+        result = index.upsert(vendor.model_dump(exclude_unset=True) for vendor in request.vendors)
+        logger.info(f"Portfolio updated: {result}")
+        return {**result, "vendors": len(index), "version": index.version, "instance": INSTANCE}
+
+    except Exception as e:
+        logger.error(f"Error updating portfolio: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error updating portfolio: {str(e)}")
+
+@app.delete("/api/portfolio/vendors/{vendor_id}")
+async def remove_vendor(vendor_id: str):
+    """Remove a vendor from the portfolio"""
+    if not index.remove(vendor_id):
+        raise HTTPException(status_code=404, detail=f"Vendor {vendor_id} not found")
+    return {"vendor_id": vendor_id, "removed": True, "version": index.version}
+
+@app.get("/api/portfolio/summary")
+async def portfolio_summary(request: Request):
+    """Vendor count, count per risk level and average score"""
+    return conditional_json(request, index.summary)
+
+@app.get("/api/portfolio/histogram")
+async def score_histogram(
+    request: Request,
+    bin_width: int = Query(10, ge=1, le=101, description="Score points per bin"),
+    level: Optional[RiskLevelName] = None
+):
+    """Vendor counts per score bin, from 0 to 100, optionally for one risk level"""
+    return conditional_json(request, lambda: {"bin_width": bin_width, "level": level, "bins": index.histogram(bin_width, level)})
+
+@app.get("/api/portfolio/vendors")
+async def list_vendors(
+    request: Request,
+    level: Optional[RiskLevelName] = None,
+    order: Literal["asc", "desc"] = Query("asc", description="Score order; asc is riskiest first"),
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    after_score: Optional[int] = Query(None, ge=0, le=100, description="Continue after this vendor (next_after of the previous page)"),
+    after_vendor_id: Optional[str] = None
+):
+    """
+    A page of vendors in score order, optionally for one risk level
+
+    Page with offset, or with the previous page's next_after
+    (after_score and after_vendor_id), which stays consistent while scores
+    change.
+    """
+    if (after_score is None) != (after_vendor_id is None):
+        raise HTTPException(status_code=422, detail="after_score and after_vendor_id go together")
+    after = (after_score, after_vendor_id) if after_score is not None else None
+    return conditional_json(request, lambda: index.page(level, order == "desc", limit, offset, after))
+
+@app.get("/api/portfolio/top")
+async def riskiest_vendors(
+    request: Request,
+    n: int = Query(10, ge=1, le=1000),
+    level: Optional[RiskLevelName] = None
+):
+    """The n riskiest (lowest scoring) vendors, optionally for one risk level"""
+    return conditional_json(request, lambda: {"vendors": index.page(level, limit=n)["vendors"]})
+
+@app.get("/api/portfolio/vendors/{vendor_id}")
+async def get_vendor(request: Request, vendor_id: str):
+    """One vendor's latest score"""
+    if index.vendor(vendor_id) is None:
+        raise HTTPException(status_code=404, detail=f"Vendor {vendor_id} not found")
+    return conditional_json(request, lambda: index.vendor(vendor_id))
+
+@app.get("/api/portfolio/stats")
+async def portfolio_stats():
+    """Portfolio size and version, and query cache counters"""
+    return {**index.stats(), "instance": INSTANCE, "query_cache": query_cache.stats()}
+
+def collect_portfolio_metrics() -> List[instrumentation.Family]:
+    """Vendors per level and query cache counters, read at scrape time"""
+    return [
+        ("grc_portfolio_vendors", "gauge", "Vendors in the portfolio index, by risk level",
+         [({"risk_level": level}, count) for level, count in zip(index.levels, index.level_counts)]),
+        ("grc_portfolio_version", "gauge", "Changes applied to the portfolio index", [({}, index.version)]),
+        *instrumentation.cache_families("portfolio_queries", query_cache.stats(), ("hits", "misses", "not_modified"), "entries"),
+    ]
+
+telemetry.collect(collect_portfolio_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, portfolio and query cache metrics in the Prometheus text format"""
+    return PlainTextResponse(telemetry.render(), media_type=instrumentation.CONTENT_TYPE)
+
+@app.get("/")
+async def root():
+    """Root endpoint"""
+    return {
+        "service": "Portfolio Index",
+        "version": "1.0.0",
+        "endpoints": [
+            "/health",
+            "/api/portfolio",
+            "/api/portfolio/summary",
+            "/api/portfolio/histogram",
+            "/api/portfolio/vendors",
+            "/api/portfolio/vendors/{vendor_id}",
+            "/api/portfolio/top",
+            "/api/portfolio/stats",
+            "/metrics",
+            "/docs"
+        ]
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=5006)
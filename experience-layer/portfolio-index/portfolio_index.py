@@ -0,0 +1,297 @@
+"""
+Read-optimized index of the latest score per vendor
+
+Vendors are held in array-backed columns (vendor id, name, domain, score,
+risk level, assessment and update timestamps), one row per vendor, with
+deleted rows filled by the last row. Alongside them the index maintains:
+
+- per-level vendor counts, a score sum and per-level, per-score counts, so
+  the summary and histograms never scan the rows;
+- (score, vendor_id) keys sorted for the whole portfolio and per level, so a
+  page in score order, filtered or not, is a bisect and a slice.
+
+Ascending score order is riskiest first. Every change bumps version, which
+the service turns into its ETag; QueryCache keeps encoded responses for the
+current version only.
+"""
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+RISK_LEVELS = ("critical", "high", "medium", "low", "minimal")
+MAX_SCORE = 100
+
+# (score, vendor_id): the sort key of the score indexes
+Key = Tuple[int, str]
+
+
+def to_millis(value: Any) -> int:
+    """Epoch milliseconds for a datetime or ISO string; naive values are UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def from_millis(millis: int) -> str:
+    return datetime.utcfromtimestamp(millis / 1000).isoformat(timespec="milliseconds")
+
+
+class PortfolioIndex:
+    """Latest score per vendor, with incremental counters and sorted score indexes"""
+
+    def __init__(self, levels: Tuple[str, ...] = RISK_LEVELS, clock: Callable[[], float] = time.time):
+        self.levels = levels
+        self.level_index = {level: i for i, level in enumerate(levels)}
+        self.clock = clock
+        self.version = 0
+        self.updated_at: Optional[int] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.vendor_ids: List[str] = []
+        self.names: List[Optional[str]] = []
+        self.domains: List[str] = []
+        self.scores = array("b")
+        self.level_codes = array("b")
+        self.assessed_ms = array("q")
+        self.updated_ms = array("q")
+        self.rows: Dict[str, int] = {}
+        self.level_counts = [0] * len(self.levels)
+        self.score_counts = [[0] * (MAX_SCORE + 1) for _ in self.levels]
+        self.score_sum = 0
+        self.by_score: List[Key] = []
+        self.by_level_score: List[List[Key]] = [[] for _ in self.levels]
+
+    def __len__(self) -> int:
+        return len(self.vendor_ids)
+
+    # Writes
+
+    def upsert(self, vendors: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Add or update vendors; returns added, updated, unchanged and stale counts
+
+        A row whose last_assessment is older than the stored one is stale and
+        skipped, so out-of-order pushes cannot roll a vendor back; re-sent
+        identical rows leave the version (and so the ETag) as it was, and a
+        vendor_name or domain left out keeps the stored one. Large batches
+        rebuild the sorted indexes once instead of inserting key by key.
+        """
+        vendors = list(vendors)
+        rebuild = len(vendors) > max(1000, len(self) // 4)
+        added = updated = unchanged = stale = 0
+        now = int(self.clock() * 1000)
+        for vendor in vendors:
+            vendor_id = vendor["vendor_id"]
+            score = vendor["risk_score"]
+            level = self.level_index[vendor["risk_level"]]
+            assessed = to_millis(vendor["last_assessment"])
+            row = self.rows.get(vendor_id)
+            if row is None:
+                row = self.rows[vendor_id] = len(self.vendor_ids)
+                self.vendor_ids.append(vendor_id)
+                self.names.append(vendor.get("vendor_name"))
+                self.domains.append(vendor.get("domain", ""))
+                self.scores.append(score)
+                self.level_codes.append(level)
+                self.assessed_ms.append(assessed)
+                self.updated_ms.append(now)
+                self._count(level, score, 1)
+                if not rebuild:
+                    self._index(vendor_id, level, score)
+                added += 1
+                continue
+            if assessed < self.assessed_ms[row]:
+                stale += 1
+                continue
+            old_level, old_score = self.level_codes[row], self.scores[row]
+            name = vendor.get("vendor_name", self.names[row])
+            domain = vendor.get("domain", self.domains[row])
+            if (assessed, level, score, domain, name) == (
+                self.assessed_ms[row], old_level, old_score, self.domains[row], self.names[row]
+            ):
+                unchanged += 1
+                continue
+            self._count(old_level, old_score, -1)
+            self._count(level, score, 1)
+            if not rebuild and (old_level, old_score) != (level, score):
+                self._unindex(vendor_id, old_level, old_score)
+                self._index(vendor_id, level, score)
+            self.names[row] = name
+            self.domains[row] = domain
+            self.scores[row] = score
+            self.level_codes[row] = level
+            self.assessed_ms[row] = assessed
+            self.updated_ms[row] = now
+            updated += 1
+        if rebuild:
+            self._rebuild_indexes()
+        if added or updated:
+            self._changed(now)
+        return {"added": added, "updated": updated, "unchanged": unchanged, "stale": stale}
+
+    def replace(self, vendors: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Replace the whole portfolio"""
+        self._reset()
+        result = self.upsert(vendors)
+        self._changed(int(self.clock() * 1000))
+        return result
+
+    def remove(self, vendor_id: str) -> bool:
+        row = self.rows.pop(vendor_id, None)
+        if row is None:
+            return False
+        level, score = self.level_codes[row], self.scores[row]
+        self._count(level, score, -1)
+        self._unindex(vendor_id, level, score)
+        last = len(self.vendor_ids) - 1
+        if row != last:
+            # Move the last row into the hole
+            moved = self.vendor_ids[last]
+            self.rows[moved] = row
+            for column in (self.vendor_ids, self.names, self.domains, self.scores, self.level_codes, self.assessed_ms, self.updated_ms):
+                column[row] = column[last]
+        for column in (self.vendor_ids, self.names, self.domains, self.scores, self.level_codes, self.assessed_ms, self.updated_ms):
+            column.pop()
+        self._changed(int(self.clock() * 1000))
+        return True
+
+    def _changed(self, now: int) -> None:
+        self.version += 1
+        self.updated_at = now
+
+    def _count(self, level: int, score: int, delta: int) -> None:
+        self.level_counts[level] += delta
+        self.score_counts[level][score] += delta
+        self.score_sum += score * delta
+
+    def _index(self, vendor_id: str, level: int, score: int) -> None:
+        insort(self.by_score, (score, vendor_id))
+        insort(self.by_level_score[level], (score, vendor_id))
+
+    def _unindex(self, vendor_id: str, level: int, score: int) -> None:
+        for keys in (self.by_score, self.by_level_score[level]):
+            del keys[bisect_left(keys, (score, vendor_id))]
+
+    def _rebuild_indexes(self) -> None:
+        keys = sorted(zip(self.scores, self.vendor_ids))
+        self.by_score = keys
+        self.by_level_score = [[] for _ in self.levels]
+        level_codes, rows = self.level_codes, self.rows
+        for key in keys:
+            self.by_level_score[level_codes[rows[key[1]]]].append(key)
+
+    # Reads
+
+    def vendor(self, vendor_id: str) -> Optional[Dict[str, Any]]:
+        row = self.rows.get(vendor_id)
+        return self._row(row) if row is not None else None
+
+    def _row(self, row: int) -> Dict[str, Any]:
+        return {
+            "vendor_id": self.vendor_ids[row],
+            "vendor_name": self.names[row],
+            "domain": self.domains[row],
+            "risk_score": self.scores[row],
+            "risk_level": self.levels[self.level_codes[row]],
+            "last_assessment": from_millis(self.assessed_ms[row]),
+            "updated_at": from_millis(self.updated_ms[row]),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        total = len(self)
+        return {
+            "total_vendors": total,
+            "risk_levels": dict(zip(self.levels, self.level_counts)),
+            "average_risk_score": round(self.score_sum / total, 1) if total else 0.0,
+            "version": self.version,
+            "updated_at": from_millis(self.updated_at) if self.updated_at is not None else None,
+        }
+
+    def histogram(self, bin_width: int = 10, level: Optional[str] = None) -> List[Dict[str, int]]:
+        """Vendor counts in score bins [min_score, max_score], from 0 to 100"""
+        if level is not None:
+            counts = self.score_counts[self.level_index[level]]
+        else:
+            counts = [sum(column) for column in zip(*self.score_counts)]
+        return [
+            {"min_score": low, "max_score": min(low + bin_width - 1, MAX_SCORE), "count": sum(counts[low:low + bin_width])}
+            for low in range(0, MAX_SCORE + 1, bin_width)
+        ]
+
+    def page(
+        self,
+        level: Optional[str] = None,
+        descending: bool = False,
+        limit: int = 50,
+        offset: int = 0,
+        after: Optional[Key] = None,
+    ) -> Dict[str, Any]:
+        """
+        A page of vendors in score order (ascending: riskiest first)
+
+        after (the last (score, vendor_id) of the previous page) continues
+        from that vendor and is stable while the portfolio changes; otherwise
+        offset is used.
+        """
+        keys = self.by_score if level is None else self.by_level_score[self.level_index[level]]
+        total = len(keys)
+        if descending:
+            end = max(0, bisect_left(keys, after) if after is not None else total - offset)
+            selected = keys[max(0, end - limit):end][::-1]
+            more = end - limit > 0
+        else:
+            start = bisect_right(keys, after) if after is not None else offset
+            selected = keys[start:start + limit]
+            more = start + limit < total
+        rows = self.rows
+        vendors = [self._row(rows[vendor_id]) for _, vendor_id in selected]
+        last = selected[-1] if more and selected else None
+        return {
+            "total": total,
+            "vendors": vendors,
+            "next_after": {"score": last[0], "vendor_id": last[1]} if last is not None else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"vendors": len(self), "version": self.version}
+
+
+class QueryCache:
+    """Encoded responses of the current index version, by request path and query"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self.entries: Dict[str, bytes] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, version: int, key: str) -> Optional[bytes]:
+        if version != self.version:
+            self.entries = {}
+            self.version = version
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def put(self, key: str, body: bytes) -> None:
+        if len(self.entries) < self.max_entries:
+            self.entries[key] = body
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "entries": len(self.entries),
+            "version": self.version,
+        }
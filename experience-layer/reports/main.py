@@ -1,29 +1,82 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse, HTMLResponse
+from fastapi.responses import FileResponse, StreamingResponse, HTMLResponse, PlainTextResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterator
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from jinja2 import Environment, FileSystemLoader, select_autoescape
-from weasyprint import HTML
-import httpx
+from starlette.background import BackgroundTask
+import asyncio
 import io
+import json
 import logging
+import os
+import shutil
+import tempfile
+import time
+from grc_shared import instrumentation
+import metrics_engine
+import pdf_pool
+import report_jobs
 
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by grc_shared/gunicorn.conf.py, or below when run directly
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Executive Reports Service",
-    description="Automated report generation for vendor risk assessments",
-    version="1.0.0"
-)
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates"))
+REPORT_STYLESHEET = "report.css"
 
 # Jinja2 template environment
 env = Environment(
-    loader=FileSystemLoader('templates'),
+    loader=FileSystemLoader(TEMPLATE_DIR),
     autoescape=select_autoescape(['html', 'xml'])
 )
 
+# PDF rendering runs in worker processes; at most PDF_WORKERS + PDF_MAX_QUEUE
+# renders are admitted, further requests get 429 with Retry-After
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+PDF_MAX_QUEUE = int(os.getenv("PDF_MAX_QUEUE", "8"))
+
+# Reports above REPORT_STREAM_THRESHOLD vendors are rendered REPORT_CHUNK_SIZE
+# vendors at a time, so memory does not grow with the report
+REPORT_STREAM_THRESHOLD = int(os.getenv("REPORT_STREAM_THRESHOLD", "5000"))
+REPORT_CHUNK_SIZE = int(os.getenv("REPORT_CHUNK_SIZE", "500"))
+HTML_FLUSH_BYTES = 64 * 1024
+
+# Length of the riskiest-vendor and biggest-mover lists in report metrics
+REPORT_TOP_N = int(os.getenv("REPORT_TOP_N", "10"))
+
+# Request rates and latencies, render stage timings and pool/cache state for /metrics
+telemetry = instrumentation.ServiceMetrics("reports")
+
+pdf_renderer = pdf_pool.PdfRenderPool(
+    TEMPLATE_DIR, [REPORT_STYLESHEET], PDF_WORKERS, PDF_MAX_QUEUE, observe_stage=telemetry.observe_stage
+)
+
+def preload_templates() -> None:
+    """Parse and compile every report template into the environment's cache"""
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Parse templates and start the warmed PDF render pool"""
+    preload_templates()
+    try:
+        await pdf_renderer.start()
+    except Exception as e:
+        # HTML reports still work; PDF requests will report the error
+        logger.error(f"Error starting PDF render pool: {str(e)}")
+    yield
+    pdf_renderer.shutdown()
+
+app = FastAPI(
+    title="Executive Reports Service",
+    description="Automated report generation for vendor risk assessments",
+    version="1.0.0",
+    lifespan=lifespan
+)
+app.add_middleware(instrumentation.MetricsMiddleware, metrics=telemetry)
+
 class VendorSummary(BaseModel):
     """Vendor information for report"""
     vendor_id: str
@@ -40,6 +93,8 @@ class ReportRequest(BaseModel):
     vendors: List[VendorSummary]
     include_charts: bool = Field(default=True)
     format: str = Field(default="pdf", pattern="^(pdf|html)$")
+    chunk_size: Optional[int] = Field(default=None, ge=10, le=10000, description="Render the vendor table this many rows at a time")
+    previous_period_vendors: Optional[List[VendorSummary]] = Field(default=None, description="Vendor list of the previous period, for trend metrics")
 
 class ReportMetrics(BaseModel):
     """Overall metrics for the report"""
@@ -51,6 +106,55 @@ class ReportMetrics(BaseModel):
     minimal_risk: int
     average_risk_score: float
 
+class ScoreHistogramBucket(BaseModel):
+    """Vendors with min_score <= risk_score <= max_score"""
+    min_score: int
+    max_score: int
+    count: int
+
+class TldBreakdown(BaseModel):
+    """Metrics for vendors whose domain ends in one TLD"""
+    tld: str
+    vendors: int
+    average_risk_score: float
+    risk_levels: Dict[str, int]
+
+class VendorRiskEntry(BaseModel):
+    """One vendor in a ranked list"""
+    vendor_id: str
+    vendor_name: str
+    domain: str
+    risk_score: int
+    risk_level: str
+    last_assessment: str
+
+class VendorScoreChange(VendorRiskEntry):
+    """A vendor whose score moved since the previous period"""
+    previous_risk_score: int
+    score_delta: int
+
+class MetricsTrend(BaseModel):
+    """Changes against the previous period's vendor list"""
+    previous_total_vendors: int
+    total_vendors_delta: int
+    average_risk_score_delta: float
+    median_risk_score_delta: float
+    risk_level_deltas: Dict[str, int]
+    new_vendors: int
+    removed_vendors: int
+    improved_vendors: int
+    worsened_vendors: int
+    biggest_improvements: List[VendorScoreChange]
+    biggest_declines: List[VendorScoreChange]
+
+class DetailedReportMetrics(ReportMetrics):
+    """ReportMetrics plus distribution, TLD, top-N and trend metrics"""
+    score_percentiles: Dict[str, float]
+    score_histogram: List[ScoreHistogramBucket]
+    tld_breakdown: List[TldBreakdown]
+    top_riskiest: List[VendorRiskEntry]
+    trend: Optional[MetricsTrend] = None
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -65,48 +169,254 @@ async def generate_report(request: ReportRequest):
     """
     Generate an executive summary report
     
-    Returns PDF or HTML based on format parameter
+    Returns PDF or HTML based on format parameter. Reports with a
+    chunk_size, or more than REPORT_STREAM_THRESHOLD vendors, are produced
+    in chunks: HTML is streamed as it renders, PDF is rendered section by
+    section and sent once the sections are merged.
     """
     try:
         logger.info(f"Generating {request.format} report: {request.report_title}")
+        chunk_size = report_chunk_size(request)
+        filename = f"vendor_risk_report_{datetime.now().strftime('%Y%m%d')}.pdf"
         
-        # Calculate metrics
-        metrics = calculate_metrics(request.vendors)
-        
-        # Prepare template data
-        template_data = {
-            "title": request.report_title,
-            "period": request.report_period,
-            "generated_date": datetime.now().strftime("%B %d, %Y"),
-            "vendors": request.vendors,
-            "metrics": metrics,
-            "include_charts": request.include_charts
-        }
+        if request.format == "html" and chunk_size:
+            return StreamingResponse(iter_report_html(request), media_type="text/html; charset=utf-8")
         
-        # Render HTML template
-        template = env.get_template('executive_summary.html')
-        html_content = template.render(**template_data)
+        try:
+            if request.format == "pdf" and chunk_size:
+                directory = tempfile.mkdtemp(prefix="grc-report-")
+                try:
+                    path = await render_report_sections(request, chunk_size, directory)
+                except BaseException:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    raise
+                return FileResponse(
+                    path,
+                    media_type="application/pdf",
+                    filename=filename,
+                    background=BackgroundTask(shutil.rmtree, directory, ignore_errors=True)
+                )
+            content = await render_report(request)
+        except pdf_pool.PoolSaturated as e:
+            logger.warning(f"Rejecting report {request.report_title}: {str(e)}")
+            raise HTTPException(
+                status_code=429,
+                detail="PDF rendering is at capacity, retry later",
+                headers={"Retry-After": str(e.retry_after)}
+            )
         
         if request.format == "html":
-            return HTMLResponse(content=html_content)
-        
-        # Generate PDF
-        pdf_buffer = io.BytesIO()
-        HTML(string=html_content).write_pdf(pdf_buffer)
-        pdf_buffer.seek(0)
-        
-        filename = f"vendor_risk_report_{datetime.now().strftime('%Y%m%d')}.pdf"
+            return HTMLResponse(content=content)
         
         return StreamingResponse(
-            pdf_buffer,
+            io.BytesIO(content),
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating report: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
 
+def report_chunk_size(request: ReportRequest) -> Optional[int]:
+    """Vendors per chunk, or None to render the report in one piece"""
+    if request.chunk_size:
+        return request.chunk_size
+    if len(request.vendors) > REPORT_STREAM_THRESHOLD:
+        return REPORT_CHUNK_SIZE
+    return None
+
+def report_template_data(request: ReportRequest, metrics: ReportMetrics) -> Dict:
+    """Template variables shared by every rendering mode"""
+    return {
+        "title": request.report_title,
+        "period": request.report_period,
+        "generated_date": datetime.now().strftime("%B %d, %Y"),
+        "vendors": request.vendors,
+        "metrics": metrics,
+        "include_charts": request.include_charts,
+        "inline_styles": True
+    }
+
+async def render_report(request: ReportRequest) -> bytes:
+    """Render a report to HTML or PDF bytes; raises PoolSaturated if PDF rendering is at capacity"""
+    # Calculate metrics
+    metrics = calculate_metrics(request.vendors, request.previous_period_vendors)
+    
+    # Prepare template data
+    template_data = report_template_data(request, metrics)
+    
+    if request.format == "html":
+        # Render HTML template
+        with telemetry.stage("template_render"):
+            template = env.get_template('executive_summary.html')
+            return template.render(**template_data).encode()
+    
+    # Generate PDF in a worker, which applies its pre-parsed stylesheet
+    template_data.update(
+        vendors=[vendor.model_dump() for vendor in request.vendors],
+        metrics=metrics.model_dump(),
+        inline_styles=False
+    )
+    return await pdf_renderer.render('executive_summary.html', template_data)
+
+def iter_report_html(request: ReportRequest) -> Iterator[str]:
+    """Render the HTML report incrementally, in pieces of about HTML_FLUSH_BYTES"""
+    template_data = report_template_data(request, calculate_metrics(request.vendors, request.previous_period_vendors))
+    buffer: List[str] = []
+    size = 0
+    # The first piece goes out at once so the client sees the report start
+    flush_at = 0
+    # Time spent rendering, not waiting for the client to take each piece
+    rendering = 0.0
+    lap = time.perf_counter()
+    try:
+        for piece in env.get_template('executive_summary.html').generate(**template_data):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= flush_at:
+                rendering += time.perf_counter() - lap
+                yield "".join(buffer)
+                lap = time.perf_counter()
+                buffer.clear()
+                size = 0
+                flush_at = HTML_FLUSH_BYTES
+        rendering += time.perf_counter() - lap
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        telemetry.observe_stage("template_render", rendering)
+
+async def render_report_sections(request: ReportRequest, chunk_size: int, directory: str) -> str:
+    """Render a PDF report chunk_size vendors at a time into directory; returns the merged file"""
+    metrics = calculate_metrics(request.vendors, request.previous_period_vendors)
+    base_data = report_template_data(request, metrics)
+    base_data.update(metrics=metrics.model_dump(), inline_styles=False)
+    vendors = request.vendors
+    
+    def sections():
+        for offset in range(0, max(len(vendors), 1), chunk_size):
+            yield {
+                **base_data,
+                "vendors": [vendor.model_dump() for vendor in vendors[offset:offset + chunk_size]],
+                "first": offset == 0
+            }
+    
+    return await pdf_renderer.render_sections('executive_summary_section.html', sections(), directory)
+
+async def write_report(request: ReportRequest, path: str) -> None:
+    """Render a report to a file for a background job, waiting for PDF capacity instead of failing"""
+    chunk_size = report_chunk_size(request)
+    if request.format == "html":
+        def write_html():
+            with open(path, "w", encoding="utf-8") as f:
+                for piece in iter_report_html(request):
+                    f.write(piece)
+        await asyncio.to_thread(write_html)
+        return
+    
+    while True:
+        try:
+            if chunk_size:
+                directory = tempfile.mkdtemp(prefix=".sections.", dir=os.path.dirname(path))
+                try:
+                    os.replace(await render_report_sections(request, chunk_size, directory), path)
+                finally:
+                    shutil.rmtree(directory, ignore_errors=True)
+            else:
+                content = await render_report(request)
+                with open(path, "wb") as f:
+                    f.write(content)
+            return
+        except pdf_pool.PoolSaturated as e:
+            await asyncio.sleep(e.retry_after)
+
+# Finished reports are cached under a hash of the request and the templates.
+# Job state is held in memory by the process that accepted the job.
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "grc-report-cache"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+REPORT_JOB_CONCURRENCY = int(os.getenv("REPORT_JOB_CONCURRENCY", str(PDF_WORKERS)))
+REPORT_JOB_HISTORY = int(os.getenv("REPORT_JOB_HISTORY", "1000"))
+
+TEMPLATE_VERSION = report_jobs.template_version(TEMPLATE_DIR)
+artifact_store = report_jobs.ArtifactStore(REPORT_CACHE_DIR, REPORT_CACHE_MAX_BYTES)
+report_queue = report_jobs.JobQueue(artifact_store, write_report, REPORT_JOB_CONCURRENCY, REPORT_JOB_HISTORY)
+
+def job_response(job: report_jobs.Job) -> Dict:
+    return {
+        **job.to_dict(),
+        "status_url": f"/api/jobs/{job.id}",
+        "events_url": f"/api/jobs/{job.id}/events",
+        "artifact_url": f"/api/jobs/{job.id}/artifact"
+    }
+
+def get_job_or_404(job_id: str) -> report_jobs.Job:
+    job = report_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+@app.post("/api/jobs", status_code=202)
+async def submit_report_job(request: ReportRequest):
+    """
+    Queue a report for background generation
+
+    Returns a job id immediately. Identical requests (same content and
+    templates) complete at once from the artifact cache, and identical
+    requests submitted while one is rendering share that render.
+    """
+    try:
+        key = report_jobs.request_key(request, TEMPLATE_VERSION)
+        job = report_queue.submit(request, key, request.format)
+        logger.info(f"Report job {job.id} ({job.status}): {request.report_title}")
+        return job_response(job)
+    
+    except Exception as e:
+        logger.error(f"Error submitting report job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error submitting report job: {str(e)}")
+
+@app.get("/api/jobs/{job_id}")
+async def get_report_job(job_id: str):
+    """Report job status"""
+    return job_response(get_job_or_404(job_id))
+
+@app.get("/api/jobs/{job_id}/events")
+async def report_job_events(job_id: str):
+    """Server-sent events with the job status on every change, until it finishes"""
+    job = get_job_or_404(job_id)
+    
+    async def stream():
+        async for state in report_queue.events(job):
+            yield f"event: status\ndata: {json.dumps(state)}\n\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/jobs/{job_id}/artifact")
+async def download_report_job(job_id: str):
+    """Download a finished report"""
+    job = get_job_or_404(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    path = artifact_store.path(job.key)
+    if path is None:
+        raise HTTPException(status_code=410, detail="Report was evicted from the cache; submit the request again")
+    
+    filename = f"vendor_risk_report_{job.finished_at[:10].replace('-', '')}.{job.extension}"
+    return FileResponse(
+        path,
+        media_type=report_jobs.MEDIA_TYPES[job.extension],
+        filename=filename if job.extension == "pdf" else None
+    )
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Report artifact cache and job counters"""
+    return {"template_version": TEMPLATE_VERSION, **artifact_store.stats(), **report_queue.stats()}
+
 @app.get("/api/demo")
 async def generate_demo_report():
     """Generate a demo report with sample data"""
@@ -154,37 +464,55 @@ async def generate_demo_report():
     
     return await generate_report(request)
 
-def calculate_metrics(vendors: List[VendorSummary]) -> ReportMetrics:
-    """Calculate overall metrics from vendor list"""
-    total = len(vendors)
-    
-    # Count by risk level
-    risk_counts = {
-        "critical": 0,
-        "high": 0,
-        "medium": 0,
-        "low": 0,
-        "minimal": 0
-    }
-    
-    total_score = 0
-    for vendor in vendors:
-        risk_level = vendor.risk_level.lower()
-        if risk_level in risk_counts:
-            risk_counts[risk_level] += 1
-        total_score += vendor.risk_score
-    
-    avg_score = total_score / total if total > 0 else 0
+def calculate_metrics(
+    vendors: List[VendorSummary],
+    previous_vendors: Optional[List[VendorSummary]] = None,
+    top_n: int = REPORT_TOP_N
+) -> DetailedReportMetrics:
+    """Calculate overall, distribution, TLD, top-N and trend metrics in one vectorized pass"""
+    with telemetry.stage("report_metrics"):
+        return DetailedReportMetrics.model_validate(
+            metrics_engine.compute_metrics(vendors, previous_vendors, top_n)
+        )
+
+@app.post("/api/metrics", response_model=DetailedReportMetrics)
+async def report_metrics(request: ReportRequest):
+    """Report metrics without rendering the report"""
+    try:
+        return calculate_metrics(request.vendors, request.previous_period_vendors)
     
-    return ReportMetrics(
-        total_vendors=total,
-        critical_risk=risk_counts["critical"],
-        high_risk=risk_counts["high"],
-        medium_risk=risk_counts["medium"],
-        low_risk=risk_counts["low"],
-        minimal_risk=risk_counts["minimal"],
-        average_risk_score=round(avg_score, 1)
-    )
+    except Exception as e:
+        logger.error(f"Error calculating report metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error calculating metrics: {str(e)}")
+
+@app.get("/api/render/stats")
+async def render_stats():
+    """PDF render pool utilization, queue wait and render time"""
+    return pdf_renderer.stats()
+
+def collect_render_metrics() -> List[instrumentation.Family]:
+    """PDF pool, report job and artifact cache state, read at scrape time"""
+    pool = pdf_renderer.stats()
+    jobs = report_queue.stats()
+    return [
+        *instrumentation.cache_families("artifacts", artifact_store.stats(), ("hits", "misses", "evictions"), "artifacts"),
+        ("grc_pdf_workers_busy", "gauge", "PDF render workers currently rendering", [({}, pool["busy_workers"])]),
+        ("grc_pdf_renders_queued", "gauge", "PDF renders waiting for a worker", [({}, pool["queued"])]),
+        ("grc_pdf_renders_total", "counter", "PDF renders by outcome", [
+            ({"outcome": outcome}, pool[outcome]) for outcome in ("rendered", "failed", "rejected")
+        ]),
+        ("grc_report_jobs", "gauge", "Report jobs held in memory, by status",
+         [({"status": status}, count) for status, count in jobs["jobs"].items()]),
+        ("grc_report_jobs_submitted_total", "counter", "Report jobs submitted", [({}, jobs["submitted"])]),
+        ("grc_report_jobs_coalesced_total", "counter", "Report jobs that joined an identical render", [({}, jobs["coalesced"])]),
+    ]
+
+telemetry.collect(collect_render_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, render stage, render pool and cache metrics in the Prometheus text format"""
+    return PlainTextResponse(telemetry.render(), media_type=instrumentation.CONTENT_TYPE)
 
 @app.get("/")
 async def root():
@@ -196,10 +524,28 @@ async def root():
             "/health",
             "/api/generate",
             "/api/demo",
+            "/api/metrics",
+            "/api/render/stats",
+            "/api/jobs",
+            "/api/cache/stats",
+            "/metrics",
             "/docs"
         ]
     }
 
+def preload() -> None:
+    """
+    Parse the templates and build the OpenAPI schema before workers start
+
+    grc_shared/gunicorn.conf.py calls this in the master process, so forked workers share
+    the compiled templates (their lifespan then finds them cached) and the
+    schema behind /docs. WeasyPrint is only ever imported by the PDF workers.
+    """
+    preload_templates()
+    app.openapi()
+
 if __name__ == "__main__":
     import uvicorn
+    # LOG_LEVEL=WARNING drops the per-request INFO lines
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
     uvicorn.run(app, host="0.0.0.0", port=5003)
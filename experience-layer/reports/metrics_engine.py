@@ -0,0 +1,186 @@
+"""
+Vectorized report metrics
+
+VendorColumns reads the vendor list once into arrays (score, level code, TLD,
+vendor_id). Every aggregate is then derived from those arrays: level counts,
+score histogram and TLD groups with bincount, percentiles and the riskiest
+vendors from a single argsort of the scores, and trend deltas against a
+previous period with one sorted join on vendor_id.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+RISK_LEVELS = ("critical", "high", "medium", "low", "minimal")
+# Level code for risk_level values outside RISK_LEVELS: counted nowhere, scored as usual
+OTHER_LEVEL = len(RISK_LEVELS)
+LEVEL_CODES = {level: code for code, level in enumerate(RISK_LEVELS)}
+
+PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+HISTOGRAM_BUCKET_WIDTH = 10
+HISTOGRAM_BUCKETS = 100 // HISTOGRAM_BUCKET_WIDTH
+
+
+class VendorColumns:
+    """Columns of a vendor list, built in one pass"""
+
+    def __init__(self, vendors: Sequence[Any]):
+        self.vendors = vendors
+        scores, levels, ids, tlds = [], [], [], []
+        for v in vendors:
+            scores.append(v.risk_score)
+            levels.append(LEVEL_CODES.get(v.risk_level.lower(), OTHER_LEVEL))
+            ids.append(v.vendor_id)
+            tlds.append(v.domain.rstrip(".").rsplit(".", 1)[-1].lower())
+        self.scores = np.array(scores, dtype=np.int64)
+        self.levels = np.array(levels, dtype=np.int64)
+        self.ids = np.array(ids, dtype=str)
+        self.tld_names, self.tld_codes = np.unique(np.array(tlds, dtype=str), return_inverse=True)
+        # Ascending score, stable, so ties keep request order; shared by every ranked metric
+        self.order = np.argsort(self.scores, kind="stable")
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+
+def level_counts(columns: VendorColumns) -> Dict[str, int]:
+    counts = np.bincount(columns.levels, minlength=OTHER_LEVEL + 1)
+    return dict(zip(RISK_LEVELS, counts[:OTHER_LEVEL].tolist()))
+
+
+def percentiles(columns: VendorColumns) -> Dict[str, float]:
+    """Linear-interpolated percentiles (numpy's default method) from the sorted scores"""
+    if not len(columns):
+        return {f"p{q}": 0.0 for q in PERCENTILES}
+    ranked = columns.scores[columns.order]
+    position = np.array(PERCENTILES) / 100 * (len(ranked) - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    values = ranked[low] + (ranked[high] - ranked[low]) * (position - low)
+    return {f"p{q}": round(float(value), 2) for q, value in zip(PERCENTILES, values)}
+
+
+def histogram(columns: VendorColumns) -> List[Dict[str, int]]:
+    """Vendor counts per score bucket; the last bucket includes 100"""
+    buckets = np.minimum(columns.scores // HISTOGRAM_BUCKET_WIDTH, HISTOGRAM_BUCKETS - 1)
+    counts = np.bincount(buckets, minlength=HISTOGRAM_BUCKETS)
+    return [
+        {
+            "min_score": i * HISTOGRAM_BUCKET_WIDTH,
+            "max_score": 100 if i == HISTOGRAM_BUCKETS - 1 else (i + 1) * HISTOGRAM_BUCKET_WIDTH - 1,
+            "count": count,
+        }
+        for i, count in enumerate(counts.tolist())
+    ]
+
+
+def tld_breakdown(columns: VendorColumns) -> List[Dict[str, Any]]:
+    """Vendor count, average score and level counts per TLD, largest first"""
+    groups = len(columns.tld_names)
+    counts = np.bincount(columns.tld_codes, minlength=groups)
+    sums = np.bincount(columns.tld_codes, weights=columns.scores, minlength=groups)
+    by_level = np.bincount(
+        columns.tld_codes * (OTHER_LEVEL + 1) + columns.levels, minlength=groups * (OTHER_LEVEL + 1)
+    ).reshape(groups, OTHER_LEVEL + 1)
+    ranking = np.lexsort((columns.tld_names, -counts))
+    return [
+        {
+            "tld": str(columns.tld_names[g]),
+            "vendors": int(counts[g]),
+            "average_risk_score": round(float(sums[g] / counts[g]), 1),
+            "risk_levels": dict(zip(RISK_LEVELS, by_level[g, :OTHER_LEVEL].tolist())),
+        }
+        for g in ranking.tolist()
+    ]
+
+
+def vendor_entry(vendor: Any) -> Dict[str, Any]:
+    return {
+        "vendor_id": vendor.vendor_id,
+        "vendor_name": vendor.vendor_name,
+        "domain": vendor.domain,
+        "risk_score": vendor.risk_score,
+        "risk_level": vendor.risk_level,
+        "last_assessment": vendor.last_assessment,
+    }
+
+
+def riskiest(columns: VendorColumns, top_n: int) -> List[Dict[str, Any]]:
+    """Lowest-scoring vendors (lower = riskier), in request order among ties"""
+    return [vendor_entry(columns.vendors[i]) for i in columns.order[:top_n].tolist()]
+
+
+def trend(current: VendorColumns, previous: VendorColumns, top_n: int) -> Dict[str, Any]:
+    """Deltas against the previous period, plus per-vendor movers joined on vendor_id"""
+    current_counts = level_counts(current)
+    previous_counts = level_counts(previous)
+    current_average = float(current.scores.mean()) if len(current) else 0.0
+    previous_average = float(previous.scores.mean()) if len(previous) else 0.0
+    current_median = percentiles(current)["p50"]
+    previous_median = percentiles(previous)["p50"]
+
+    # Sorted join: position of each current vendor_id among the previous ids
+    sorter = np.argsort(previous.ids, kind="stable")
+    sorted_ids = previous.ids[sorter]
+    position = np.searchsorted(sorted_ids, current.ids)
+    in_range = position < len(sorted_ids)
+    matched = np.zeros(len(current), dtype=bool)
+    matched[in_range] = sorted_ids[position[in_range]] == current.ids[in_range]
+    current_index = np.flatnonzero(matched)
+    previous_index = sorter[position[matched]]
+    deltas = current.scores[current_index] - previous.scores[previous_index]
+
+    def movers(sign: int) -> List[Dict[str, Any]]:
+        signed = deltas * sign
+        candidates = np.flatnonzero(signed > 0)
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-signed[candidates], top_n - 1)[:top_n]]
+        candidates = candidates[np.lexsort((candidates, -signed[candidates]))]
+        return [
+            {
+                **vendor_entry(current.vendors[current_index[k]]),
+                "previous_risk_score": int(previous.scores[previous_index[k]]),
+                "score_delta": int(deltas[k]),
+            }
+            for k in candidates.tolist()
+        ]
+
+    return {
+        "previous_total_vendors": len(previous),
+        "total_vendors_delta": len(current) - len(previous),
+        "average_risk_score_delta": round(current_average - previous_average, 1),
+        "median_risk_score_delta": round(current_median - previous_median, 2),
+        "risk_level_deltas": {level: current_counts[level] - previous_counts[level] for level in RISK_LEVELS},
+        "new_vendors": len(current) - len(current_index),
+        "removed_vendors": len(previous) - len(current_index),
+        "improved_vendors": int(np.count_nonzero(deltas > 0)),
+        "worsened_vendors": int(np.count_nonzero(deltas < 0)),
+        "biggest_improvements": movers(1) if top_n else [],
+        "biggest_declines": movers(-1) if top_n else [],
+    }
+
+
+def compute_metrics(
+    vendors: Sequence[Any], previous_vendors: Optional[Sequence[Any]] = None, top_n: int = 10
+) -> Dict[str, Any]:
+    """Every report metric for a vendor list, keyed like DetailedReportMetrics"""
+    columns = VendorColumns(vendors)
+    counts = level_counts(columns)
+    total = len(columns)
+    metrics = {
+        "total_vendors": total,
+        "critical_risk": counts["critical"],
+        "high_risk": counts["high"],
+        "medium_risk": counts["medium"],
+        "low_risk": counts["low"],
+        "minimal_risk": counts["minimal"],
+        "average_risk_score": round(float(columns.scores.sum()) / total, 1) if total else 0,
+        "score_percentiles": percentiles(columns),
+        "score_histogram": histogram(columns),
+        "tld_breakdown": tld_breakdown(columns),
+        "top_riskiest": riskiest(columns, top_n),
+        "trend": None,
+    }
+    if previous_vendors is not None:
+        metrics["trend"] = trend(columns, VendorColumns(previous_vendors), top_n)
+    return metrics
@@ -0,0 +1,206 @@
+"""
+Streaming PDF concatenation
+
+merge_pdfs() copies each input's pages, and every object they reference, to
+the output as soon as it has read the input, then closes the input. Only one
+input's objects are in memory at a time, along with a byte offset per object
+written, an object number per page and the outline entries. The page tree,
+outline, catalog and cross-reference table are written last.
+
+pypdf parses the inputs and serializes the objects. Each input's object
+numbers are renumbered into the output's, and its pages are given the
+output's page tree as parent, with the attributes they inherited from their
+own tree copied onto them.
+"""
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    PdfObject,
+    StreamObject,
+    TextStringObject,
+)
+
+# (level, title, page index in the output, left, top)
+OutlineEntry = Tuple[int, str, int, Optional[PdfObject], Optional[PdfObject]]
+
+
+def _reference(number: int) -> IndirectObject:
+    return IndirectObject(number, 0, None)
+
+
+class _Output:
+    """A PDF file written one object at a time, with each object's byte offset"""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.offsets: List[int] = []
+        f.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def reserve(self) -> int:
+        """A new object number, for an object written later"""
+        self.offsets.append(0)
+        return len(self.offsets)
+
+    def write(self, number: int, obj: PdfObject) -> None:
+        self.offsets[number - 1] = self.f.tell()
+        self.f.write(f"{number} 0 obj\n".encode())
+        obj.write_to_stream(self.f)
+        self.f.write(b"\nendobj\n")
+
+    def finish(self, catalog: int, info: Optional[int]) -> None:
+        start = self.f.tell()
+        self.f.write(f"xref\n0 {len(self.offsets) + 1}\n0000000000 65535 f \n".encode())
+        for offset in self.offsets:
+            self.f.write(f"{offset:010d} 00000 n \n".encode())
+        info_entry = f" /Info {info} 0 R" if info is not None else ""
+        self.f.write(f"trailer\n<< /Size {len(self.offsets) + 1} /Root {catalog} 0 R{info_entry} >>\n".encode())
+        self.f.write(f"startxref\n{start}\n%%EOF\n".encode())
+
+
+def _copy_input(reader: PdfReader, out: _Output, pages_root: int, with_info: bool) -> Tuple[List[int], Optional[int]]:
+    """Write an input's pages, and its document information if with_info; returns their object numbers"""
+    numbers: Dict[Tuple[int, int], int] = {}
+    pending: List[IndirectObject] = []
+
+    def reference(ref: IndirectObject) -> IndirectObject:
+        key = (ref.idnum, ref.generation)
+        if key not in numbers:
+            numbers[key] = out.reserve()
+            pending.append(ref)
+        return _reference(numbers[key])
+
+    def copy(obj):
+        if isinstance(obj, IndirectObject):
+            return reference(obj)
+        if isinstance(obj, StreamObject):
+            duplicate = StreamObject()
+            # The stream's bytes as read, still encoded with its /Filter
+            duplicate._data = obj._data
+            for key, value in obj.items():
+                if key != "/Length":
+                    duplicate[NameObject(key)] = copy(value)
+            return duplicate
+        if isinstance(obj, DictionaryObject):
+            page = obj.get("/Type") == "/Page"
+            duplicate = DictionaryObject()
+            for key, value in obj.items():
+                # A page's own page tree is not copied; it joins the output's
+                if not (page and key == "/Parent"):
+                    duplicate[NameObject(key)] = copy(value)
+            if page:
+                duplicate[NameObject("/Parent")] = _reference(pages_root)
+            return duplicate
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(copy(value) for value in obj)
+        return obj
+
+    # reader.pages copies inherited attributes (/Resources, /MediaBox, ...) onto each page
+    pages = [reference(page.indirect_reference) for page in reader.pages]
+    info = reader.trailer.get("/Info") if with_info else None
+    info = reference(info) if isinstance(info, IndirectObject) else None
+    while pending:
+        ref = pending.pop()
+        obj = ref.get_object()
+        out.write(numbers[(ref.idnum, ref.generation)], NullObject() if obj is None else copy(obj))
+    return [page.idnum for page in pages], info.idnum if info is not None else None
+
+
+def _outline_entries(reader: PdfReader, first_page: int, items=None, level: int = 0) -> List[OutlineEntry]:
+    """An input's outline, flattened in order with each entry's depth"""
+    entries = []
+    for item in reader.outline if items is None else items:
+        if isinstance(item, list):
+            entries.extend(_outline_entries(reader, first_page, item, level + 1))
+            continue
+        page = reader.get_destination_page_number(item)
+        if page >= 0:
+            entries.append((level, str(item.title), first_page + page, item.left, item.top))
+    return entries
+
+
+def _write_outline(out: _Output, entries: List[OutlineEntry], pages: List[int]) -> int:
+    """Write the outline tree for entries; returns its root object number"""
+    root = out.reserve()
+    numbers = [out.reserve() for _ in entries]
+    parents: List[Optional[int]] = []
+    stack: List[int] = []
+    for index, (level, *_) in enumerate(entries):
+        while stack and entries[stack[-1]][0] >= level:
+            stack.pop()
+        parents.append(stack[-1] if stack else None)
+        stack.append(index)
+    children: Dict[Optional[int], List[int]] = {None: []}
+    for index, parent in enumerate(parents):
+        children.setdefault(index, [])
+        children[parent].append(index)
+    descendants = [0] * len(entries)
+    for index in reversed(range(len(entries))):
+        descendants[index] = sum(1 + descendants[child] for child in children[index])
+    neighbours: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+    for kids in children.values():
+        for position, index in enumerate(kids):
+            neighbours[index] = (kids[position - 1] if position > 0 else None, kids[position + 1] if position + 1 < len(kids) else None)
+
+    def links(item: DictionaryObject, kids: List[int]) -> None:
+        if kids:
+            item[NameObject("/First")] = _reference(numbers[kids[0]])
+            item[NameObject("/Last")] = _reference(numbers[kids[-1]])
+
+    for index, (level, title, page, left, top) in enumerate(entries):
+        parent = parents[index]
+        item = DictionaryObject({
+            NameObject("/Title"): TextStringObject(title),
+            NameObject("/Parent"): _reference(root if parent is None else numbers[parent]),
+            NameObject("/Dest"): ArrayObject([
+                _reference(pages[page]), NameObject("/XYZ"),
+                NullObject() if left is None else left, NullObject() if top is None else top, NullObject(),
+            ]),
+        })
+        previous, following = neighbours[index]
+        if previous is not None:
+            item[NameObject("/Prev")] = _reference(numbers[previous])
+        if following is not None:
+            item[NameObject("/Next")] = _reference(numbers[following])
+        links(item, children[index])
+        if children[index]:
+            item[NameObject("/Count")] = NumberObject(descendants[index])
+        out.write(numbers[index], item)
+    outline = DictionaryObject({NameObject("/Type"): NameObject("/Outlines"), NameObject("/Count"): NumberObject(len(entries))})
+    links(outline, children[None])
+    out.write(root, outline)
+    return root
+
+
+def merge_pdfs(paths: List[str], out_path: str) -> None:
+    """Concatenate PDF files in order into out_path, holding one input in memory at a time"""
+    with open(out_path, "wb") as f:
+        out = _Output(f)
+        catalog = out.reserve()
+        pages_root = out.reserve()
+        pages: List[int] = []
+        outline: List[OutlineEntry] = []
+        info = None
+        for path in paths:
+            with PdfReader(path) as reader:
+                outline.extend(_outline_entries(reader, len(pages)))
+                # The document information (title, producer) of the first input
+                section_pages, section_info = _copy_input(reader, out, pages_root, with_info=not pages)
+            pages.extend(section_pages)
+            info = info if info is not None else section_info
+        out.write(pages_root, DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(_reference(number) for number in pages),
+            NameObject("/Count"): NumberObject(len(pages)),
+        }))
+        root = DictionaryObject({NameObject("/Type"): NameObject("/Catalog"), NameObject("/Pages"): _reference(pages_root)})
+        if outline:
+            root[NameObject("/Outlines")] = _reference(_write_outline(out, outline, pages))
+        out.write(catalog, root)
+        out.finish(catalog, info)
@@ -0,0 +1,248 @@
+"""
+Process pool for PDF rendering
+
+WeasyPrint layout is CPU-bound and holds the GIL, so PDFs are rendered in
+worker processes. Each worker parses every template and the shared stylesheet
+once at startup and renders a throwaway page to load fonts, so requests only
+pay for their own layout. The pool admits at most `workers + max_queue`
+renders at a time; beyond that render() raises PoolSaturated with a
+Retry-After estimate instead of queueing without bound.
+
+render_sections() renders a long report as consecutive sections, each to
+its own file, and merges the files with pdf_merge, which streams them into
+the report one at a time. Neither WeasyPrint nor the merge ever holds more
+than one section, so memory is bounded by the section size rather than the
+report size.
+"""
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pdf_merge import merge_pdfs
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturated(Exception):
+    """Raised when the render queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"PDF render queue is full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+# Worker process state, set once by _init_worker
+_template_dir: Optional[str] = None
+_env = None
+_stylesheets: List[Any] = []
+
+
+def _init_worker(template_dir: str, stylesheet_names: List[str]) -> None:
+    global _template_dir, _env, _stylesheets
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    from weasyprint import CSS, HTML
+
+    _template_dir = template_dir
+    _env = Environment(
+        loader=FileSystemLoader(template_dir),
+        autoescape=select_autoescape(['html', 'xml']),
+        auto_reload=False,
+    )
+    for name in _env.list_templates(extensions=["html"]):
+        _env.get_template(name)
+    _stylesheets = [CSS(filename=os.path.join(template_dir, name)) for name in stylesheet_names]
+    # The first layout loads fonts and fontconfig caches
+    HTML(string="<p>warm-up</p>").write_pdf(stylesheets=_stylesheets)
+
+
+def _render(template_name: str, context: Dict[str, Any], submitted_at: float) -> Tuple[bytes, float, float, float]:
+    """Render a template to PDF; returns (pdf, queue wait, template render, PDF layout and write) seconds"""
+    from weasyprint import HTML
+
+    started_at = time.time()
+    html = _env.get_template(template_name).render(**context)
+    rendered_at = time.time()
+    pdf = HTML(string=html, base_url=_template_dir).write_pdf(stylesheets=_stylesheets)
+    return pdf, started_at - submitted_at, rendered_at - started_at, time.time() - rendered_at
+
+
+def _render_section(template_name: str, context: Dict[str, Any], path: str, submitted_at: float) -> Tuple[int, float, float, float]:
+    """Render one report section to a PDF file; returns (pages, queue wait, template render, PDF layout and write) seconds"""
+    from weasyprint import HTML
+
+    started_at = time.time()
+    html = _env.get_template(template_name).render(**context)
+    rendered_at = time.time()
+    document = HTML(string=html, base_url=_template_dir).render(stylesheets=_stylesheets)
+    document.write_pdf(path)
+    return len(document.pages), started_at - submitted_at, rendered_at - started_at, time.time() - rendered_at
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+class PdfRenderPool:
+    """
+    Bounded process pool with render time, queue wait and utilization counters
+
+    If given, observe_stage(stage, seconds) receives the queue wait, template
+    render, PDF write and merge time of every render.
+    """
+
+    def __init__(self, template_dir: str, stylesheet_names: List[str], workers: int, max_queue: int, observe_stage: Optional[Callable[[str, float], None]] = None):
+        self.template_dir = template_dir
+        self.stylesheet_names = stylesheet_names
+        self.workers = workers
+        self.max_queue = max_queue
+        self.observe_stage = observe_stage
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.rendered = 0
+        self.failed = 0
+        self.rejected = 0
+        self.sections_rendered = 0
+        self.render_seconds = 0.0
+        self.render_seconds_max = 0.0
+        self.queue_wait_seconds = 0.0
+        self.queue_wait_seconds_max = 0.0
+        self.started_at = time.monotonic()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, so workers never inherit the server's threads or event loop
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.template_dir, self.stylesheet_names),
+        )
+
+    async def start(self) -> None:
+        """Start every worker and wait until each has warmed its templates"""
+        self._executor = self._new_executor()
+        self.started_at = time.monotonic()
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _ready) for _ in range(self.workers)))
+        logger.info(f"PDF render pool ready: {len(set(pids))} workers, queue limit {self.max_queue}")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _admit(self) -> None:
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturated(self.retry_after())
+        if self._executor is None:
+            self._executor = self._new_executor()
+        self.in_flight += 1
+
+    async def _submit(self, function, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, function, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); replace the pool for later requests
+            self.failed += 1
+            logger.error("PDF render pool broken; restarting workers")
+            self.shutdown()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+
+    def _observe(self, queue_wait: float, template_seconds: float, pdf_seconds: float) -> None:
+        if self.observe_stage is not None:
+            self.observe_stage("pdf_queue_wait", queue_wait)
+            self.observe_stage("template_render", template_seconds)
+            self.observe_stage("pdf_write", pdf_seconds)
+
+    def _record(self, queue_wait: float, seconds: float) -> None:
+        self.render_seconds += seconds
+        self.render_seconds_max = max(self.render_seconds_max, seconds)
+        self.queue_wait_seconds += queue_wait
+        self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, queue_wait)
+
+    async def render(self, template_name: str, context: Dict[str, Any]) -> bytes:
+        """Render a template to PDF in a worker, or raise PoolSaturated"""
+        self._admit()
+        try:
+            pdf, queue_wait, template_seconds, pdf_seconds = await self._submit(_render, template_name, context, time.time())
+        finally:
+            self.in_flight -= 1
+        self._observe(queue_wait, template_seconds, pdf_seconds)
+        self._record(queue_wait, template_seconds + pdf_seconds)
+        self.rendered += 1
+        return pdf
+
+    async def render_sections(self, template_name: str, contexts: Iterable[Dict[str, Any]], directory: str) -> str:
+        """
+        Render contexts one after another as sections of one PDF, or raise PoolSaturated
+
+        Each context gets `page_offset`, the number of pages before it. The
+        sections are merged into a file in directory, whose path is returned.
+        """
+        self._admit()
+        try:
+            paths = []
+            pages = 0
+            total_wait = total_seconds = 0.0
+            for index, context in enumerate(contexts):
+                path = os.path.join(directory, f"section-{index:05d}.pdf")
+                section_pages, queue_wait, template_seconds, pdf_seconds = await self._submit(
+                    _render_section, template_name, {**context, "page_offset": pages}, path, time.time()
+                )
+                self._observe(queue_wait, template_seconds, pdf_seconds)
+                self.sections_rendered += 1
+                total_wait += queue_wait
+                total_seconds += template_seconds + pdf_seconds
+                pages += section_pages
+                paths.append(path)
+            out_path = os.path.join(directory, "report.pdf")
+            start = time.perf_counter()
+            await self._submit(merge_pdfs, paths, out_path)
+            merge_seconds = time.perf_counter() - start
+            if self.observe_stage is not None:
+                self.observe_stage("pdf_merge", merge_seconds)
+            total_seconds += merge_seconds
+            for path in paths:
+                os.unlink(path)
+        finally:
+            self.in_flight -= 1
+        self._record(total_wait, total_seconds)
+        self.rendered += 1
+        return out_path
+
+    def retry_after(self) -> int:
+        """Seconds until the queue should have room, from the mean render time"""
+        mean = self.render_seconds / self.rendered if self.rendered else 1.0
+        queued = max(self.in_flight - self.workers, 0) + 1
+        return max(1, math.ceil(mean * queued / self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        busy = min(self.in_flight, self.workers)
+        uptime = time.monotonic() - self.started_at
+        return {
+            "workers": self.workers,
+            "busy_workers": busy,
+            "queued": max(self.in_flight - self.workers, 0),
+            "max_queue": self.max_queue,
+            "utilization": round(busy / self.workers, 4),
+            "utilization_since_start": round(self.render_seconds / (self.workers * uptime), 4) if uptime else 0.0,
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "sections_rendered": self.sections_rendered,
+            "render_seconds_total": round(self.render_seconds, 4),
+            "render_seconds_avg": round(self.render_seconds / self.rendered, 4) if self.rendered else 0.0,
+            "render_seconds_max": round(self.render_seconds_max, 4),
+            "queue_wait_seconds_avg": round(self.queue_wait_seconds / self.rendered, 4) if self.rendered else 0.0,
+            "queue_wait_seconds_max": round(self.queue_wait_seconds_max, 4),
+        }
@@ -0,0 +1,299 @@
+"""
+Asynchronous report jobs with a content-addressed artifact cache
+
+A job renders one ReportRequest in the background. Its artifact is stored
+under a hash of the normalized request and the template version, so a repeat
+of an identical request completes immediately from the cache and concurrent
+identical submissions share one render. The cache is a directory of files
+bounded by total size, evicting least recently used artifacts first.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {"pdf": "application/pdf", "html": "text/html; charset=utf-8"}
+
+
+def template_version(template_dir: str) -> str:
+    """Hash of every file under the template directory"""
+    digest = hashlib.blake2b(digest_size=16)
+    for root, dirs, files in os.walk(template_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, template_dir).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def request_key(request: BaseModel, template_version: str) -> str:
+    """Content address of a request: defaults filled in, keys sorted, compact JSON"""
+    normalized = json.dumps(request.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{template_version}:{normalized}".encode()).hexdigest()
+
+
+class ArtifactStore:
+    """Directory of rendered artifacts named by key, bounded by total bytes (LRU)"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (filename, size), least recently used first; rebuilt from disk
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.total_bytes = 0
+        found = []
+        for name in os.listdir(root):
+            if name.startswith("."):
+                # Temp file or section directory left by an interrupted render
+                path = os.path.join(root, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.unlink(path)
+                continue
+            stat = os.stat(os.path.join(root, name))
+            found.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(found):
+            self.entries[name.split(".", 1)[0]] = (name, size)
+            self.total_bytes += size
+        self._evict()
+
+    def path(self, key: str) -> Optional[str]:
+        """Path of a cached artifact, marking it recently used"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        path = os.path.join(self.root, entry[0])
+        if not os.path.exists(path):
+            self.misses += 1
+            self._drop(key)
+            return None
+        self.entries.move_to_end(key)
+        os.utime(path)
+        self.hits += 1
+        return path
+
+    def temp_path(self) -> str:
+        """New hidden file in the store directory, for commit() once written"""
+        fd, path = tempfile.mkstemp(dir=self.root, prefix=".artifact.")
+        os.close(fd)
+        return path
+
+    def commit(self, key: str, extension: str, tmp_path: str) -> str:
+        """Move a written temp file into the store and evict down to max_bytes"""
+        name = f"{key}.{extension}"
+        path = os.path.join(self.root, name)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        self._drop(key)
+        self.entries[key] = (name, size)
+        self.total_bytes += size
+        self._evict(keep=key)
+        return path
+
+    def put(self, key: str, extension: str, data: bytes) -> str:
+        """Atomically store an artifact"""
+        tmp_path = self.temp_path()
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            return self.commit(key, extension, tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _drop(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        while self.total_bytes > self.max_bytes and self.entries:
+            key = next(iter(self.entries))
+            if key == keep:
+                break
+            name, _ = self.entries[key]
+            self._drop(key)
+            try:
+                os.unlink(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "artifacts": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class Job:
+    """One report render; `changed` is replaced (after being set) on every status change"""
+
+    TERMINAL = ("completed", "failed")
+
+    def __init__(self, key: str, request: Any, extension: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.request = request
+        self.extension = extension
+        self.status = "queued"
+        self.cached = False
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.changed = asyncio.Event()
+
+    def update(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        now = datetime.utcnow().isoformat()
+        if status == "running":
+            self.started_at = now
+        elif status in self.TERMINAL:
+            self.finished_at = now
+            self.request = None
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "cached": self.cached,
+            "format": self.extension,
+            "artifact_key": self.key,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Runs report jobs in the background, at most `concurrency` at a time
+
+    render(request, path) writes the artifact to a temp file in the store,
+    which is committed under the job's key once complete.
+    """
+
+    def __init__(
+        self,
+        store: ArtifactStore,
+        render: Callable[[Any, str], Awaitable[None]],
+        concurrency: int,
+        max_jobs: int = 1000,
+    ):
+        self.store = store
+        self.render = render
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, Job] = {}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self.submitted = 0
+        self.coalesced = 0
+        self.render_seconds = 0.0
+        self.rendered = 0
+
+    def submit(self, request: Any, key: str, extension: str) -> Job:
+        """Queue a render, or return a completed/in-progress job for the same key"""
+        self.submitted += 1
+        active = self._active.get(key)
+        if active is not None:
+            self.coalesced += 1
+            return active
+
+        job = Job(key, request, extension)
+        self._remember(job)
+        if self.store.path(key) is not None:
+            job.cached = True
+            job.update("completed")
+            return job
+
+        self._active[key] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def events(self, job: Job) -> AsyncIterator[Dict[str, Any]]:
+        """Job state now and after every change, ending with a terminal state"""
+        while True:
+            changed = job.changed
+            yield job.to_dict()
+            if job.status in Job.TERMINAL:
+                return
+            await changed.wait()
+
+    async def _run(self, job: Job) -> None:
+        try:
+            async with self._slots:
+                job.update("running")
+                start = time.perf_counter()
+                tmp_path = self.store.temp_path()
+                try:
+                    await self.render(job.request, tmp_path)
+                    self.store.commit(job.key, job.extension, tmp_path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
+                self.render_seconds += time.perf_counter() - start
+                self.rendered += 1
+            job.update("completed")
+        except Exception as e:
+            logger.error(f"Report job {job.id} failed: {str(e)}")
+            job.update("failed", str(e))
+        finally:
+            self._active.pop(job.key, None)
+
+    def _remember(self, job: Job) -> None:
+        self.jobs[job.id] = job
+        # Forget the oldest finished jobs; running ones are kept regardless
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id].status in Job.TERMINAL:
+                del self.jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self.jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "jobs": by_status,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rendered": self.rendered,
+            "render_seconds_avg": round(self.render_seconds / self.rendered, 4) if self.rendered else 0.0,
+        }
@@ -0,0 +1,15 @@
+"""
+Modules shared by the Python services
+
+Copied into each service's image next to its main.py (the images are built
+from the repository root), so services import them as grc_shared.<module>.
+Running a service outside Docker needs the repository root on PYTHONPATH.
+
+- instrumentation: request and stage metrics behind each service's /metrics
+- portfolio_client: the client the services push vendor scores to the
+  dashboard's portfolio index with
+- risk_factors: the vendor risk factors the risk engine scores, also checked
+  by the services that send vendors to it
+- gunicorn.conf.py: gunicorn settings of the services served by gunicorn
+  (a config file, passed with -c rather than imported)
+"""
@@ -0,0 +1,53 @@
+"""
+Gunicorn settings: one uvicorn worker forked from a preloaded app
+
+The master imports main.py (preload_app) and calls main.preload(), which
+loads what the service otherwise loads on first use, such as templates,
+lookup libraries and the OpenAPI schema, before the worker is forked. The
+first requests do not pay for it, and a worker the master restarts after a
+hang or crash is forked warm instead of importing everything again. The
+garbage collector is kept off while loading and everything loaded is frozen
+before the fork, so the worker shares those pages with the master rather
+than copying them when it collects.
+
+There is exactly one worker per container, and the services are scaled by
+running more replicas, not more workers. With a single worker, preloading
+buys warm starts and restarts rather than memory shared between workers.
+Each service keeps state in process that another worker would not see:
+report jobs, the artifact index and PDF pool in reports; the simulation
+portfolio, stored scores and drift alerts in the risk engine; the per-TLD
+WHOIS rate limits and circuit breakers in the OSINT service; and the
+counters behind /metrics in all three. Replicas keep that state per replica
+in the same way, so it has to move to a shared store before a service that
+depends on it runs more than one. The bind address is given on the command
+line by each service's Dockerfile. Logging is set up here, not when main.py
+is imported.
+"""
+import gc
+import logging
+import os
+
+worker_class = "uvicorn_worker.UvicornWorker"
+# One worker: the services keep their state in process and scale with replicas (see above)
+workers = 1
+preload_app = True
+# Seconds a worker may go without a heartbeat (a blocked event loop) before it is restarted
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+
+# LOG_LEVEL=WARNING drops the per-request INFO lines. Configured before the
+# master imports the app, so messages logged while loading are kept too.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
+# No collections in the master, so importing leaves no freed holes in shared pages
+gc.disable()
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before any worker is forked"""
+    import main
+    main.preload()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
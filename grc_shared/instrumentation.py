@@ -0,0 +1,285 @@
+"""
+Prometheus-style instrumentation shared by the services
+
+Counters, gauges and histograms are kept in process and rendered in the
+Prometheus text format by each service's GET /metrics. MetricsMiddleware
+counts and times every request by method and route template and tracks
+requests in flight; stage() and observe_stage() time the parts of a request
+(lookups, scoring factors, rendering). Values a service already keeps, such as
+cache counters and pool sizes, are read by collectors at scrape time and cost
+nothing in between.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; wide enough for a single scoring factor and a large PDF alike
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# (labels, value) pairs of one metric family
+Samples = List[Tuple[Dict[str, str], float]]
+# (name, type, help, samples), as returned by collectors
+Family = Tuple[str, str, str, Samples]
+
+
+class Counter:
+    """Monotonic count per label tuple"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def family(self) -> Family:
+        with self._lock:
+            values = list(self.values.items())
+        return self.name, self.kind, self.documentation, [
+            (dict(zip(self.labelnames, labels)), value) for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    """Value per label tuple that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        with self._lock:
+            self.values[labels] = value
+
+
+class HistogramSeries:
+    """Bucket counts and sum of one label tuple; hold on to it to skip the label lookup"""
+
+    __slots__ = ("buckets", "counts", "total", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # The last count is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.total
+
+
+class Histogram:
+    """Bucketed observations per label tuple, with their sum and count"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple[str, ...], HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labels: str) -> HistogramSeries:
+        series = self.series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self.series.setdefault(labels, HistogramSeries(self.buckets))
+        return series
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        self.labels(*labels).observe(value)
+
+    def family(self) -> Family:
+        with self._lock:
+            items = list(self.series.items())
+        series = [(labels, *child.snapshot()) for labels, child in items]
+        bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+        samples: Samples = []
+        for labels, counts, total in series:
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                samples.append(({**base, "le": bound}, cumulative))
+            samples.append(({**base, "__suffix__": "_sum"}, total))
+            samples.append(({**base, "__suffix__": "_count"}, cumulative))
+        return self.name, "histogram", self.documentation, samples
+
+
+class ServiceMetrics:
+    """A service's metric registry: request and stage metrics plus registered collectors"""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.requests = Counter(
+            "grc_http_requests_total", "HTTP requests by method, route and status", ("method", "route", "status")
+        )
+        self.request_seconds = Histogram(
+            "grc_http_request_duration_seconds", "HTTP request latency by method and route", ("method", "route")
+        )
+        self.in_flight = Gauge("grc_http_requests_in_flight", "HTTP requests being handled")
+        self.stage_seconds = Histogram(
+            "grc_stage_duration_seconds", "Time spent in each stage of request handling", ("stage",)
+        )
+        self.metrics: List[Any] = [self.requests, self.request_seconds, self.in_flight, self.stage_seconds]
+        self.collectors: List[Callable[[], Iterable[Family]]] = []
+        self.started_at = time.time()
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Register a function returning metric families, called on every scrape"""
+        self.collectors.append(collector)
+
+    def stage_series(self, stage: str) -> HistogramSeries:
+        """The histogram of one stage, for hot paths that observe it directly"""
+        return self.stage_seconds.labels(stage)
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self.stage_seconds.labels(stage).observe(seconds)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as stage"""
+        series = self.stage_seconds.labels(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            series.observe(time.perf_counter() - start)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        families: Dict[str, Tuple[str, str, Samples]] = {}
+        sources: List[Family] = [
+            ("grc_service_start_time_seconds", "gauge", "Unix time the service started",
+             [({"service": self.service}, self.started_at)]),
+        ]
+        sources.extend(metric.family() for metric in self.metrics)
+        for collector in self.collectors:
+            sources.extend(collector())
+        # Collectors may contribute samples to the same family
+        for name, kind, documentation, samples in sources:
+            if name in families:
+                families[name][2].extend(samples)
+            else:
+                families[name] = (kind, documentation, list(samples))
+
+        lines = []
+        for name, (kind, documentation, samples) in families.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                suffix = ""
+                if "__suffix__" in labels:
+                    labels = dict(labels)
+                    suffix = labels.pop("__suffix__")
+                elif kind == "histogram":
+                    suffix = "_bucket"
+                lines.append(f"{name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting and timing requests per route template
+
+    A request's latency runs until its response body is complete, so streamed
+    responses include their streaming time. Requests that match no route are
+    labelled "unmatched" to keep label values bounded.
+    """
+
+    def __init__(self, app, metrics: ServiceMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight.dec()
+            # The router records the matched route in the shared scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            metrics.requests.inc((scope["method"], path, str(status)))
+            metrics.request_seconds.observe(elapsed, (scope["method"], path))
+
+
+def cache_families(cache: str, stats: Dict[str, Any], events: Iterable[str], size_key: Optional[str] = None) -> List[Family]:
+    """Cache counters from a stats() dict as grc_cache_events_total (and grc_cache_entries)"""
+    families: List[Family] = [(
+        "grc_cache_events_total", "counter", "Cache hits, misses and other cache events",
+        [({"cache": cache, "event": event}, stats[event]) for event in events if event in stats],
+    )]
+    if size_key is not None:
+        families.append((
+            "grc_cache_entries", "gauge", "Entries held by each cache", [({"cache": cache}, stats[size_key])]
+        ))
+    return families
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{escape(str(value))}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
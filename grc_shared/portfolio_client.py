@@ -0,0 +1,80 @@
+"""
+Client for the dashboard's portfolio index
+
+The index (experience-layer/portfolio-index) holds every vendor's latest
+score in memory. The services that score vendors push their results to it:
+eramba-sync loads it with the whole portfolio and pushes each stored page,
+vendor-monitor pushes each re-assessment. Its failures are the caller's to
+log; they never stop scoring.
+"""
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+class PortfolioIndexUnavailable(Exception):
+    """The portfolio index could not be reached or answered with an error"""
+
+
+class PortfolioIndexClient:
+    """HTTP client for the portfolio index's update endpoints"""
+
+    def __init__(self, base_url: str, timeout: float = 60.0, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=httpx.Timeout(timeout, connect=5.0), transport=transport)
+        # The index process last loaded with the whole portfolio; None until loaded, or after a missed push
+        self.instance: Optional[str] = None
+        self.loads = 0
+        self.vendors_pushed = 0
+        self.requests = 0
+        self.errors = 0
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def replace(self, vendors: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """PUT /api/portfolio: the index holds exactly these vendors"""
+        return await self._send("PUT", "/api/portfolio", vendors)
+
+    async def upsert(self, vendors: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """POST /api/portfolio/vendors: add or update these vendors"""
+        return await self._send("POST", "/api/portfolio/vendors", vendors)
+
+    async def running_instance(self) -> Optional[str]:
+        """The index process answering now, from GET /api/portfolio/stats"""
+        self.requests += 1
+        try:
+            response = await self.client.get("/api/portfolio/stats")
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise PortfolioIndexUnavailable(f"Portfolio index unavailable: {str(e)}") from e
+        return response.json().get("instance")
+
+    async def _send(self, method: str, url: str, vendors: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.requests += 1
+        try:
+            response = await self.client.request(method, url, json={"vendors": vendors})
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise PortfolioIndexUnavailable(f"Portfolio index update failed: {str(e)}") from e
+        self.vendors_pushed += len(vendors)
+        return response.json()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "portfolio_index_url": self.base_url, "loaded": self.instance is not None, "loads": self.loads,
+            "vendors_pushed": self.vendors_pushed, "requests": self.requests, "errors": self.errors,
+        }
+
+
+def portfolio_vendor(vendor_id: Any, vendor_name: Optional[str], domain: Optional[str], score: int, level: str, calculated_at: str) -> Dict[str, Any]:
+    """A vendor's entry for the portfolio index; without a name the index keeps the one it has"""
+    vendor = {
+        "vendor_id": str(vendor_id), "domain": (domain or "").strip(),
+        "risk_score": score, "risk_level": level, "last_assessment": calculated_at,
+    }
+    if vendor_name:
+        vendor["vendor_name"] = vendor_name
+    return vendor
@@ -0,0 +1,26 @@
+"""
+A vendor's risk factors, as the risk engine scores them
+
+The risk engine validates its requests with VendorRiskFactors; the Eramba
+sync and the Vendor Monitor validate each vendor with the same model before
+sending it, so one bad row is reported on its own instead of failing the
+whole batch it was sent in.
+"""
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class VendorRiskFactors(BaseModel):
+    """Input factors for risk calculation"""
+    vendor_id: str
+    domain: str
+    company_age_years: Optional[int] = Field(None, ge=0, description="Age of company in years")
+    employee_count: Optional[int] = Field(None, ge=0)
+    has_ssl: bool = Field(True, description="Has valid SSL certificate")
+    breach_count: int = Field(0, ge=0, description="Number of known data breaches")
+    cve_count: int = Field(0, ge=0, description="Number of known CVEs")
+    compliance_certifications: List[str] = Field(default_factory=list, description="e.g., ISO27001, SOC2, PCI-DSS")
+    domain_reputation_score: Optional[int] = Field(None, ge=0, le=100, description="From OSINT service")
+    financial_health_score: Optional[int] = Field(None, ge=0, le=100)
+    incident_history_score: Optional[int] = Field(None, ge=0, le=100)
@@ -0,0 +1,274 @@
+"""
+Vendor source and score sink in Eramba's database
+
+Vendors are read from a view over Eramba's third parties (grc_sync_vendors by
+default, see grc_sync.sql) in keyset pages ordered by (modified, vendor_id):
+each page starts after the last row of the previous one, so a page costs one
+index range scan however deep the sync is. Scores are written back to
+grc_vendor_risk_scores with bulk upserts, and each page's upsert commits
+together with the sync checkpoint (the last (modified, vendor_id) written), so
+an interrupted sync resumes exactly after the last page it stored.
+
+The view must have vendor_id (integer), domain and modified columns; any of
+vendor_name and the risk factor columns (FACTOR_COLUMNS) it also has are read.
+A mysql:// URL uses Eramba's MySQL (requires PyMySQL); sqlite:///path is a
+local stand-in with the same tables, for development and benchmarks.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+# Optional view columns passed on to the risk engine as VendorRiskFactors
+FACTOR_COLUMNS = (
+    "company_age_years", "employee_count", "has_ssl", "breach_count", "cve_count",
+    "compliance_certifications", "domain_reputation_score", "financial_health_score", "incident_history_score",
+)
+REQUIRED_COLUMNS = ("vendor_id", "domain", "modified")
+
+SCORE_COLUMNS = (
+    "vendor_id", "overall_risk_score", "risk_level", "domain_reputation_score", "has_ssl",
+    "scoring_model_version", "calculated_at", "last_error", "synced_at",
+)
+# Columns a failed vendor updates; its last good score is kept
+ERROR_COLUMNS = ("vendor_id", "last_error", "synced_at")
+CHECKPOINT_COLUMNS = ("name", "watermark_modified", "watermark_id", "run_started_at", "vendors_synced", "updated_at")
+
+# (modified, vendor_id) of the last row stored; None before the first page
+Watermark = Optional[Tuple[str, int]]
+
+
+def format_modified(value: Any) -> str:
+    """A modified value as 'YYYY-MM-DD HH:MM:SS[.ffffff]', the form both databases compare"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+class VendorStore:
+    """
+    Shared SQL for the Eramba database backends
+
+    Subclasses give the placeholder style, schema, connect(), now() and
+    upsert().
+    """
+
+    placeholder = "?"
+    schema: Tuple[str, ...] = ()
+
+    def __init__(self, view: str = "grc_sync_vendors"):
+        self.view = view
+        self.columns: List[str] = []
+        self._read_connection = None
+        self._write_connection = None
+        self._read_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._write_connection is not None
+
+    def connect(self):
+        raise NotImplementedError
+
+    def now(self) -> str:
+        """The database's current time, in the form of modified values"""
+        raise NotImplementedError
+
+    def upsert(self, cursor, table: str, columns: Tuple[str, ...], rows: List[Tuple]) -> None:
+        raise NotImplementedError
+
+    def open(self) -> None:
+        self._read_connection = self.connect()
+        self._write_connection = self.connect()
+        with self._write_lock:
+            cursor = self._write_connection.cursor()
+            for statement in self.schema:
+                cursor.execute(statement)
+            self._write_connection.commit()
+        with self._read_lock:
+            cursor = self._read_connection.cursor()
+            cursor.execute(f"SELECT * FROM {self.view} WHERE 1 = 0")
+            available = [column[0] for column in cursor.description]
+            cursor.fetchall()
+            self._read_connection.commit()
+        missing = [column for column in REQUIRED_COLUMNS if column not in available]
+        if missing:
+            raise ValueError(f"{self.view} lacks required columns: {', '.join(missing)}")
+        optional = [column for column in ("vendor_name", *FACTOR_COLUMNS) if column in available]
+        self.columns = [*REQUIRED_COLUMNS, *optional]
+
+    def close(self) -> None:
+        for connection in (self._read_connection, self._write_connection):
+            if connection is not None:
+                connection.close()
+        self._read_connection = self._write_connection = None
+
+    def _query(self, sql: str, params: Tuple) -> List[Tuple]:
+        with self._read_lock:
+            cursor = self._read_connection.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            # End the read transaction so the next page sees new commits
+            self._read_connection.commit()
+            return rows
+
+    def changed_vendors(self, after: Watermark, before: str, limit: int) -> List[Dict[str, Any]]:
+        """Up to limit vendors with after < (modified, vendor_id) and modified < before, in that order"""
+        p = self.placeholder
+        where = f"modified < {p}"
+        params: Tuple = (before,)
+        if after is not None:
+            where += f" AND (modified > {p} OR (modified = {p} AND vendor_id > {p}))"
+            params += (after[0], after[0], after[1])
+        rows = self._query(
+            f"SELECT {', '.join(self.columns)} FROM {self.view} WHERE {where}"
+            f" ORDER BY modified, vendor_id LIMIT {p}",
+            params + (limit,),
+        )
+        return [dict(zip(self.columns, row)) for row in rows]
+
+    def scored_vendors(self) -> List[Dict[str, Any]]:
+        """Every vendor in the view with a score: vendor_id, domain, vendor_name and its latest score"""
+        name = "v.vendor_name" if "vendor_name" in self.columns else "NULL"
+        rows = self._query(
+            f"SELECT v.vendor_id, v.domain, {name}, s.overall_risk_score, s.risk_level, s.calculated_at"
+            f" FROM grc_vendor_risk_scores s JOIN {self.view} v ON v.vendor_id = s.vendor_id"
+            " WHERE s.overall_risk_score IS NOT NULL",
+            (),
+        )
+        columns = ("vendor_id", "domain", "vendor_name", "overall_risk_score", "risk_level", "calculated_at")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def load_checkpoint(self, name: str) -> Dict[str, Any]:
+        """Watermark and progress of the named sync; no watermark means from the first vendor"""
+        p = self.placeholder
+        rows = self._query(
+            "SELECT watermark_modified, watermark_id, run_started_at, vendors_synced, updated_at"
+            f" FROM grc_sync_checkpoints WHERE name = {p}",
+            (name,),
+        )
+        modified, vendor_id, started, synced, updated = rows[0] if rows else (None, None, None, 0, None)
+        return {
+            "watermark": (format_modified(modified), vendor_id) if modified is not None else None,
+            "run_started_at": format_modified(started) if started is not None else None,
+            "vendors_synced": synced,
+            "updated_at": format_modified(updated) if updated is not None else None,
+        }
+
+    def save_page(self, name: str, scores: List[Tuple], errors: List[Tuple], watermark: Watermark, run_started_at: str, vendors_synced: int) -> None:
+        """Upsert a page's scores and failures and move the checkpoint, in one transaction"""
+        checkpoint = (
+            name,
+            watermark[0] if watermark else None,
+            watermark[1] if watermark else None,
+            run_started_at,
+            vendors_synced,
+            datetime.utcnow().isoformat(sep=" "),
+        )
+        with self._write_lock:
+            connection = self._write_connection
+            try:
+                cursor = connection.cursor()
+                if scores:
+                    self.upsert(cursor, "grc_vendor_risk_scores", SCORE_COLUMNS, scores)
+                if errors:
+                    self.upsert(cursor, "grc_vendor_risk_scores", ERROR_COLUMNS, errors)
+                self.upsert(cursor, "grc_sync_checkpoints", CHECKPOINT_COLUMNS, [checkpoint])
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+
+class SqliteVendorStore(VendorStore):
+    placeholder = "?"
+    schema = (
+        "CREATE TABLE IF NOT EXISTS grc_vendor_risk_scores ("
+        " vendor_id INTEGER PRIMARY KEY, overall_risk_score INTEGER, risk_level TEXT,"
+        " domain_reputation_score INTEGER, has_ssl INTEGER, scoring_model_version TEXT,"
+        " calculated_at TEXT, last_error TEXT, synced_at TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS grc_sync_checkpoints ("
+        " name TEXT PRIMARY KEY, watermark_modified TEXT, watermark_id INTEGER,"
+        " run_started_at TEXT, vendors_synced INTEGER NOT NULL DEFAULT 0, updated_at TEXT)",
+    )
+
+    def __init__(self, path: str, view: str = "grc_sync_vendors"):
+        super().__init__(view)
+        self.path = path
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def now(self) -> str:
+        return self._query("SELECT datetime('now')", ())[0][0]
+
+    def upsert(self, cursor, table: str, columns: Tuple[str, ...], rows: List[Tuple]) -> None:
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            f" ON CONFLICT ({columns[0]}) DO UPDATE SET {updates}",
+            rows,
+        )
+
+
+class MysqlVendorStore(VendorStore):
+    placeholder = "%s"
+    schema = (
+        "CREATE TABLE IF NOT EXISTS grc_vendor_risk_scores ("
+        " vendor_id BIGINT PRIMARY KEY, overall_risk_score SMALLINT NULL, risk_level VARCHAR(16) NULL,"
+        " domain_reputation_score SMALLINT NULL, has_ssl BOOLEAN NULL, scoring_model_version VARCHAR(64) NULL,"
+        " calculated_at VARCHAR(32) NULL, last_error TEXT NULL, synced_at DATETIME(6) NOT NULL"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+        "CREATE TABLE IF NOT EXISTS grc_sync_checkpoints ("
+        " name VARCHAR(64) PRIMARY KEY, watermark_modified DATETIME(6) NULL, watermark_id BIGINT NULL,"
+        " run_started_at DATETIME(6) NULL, vendors_synced INT NOT NULL DEFAULT 0, updated_at DATETIME(6) NULL"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4",
+    )
+    # Rows per INSERT statement; well under max_allowed_packet
+    upsert_chunk = 1000
+
+    def __init__(self, url: str, view: str = "grc_sync_vendors"):
+        super().__init__(view)
+        self.url = url
+
+    def connect(self):
+        import pymysql
+        parsed = urlparse(self.url)
+        return pymysql.connect(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 3306,
+            user=unquote(parsed.username or ""),
+            password=unquote(parsed.password or ""),
+            database=parsed.path.lstrip("/"),
+            charset="utf8mb4",
+            autocommit=False,
+        )
+
+    def now(self) -> str:
+        return format_modified(self._query("SELECT NOW(6)", ())[0][0])
+
+    def upsert(self, cursor, table: str, columns: Tuple[str, ...], rows: List[Tuple]) -> None:
+        # One multi-row INSERT per chunk; the row alias replaces the deprecated VALUES()
+        updates = ", ".join(f"{column} = new.{column}" for column in columns[1:])
+        row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        for start in range(0, len(rows), self.upsert_chunk):
+            chunk = rows[start:start + self.upsert_chunk]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row] * len(chunk))}"
+                f" AS new ON DUPLICATE KEY UPDATE {updates}",
+                [value for values in chunk for value in values],
+            )
+
+
+def open_store(url: str, view: str = "grc_sync_vendors") -> VendorStore:
+    """Store for a mysql:// or sqlite:///path URL"""
+    if url.startswith("sqlite:///"):
+        return SqliteVendorStore(url[len("sqlite:///"):], view)
+    if url.startswith(("mysql://", "mysql+pymysql://")):
+        return MysqlVendorStore(url, view)
+    raise ValueError(f"Unsupported Eramba database URL: {url}")
@@ -0,0 +1,57 @@
+-- Eramba -> intelligence layer sync: objects in Eramba's MySQL database
+--
+-- Run once against Eramba's database, as root, after Eramba has created its
+-- schema:
+--   docker compose exec -T mysql mysql -u root -p"$MYSQL_ROOT_PASSWORD" eramba < grc_sync.sql
+-- The sync worker creates grc_vendor_risk_scores and grc_sync_checkpoints
+-- itself if they are missing; they are here so the grants can name them.
+
+-- Keyset pages are read in (modified, id) order; without this index every page
+-- sorts the whole table
+CREATE INDEX grc_sync_modified_id ON third_parties (modified, id);
+
+-- What the sync reads. vendor_id, domain and modified are required; vendor_name
+-- and any of company_age_years, employee_count, has_ssl, breach_count,
+-- cve_count, compliance_certifications (comma- or semicolon-separated),
+-- domain_reputation_score, financial_health_score and incident_history_score
+-- are passed on when present. Eramba has no domain field for third parties:
+-- map it from the custom field holding it, for example
+--   (SELECT cfv.value FROM custom_field_values cfv
+--     WHERE cfv.foreign_key = tp.id AND cfv.model = 'ThirdParties'
+--       AND cfv.custom_field_id = 12) AS domain
+-- Vendors without a domain are scored from their other factors only.
+CREATE OR REPLACE VIEW grc_sync_vendors AS
+SELECT
+    tp.id AS vendor_id,
+    tp.name AS vendor_name,
+    CAST(NULL AS CHAR(255)) AS domain,
+    tp.modified AS modified
+FROM third_parties tp
+WHERE tp.deleted = 0;
+
+CREATE TABLE IF NOT EXISTS grc_vendor_risk_scores (
+    vendor_id BIGINT PRIMARY KEY,
+    overall_risk_score SMALLINT NULL,
+    risk_level VARCHAR(16) NULL,
+    domain_reputation_score SMALLINT NULL,
+    has_ssl BOOLEAN NULL,
+    scoring_model_version VARCHAR(64) NULL,
+    calculated_at VARCHAR(32) NULL,
+    last_error TEXT NULL,
+    synced_at DATETIME(6) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS grc_sync_checkpoints (
+    name VARCHAR(64) PRIMARY KEY,
+    watermark_modified DATETIME(6) NULL,
+    watermark_id BIGINT NULL,
+    run_started_at DATETIME(6) NULL,
+    vendors_synced INT NOT NULL DEFAULT 0,
+    updated_at DATETIME(6) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- A sync user that can read the view and write only its own tables
+CREATE USER IF NOT EXISTS 'grc_sync'@'%' IDENTIFIED BY 'Change_Sync_Password_123';
+GRANT SELECT ON grc_sync_vendors TO 'grc_sync'@'%';
+GRANT SELECT, INSERT, UPDATE ON grc_vendor_risk_scores TO 'grc_sync'@'%';
+GRANT SELECT, INSERT, UPDATE ON grc_sync_checkpoints TO 'grc_sync'@'%';
@@ -0,0 +1,367 @@
+"""
+Eramba -> intelligence layer sync
+
+A run reads the vendors changed since the checkpoint watermark in keyset
+pages, sends each page through the risk engine and writes the scores back to
+Eramba's database. POST /api/assess/batch enriches a page's domains with the
+OSINT service and scores them; vendors without a domain (or every vendor,
+with enrichment off) go to POST /api/calculate/batch. Both use one pool of
+keep-alive connections.
+
+Reading, assessment and write-back overlap: up to pages_in_flight pages are
+assessed at once while the next pages are read, and pages are stored in
+order, so the checkpoint only moves past vendors whose scores are committed.
+Only vendors modified before the run's cutoff (database time at the start,
+less safety_lag seconds) are read; rows changed during the run, or committed
+late by a long transaction, have later modified values and are picked up by
+the next run.
+
+A vendor whose factors are invalid or whose enrichment failed gets
+last_error set and keeps its previous score. A risk engine or database
+failure stops the run; the next run resumes after the last stored page.
+
+With a portfolio index client, each stored page's scores are also pushed to
+the dashboard's portfolio index. The index is held in memory, so runs start
+and end by loading it with every scored vendor in Eramba when it has not been
+loaded yet, has restarted since (it reports its process instance) or missed a
+push; the index's own failures never stop a run.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from pydantic import ValidationError
+
+from eramba_store import FACTOR_COLUMNS, VendorStore, Watermark, format_modified
+from grc_shared.portfolio_client import PortfolioIndexClient, PortfolioIndexUnavailable, portfolio_vendor
+from grc_shared.risk_factors import VendorRiskFactors
+
+logger = logging.getLogger(__name__)
+
+
+class SyncInProgress(Exception):
+    """A sync run was requested while one is running"""
+
+
+class RiskEngineUnavailable(Exception):
+    """The risk engine could not be reached or answered with an error"""
+
+
+class RiskEngineClient:
+    """Pooled keep-alive HTTP client for the risk engine's batch endpoints"""
+
+    def __init__(self, base_url: str, timeout: float = 300.0, max_connections: int = 8, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self.requests = 0
+        self.errors = 0
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def assess(self, vendors: List[Dict[str, Any]], concurrency: int) -> List[Dict[str, Any]]:
+        """AssessmentResponse dicts from /api/assess/batch, in completion order"""
+        self.requests += 1
+        try:
+            async with self.client.stream(
+                "POST", "/api/assess/batch", json={"vendors": vendors, "concurrency": concurrency}
+            ) as response:
+                response.raise_for_status()
+                return [json.loads(line) async for line in response.aiter_lines() if line]
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise RiskEngineUnavailable(f"Risk engine assessment failed: {str(e)}") from e
+
+    async def calculate(self, vendors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """RiskScoreResponse dicts from /api/calculate/batch, in request order"""
+        self.requests += 1
+        try:
+            response = await self.client.post("/api/calculate/batch", json={"vendors": vendors})
+            response.raise_for_status()
+            return response.json()["results"]
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise RiskEngineUnavailable(f"Risk engine scoring failed: {str(e)}") from e
+
+    def stats(self) -> Dict[str, Any]:
+        return {"risk_engine_url": self.base_url, "requests": self.requests, "errors": self.errors}
+
+
+def vendor_factors(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Risk factors for a view row; certifications may be a comma- or semicolon-separated string"""
+    factors = {"vendor_id": str(row["vendor_id"]), "domain": (row["domain"] or "").strip()}
+    for column in FACTOR_COLUMNS:
+        value = row.get(column)
+        if value is None:
+            continue
+        if column == "compliance_certifications" and isinstance(value, str):
+            value = [name.strip() for name in re.split(r"[;,]", value) if name.strip()]
+        factors[column] = value
+    return factors
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+async def finish_shielded(task: asyncio.Future) -> bool:
+    """Wait for task to finish even if the caller is cancelled meanwhile; returns whether it was"""
+    cancelled = False
+    while True:
+        try:
+            await asyncio.shield(task)
+            return cancelled
+        except asyncio.CancelledError:
+            if task.cancelled():
+                raise
+            cancelled = True
+
+
+class SyncWorker:
+    """Runs syncs of one view into the score table, one run at a time"""
+
+    def __init__(
+        self,
+        store: VendorStore,
+        risk_engine: RiskEngineClient,
+        name: str = "vendors",
+        page_size: int = 1000,
+        pages_in_flight: int = 4,
+        enrich: bool = True,
+        enrich_concurrency: int = 50,
+        safety_lag: float = 5.0,
+        observe_stage=None,
+        portfolio: Optional[PortfolioIndexClient] = None,
+    ):
+        self.store = store
+        self.risk_engine = risk_engine
+        self.portfolio = portfolio
+        self.name = name
+        self.page_size = page_size
+        self.pages_in_flight = pages_in_flight
+        self.enrich = enrich
+        self.enrich_concurrency = enrich_concurrency
+        self.safety_lag = safety_lag
+        self.observe_stage = observe_stage or (lambda stage, seconds: None)
+        self.running = False
+        self.current: Optional[Dict[str, Any]] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.runs = 0
+        self.vendors_scored = 0
+        self.vendors_failed = 0
+
+    async def run(self, full: bool = False) -> Dict[str, Any]:
+        """One sync run; full starts from the first vendor instead of the checkpoint"""
+        if self.running:
+            raise SyncInProgress("A sync is already running")
+        self.running = True
+        started = datetime.utcnow()
+        run = self.current = {
+            "full": full, "status": "running", "started_at": started.isoformat(),
+            "pages": 0, "vendors": 0, "scored": 0, "failed": 0,
+        }
+        start = time.perf_counter()
+        try:
+            if not self.store.is_open:
+                await asyncio.to_thread(self.store.open)
+            checkpoint = await asyncio.to_thread(self.store.load_checkpoint, self.name)
+            watermark = None if full else checkpoint["watermark"]
+            now = datetime.fromisoformat(await asyncio.to_thread(self.store.now))
+            cutoff = format_modified(now - timedelta(seconds=self.safety_lag))
+            run["resumed_from"] = list(watermark) if watermark else None
+            run["cutoff"] = cutoff
+            logger.info(f"Sync {self.name}: {'full' if full else 'incremental'} run from {watermark or 'the first vendor'} to modified < {cutoff}")
+            await self.load_portfolio()
+            await self._sync(watermark, cutoff, run, started.isoformat(sep=" "))
+            # Again in case a push failed or the index restarted during the run
+            await self.load_portfolio()
+            run["status"] = "completed"
+        except asyncio.CancelledError:
+            run["status"] = "cancelled"
+            raise
+        except Exception as e:
+            run["status"] = "failed"
+            run["error"] = str(e)
+            raise
+        finally:
+            run["seconds"] = round(time.perf_counter() - start, 3)
+            run["vendors_per_second"] = round(run["vendors"] / run["seconds"], 1) if run["seconds"] else 0.0
+            run["finished_at"] = datetime.utcnow().isoformat()
+            self.last_run, self.current = run, None
+            self.running = False
+            self.runs += 1
+            logger.info(f"Sync {self.name} {run['status']}: {run['vendors']} vendors ({run['failed']} failed) in {run['seconds']}s")
+        return run
+
+    async def _sync(self, watermark: Watermark, cutoff: str, run: Dict[str, Any], run_started_at: str) -> None:
+        pages: asyncio.Queue = asyncio.Queue()
+        # Held from a page's assessment until it is stored
+        slots = asyncio.Semaphore(self.pages_in_flight)
+
+        async def read():
+            after = watermark
+            while True:
+                start = time.perf_counter()
+                rows = await asyncio.to_thread(self.store.changed_vendors, after, cutoff, self.page_size)
+                self.observe_stage("sync_read_page", time.perf_counter() - start)
+                if not rows:
+                    break
+                after = (format_modified(rows[-1]["modified"]), rows[-1]["vendor_id"])
+                await slots.acquire()
+                pages.put_nowait((asyncio.create_task(self.assess_page(rows)), after, rows))
+                if len(rows) < self.page_size:
+                    break
+            pages.put_nowait(None)
+
+        reader = asyncio.create_task(read())
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    break
+                task, after, rows = page
+                count = len(rows)
+                scores, errors = await task
+                start = time.perf_counter()
+                write = asyncio.ensure_future(asyncio.to_thread(
+                    self.store.save_page, self.name, scores, errors, after, run_started_at, run["vendors"] + count
+                ))
+                # The thread commits the page even if the run is cancelled meanwhile, so count it first
+                cancelled = await finish_shielded(write)
+                self.observe_stage("sync_write_page", time.perf_counter() - start)
+                slots.release()
+                run["pages"] += 1
+                run["vendors"] += count
+                run["scored"] += len(scores)
+                run["failed"] += len(errors)
+                run["watermark"] = list(after)
+                self.vendors_scored += len(scores)
+                self.vendors_failed += len(errors)
+                if cancelled:
+                    if self.portfolio is not None:
+                        # The page is stored but not pushed: reload the index next run
+                        self.portfolio.instance = None
+                    raise asyncio.CancelledError
+                await self.push_page(rows, scores)
+            await reader
+        finally:
+            reader.cancel()
+            while not pages.empty():
+                page = pages.get_nowait()
+                if page is not None:
+                    page[0].cancel()
+
+    async def load_portfolio(self) -> None:
+        """Replace the portfolio index's contents with every scored vendor, unless the same index process has them"""
+        if self.portfolio is None:
+            return
+        try:
+            if self.portfolio.instance is not None and await self.portfolio.running_instance() == self.portfolio.instance:
+                return
+            vendors = await asyncio.to_thread(self.store.scored_vendors)
+            result = await self.portfolio.replace([
+                portfolio_vendor(v["vendor_id"], v["vendor_name"], v["domain"], v["overall_risk_score"], v["risk_level"], v["calculated_at"])
+                for v in vendors
+            ])
+        except PortfolioIndexUnavailable as e:
+            self.portfolio.instance = None
+            logger.warning(f"Portfolio index not loaded: {str(e)}")
+            return
+        self.portfolio.instance = result.get("instance")
+        self.portfolio.loads += 1
+        logger.info(f"Portfolio index loaded with {len(vendors)} vendors")
+
+    async def push_page(self, rows: List[Dict[str, Any]], scores: List[Tuple]) -> None:
+        """Send a stored page's scores to the portfolio index, if it is loaded"""
+        if self.portfolio is None or self.portfolio.instance is None or not scores:
+            return
+        by_id = {row["vendor_id"]: row for row in rows}
+        vendors = [
+            portfolio_vendor(score[0], by_id[score[0]].get("vendor_name"), by_id[score[0]]["domain"], score[1], score[2], score[6])
+            for score in scores
+        ]
+        try:
+            result = await self.portfolio.upsert(vendors)
+        except PortfolioIndexUnavailable as e:
+            logger.warning(f"Portfolio index update skipped, reloading it later: {str(e)}")
+            self.portfolio.instance = None
+            return
+        except asyncio.CancelledError:
+            self.portfolio.instance = None
+            raise
+        if result.get("instance") != self.portfolio.instance:
+            logger.warning("Portfolio index restarted since it was loaded; reloading it")
+            self.portfolio.instance = None
+
+    async def assess_page(self, rows: List[Dict[str, Any]]) -> Tuple[List[Tuple], List[Tuple]]:
+        """(score rows, error rows) for the store, one per vendor of the page"""
+        start = time.perf_counter()
+        synced_at = datetime.utcnow().isoformat(sep=" ")
+        ids = {str(row["vendor_id"]): row["vendor_id"] for row in rows}
+        errors: List[Tuple] = []
+        enriched: List[Dict[str, Any]] = []
+        scored_only: List[Dict[str, Any]] = []
+        for row in rows:
+            try:
+                # Checked with the risk engine's own model, so one bad row cannot fail the page
+                factors = VendorRiskFactors(**vendor_factors(row)).model_dump(exclude_none=True)
+            except ValidationError as e:
+                errors.append((row["vendor_id"], f"Invalid factors: {validation_message(e)}", synced_at))
+                continue
+            (enriched if self.enrich and factors["domain"] else scored_only).append(factors)
+
+        results: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]] = {}
+        if enriched:
+            for assessment in await self.risk_engine.assess(enriched, self.enrich_concurrency):
+                results[assessment["vendor_id"]] = (assessment["risk"], assessment["enrichment"], assessment["error"])
+        if scored_only:
+            for risk in await self.risk_engine.calculate(scored_only):
+                results[risk["vendor_id"]] = (risk, None, None)
+
+        scores: List[Tuple] = []
+        for factors in enriched + scored_only:
+            vendor_id = ids[factors["vendor_id"]]
+            risk, enrichment, error = results.get(factors["vendor_id"], (None, None, "No result from the risk engine"))
+            if risk is None:
+                errors.append((vendor_id, error, synced_at))
+                continue
+            # What the score was computed from: the enrichment's values when it had them
+            enrichment = enrichment or {}
+            reputation = enrichment.get("reputation_score")
+            has_ssl = enrichment.get("has_ssl")
+            scores.append((
+                vendor_id,
+                risk["overall_risk_score"],
+                risk["risk_level"],
+                reputation if reputation is not None else factors.get("domain_reputation_score"),
+                has_ssl if has_ssl is not None else factors["has_ssl"],
+                risk["scoring_model_version"],
+                risk["calculated_at"],
+                None,
+                synced_at,
+            ))
+        self.observe_stage("sync_assess_page", time.perf_counter() - start)
+        return scores, errors
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "running": self.running,
+            "current_run": self.current,
+            "last_run": self.last_run,
+            "runs": self.runs,
+            "vendors_scored": self.vendors_scored,
+            "vendors_failed": self.vendors_failed,
+            "risk_engine": self.risk_engine.stats(),
+            "portfolio_index": self.portfolio.stats() if self.portfolio is not None else None,
+        }
@@ -0,0 +1,162 @@
+"""
+Circuit breakers for lookup backends
+
+A backend that keeps failing (a WHOIS server, a DNS resolver) is skipped
+instead of being waited on by every lookup. After failure_threshold
+consecutive failures its breaker opens and calls are rejected at once with
+CircuitOpen. Once reset_timeout has passed the breaker is half-open: one
+probe call goes through, and its success closes the breaker while its
+failure opens it again for twice as long, up to max_reset_timeout.
+"""
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BackendUnavailable(Exception):
+    """
+    A lookup backend failed: refused, reset, timed out or answered with an error
+
+    cache_for is how long (seconds) callers may remember the failure instead
+    of asking again; 0 means not at all.
+    """
+
+    def __init__(self, message: str, cache_for: float = 0):
+        super().__init__(message)
+        self.cache_for = cache_for
+
+
+class CircuitOpen(BackendUnavailable):
+    """The backend's breaker is open, so no call was made"""
+
+
+class CircuitBreaker:
+    """Closed, open or half-open state of one backend"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_reset_timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.open_for = reset_timeout
+        self.opened_at: Optional[float] = None
+        self.probe_started: Optional[float] = None
+        self.consecutive_failures = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opens = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if self.clock() - self.opened_at < self.open_for:
+            return OPEN
+        return HALF_OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; when half-open, only one probe at a time does"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        now = self.clock()
+        # A probe that never reported back (its caller was cancelled) is replaced after open_for
+        if state == HALF_OPEN and (self.probe_started is None or now - self.probe_started >= self.open_for):
+            self.probe_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    def success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_started = None
+        self.open_for = self.reset_timeout
+
+    def failure(self) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        state = self.state
+        if state == HALF_OPEN:
+            # The probe failed: stay away for longer
+            self.open_for = min(self.open_for * 2, self.max_reset_timeout)
+            self._open()
+        elif state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a probe through"""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.open_for - self.clock())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opens": self.opens,
+            "retry_in": round(self.retry_in(), 1),
+        }
+
+    def _open(self) -> None:
+        self.opened_at = self.clock()
+        self.probe_started = None
+        self.opens += 1
+
+
+class KeyedCircuitBreakers:
+    """One CircuitBreaker per backend key, created on first use"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_reset_timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(
+                self.failure_threshold, self.reset_timeout, self.max_reset_timeout, self.clock
+            )
+        return breaker
+
+    def check(self, key: str) -> CircuitBreaker:
+        """The key's breaker, or CircuitOpen if it does not allow a call now"""
+        breaker = self.get(key)
+        if not breaker.allow():
+            raise CircuitOpen(f"{key} is unavailable, next probe in {breaker.retry_in():.0f}s")
+        return breaker
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: breaker.stats() for key, breaker in self.breakers.items()}
+
+
+def split_address(address: str, default_port: int) -> Tuple[str, int]:
+    """("host", port) from "host" or "host:port"; IPv6 addresses go in brackets"""
+    address = address.strip()
+    if address.startswith("["):
+        host, _, rest = address[1:].partition("]")
+        return host, int(rest[1:]) if rest.startswith(":") else default_port
+    if address.count(":") == 1:
+        host, port = address.split(":")
+        return host, int(port)
+    return address, default_port
@@ -0,0 +1,90 @@
+"""
+DNS lookups through a list of resolvers, each behind a circuit breaker
+
+Resolvers are tried in order, skipping any whose breaker is open, so a dead
+resolver costs one timeout per breaker probe rather than one per lookup.
+Without configured resolvers the system configuration (/etc/resolv.conf) is
+used as a single backend named "system".
+
+NXDOMAIN and "no records of this type" are answers, not failures: they come
+back as an empty record list with the outcome "nxdomain" or "no_answer".
+Timeouts, SERVFAIL and REFUSED answers and unreachable resolvers count
+against the resolver's breaker and move on to the next one; when none
+answers, BackendUnavailable (CircuitOpen if none was even tried) is raised.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from circuit_breaker import BackendUnavailable, CircuitOpen, KeyedCircuitBreakers, split_address
+
+logger = logging.getLogger(__name__)
+
+DNS_PORT = 53
+
+
+class DnsClient:
+    """Resolves one record type at a time, failing over between resolvers"""
+
+    def __init__(self, resolvers: List[str], timeout: float, breakers: KeyedCircuitBreakers, failure_ttl: float = 0):
+        self.addresses = resolvers
+        self.timeout = timeout
+        self.breakers = breakers
+        self.failure_ttl = failure_ttl
+        self._resolvers: Optional[List[Tuple[str, Any]]] = None
+
+    def resolvers(self) -> List[Tuple[str, Any]]:
+        """(name, dnspython resolver) pairs, created on first use"""
+        if self._resolvers is None:
+            import dns.asyncresolver
+
+            if not self.addresses:
+                self._resolvers = [("system", dns.asyncresolver.get_default_resolver())]
+            else:
+                resolvers = []
+                for address in self.addresses:
+                    host, port = split_address(address, DNS_PORT)
+                    resolver = dns.asyncresolver.Resolver(configure=False)
+                    resolver.nameservers = [host]
+                    resolver.port = port
+                    resolvers.append((f"{host}:{port}", resolver))
+                self._resolvers = resolvers
+        return self._resolvers
+
+    async def resolve(self, domain: str, record_type: str) -> Tuple[List[str], Optional[int], str]:
+        """(records, record TTL, outcome), the outcome being "answer", "nxdomain", "no_answer" or "invalid" """
+        import dns.exception
+        import dns.resolver
+
+        errors = []
+        for name, resolver in self.resolvers():
+            breaker = self.breakers.get(name)
+            if not breaker.allow():
+                errors.append(f"{name}: circuit open")
+                continue
+            try:
+                answers = await asyncio.wait_for(resolver.resolve(domain, record_type, lifetime=self.timeout), self.timeout)
+            except dns.resolver.NXDOMAIN:
+                breaker.success()
+                return [], None, "nxdomain"
+            except dns.resolver.NoAnswer:
+                breaker.success()
+                return [], None, "no_answer"
+            except (dns.exception.Timeout, dns.resolver.NoNameservers, asyncio.TimeoutError, OSError) as e:
+                breaker.failure()
+                errors.append(f"{name}: {str(e) or type(e).__name__}")
+                logger.info(f"DNS {record_type} lookup for {domain} failed on {name}: {str(e) or type(e).__name__}")
+                continue
+            except dns.exception.DNSException:
+                # Not a name that can be looked up (empty or overlong labels); no resolver will do better
+                return [], None, "invalid"
+            breaker.success()
+            return [str(r) for r in answers], answers.rrset.ttl, "answer"
+
+        message = f"No resolver answered {record_type} for {domain} ({'; '.join(errors)})"
+        if all(error.endswith("circuit open") for error in errors):
+            raise CircuitOpen(message)
+        raise BackendUnavailable(message, self.failure_ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"resolvers": [name for name, _ in self.resolvers()], "breakers": self.breakers.stats()}
@@ -0,0 +1,238 @@
+"""
+Two-tier cache for OSINT lookups
+
+Tier 1 is a bounded in-process LRU; tier 2 is the intelligence layer's Redis
+(optional - without REDIS_URL the cache is in-process only). Each entry
+carries its own TTL, chosen by the lookup (DNS record TTL, WHOIS TTL), plus a
+stale window during which the old value is served immediately while a
+background refresh fetches a new one. Concurrent misses for the same key
+share a single fetch.
+
+A fetch that fails with an exception carrying cache_for (seconds), such as
+BackendUnavailable, has the failure remembered in-process for that long:
+lookups of the key re-raise it instead of fetching again, and a stale entry
+is served without scheduling refreshes until it lapses.
+
+The Redis tier only needs an object with async get(key) and
+set(key, value, ex=seconds), so redis.asyncio clients and fakes both work.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A fetch returns (value, ttl_seconds); a ttl of None means "do not cache"
+Fetch = Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+
+
+class CacheEntry:
+    __slots__ = ("value", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class LRUCache:
+    """Bounded least-recently-used map of key -> CacheEntry"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class EnrichmentCache:
+    """LRU + Redis cache with per-entry TTLs and stale-while-revalidate"""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        redis: Any = None,
+        key_prefix: str = "osint:",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.local = LRUCache(max_entries)
+        self.redis = redis
+        self.key_prefix = key_prefix
+        self.clock = clock
+        self.counters: Dict[str, int] = {
+            "hits": 0,
+            "redis_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "redis_errors": 0,
+            "failure_hits": 0,
+        }
+        # key -> (clock time the failure is forgotten, exception), oldest first
+        self.failures: "OrderedDict[str, Tuple[float, Exception]]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get_or_fetch(self, key: str, fetch: Fetch, stale_ttl: float = 0) -> Any:
+        """
+        Return the cached value for key, calling fetch on a miss
+
+        Fresh entries are returned as-is. Expired entries still inside their
+        stale window are returned immediately and refreshed in the background.
+        A remembered failure is re-raised when there is nothing to serve.
+        """
+        now = self.clock()
+        entry = self.local.get(key)
+        tier = "hits"
+        if entry is None or entry.stale_until <= now:
+            entry = await self._redis_get(key)
+            tier = "redis_hits"
+            if entry is not None and entry.stale_until > now:
+                self.local.set(key, entry)
+            else:
+                entry = None
+
+        if entry is not None:
+            if entry.expires_at > now:
+                self.counters[tier] += 1
+            else:
+                self.counters["stale_hits"] += 1
+                self._schedule_refresh(key, fetch, stale_ttl)
+            return entry.value
+
+        failure = self._failure(key, now)
+        if failure is not None:
+            self.counters["failure_hits"] += 1
+            raise failure.with_traceback(None)
+
+        # Concurrent misses for the same key wait on one shared fetch task,
+        # which finishes (and populates the cache) even if its callers go away
+        task = self._inflight.get(key)
+        if task is None:
+            self.counters["misses"] += 1
+            task = asyncio.create_task(self._fetch_and_store(key, fetch, stale_ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def expires_at(self, key: str) -> Optional[float]:
+        """When key's in-process entry stops being fresh (clock time), or None if not cached"""
+        entry = self.local.entries.get(key)
+        return entry.expires_at if entry is not None else None
+
+    def invalidate(self, key: str) -> None:
+        """Drop key from the in-process tier"""
+        self.local.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus current size, for the stats endpoint"""
+        lookups = self.counters["hits"] + self.counters["redis_hits"] + self.counters["stale_hits"] + self.counters["coalesced"] + self.counters["misses"]
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "evictions": self.local.evictions,
+            "entries": len(self.local),
+            "failures": len(self.failures),
+            "max_entries": self.local.max_entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "redis_enabled": self.redis is not None,
+        }
+
+    def _schedule_refresh(self, key: str, fetch: Fetch, stale_ttl: float) -> None:
+        if key in self._refreshing or self._failure(key, self.clock()) is not None:
+            return
+        task = asyncio.create_task(self._refresh(key, fetch, stale_ttl))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _fetch_and_store(self, key: str, fetch: Fetch, stale_ttl: float) -> Any:
+        try:
+            value, ttl = await fetch()
+        except Exception as e:
+            cache_for = getattr(e, "cache_for", 0)
+            if cache_for > 0:
+                self._remember_failure(key, e, cache_for)
+            raise
+        self.failures.pop(key, None)
+        await self._store(key, value, ttl, stale_ttl)
+        return value
+
+    def _failure(self, key: str, now: float) -> Optional[Exception]:
+        failure = self.failures.get(key)
+        if failure is None:
+            return None
+        if failure[0] <= now:
+            del self.failures[key]
+            return None
+        return failure[1]
+
+    def _remember_failure(self, key: str, error: Exception, cache_for: float) -> None:
+        self.failures.pop(key, None)
+        self.failures[key] = (self.clock() + cache_for, error)
+        while len(self.failures) > self.local.max_entries:
+            self.failures.popitem(last=False)
+
+    async def _refresh(self, key: str, fetch: Fetch, stale_ttl: float) -> None:
+        self.counters["refreshes"] += 1
+        try:
+            await self._fetch_and_store(key, fetch, stale_ttl)
+        except Exception as e:
+            self.counters["refresh_errors"] += 1
+            logger.warning(f"Background refresh failed for {key}: {str(e)}")
+
+    async def _store(self, key: str, value: Any, ttl: Optional[float], stale_ttl: float) -> None:
+        if ttl is None or ttl <= 0:
+            return
+        now = self.clock()
+        entry = CacheEntry(value, now + ttl, now + ttl + stale_ttl)
+        self.local.set(key, entry)
+        if self.redis is None:
+            return
+        payload = json.dumps(
+            {"value": value, "expires_at": entry.expires_at, "stale_until": entry.stale_until},
+            default=str,
+        )
+        try:
+            await self.redis.set(self.key_prefix + key, payload, ex=max(1, int(ttl + stale_ttl)))
+        except Exception as e:
+            self.counters["redis_errors"] += 1
+            logger.warning(f"Redis cache write failed for {key}: {str(e)}")
+
+    async def _redis_get(self, key: str) -> Optional[CacheEntry]:
+        if self.redis is None:
+            return None
+        try:
+            payload = await self.redis.get(self.key_prefix + key)
+        except Exception as e:
+            self.counters["redis_errors"] += 1
+            logger.warning(f"Redis cache read failed for {key}: {str(e)}")
+            return None
+        if payload is None:
+            return None
+        data = json.loads(payload)
+        return CacheEntry(data["value"], data["expires_at"], data["stale_until"])
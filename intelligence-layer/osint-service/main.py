@@ -1,14 +1,22 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
-import httpx
-import whois
-import dns.resolver
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+import asyncio
+import importlib
+import os
+import time
 from datetime import datetime
 import logging
+from grc_shared import instrumentation
+from circuit_breaker import KeyedCircuitBreakers, CLOSED, HALF_OPEN, OPEN
+from dns_client import DnsClient
+from enrichment_cache import EnrichmentCache
+from rate_limit import KeyedRateLimiter, parse_rate_overrides
+from tls_collector import TlsCollector, cache_ttl
+from whois_client import WhoisClient, WhoisNotFound, parse_servers
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by grc_shared/gunicorn.conf.py, or below when run directly
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
@@ -17,6 +25,120 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Request rates and latencies, lookup stage timings and cache counters for /metrics
+telemetry = instrumentation.ServiceMetrics("osint-service")
+app.add_middleware(instrumentation.MetricsMiddleware, metrics=telemetry)
+
+# Lookup timeouts (seconds), per WHOIS server and per DNS resolver
+WHOIS_TIMEOUT = float(os.getenv("WHOIS_TIMEOUT", "10"))
+DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "5"))
+
+DNS_RECORD_TYPES = ("A", "MX", "TXT")
+
+# Lookup libraries, imported on first use (or by preload()) so the service starts
+# without them: python-whois, dnspython, and cryptography for certificate details
+PRELOAD_MODULES = (
+    "whois", "whois.parser", "whois.whois", "dns.asyncresolver", "dns.resolver",
+    "cryptography.x509", "cryptography.hazmat.primitives.asymmetric.ec", "cryptography.hazmat.primitives.asymmetric.rsa",
+)
+
+# Circuit breakers, one per WHOIS server and per DNS resolver: open after
+# BREAKER_FAILURE_THRESHOLD failures in a row, probe again after
+# BREAKER_RESET_TIMEOUT seconds, doubling up to BREAKER_MAX_RESET_TIMEOUT
+# while probes keep failing
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+BREAKER_MAX_RESET_TIMEOUT = float(os.getenv("BREAKER_MAX_RESET_TIMEOUT", "600"))
+
+# Negative results are cached for a short while: NXDOMAIN and empty DNS
+# answers for DNS_NEGATIVE_TTL, domains without a WHOIS record for
+# WHOIS_NEGATIVE_TTL. A failed lookup (backend down) is remembered for
+# LOOKUP_FAILURE_TTL seconds before the backend is asked again.
+DNS_NEGATIVE_TTL = float(os.getenv("DNS_NEGATIVE_TTL", "300"))
+WHOIS_NEGATIVE_TTL = float(os.getenv("WHOIS_NEGATIVE_TTL", "900"))
+LOOKUP_FAILURE_TTL = float(os.getenv("LOOKUP_FAILURE_TTL", "30"))
+
+# Resolvers tried in order, e.g. DNS_RESOLVERS="10.0.0.2,1.1.1.1:53"; empty uses /etc/resolv.conf
+dns_client = DnsClient(
+    [address for address in os.getenv("DNS_RESOLVERS", "").split(",") if address.strip()],
+    DNS_TIMEOUT,
+    KeyedCircuitBreakers(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, BREAKER_MAX_RESET_TIMEOUT),
+    LOOKUP_FAILURE_TTL,
+)
+
+# Enrichments answered without one of their lookups, by lookup (whois, A, MX, TXT, tls)
+degraded_lookups: Dict[str, int] = {}
+
+# Lookup cache: DNS entries live for their record TTL, WHOIS for WHOIS_CACHE_TTL.
+# Expired entries are served for a further *_STALE_TTL seconds while refreshing.
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+WHOIS_CACHE_TTL = float(os.getenv("WHOIS_CACHE_TTL", str(7 * 24 * 3600)))
+WHOIS_CACHE_STALE_TTL = float(os.getenv("WHOIS_CACHE_STALE_TTL", str(24 * 3600)))
+DNS_CACHE_STALE_TTL = float(os.getenv("DNS_CACHE_STALE_TTL", "300"))
+
+def connect_redis(url: str):
+    """redis.asyncio client; the library is only imported when REDIS_URL is set"""
+    import redis.asyncio as aioredis
+    return aioredis.from_url(url)
+
+lookup_cache = EnrichmentCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    redis=connect_redis(REDIS_URL) if REDIS_URL else None,
+)
+
+# WHOIS calls per second (and burst) allowed per TLD, e.g. WHOIS_RATE_OVERRIDES="com=5,io=0.5"
+WHOIS_RATE_PER_TLD = float(os.getenv("WHOIS_RATE_PER_TLD", "2"))
+WHOIS_RATE_BURST = float(os.getenv("WHOIS_RATE_BURST", "5"))
+whois_rate_limiter = KeyedRateLimiter(
+    WHOIS_RATE_PER_TLD,
+    WHOIS_RATE_BURST,
+    parse_rate_overrides(os.getenv("WHOIS_RATE_OVERRIDES", "")),
+)
+
+# WHOIS servers by TLD, e.g. WHOIS_SERVERS="com=whois.example.net,io=10.0.0.5:4343";
+# other TLDs use python-whois's choice
+whois_client = WhoisClient(
+    WHOIS_TIMEOUT,
+    KeyedCircuitBreakers(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, BREAKER_MAX_RESET_TIMEOUT),
+    parse_servers(os.getenv("WHOIS_SERVERS", "")),
+    LOOKUP_FAILURE_TTL,
+    throttle=whois_rate_limiter.acquire,
+)
+
+# TLS inspection: port, per-connection timeouts (seconds) and connections open at once.
+# TLS_CA_FILE adds trusted CAs, e.g. a private CA or a local test CA.
+tls_collector = TlsCollector(
+    port=int(os.getenv("TLS_PORT", "443")),
+    connect_timeout=float(os.getenv("TLS_CONNECT_TIMEOUT", "3")),
+    handshake_timeout=float(os.getenv("TLS_HANDSHAKE_TIMEOUT", "3")),
+    max_concurrency=int(os.getenv("TLS_MAX_CONCURRENCY", "200")),
+    ca_file=os.getenv("TLS_CA_FILE") or None,
+)
+
+# A valid certificate's inspection is cached until TLS_EXPIRY_MARGIN before it
+# expires, at most TLS_CACHE_MAX_TTL; missing or invalid TLS is rechecked after
+# TLS_RECHECK_TTL. Timeouts, resets and inconclusive checks are not cached.
+TLS_CACHE_MAX_TTL = float(os.getenv("TLS_CACHE_MAX_TTL", str(7 * 24 * 3600)))
+TLS_EXPIRY_MARGIN = float(os.getenv("TLS_EXPIRY_MARGIN", str(24 * 3600)))
+TLS_RECHECK_TTL = float(os.getenv("TLS_RECHECK_TTL", "3600"))
+
+# Bulk enrichment: domains per request, and domains enriched at once per request
+BULK_MAX_DOMAINS = int(os.getenv("BULK_MAX_DOMAINS", "10000"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "50"))
+
+def preload() -> None:
+    """
+    Import the lookup libraries now rather than on first use
+
+    grc_shared/gunicorn.conf.py calls this in the master process, so forked workers
+    share the imported modules (and the OpenAPI schema behind /docs) and none
+    of them pays for the first lookup.
+    """
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    app.openapi()
+
 class DomainEnrichRequest(BaseModel):
     """Request model for domain enrichment"""
     domain: str = Field(..., description="Domain name to enrich", example="example.com")
@@ -27,9 +149,23 @@ class DomainEnrichResponse(BaseModel):
     whois_data: Optional[Dict[str, Any]] = None
     dns_records: Optional[Dict[str, Any]] = None
     ssl_info: Optional[Dict[str, Any]] = None
-    reputation_score: Optional[int] = Field(None, ge=0, le=100)
+    has_ssl: Optional[bool] = Field(None, description="Trusted, unexpired certificate for the domain; null if the check was inconclusive")
+    reputation_score: Optional[int] = Field(None, ge=0, le=100, description="Null when WHOIS or DNS data is degraded")
+    degraded: bool = Field(False, description="A lookup backend failed or was skipped by its circuit breaker")
+    degraded_lookups: List[str] = Field(default_factory=list, description="Lookups (whois, A, MX, TXT, tls) without a result")
+    lookup_timings_ms: Optional[Dict[str, float]] = Field(None, description="Duration of each lookup (whois, A, MX, TXT, tls)")
+    cache_expires_at: Optional[str] = Field(None, description="When the first of the cached lookups behind this result expires; null if none were cached")
     last_updated: str
 
+class BulkEnrichRequest(BaseModel):
+    """Request model for bulk domain enrichment"""
+    domains: List[str] = Field(..., min_length=1, max_length=BULK_MAX_DOMAINS)
+    concurrency: int = Field(BULK_CONCURRENCY, ge=1, le=500, description="Domains enriched at once")
+
+class BulkEnrichResult(DomainEnrichResponse):
+    """One streamed bulk enrichment result; error is set when the domain failed"""
+    error: Optional[str] = None
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -47,84 +183,197 @@ async def enrich_domain(request: DomainEnrichRequest):
     
     - Performs WHOIS lookup
     - Retrieves DNS records
-    - Checks SSL certificate status
+    - Inspects the TLS certificate and protocol versions on port 443
     - Calculates preliminary reputation score
+    
+    WHOIS, each DNS record type and the TLS check run concurrently, each
+    with its own timeout, so latency tracks the slowest single lookup.
+    Lookups whose backend is down are listed in degraded_lookups; the
+    reputation score is then null rather than lowered for missing data.
     """
     try:
         logger.info(f"Enriching domain: {request.domain}")
-        
-        # Get WHOIS data
-        whois_data = get_whois_data(request.domain)
-        
-        # Get DNS records
-        dns_records = get_dns_records(request.domain)
-        
-        # Get SSL info (simplified)
-        ssl_info = {"status": "Not implemented yet"}
-        
-        # Calculate reputation score (simplified algorithm)
-        reputation_score = calculate_reputation_score(whois_data, dns_records)
-        
-        return DomainEnrichResponse(
-            domain=request.domain,
-            whois_data=whois_data,
-            dns_records=dns_records,
-            ssl_info=ssl_info,
-            reputation_score=reputation_score,
-            last_updated=datetime.utcnow().isoformat()
-        )
+        return await enrich(request.domain)
     
     except Exception as e:
         logger.error(f"Error enriching domain {request.domain}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error enriching domain: {str(e)}")
 
-def get_whois_data(domain: str) -> Optional[Dict[str, Any]]:
-    """Retrieve WHOIS data for a domain"""
+@app.post("/api/enrich/bulk")
+async def enrich_domains_bulk(request: BulkEnrichRequest):
+    """
+    Enrich many domains, streaming results as each one completes
+    
+    Returns NDJSON, one BulkEnrichResult per requested domain in completion
+    order. Lookups for the same domain are shared between concurrent
+    requests and WHOIS calls are rate limited per TLD.
+    """
+    logger.info(f"Bulk enriching {len(request.domains)} domains (concurrency {request.concurrency})")
+    return StreamingResponse(
+        stream_enrichments(request.domains, request.concurrency),
+        media_type="application/x-ndjson"
+    )
+
+async def enrich(domain: str) -> DomainEnrichResponse:
+    """Run every lookup for a domain and score it"""
+    # Get WHOIS data, DNS records and TLS details concurrently
+    timings: Dict[str, float] = {}
+    degraded: List[str] = []
+    whois_data, dns_records, ssl_info = await asyncio.gather(
+        fetch_whois_data(domain, timings, degraded),
+        get_dns_records(domain, timings, degraded),
+        fetch_ssl_info(domain, timings),
+    )
+    if ssl_info.get("has_ssl") is None:
+        degraded.append("tls")
+    for lookup in degraded:
+        degraded_lookups[lookup] = degraded_lookups.get(lookup, 0) + 1
+    
+    # Calculate reputation score (simplified algorithm); missing WHOIS or DNS
+    # data would read as a poorly set up domain, so there is no score then.
+    # An inconclusive TLS check only leaves its adjustment out.
+    if any(lookup != "tls" for lookup in degraded):
+        reputation_score = None
+    else:
+        reputation_score = calculate_reputation_score(whois_data, dns_records, ssl_info)
+    
+    return DomainEnrichResponse(
+        domain=domain,
+        whois_data=whois_data,
+        dns_records=dns_records,
+        ssl_info=ssl_info,
+        has_ssl=ssl_info.get("has_ssl"),
+        reputation_score=reputation_score,
+        degraded=bool(degraded),
+        degraded_lookups=sorted(degraded),
+        lookup_timings_ms=timings,
+        cache_expires_at=cache_expiry(domain),
+        last_updated=datetime.utcnow().isoformat()
+    )
+
+def cache_expiry(domain: str) -> Optional[str]:
+    """When the first of the domain's cached WHOIS, DNS and TLS lookups expires"""
+    domain = domain.lower()
+    keys = [f"whois:{domain}", *(f"dns:{record_type}:{domain}" for record_type in DNS_RECORD_TYPES), f"tls:{domain}"]
+    expiries = [expires for expires in map(lookup_cache.expires_at, keys) if expires is not None]
+    return datetime.utcfromtimestamp(min(expiries)).isoformat() if expiries else None
+
+async def stream_enrichments(domains: List[str], concurrency: int) -> AsyncIterator[str]:
+    """Enrich domains with a fixed pool of workers, yielding NDJSON lines as they finish"""
+    pending = iter(domains)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        for domain in pending:
+            try:
+                result = BulkEnrichResult(**(await enrich(domain)).model_dump())
+            except Exception as e:
+                logger.warning(f"Bulk enrichment failed for {domain}: {str(e)}")
+                result = BulkEnrichResult(domain=domain, error=str(e), last_updated=datetime.utcnow().isoformat())
+            await results.put(result)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(domains)))]
     try:
-        w = whois.whois(domain)
-        return {
-            "registrar": w.registrar,
-            "creation_date": str(w.creation_date) if w.creation_date else None,
-            "expiration_date": str(w.expiration_date) if w.expiration_date else None,
-            "name_servers": w.name_servers if w.name_servers else [],
-            "status": w.status if w.status else None,
-        }
+        for _ in range(len(domains)):
+            yield (await results.get()).model_dump_json() + "\n"
+    finally:
+        # Stop outstanding lookups if the client disconnects mid-stream
+        for task in workers:
+            task.cancel()
+
+async def fetch_whois_data(
+    domain: str, timings: Optional[Dict[str, float]] = None, degraded: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Cached WHOIS data for a domain; adds "whois" to degraded if the lookup failed"""
+    start = time.perf_counter()
+    try:
+        return await lookup_cache.get_or_fetch(
+            f"whois:{domain.lower()}", lambda: lookup_whois(domain), WHOIS_CACHE_STALE_TTL
+        )
     except Exception as e:
         logger.warning(f"WHOIS lookup failed for {domain}: {str(e)}")
+        if degraded is not None:
+            degraded.append("whois")
         return {"error": str(e)}
+    finally:
+        elapsed = time.perf_counter() - start
+        telemetry.observe_stage("whois", elapsed)
+        if timings is not None:
+            timings["whois"] = round(elapsed * 1000, 1)
 
-def get_dns_records(domain: str) -> Optional[Dict[str, Any]]:
-    """Retrieve DNS records for a domain"""
+async def lookup_whois(domain: str) -> Tuple[Dict[str, Any], float]:
+    """
+    Query the domain's WHOIS server, returning (data, cache TTL)
+
+    A domain the registry has no record of is an answer, cached for
+    WHOIS_NEGATIVE_TTL; an unreachable server raises BackendUnavailable.
+    Calls are rate limited per TLD by the client.
+    """
     try:
-        dns_data = {}
-        
-        # Get A records
-        try:
-            a_records = dns.resolver.resolve(domain, 'A')
-            dns_data['A'] = [str(r) for r in a_records]
-        except:
-            dns_data['A'] = []
-        
-        # Get MX records
-        try:
-            mx_records = dns.resolver.resolve(domain, 'MX')
-            dns_data['MX'] = [str(r) for r in mx_records]
-        except:
-            dns_data['MX'] = []
-        
-        # Get TXT records
-        try:
-            txt_records = dns.resolver.resolve(domain, 'TXT')
-            dns_data['TXT'] = [str(r) for r in txt_records]
-        except:
-            dns_data['TXT'] = []
-        
-        return dns_data
+        return await whois_client.lookup(domain), WHOIS_CACHE_TTL
+    except WhoisNotFound as e:
+        return {"error": str(e), "registered": False}, WHOIS_NEGATIVE_TTL
+
+async def get_dns_records(
+    domain: str, timings: Optional[Dict[str, float]] = None, degraded: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Retrieve DNS records for a domain, resolving all record types concurrently"""
+    results = await asyncio.gather(*(resolve_dns_record(domain, rtype, timings, degraded) for rtype in DNS_RECORD_TYPES))
+    return dict(zip(DNS_RECORD_TYPES, results))
+
+async def resolve_dns_record(
+    domain: str, record_type: str, timings: Optional[Dict[str, float]] = None, degraded: Optional[List[str]] = None
+) -> List[str]:
+    """Cached records of one type for a domain; adds the type to degraded if no resolver answered"""
+    start = time.perf_counter()
+    try:
+        return await lookup_cache.get_or_fetch(
+            f"dns:{record_type}:{domain.lower()}", lambda: lookup_dns_record(domain, record_type), DNS_CACHE_STALE_TTL
+        )
     except Exception as e:
-        logger.warning(f"DNS lookup failed for {domain}: {str(e)}")
-        return {"error": str(e)}
+        logger.warning(f"DNS {record_type} lookup failed for {domain}: {str(e)}")
+        if degraded is not None:
+            degraded.append(record_type)
+        return []
+    finally:
+        elapsed = time.perf_counter() - start
+        telemetry.observe_stage(f"dns_{record_type}", elapsed)
+        if timings is not None:
+            timings[record_type] = round(elapsed * 1000, 1)
+
+async def lookup_dns_record(domain: str, record_type: str) -> Tuple[List[str], float]:
+    """
+    Resolve one record type, returning (records, cache TTL)
 
-def calculate_reputation_score(whois_data: Optional[Dict], dns_data: Optional[Dict]) -> int:
+    Records are cached for their TTL; NXDOMAIN and empty answers for
+    DNS_NEGATIVE_TTL. If no resolver answers, BackendUnavailable is raised.
+    """
+    records, ttl, outcome = await dns_client.resolve(domain, record_type)
+    if outcome != "answer":
+        return [], DNS_NEGATIVE_TTL
+    return records, ttl
+
+async def fetch_ssl_info(domain: str, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Cached TLS inspection of a domain"""
+    start = time.perf_counter()
+    try:
+        return await lookup_cache.get_or_fetch(f"tls:{domain.lower()}", lambda: lookup_tls(domain))
+    finally:
+        elapsed = time.perf_counter() - start
+        telemetry.observe_stage("tls", elapsed)
+        if timings is not None:
+            timings["tls"] = round(elapsed * 1000, 1)
+
+async def lookup_tls(domain: str) -> Tuple[Dict[str, Any], Optional[float]]:
+    """Inspect the domain's certificate, returning (details, cache TTL)"""
+    try:
+        info = await tls_collector.inspect(domain)
+    except Exception as e:
+        logger.warning(f"TLS inspection failed for {domain}: {str(e)}")
+        return {"status": "error", "has_ssl": None, "error": str(e)}, None
+    return info, cache_ttl(info, TLS_CACHE_MAX_TTL, TLS_EXPIRY_MARGIN, TLS_RECHECK_TTL)
+
+def calculate_reputation_score(whois_data: Optional[Dict], dns_data: Optional[Dict], ssl_info: Optional[Dict] = None) -> int:
     """
     Calculate a basic reputation score (0-100)
     Higher score = better reputation
@@ -148,9 +397,66 @@ def calculate_reputation_score(whois_data: Optional[Dict], dns_data: Optional[Di
         if dns_data.get("TXT"):
             score += 5
     
+    if ssl_info:
+        status = ssl_info.get("status")
+        if status in ("no_tls", "handshake_failed"):
+            # Nothing usable served on 443
+            score -= 20
+        elif status in ("invalid", "expired"):
+            # Untrusted chain, hostname mismatch or expired certificate
+            score -= 15
+        elif status == "valid":
+            if ssl_info.get("days_remaining", 0) < 14:
+                score -= 5
+            if ssl_info.get("key_type") == "RSA" and (ssl_info.get("key_size") or 0) < 2048:
+                score -= 5
+    
     # Ensure score is within bounds
     return max(0, min(100, score))
 
+@app.get("/api/backends")
+async def backend_stats():
+    """Circuit breaker state of each WHOIS server and DNS resolver, and degraded enrichment counts"""
+    return {"whois": whois_client.stats(), "dns": dns_client.stats(), "degraded_lookups": degraded_lookups}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Lookup cache hit/miss/eviction counters, WHOIS rate limiter and TLS collector state"""
+    return {**lookup_cache.stats(), "whois_rate_limits": whois_rate_limiter.stats(), "tls": tls_collector.stats()}
+
+BREAKER_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+def collect_lookup_metrics() -> List[instrumentation.Family]:
+    """Lookup cache, WHOIS rate limiter, circuit breaker and TLS collector counters, read at scrape time"""
+    stats = lookup_cache.stats()
+    breakers = [("whois", key, breaker) for key, breaker in whois_client.breakers.breakers.items()]
+    breakers += [("dns", key, breaker) for key, breaker in dns_client.breakers.breakers.items()]
+    return [
+        *instrumentation.cache_families("lookup", stats, (
+            "hits", "redis_hits", "stale_hits", "misses", "coalesced", "refreshes", "refresh_errors", "redis_errors", "evictions",
+            "failure_hits",
+        ), "entries"),
+        ("grc_backend_circuit_state", "gauge", "Circuit breaker state per WHOIS server and DNS resolver (0 closed, 1 half-open, 2 open)",
+         [({"backend": backend, "server": key}, BREAKER_STATES[breaker.state]) for backend, key, breaker in breakers]),
+        ("grc_backend_failures_total", "counter", "Failed calls per WHOIS server and DNS resolver",
+         [({"backend": backend, "server": key}, breaker.failures) for backend, key, breaker in breakers]),
+        ("grc_backend_rejected_total", "counter", "Calls skipped by an open circuit breaker, per WHOIS server and DNS resolver",
+         [({"backend": backend, "server": key}, breaker.rejected) for backend, key, breaker in breakers]),
+        ("grc_enrich_degraded_total", "counter", "Enrichments answered without a lookup's result, by lookup",
+         [({"lookup": lookup}, count) for lookup, count in degraded_lookups.items()]),
+        ("grc_whois_rate_limited_total", "counter", "WHOIS calls that waited for a rate limit token, by TLD",
+         [({"tld": tld}, bucket["throttled"]) for tld, bucket in whois_rate_limiter.stats().items()]),
+        ("grc_tls_inspections_total", "counter", "TLS inspections run (cache misses)",
+         [({}, tls_collector.inspections)]),
+    ]
+
+telemetry.collect(collect_lookup_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, lookup stage and cache metrics in the Prometheus text format"""
+    return PlainTextResponse(telemetry.render(), media_type=instrumentation.CONTENT_TYPE)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -160,10 +466,16 @@ async def root():
         "endpoints": [
             "/health",
             "/api/enrich",
+            "/api/enrich/bulk",
+            "/api/cache/stats",
+            "/api/backends",
+            "/metrics",
             "/docs"
         ]
     }
 
 if __name__ == "__main__":
     import uvicorn
+    # LOG_LEVEL=WARNING drops the per-request INFO lines
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
     uvicorn.run(app, host="0.0.0.0", port=5001)
@@ -0,0 +1,96 @@
+"""
+Token-bucket rate limiting for outbound lookups
+
+WHOIS servers throttle per client, and python-whois picks the server from the
+TLD, so WHOIS calls are limited with one bucket per TLD. Rates that are not
+positive, and bursts below one token, raise ValueError when the limiter is
+built: such a bucket would never hand out a token, and every lookup waiting on
+it would hang.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; acquire() waits for a token"""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        check_limits(rate, burst)
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+        self.waits = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        # The lock keeps waiters in FIFO order and stops them racing for refills
+        async with self._lock:
+            waited = 0.0
+            while True:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    if waited:
+                        self.waits += 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class KeyedRateLimiter:
+    """One TokenBucket per key, created on first use"""
+
+    def __init__(self, rate: float, burst: float, overrides: Optional[Dict[str, float]] = None):
+        # Checked here, not when a key's bucket is first created, so bad settings fail at startup
+        check_limits(rate, burst)
+        for key, override in (overrides or {}).items():
+            check_limits(override, burst, key)
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, key: str) -> float:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.overrides.get(key, self.rate), self.burst)
+        return await bucket.acquire()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            key: {"rate": bucket.rate, "tokens": round(bucket.tokens, 2), "throttled": bucket.waits}
+            for key, bucket in self.buckets.items()
+        }
+
+
+def check_limits(rate: float, burst: float, key: Optional[str] = None) -> None:
+    """ValueError unless rate is positive and burst at least one token"""
+    where = f" for {key}" if key else ""
+    if not rate > 0:
+        raise ValueError(f"Rate limit{where} must be positive, got {rate}")
+    if not burst >= 1:
+        raise ValueError(f"Rate limit burst{where} must be at least 1, got {burst}")
+
+
+def parse_rate_overrides(spec: str) -> Dict[str, float]:
+    """Parse "com=5,io=0.5" into {"com": 5.0, "io": 0.5}; ValueError for rates that are not positive numbers"""
+    overrides = {}
+    for item in spec.split(","):
+        if "=" in item:
+            key, rate = item.split("=", 1)
+            key = key.strip().lower().lstrip(".")
+            try:
+                value = float(rate)
+            except ValueError:
+                raise ValueError(f"Rate limit override for {key} is not a number: {rate.strip()!r}") from None
+            if not value > 0:
+                raise ValueError(f"Rate limit override for {key} must be positive, got {value}")
+            overrides[key] = value
+    return overrides
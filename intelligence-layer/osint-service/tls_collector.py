@@ -0,0 +1,204 @@
+"""
+Concurrent TLS certificate inspection
+
+Each domain gets one verified handshake (chain and hostname checked against
+the system trust store, plus ca_file if given) and, at the same time,
+unverified handshakes pinned to TLS 1.2 and to TLS 1.3 to learn which of
+those versions the server accepts. Certificate details come from whichever
+handshake succeeded, so an untrusted or expired certificate is still
+described. A certificate is only called invalid or expired when the verified
+handshake failed verification; when it failed for another reason (a timeout,
+a reset) while a probe succeeded, the check is inconclusive. Every connection has its own connect and handshake timeouts, and
+at most max_concurrency connections are open at once across all domains.
+"""
+import asyncio
+import logging
+import ssl
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROBED_VERSIONS = {"TLSv1.2": ssl.TLSVersion.TLSv1_2, "TLSv1.3": ssl.TLSVersion.TLSv1_3}
+
+# Statuses for which the domain was reached and its TLS setup determined.
+# The others (inconclusive, reset, timeout, error) are not cached.
+DETERMINED = ("valid", "invalid", "expired", "no_tls", "handshake_failed")
+
+
+class TlsCollector:
+    """Inspects the certificate and TLS versions served on a port"""
+
+    def __init__(
+        self,
+        port: int = 443,
+        connect_timeout: float = 3.0,
+        handshake_timeout: float = 3.0,
+        max_concurrency: int = 200,
+        ca_file: Optional[str] = None,
+    ):
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.handshake_timeout = handshake_timeout
+        self.max_concurrency = max_concurrency
+        self.verified_context = ssl.create_default_context()
+        if ca_file:
+            self.verified_context.load_verify_locations(cafile=ca_file)
+        self.probe_contexts = {name: self._probe_context(version) for name, version in PROBED_VERSIONS.items()}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.inspections = 0
+
+    @staticmethod
+    def _probe_context(version: ssl.TLSVersion) -> ssl.SSLContext:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        context.minimum_version = version
+        context.maximum_version = version
+        return context
+
+    async def _handshake(self, host: str, port: int, server_hostname: str, context: ssl.SSLContext) -> Tuple[bytes, str, str]:
+        """(DER certificate, protocol version, cipher) of one TLS handshake"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            transport, protocol = await asyncio.wait_for(
+                loop.create_connection(asyncio.Protocol, host, port), self.connect_timeout
+            )
+            try:
+                tls_transport = await loop.start_tls(
+                    transport, protocol, context,
+                    server_hostname=server_hostname, ssl_handshake_timeout=self.handshake_timeout,
+                )
+                ssl_object = tls_transport.get_extra_info("ssl_object")
+                result = ssl_object.getpeercert(binary_form=True), ssl_object.version(), ssl_object.cipher()[0]
+                tls_transport.abort()
+                return result
+            finally:
+                transport.abort()
+
+    async def inspect(self, domain: str, host: Optional[str] = None, port: Optional[int] = None) -> Dict[str, Any]:
+        """TLS details for domain, connecting to host (default: the domain) on port"""
+        self.inspections += 1
+        host = host or domain
+        port = port or self.port
+        checked_at = datetime.now(timezone.utc)
+        contexts = [self.verified_context, *self.probe_contexts.values()]
+        verified, *probes = await asyncio.gather(
+            *(self._handshake(host, port, domain, context) for context in contexts),
+            return_exceptions=True,
+        )
+        versions = [name for name, probe in zip(PROBED_VERSIONS, probes) if not isinstance(probe, BaseException)]
+        handshake = verified if not isinstance(verified, BaseException) else next(
+            (probe for probe in probes if not isinstance(probe, BaseException)), None
+        )
+
+        if handshake is None:
+            status, error = failure_status(verified)
+            return {
+                "status": status,
+                "has_ssl": False if status in DETERMINED else None,
+                "error": error,
+                "checked_at": checked_at.replace(tzinfo=None).isoformat(),
+            }
+
+        der, negotiated, cipher = handshake
+        info = certificate_details(der, checked_at)
+        if not isinstance(verified, BaseException):
+            status, chain_valid = "valid", True
+        elif not isinstance(verified, ssl.SSLCertVerificationError):
+            # The verified handshake never got to verification: nothing is known about the chain
+            status, chain_valid = "inconclusive", None
+        elif info["days_remaining"] < 0:
+            status, chain_valid = "expired", False
+        else:
+            status, chain_valid = "invalid", False
+        return {
+            "status": status,
+            "has_ssl": status == "valid" if status in DETERMINED else None,
+            "chain_valid": chain_valid,
+            "verify_error": None if chain_valid else verify_error(verified),
+            **info,
+            "negotiated_protocol": negotiated,
+            "cipher": cipher,
+            "protocol_versions": versions,
+            "checked_at": checked_at.replace(tzinfo=None).isoformat(),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inspections": self.inspections,
+            "port": self.port,
+            "connect_timeout": self.connect_timeout,
+            "handshake_timeout": self.handshake_timeout,
+            "max_concurrency": self.max_concurrency,
+        }
+
+
+def cache_ttl(info: Dict[str, Any], max_ttl: float, expiry_margin: float, recheck_ttl: float) -> Optional[float]:
+    """
+    Seconds to cache an inspection: a valid certificate until expiry_margin
+    before it expires (at most max_ttl), other determined outcomes for
+    recheck_ttl, timeouts and errors not at all
+    """
+    if info["status"] not in DETERMINED:
+        return None
+    if info["status"] == "valid":
+        not_after = datetime.fromisoformat(info["not_after"])
+        remaining = (not_after - datetime.utcnow()).total_seconds() - expiry_margin
+        return min(max_ttl, remaining) if remaining > 0 else recheck_ttl
+    return recheck_ttl
+
+
+def certificate_details(der: bytes, now: datetime) -> Dict[str, Any]:
+    # cryptography is imported with the first certificate, not at startup
+    from cryptography import x509
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+    cert = x509.load_der_x509_certificate(der)
+    key = cert.public_key()
+    if isinstance(key, rsa.RSAPublicKey):
+        key_type, key_size = "RSA", key.key_size
+    elif isinstance(key, ec.EllipticCurvePublicKey):
+        key_type, key_size = f"EC {key.curve.name}", key.curve.key_size
+    else:
+        key_type, key_size = type(key).__name__.lstrip("_"), getattr(key, "key_size", None)
+    try:
+        names = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName).value.get_values_for_type(x509.DNSName)
+    except x509.ExtensionNotFound:
+        names = []
+    not_after = cert.not_valid_after_utc
+    remaining = (not_after - now).total_seconds()
+    return {
+        "issuer": cert.issuer.rfc4514_string(),
+        "subject": cert.subject.rfc4514_string(),
+        "subject_alt_names": names[:50],
+        "not_before": cert.not_valid_before_utc.replace(tzinfo=None).isoformat(),
+        "not_after": not_after.replace(tzinfo=None).isoformat(),
+        "days_remaining": int(remaining // 86400),
+        "key_type": key_type,
+        "key_size": key_size,
+        "signature_algorithm": cert.signature_hash_algorithm.name if cert.signature_hash_algorithm else None,
+    }
+
+
+def verify_error(error: BaseException) -> str:
+    if isinstance(error, ssl.SSLCertVerificationError):
+        return error.verify_message or str(error)
+    return str(error) or type(error).__name__
+
+
+def failure_status(error: BaseException) -> Tuple[str, str]:
+    """Status and message for a domain where no handshake completed"""
+    if isinstance(error, ConnectionRefusedError):
+        return "no_tls", "Connection refused"
+    # asyncio aborts a handshake that outlives ssl_handshake_timeout with ConnectionAbortedError
+    if isinstance(error, (asyncio.TimeoutError, ConnectionAbortedError)):
+        return "timeout", "Connect or handshake timed out"
+    # A reset may come from a middlebox or an overloaded server: retried, not remembered
+    if isinstance(error, ConnectionResetError):
+        return "reset", "Connection reset during the handshake"
+    if isinstance(error, (ssl.SSLError, asyncio.IncompleteReadError)):
+        return "handshake_failed", str(error) or type(error).__name__
+    return "error", str(error) or type(error).__name__
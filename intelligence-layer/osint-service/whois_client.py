@@ -0,0 +1,177 @@
+"""
+Asynchronous WHOIS client with explicit failures
+
+python-whois is blocking and turns connection errors and timeouts into a
+record with no data, so an unreachable WHOIS server looks the same as a
+domain without registration details. This client queries WHOIS servers
+(RFC 3912: one line out, read to EOF) over asyncio streams instead and
+raises BackendUnavailable when a server refuses, times out or closes without
+answering, which also counts against that server's circuit breaker.
+
+Servers are chosen as python-whois chooses them (asking whois.iana.org for
+TLDs it does not know), unless overridden per TLD, and the registrar server
+a thin registry refers to is queried too. Responses are parsed by
+python-whois; a registry without a record for the domain raises
+WhoisNotFound. The optional throttle (a per-TLD rate limiter) is awaited
+only once the registry's breaker has let the lookup through, so lookups
+against an open breaker fail without queueing for a token; it returns the
+seconds it waited. The wait for a token and the registry query share one
+timeout: a lookup that cannot get a
+token in time raises BackendUnavailable, and a query cut short by a long
+wait does not count against the server's breaker when it times out.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from circuit_breaker import BackendUnavailable, CircuitBreaker, KeyedCircuitBreakers, split_address
+
+logger = logging.getLogger(__name__)
+
+WHOIS_PORT = 43
+
+
+class WhoisNotFound(Exception):
+    """The registry has no record of the domain"""
+
+
+class WhoisClient:
+    """WHOIS lookups over asyncio streams, with one circuit breaker per server"""
+
+    def __init__(
+        self,
+        timeout: float,
+        breakers: KeyedCircuitBreakers,
+        servers: Optional[Dict[str, str]] = None,
+        failure_ttl: float = 0,
+        throttle: Optional[Callable[[str], Awaitable[float]]] = None,
+    ):
+        self.timeout = timeout
+        self.breakers = breakers
+        self.servers = servers or {}
+        self.failure_ttl = failure_ttl
+        self.throttle = throttle
+        # TLD -> server picked by python-whois, which may have asked IANA
+        self._chosen: Dict[str, str] = {}
+
+    async def lookup(self, domain: str) -> Dict[str, Any]:
+        """Registration details of a domain; raises WhoisNotFound or BackendUnavailable"""
+        from whois import extract_domain
+        from whois.parser import PywhoisError, WhoisEntry
+        from whois.whois import NICClient
+
+        domain = extract_domain(domain.strip().rstrip(".")).lower()
+        query = domain.encode("idna").decode("ascii")
+        server = await self.server_for(query)
+        host, port = split_address(server, WHOIS_PORT)
+        breaker = self.breakers.check(f"{host}:{port}")
+        timeout = None
+        if self.throttle is not None:
+            tld = query.rsplit(".", 1)[-1]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.timeout
+            try:
+                waited = await asyncio.wait_for(self.throttle(tld), self.timeout)
+            except asyncio.TimeoutError as e:
+                raise BackendUnavailable(f"WHOIS rate limit for .{tld}: no slot within {self.timeout:g}s") from e
+            if waited:
+                timeout = deadline - loop.time()
+        text = await self.query(server, query, breaker, timeout)
+        if 'with "=xxx"' in text:
+            # Verisign lists every name server matching the query unless asked for the domain only
+            text = await self.query(server, "=" + query)
+        referral = NICClient.findwhois_server(text, host, query)
+        if referral and referral != host:
+            try:
+                text += await self.query(referral, query)
+            except BackendUnavailable as e:
+                # The registry's record is enough to score; the registrar's adds contacts
+                logger.info(f"WHOIS referral for {domain} skipped: {str(e)}")
+        try:
+            w = WhoisEntry.load(domain, text)
+        except PywhoisError as e:
+            raise WhoisNotFound(f"No WHOIS record for {domain}") from e
+        return {
+            "registrar": w.registrar,
+            "creation_date": str(w.creation_date) if w.creation_date else None,
+            "expiration_date": str(w.expiration_date) if w.expiration_date else None,
+            "name_servers": w.name_servers if w.name_servers else [],
+            "status": w.status if w.status else None,
+        }
+
+    async def server_for(self, domain: str) -> str:
+        """The registry WHOIS server ("host" or "host:port") for a domain's TLD"""
+        tld = domain.rsplit(".", 1)[-1]
+        server = self.servers.get(tld) or self._chosen.get(tld)
+        if server is not None:
+            return server
+        from whois.whois import NICClient
+
+        try:
+            # choose_server is a table lookup, but asks IANA (blocking) for TLDs missing from it
+            server = await asyncio.wait_for(asyncio.to_thread(NICClient().choose_server, domain), self.timeout)
+        except Exception as e:
+            raise BackendUnavailable(f"No WHOIS server found for .{tld}: {describe(e)}", self.failure_ttl) from e
+        if not server:
+            raise WhoisNotFound(f"No WHOIS server for {domain}")
+        self._chosen[tld] = server
+        return server
+
+    async def query(
+        self, server: str, text: str, breaker: Optional[CircuitBreaker] = None, timeout: Optional[float] = None
+    ) -> str:
+        """
+        A WHOIS server's whole response to one query; breaker is the server's,
+        if already checked, and timeout what is left of the lookup's (default:
+        the full timeout)
+        """
+        from whois.whois import NICClient
+
+        host, port = split_address(server, WHOIS_PORT)
+        if breaker is None:
+            breaker = self.breakers.check(f"{host}:{port}")
+        if host == NICClient.DENICHOST:
+            text = "-T dn,ace -C UTF-8 " + text
+        elif host == NICClient.DK_HOST:
+            text = " --show-handles " + text
+        if timeout is None:
+            timeout = self.timeout
+        try:
+            response = await asyncio.wait_for(self._exchange(host, port, text), max(timeout, 0))
+        except (OSError, asyncio.TimeoutError) as e:
+            # A query shortened by the wait for the rate limit is not the server's failure when it times out
+            if timeout == self.timeout or not isinstance(e, asyncio.TimeoutError):
+                breaker.failure()
+            raise BackendUnavailable(f"WHOIS server {host}:{port} failed: {describe(e)}", self.failure_ttl) from e
+        if not response.strip():
+            breaker.failure()
+            raise BackendUnavailable(f"WHOIS server {host}:{port} closed without answering", self.failure_ttl)
+        breaker.success()
+        return response.decode("utf-8", "replace")
+
+    async def _exchange(self, host: str, port: int, text: str) -> bytes:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(text.encode("utf-8") + b"\r\n")
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"servers": {**self._chosen, **self.servers}, "breakers": self.breakers.stats()}
+
+
+def describe(error: BaseException) -> str:
+    """An exception's message, or its type for the ones without (timeouts)"""
+    return str(error) or type(error).__name__
+
+
+def parse_servers(spec: str) -> Dict[str, str]:
+    """Parse "com=whois.example.net,io=127.0.0.1:4343" into {"com": ..., "io": ...}"""
+    servers = {}
+    for item in spec.split(","):
+        if "=" in item:
+            tld, server = item.split("=", 1)
+            servers[tld.strip().lower().lstrip(".")] = server.strip()
+    return servers
@@ -0,0 +1,152 @@
+"""
+Columnar scoring kernel for batch risk calculation
+
+Every function here evaluates the same compiled scoring model tables as the
+per-vendor path in main.py and must return exactly the same integers for the
+same inputs. Inputs are NumPy arrays with one element per vendor.
+"""
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from scoring_model import CompiledModel
+
+# Upper bound applied when loading counts into int64 columns. Every bracket and
+# deduction saturates far below this, so clipping never changes a score.
+COLUMN_CAP = 1_000_000
+
+
+def maturity_scores(model: CompiledModel, company_age: np.ndarray, employee_count: np.ndarray) -> np.ndarray:
+    """Vectorized company maturity score; 0 means unknown"""
+    maturity = model.config.company_maturity
+    age_points = np.where(
+        company_age > 0,
+        model.age_points_array[np.searchsorted(model.age_thresholds_array, company_age, side="right")],
+        maturity.age_years.unknown_points,
+    )
+    employee_points = np.where(
+        employee_count > 0,
+        model.employee_points_array[np.searchsorted(model.employee_thresholds_array, employee_count, side="right")],
+        maturity.employee_count.unknown_points,
+    )
+    return np.minimum(age_points + employee_points, maturity.max_points)
+
+
+def security_scores(model: CompiledModel, has_ssl: np.ndarray, certification_points: np.ndarray) -> np.ndarray:
+    """Vectorized security posture score from pre-matched certification points"""
+    security = model.config.security_posture
+    return np.minimum(has_ssl.astype(np.int64) * security.ssl_points + certification_points, security.max_points)
+
+
+def incident_scores(model: CompiledModel, breach_count: np.ndarray, cve_count: np.ndarray) -> np.ndarray:
+    """Vectorized incident history score via the flat (breaches, cves) table"""
+    index = (
+        np.minimum(breach_count, model.breach_saturation) * (model.cve_saturation + 1)
+        + np.minimum(cve_count, model.cve_saturation)
+    )
+    return model.incident_table_array[index]
+
+
+def scaled_scores(table: np.ndarray, raw_scores: np.ndarray) -> np.ndarray:
+    """Look up 0-100 scores in a scaled table (index 0 is the unknown score)"""
+    return table[raw_scores]
+
+
+def risk_level_indices(model: CompiledModel, overall_scores: np.ndarray) -> np.ndarray:
+    """Vectorized risk level, as indices into model.level_names"""
+    return model.level_table_array[overall_scores]
+
+
+class FactorColumns:
+    """
+    Vendor risk factors held column-wise, one int64 (or bool) array per factor
+
+    Missing counts and scores are stored as 0 (unknown). Certifications are
+    string data, so each vendor holds an index into the distinct certification
+    lists; matching is then done once per distinct list, not once per vendor.
+    """
+
+    def __init__(self, factors: Iterable[Any]):
+        factors = list(factors)
+        n = len(factors)
+
+        def column(values):
+            return np.fromiter(values, dtype=np.int64, count=n)
+
+        self.vendor_ids: List[str] = [f.vendor_id for f in factors]
+        self.company_age = column(min(f.company_age_years or 0, COLUMN_CAP) for f in factors)
+        self.employee_count = column(min(f.employee_count or 0, COLUMN_CAP) for f in factors)
+        self.has_ssl = np.fromiter((f.has_ssl for f in factors), dtype=bool, count=n)
+        self.breach_count = column(min(f.breach_count, COLUMN_CAP) for f in factors)
+        self.cve_count = column(min(f.cve_count, COLUMN_CAP) for f in factors)
+        self.reputation = column(f.domain_reputation_score or 0 for f in factors)
+        self.financial = column(f.financial_health_score or 0 for f in factors)
+
+        # Each distinct certification list is a sequence of distinct strings;
+        # entry arrays map every (list, string) occurrence for bincount sums
+        list_codes: Dict[Tuple[str, ...], int] = {}
+        string_codes: Dict[str, int] = {}
+        self.certification_lists: List[Tuple[str, ...]] = []
+        self.certification_strings: List[str] = []
+        entry_lists: List[int] = []
+        entry_strings: List[int] = []
+        def list_code(certifications):
+            key = tuple(certifications)
+            index = list_codes.get(key)
+            if index is None:
+                index = list_codes[key] = len(self.certification_lists)
+                self.certification_lists.append(key)
+                for cert in key:
+                    string_index = string_codes.get(cert)
+                    if string_index is None:
+                        string_index = string_codes[cert] = len(self.certification_strings)
+                        self.certification_strings.append(cert)
+                    entry_lists.append(index)
+                    entry_strings.append(string_index)
+            return index
+        self.certification_codes = column(list_code(f.compliance_certifications) for f in factors)
+        self.entry_lists = np.array(entry_lists, dtype=np.int64)
+        self.entry_strings = np.array(entry_strings, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.vendor_ids)
+
+    def per_list_sum(self, string_values: np.ndarray) -> np.ndarray:
+        """Sum a per-string value over each distinct certification list"""
+        sums = np.bincount(
+            self.entry_lists, weights=string_values[self.entry_strings], minlength=len(self.certification_lists)
+        )
+        return sums.astype(np.int64)
+
+    def certification_points(self, model: CompiledModel) -> np.ndarray:
+        """Certification points per vendor under model's catalog (uncapped by the factor maximum)"""
+        points = model.cert_matcher.certification_points
+        string_points = np.fromiter(
+            (points(cert) for cert in self.certification_strings),
+            dtype=np.int64,
+            count=len(self.certification_strings),
+        )
+        return np.minimum(self.per_list_sum(string_points), COLUMN_CAP)[self.certification_codes]
+
+
+def factor_scores(model: CompiledModel, columns: FactorColumns, observe: Optional[Callable[[str, float], None]] = None) -> Dict[str, np.ndarray]:
+    """
+    Every factor score for every vendor, keyed like RiskScoreResponse.risk_factors
+
+    If given, observe(factor, seconds) is called with the time each factor took.
+    """
+    kernels = {
+        "company_maturity": lambda: maturity_scores(model, columns.company_age, columns.employee_count),
+        "security_posture": lambda: security_scores(model, columns.has_ssl, columns.certification_points(model)),
+        "incident_history": lambda: incident_scores(model, columns.breach_count, columns.cve_count),
+        "online_reputation": lambda: scaled_scores(model.reputation_table_array, columns.reputation),
+        "financial_health": lambda: scaled_scores(model.financial_table_array, columns.financial),
+    }
+    scores = {}
+    for name, kernel in kernels.items():
+        start = time.perf_counter()
+        scores[name] = kernel()
+        if observe is not None:
+            observe(name, time.perf_counter() - start)
+    return scores
@@ -0,0 +1,122 @@
+"""
+Precompiled certification matcher
+
+Certification strings are normalized (upper-cased, separators removed) and
+scanned once with an Aho-Corasick automaton built from every catalog entry's
+aliases. Failure links are folded into the transition table at build time, so
+the scan is one dict lookup per character. When a string contains aliases of several entries, the entry listed
+first in the catalog wins, as in the original linear scan.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional
+
+# Characters ignored when comparing certification names
+SEPARATORS = " -/:._(),"
+_NORMALIZE = str.maketrans("", "", SEPARATORS)
+
+# Upper bound on distinct certification strings remembered by a matcher
+MEMO_SIZE = 50000
+
+
+def normalize(name: str) -> str:
+    """Canonical form used for matching, e.g. "ISO/IEC 27001:2022" -> "ISOIEC270012022" """
+    return name.upper().translate(_NORMALIZE)
+
+
+class CertificationMatcher:
+    """Single-pass matcher from certification strings to catalog points"""
+
+    def __init__(self, scores: Mapping[str, int], aliases: Optional[Mapping[str, Iterable[str]]] = None):
+        aliases = aliases or {}
+        self.names: List[str] = list(scores)
+        self.points: List[int] = [scores[name] for name in self.names]
+        self._memo: Dict[str, int] = {}
+
+        # Trie of normalized aliases; each state records the best (lowest)
+        # catalog index among patterns ending there or at any suffix state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._best: List[int] = [len(self.names)]
+        for index, name in enumerate(self.names):
+            for alias in {normalize(name), *(normalize(a) for a in aliases.get(name, ()))}:
+                if alias:
+                    self._add_pattern(alias, index)
+        self._fail = [0] * len(self._goto)
+        self._link_failures()
+        self._delta = self._compile_transitions()
+
+    def match(self, certification: str) -> Optional[str]:
+        """Catalog name matched by a certification string, if any"""
+        index = self._scan(normalize(certification))
+        return self.names[index] if index < len(self.names) else None
+
+    def certification_points(self, certification: str) -> int:
+        """Points for one certification string (0 if unrecognised)"""
+        points = self._memo.get(certification)
+        if points is None:
+            index = self._scan(normalize(certification))
+            points = self.points[index] if index < len(self.points) else 0
+            if len(self._memo) < MEMO_SIZE:
+                self._memo[certification] = points
+        return points
+
+    def total_points(self, certifications: Iterable[str]) -> int:
+        """Sum of points over a list of certification strings (uncapped)"""
+        memo = self._memo
+        total = 0
+        for cert in certifications:
+            points = memo.get(cert)
+            total += self.certification_points(cert) if points is None else points
+        return total
+
+    def _add_pattern(self, pattern: str, index: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._best.append(len(self.names))
+            state = next_state
+        self._best[state] = min(self._best[state], index)
+
+    def _link_failures(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._best[child] = min(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+
+    def _compile_transitions(self) -> List[Dict[str, int]]:
+        """Full DFA: every state maps each alphabet character to its next state"""
+        alphabet = {char for edges in self._goto for char in edges}
+        delta: List[Dict[str, int]] = [{} for _ in self._goto]
+        # Breadth-first, so a state's failure target is complete before the state
+        order = [0]
+        for state in order:
+            order.extend(self._goto[state].values())
+        for state in order:
+            for char in alphabet:
+                child = self._goto[state].get(char)
+                if child is not None:
+                    delta[state][char] = child
+                elif state:
+                    target = delta[self._fail[state]].get(char, 0)
+                    if target:
+                        delta[state][char] = target
+        return delta
+
+    def _scan(self, text: str) -> int:
+        delta, best_at = self._delta, self._best
+        best = len(self.names)
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if best_at[state] < best:
+                best = best_at[state]
+        return best
@@ -0,0 +1,246 @@
+"""
+Incremental score-drift alerts
+
+Each newly computed score is compared with the vendor's last known state in
+an in-memory index (vendor_id -> score, level rank, baseline score), so a
+score costs one dict lookup and never a portfolio query. Two kinds of event
+are raised:
+
+- risk_level_changed: the vendor's risk level differs from its last one.
+- score_drop: the score fell more than drop_threshold points below the
+  baseline, which is the highest score since the last score_drop alert (or
+  since the vendor was first seen). Gradual declines therefore alert once
+  their total passes the threshold.
+
+Events go into a bounded ring with increasing ids. Server-sent-event
+subscribers and the webhook sender each read from the ring at their own pace;
+a reader that falls more than the ring's length behind skips ahead, and the
+skipped events are counted.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("risk_level_changed", "score_drop")
+
+
+class AlertEvaluator:
+    """Last known state per vendor, and the ring of events raised against it"""
+
+    def __init__(self, level_names: Sequence[str], drop_threshold: int = 10, buffer_size: int = 10000):
+        # Rank 0 is the riskiest level
+        self.level_rank = {name: rank for rank, name in enumerate(level_names)}
+        self.level_names = list(level_names)
+        self.drop_threshold = drop_threshold
+        self.state: Dict[str, Tuple[int, int, int]] = {}
+        self.events: "deque[Dict[str, Any]]" = deque(maxlen=buffer_size)
+        self.last_id = 0
+        self.evaluated = 0
+        self.skipped = 0
+        self.counts = {event_type: 0 for event_type in EVENT_TYPES}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed = asyncio.Event()
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Loop that subscribers wait in; evaluate() may then be called from any thread"""
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    def seed(self, states: Iterable[Tuple[str, int, str]]) -> int:
+        """Load (vendor_id, score, risk_level) as last known states, e.g. from the score history"""
+        count = 0
+        with self._lock:
+            for vendor_id, score, level in states:
+                self.state[vendor_id] = (score, self.level_rank.get(level, 0), score)
+                count += 1
+        return count
+
+    def evaluate(self, results: Iterable[Any]) -> int:
+        """Compare new results with the last known states; returns the number of events raised"""
+        raised = 0
+        detected_at = datetime.utcnow().isoformat()
+        with self._lock:
+            state = self.state
+            level_rank = self.level_rank
+            threshold = self.drop_threshold
+            for result in results:
+                self.evaluated += 1
+                vendor_id = result.vendor_id
+                score = result.overall_risk_score
+                level = getattr(result.risk_level, "value", result.risk_level)
+                rank = level_rank.get(level, 0)
+                previous = state.get(vendor_id)
+                if previous is None:
+                    state[vendor_id] = (score, rank, score)
+                    continue
+                previous_score, previous_rank, baseline = previous
+                if rank != previous_rank:
+                    self._raise("risk_level_changed", result, previous_score, previous_rank, rank, detected_at, {
+                        "direction": "worsened" if rank < previous_rank else "improved",
+                    })
+                    raised += 1
+                if baseline - score > threshold:
+                    self._raise("score_drop", result, previous_score, previous_rank, rank, detected_at, {
+                        "baseline_score": baseline,
+                        "score_drop": baseline - score,
+                    })
+                    raised += 1
+                    baseline = score
+                state[vendor_id] = (score, rank, max(baseline, score))
+        if raised:
+            self._notify()
+        return raised
+
+    def _raise(self, event_type: str, result: Any, previous_score: int, previous_rank: int, rank: int, detected_at: str, extra: Dict[str, Any]) -> None:
+        self.last_id += 1
+        self.counts[event_type] += 1
+        self.events.append({
+            "id": self.last_id,
+            "type": event_type,
+            "vendor_id": result.vendor_id,
+            "previous_score": previous_score,
+            "score": result.overall_risk_score,
+            "previous_risk_level": self.level_names[previous_rank],
+            "risk_level": self.level_names[rank],
+            **extra,
+            "calculated_at": result.calculated_at,
+            "scoring_model_version": result.scoring_model_version,
+            "detected_at": detected_at,
+        })
+
+    def _notify(self) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def since(self, after_id: int, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Events with id > after_id (oldest first), and how many of them were already overwritten"""
+        with self._lock:
+            new = self.last_id - after_id
+            if new <= 0:
+                return [], 0
+            # Ids in the ring are consecutive and end at last_id: take the newest from the right
+            available = min(new, len(self.events))
+            events = list(islice(reversed(self.events), available))
+        events.reverse()
+        return (events if limit is None else events[:limit]), new - available
+
+    async def subscribe(self, after_id: Optional[int] = None, keepalive: float = 15.0) -> AsyncIterator[Optional[List[Dict[str, Any]]]]:
+        """
+        Batches of new events as they are raised, starting after after_id
+        (default: only events raised from now on). Yields None after keepalive
+        seconds without events.
+        """
+        last = self.last_id if after_id is None else after_id
+        while True:
+            changed = self._changed
+            events, skipped = self.since(last)
+            if skipped:
+                self.skipped += skipped
+                logger.warning(f"Drift alert subscriber fell behind; skipped {skipped} events")
+            if events:
+                last = events[-1]["id"]
+                yield events
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vendors": len(self.state),
+            "evaluated": self.evaluated,
+            "events": dict(self.counts),
+            "last_event_id": self.last_id,
+            "buffered_events": len(self.events),
+            "skipped_by_readers": self.skipped,
+            "drop_threshold": self.drop_threshold,
+        }
+
+
+class WebhookSink:
+    """
+    Posts drift events to a webhook (e.g. an n8n Webhook node) in batches
+
+    Each POST is {"events": [...]}, at most batch_size events, sent as soon
+    as events are available. A failed POST is retried with exponential
+    backoff (up to max_backoff seconds) before moving on.
+    """
+
+    def __init__(self, evaluator: AlertEvaluator, url: str, batch_size: int = 100, timeout: float = 10.0, max_backoff: float = 60.0, max_attempts: int = 5):
+        self.evaluator = evaluator
+        self.url = url
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.sent = 0
+        self.failed = 0
+        self.posts = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        # Only imported when a webhook is configured
+        import httpx
+        last = self.evaluator.last_id
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async for batch in self.evaluator.subscribe(last):
+                if batch is None:
+                    continue
+                for start in range(0, len(batch), self.batch_size):
+                    await self._post(client, batch[start:start + self.batch_size])
+
+    async def _post(self, client: "httpx.AsyncClient", events: List[Dict[str, Any]]) -> None:
+        backoff = 1.0
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await client.post(self.url, json={"events": events})
+                response.raise_for_status()
+                self.posts += 1
+                self.sent += len(events)
+                return
+            except Exception as e:
+                logger.warning(f"Drift alert webhook attempt {attempt} failed: {str(e)}")
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+        self.failed += len(events)
+        logger.error(f"Dropped {len(events)} drift alerts after {self.max_attempts} webhook attempts")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"url": self.url, "posts": self.posts, "sent": self.sent, "failed": self.failed}
@@ -0,0 +1,145 @@
+"""
+Allocation-lean request path for single-vendor scoring
+
+FastJsonRoute answers POST /api/calculate at the ASGI level: it validates the
+raw body straight into the request model, calls the handler and sends its
+pre-encoded JSON bytes, skipping FastAPI's dependency solving, response-model
+re-validation and jsonable_encoder pass. It sits first in the route table so
+the other routes are not matched against these requests. Anything off the
+happy path (another method or content type, an invalid body, an error in the
+handler) is replayed to the regular FastAPI route, so error responses are
+exactly those of the standard path.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+import orjson
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.routing import Match, Route
+from starlette.types import Receive, Scope, Send
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+class RecommendationCache:
+    """
+    Memoized generate_recommendations
+
+    Recommendations depend only on which thresholds a vendor crosses and on its
+    breach and CVE counts, so each distinct outcome is generated once per
+    scoring model and reused. The key must follow the conditions in
+    generate_recommendations.
+    """
+
+    def __init__(self, generate: Callable[..., List[str]], max_entries: int = 4096):
+        self.generate = generate
+        self.max_entries = max_entries
+        self.fingerprint: Optional[str] = None
+        self.entries: Dict[Tuple, Tuple[str, ...]] = {}
+
+    def get(self, factors, risk_factors: Dict[str, int], overall_score: int, model) -> List[str]:
+        if model.fingerprint != self.fingerprint:
+            self.entries = {}
+            self.fingerprint = model.fingerprint
+        thresholds = model.recommendations
+        cve_count = factors.cve_count
+        key = (
+            overall_score <= thresholds.high_priority_max_score,
+            risk_factors["security_posture"] < thresholds.security_posture_below,
+            factors.has_ssl,
+            factors.breach_count,
+            cve_count if cve_count > thresholds.cve_count_above else -1,
+            risk_factors["company_maturity"] < thresholds.company_maturity_below,
+            not factors.compliance_certifications,
+            overall_score >= thresholds.low_risk_min_score,
+        )
+        texts = self.entries.get(key)
+        if texts is None:
+            texts = tuple(self.generate(factors, risk_factors, overall_score, model))
+            # Breach and CVE counts are unbounded; past the limit, misses are not kept
+            if len(self.entries) < self.max_entries:
+                self.entries[key] = texts
+        return list(texts)
+
+
+def encode_score(result) -> bytes:
+    """A RiskScoreResponse as the same JSON bytes FastAPI would send for it"""
+    return orjson.dumps({
+        "vendor_id": result.vendor_id,
+        "overall_risk_score": result.overall_risk_score,
+        "risk_level": getattr(result.risk_level, "value", result.risk_level),
+        "risk_factors": result.risk_factors,
+        "recommendations": result.recommendations,
+        "calculated_at": result.calculated_at,
+        "scoring_model_version": result.scoring_model_version,
+    })
+
+
+class FastJsonRoute(Route):
+    """POST route validating a JSON body into model and sending handler(instance) bytes, else fallback"""
+
+    def __init__(self, fallback: APIRoute, model: Type[BaseModel], handler: Callable[[Any], bytes]):
+        super().__init__(fallback.path, fallback.app, methods=["POST"], name=fallback.name, include_in_schema=False)
+        self.fallback = fallback
+        self.model = model
+        self.handler = handler
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        match, child_scope = super().matches(scope)
+        if match != Match.NONE:
+            # Read by the metrics middleware for the route label
+            child_scope["route"] = self
+        return match, child_scope
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["method"] != "POST" or not is_json(scope):
+            await self.fallback.handle(scope, receive, send)
+            return
+        body = await read_body(receive)
+        if body is None:
+            return
+        try:
+            content = self.handler(self.model.model_validate_json(body))
+        except Exception:
+            # Invalid bodies and scoring errors get the standard path's response
+            await self.fallback.handle(scope, replay(body, receive), send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-length", str(len(content)).encode()), *JSON_HEADERS],
+        })
+        await send({"type": "http.response.body", "body": content})
+
+
+def is_json(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"content-type":
+            return value == b"application/json"
+    return False
+
+
+async def read_body(receive: Receive) -> Optional[bytes]:
+    """Whole request body, or None if the client disconnected"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def replay(body: bytes, receive: Receive) -> Callable[[], Awaitable[Dict[str, Any]]]:
+    """A receive channel that yields the already-read body once, then defers to receive"""
+    sent = False
+
+    async def receive_again() -> Dict[str, Any]:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return receive_again
@@ -0,0 +1,63 @@
+"""
+Fingerprint store for incremental rescoring
+
+Each vendor's last result is kept with a fingerprint of its input factors and
+of the scoring model that produced it. Resubmitting identical factors under
+the same model returns the stored result without recomputation; any change to
+the factors or the model yields a new fingerprint and a fresh score.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def factors_fingerprint(factors_json: str, model_version: str) -> str:
+    """Fingerprint of one vendor's serialized factors under a model version"""
+    return hashlib.blake2b(f"{model_version}:{factors_json}".encode(), digest_size=16).hexdigest()
+
+
+class ScoreStore:
+    """Bounded vendor_id -> (fingerprint, result) map with hit and timing counters"""
+
+    def __init__(self, max_vendors: int = 100000):
+        self.max_vendors = max_vendors
+        self.entries: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.compute_seconds = 0.0
+
+    def get(self, vendor_id: str, fingerprint: str) -> Optional[Any]:
+        """Stored result if the vendor was last scored with this fingerprint"""
+        entry = self.entries.get(vendor_id)
+        if entry is not None and entry[0] == fingerprint:
+            self.entries.move_to_end(vendor_id)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, vendor_id: str, fingerprint: str, result: Any) -> None:
+        self.entries[vendor_id] = (fingerprint, result)
+        self.entries.move_to_end(vendor_id)
+        while len(self.entries) > self.max_vendors:
+            self.entries.popitem(last=False)
+
+    def record_compute(self, seconds: float) -> None:
+        """Add time spent scoring misses, used to estimate time saved by hits"""
+        self.compute_seconds += seconds
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        per_score = self.compute_seconds / self.misses if self.misses else 0.0
+        return {
+            "vendors": len(self.entries),
+            "max_vendors": self.max_vendors,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "compute_seconds": round(self.compute_seconds, 4),
+            "time_saved_seconds": round(self.hits * per_score, 4),
+        }
@@ -1,19 +1,72 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from contextlib import asynccontextmanager
 from datetime import datetime
 from enum import Enum
+import asyncio
+import json
 import logging
+import os
+import time
+import numpy as np
+import batch_scoring
+import drift_alerts
+import fast_path
+import incremental
+from grc_shared import instrumentation
+from grc_shared.risk_factors import VendorRiskFactors
+import pipeline
+import score_history
+import simulation
+import streaming
+from scoring_model import CompiledModel, ModelRegistry, ScoringModelConfig
 
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by grc_shared/gunicorn.conf.py, or below when run directly
 logger = logging.getLogger(__name__)
 
+# Score history database: sqlite:///path or postgresql://...; unset or empty
+# keeps no history (a file inside the container would not outlive it)
+SCORE_HISTORY_URL = os.getenv("SCORE_HISTORY_URL", "")
+
+# Every score returned, written in batches by a background thread
+history = score_history.ScoreHistory(
+    score_history.open_backend(SCORE_HISTORY_URL),
+    batch_size=int(os.getenv("SCORE_HISTORY_BATCH_SIZE", "1000")),
+    flush_interval=float(os.getenv("SCORE_HISTORY_FLUSH_INTERVAL", "1")),
+    max_pending=int(os.getenv("SCORE_HISTORY_MAX_PENDING", "100000")),
+) if SCORE_HISTORY_URL else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    alerts.bind(asyncio.get_running_loop())
+    if history is not None:
+        await asyncio.to_thread(history.start)
+        logger.info(f"Recording score history ({type(history.backend).__name__})")
+        # Resume drift alerting from each vendor's last recorded score
+        latest = await asyncio.to_thread(history.latest_states)
+        logger.info(f"Drift alerts seeded with {alerts.seed(latest)} vendors from score history")
+    if alert_webhook is not None:
+        alert_webhook.start()
+    yield
+    if alert_webhook is not None:
+        await alert_webhook.stop()
+    await osint.aclose()
+    if history is not None:
+        await asyncio.to_thread(history.stop)
+
 app = FastAPI(
     title="Risk Scoring Engine",
     description="Automated vendor risk assessment and scoring",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Request rates and latencies, per-factor scoring timings and store counters for /metrics
+telemetry = instrumentation.ServiceMetrics("risk-engine")
+app.add_middleware(instrumentation.MetricsMiddleware, metrics=telemetry)
+
 class RiskLevel(str, Enum):
     """Risk level classification"""
     CRITICAL = "critical"
@@ -22,20 +75,6 @@ class RiskLevel(str, Enum):
     LOW = "low"
     MINIMAL = "minimal"
 
-class VendorRiskFactors(BaseModel):
-    """Input factors for risk calculation"""
-    vendor_id: str
-    domain: str
-    company_age_years: Optional[int] = Field(None, ge=0, description="Age of company in years")
-    employee_count: Optional[int] = Field(None, ge=0)
-    has_ssl: bool = Field(True, description="Has valid SSL certificate")
-    breach_count: int = Field(0, ge=0, description="Number of known data breaches")
-    cve_count: int = Field(0, ge=0, description="Number of known CVEs")
-    compliance_certifications: List[str] = Field(default_factory=list, description="e.g., ISO27001, SOC2, PCI-DSS")
-    domain_reputation_score: Optional[int] = Field(None, ge=0, le=100, description="From OSINT service")
-    financial_health_score: Optional[int] = Field(None, ge=0, le=100)
-    incident_history_score: Optional[int] = Field(None, ge=0, le=100)
-
 class RiskScoreResponse(BaseModel):
     """Risk assessment response"""
     vendor_id: str
@@ -44,6 +83,73 @@ class RiskScoreResponse(BaseModel):
     risk_factors: Dict[str, int]
     recommendations: List[str]
     calculated_at: str
+    scoring_model_version: Optional[str] = Field(None, description="Scoring model version used")
+
+class BatchRiskRequest(BaseModel):
+    """Batch of vendors to score in a single columnar pass"""
+    vendors: List[VendorRiskFactors] = Field(..., max_length=50000)
+
+class BatchRiskResponse(BaseModel):
+    """Batch risk assessment response, in request order"""
+    count: int
+    results: List[RiskScoreResponse]
+
+SIMULATION_MAX_VENDORS = int(os.getenv("SIMULATION_MAX_VENDORS", "500000"))
+
+class AssessmentResponse(BaseModel):
+    """OSINT enrichment and the risk score computed from it"""
+    vendor_id: str
+    domain: str
+    enrichment: Optional[pipeline.EnrichmentSummary] = None
+    risk: Optional[RiskScoreResponse] = None
+    error: Optional[str] = Field(None, description="Set when the vendor could not be enriched, and then risk is null")
+    timings_ms: Dict[str, Optional[float]] = Field(..., description="Time until enrichment was available, and scoring time")
+    assessed_at: str
+
+class AssessmentBatchRequest(BaseModel):
+    """Vendors to enrich and score in one pipelined pass"""
+    vendors: List[VendorRiskFactors] = Field(..., min_length=1, max_length=10000)
+    concurrency: int = Field(50, ge=1, le=500, description="Domains the OSINT service enriches at once")
+
+class PortfolioRequest(BaseModel):
+    """Full vendor portfolio to load for what-if simulation"""
+    vendors: List[VendorRiskFactors] = Field(..., max_length=SIMULATION_MAX_VENDORS)
+
+# Scoring model file. Edits to it, or PUT /api/model, take effect in every
+# worker within SCORING_MODEL_CHECK_INTERVAL seconds, without a restart.
+SCORING_MODEL_PATH = os.getenv(
+    "SCORING_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_model.json")
+)
+SCORING_MODEL_CHECK_INTERVAL = float(os.getenv("SCORING_MODEL_CHECK_INTERVAL", "5"))
+
+RISK_LEVEL_BY_NAME = {level.value: level for level in RiskLevel}
+
+# Last result per vendor, reused while its factors and the scoring model are unchanged
+score_store = incremental.ScoreStore(max_vendors=int(os.getenv("SCORE_STORE_MAX_VENDORS", "100000")))
+
+# Portfolio factors held column-wise for what-if simulation
+portfolio = simulation.PortfolioStore()
+
+# OSINT service the assessment pipeline enriches vendors with, over pooled keep-alive connections
+OSINT_SERVICE_URL = os.getenv("OSINT_SERVICE_URL", "http://localhost:5001")
+osint = pipeline.OsintClient(
+    OSINT_SERVICE_URL,
+    timeout=float(os.getenv("OSINT_TIMEOUT", "30")),
+    max_connections=int(os.getenv("OSINT_MAX_CONNECTIONS", "20")),
+)
+
+# Score-drift alerts: level changes and drops of more than DRIFT_SCORE_DROP points
+alerts = drift_alerts.AlertEvaluator(
+    [level.value for level in RiskLevel],
+    drop_threshold=int(os.getenv("DRIFT_SCORE_DROP", "10")),
+    buffer_size=int(os.getenv("DRIFT_ALERT_BUFFER", "10000")),
+)
+
+# Webhook (e.g. an n8n Webhook node) that receives drift alerts in batches; empty disables it
+DRIFT_ALERT_WEBHOOK_URL = os.getenv("DRIFT_ALERT_WEBHOOK_URL", "")
+alert_webhook = drift_alerts.WebhookSink(
+    alerts, DRIFT_ALERT_WEBHOOK_URL, batch_size=int(os.getenv("DRIFT_WEBHOOK_BATCH", "100"))
+) if DRIFT_ALERT_WEBHOOK_URL else None
 
 @app.get("/health")
 async def health_check():
@@ -68,147 +174,345 @@ async def calculate_risk_score(factors: VendorRiskFactors):
     """
     try:
         logger.info(f"Calculating risk score for vendor: {factors.vendor_id}")
-        
-        # Initialize score breakdown
-        risk_factors = {}
-        
-        # 1. Company maturity (max 20 points)
-        maturity_score = calculate_maturity_score(factors.company_age_years, factors.employee_count)
-        risk_factors["company_maturity"] = maturity_score
-        
-        # 2. Security posture (max 25 points)
-        security_score = calculate_security_score(factors.has_ssl, factors.compliance_certifications)
-        risk_factors["security_posture"] = security_score
-        
-        # 3. Breach and incident history (max 25 points)
-        incident_score = calculate_incident_score(factors.breach_count, factors.cve_count)
-        risk_factors["incident_history"] = incident_score
-        
-        # 4. Domain and online reputation (max 15 points)
-        reputation_score = factors.domain_reputation_score or 50
-        reputation_score = int((reputation_score / 100) * 15)
-        risk_factors["online_reputation"] = reputation_score
-        
-        # 5. Financial health (max 15 points)
-        financial_score = factors.financial_health_score or 50
-        financial_score = int((financial_score / 100) * 15)
-        risk_factors["financial_health"] = financial_score
-        
-        # Calculate overall score
-        overall_score = sum(risk_factors.values())
-        
-        # Determine risk level
-        risk_level = determine_risk_level(overall_score)
-        
-        # Generate recommendations
-        recommendations = generate_recommendations(factors, risk_factors, overall_score)
-        
-        return RiskScoreResponse(
-            vendor_id=factors.vendor_id,
-            overall_risk_score=overall_score,
-            risk_level=risk_level,
-            risk_factors=risk_factors,
-            recommendations=recommendations,
-            calculated_at=datetime.utcnow().isoformat()
-        )
+        return score_vendor_incremental(factors)
     
     except Exception as e:
         logger.error(f"Error calculating risk score: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error calculating risk: {str(e)}")
 
-def calculate_maturity_score(company_age: Optional[int], employee_count: Optional[int]) -> int:
-    """Calculate company maturity score (0-20)"""
-    score = 0
-    
-    # Age scoring (0-12 points)
-    if company_age:
-        if company_age >= 10:
-            score += 12
-        elif company_age >= 5:
-            score += 8
-        elif company_age >= 2:
-            score += 5
-        else:
-            score += 2
-    else:
-        score += 5  # Neutral if unknown
-    
-    # Employee count scoring (0-8 points)
-    if employee_count:
-        if employee_count >= 500:
-            score += 8
-        elif employee_count >= 100:
-            score += 6
-        elif employee_count >= 20:
-            score += 4
-        else:
-            score += 2
-    else:
-        score += 3  # Neutral if unknown
-    
-    return min(score, 20)
-
-def calculate_security_score(has_ssl: bool, certifications: List[str]) -> int:
-    """Calculate security posture score (0-25)"""
-    score = 0
-    
-    # SSL certificate (0-5 points)
-    if has_ssl:
-        score += 5
-    
-    # Compliance certifications (0-20 points)
-    cert_scores = {
-        "ISO27001": 7,
-        "SOC2": 7,
-        "PCI-DSS": 6,
-        "HIPAA": 6,
-        "GDPR": 5,
-        "FedRAMP": 8,
-    }
+def score_vendor(factors: VendorRiskFactors, model: Optional[CompiledModel] = None) -> RiskScoreResponse:
+    """Run the per-vendor scoring pipeline for one set of validated factors"""
+    model = model or scoring_models.current()
     
-    for cert in certifications:
-        cert_upper = cert.upper().replace(" ", "").replace("-", "")
-        for key, value in cert_scores.items():
-            if key.replace("-", "") in cert_upper:
-                score += value
-                break
+    # Initialize score breakdown
+    risk_factors = {}
+    # Each factor is timed as its own stage
+    lap = time.perf_counter()
     
-    return min(score, 25)
-
-def calculate_incident_score(breach_count: int, cve_count: int) -> int:
-    """Calculate incident history score (0-25)"""
-    # Start from full score and deduct for incidents
-    score = 25
+    # 1. Company maturity
+    maturity_score = calculate_maturity_score(factors.company_age_years, factors.employee_count, model)
+    risk_factors["company_maturity"] = maturity_score
+    lap = observe_factor("company_maturity", lap)
+    
+    # 2. Security posture
+    security_score = calculate_security_score(factors.has_ssl, factors.compliance_certifications, model)
+    risk_factors["security_posture"] = security_score
+    lap = observe_factor("security_posture", lap)
+    
+    # 3. Breach and incident history
+    incident_score = calculate_incident_score(factors.breach_count, factors.cve_count, model)
+    risk_factors["incident_history"] = incident_score
+    lap = observe_factor("incident_history", lap)
+    
+    # 4. Domain and online reputation
+    risk_factors["online_reputation"] = model.reputation_points(factors.domain_reputation_score)
+    lap = observe_factor("online_reputation", lap)
     
-    # Deduct for breaches (more severe)
-    score -= min(breach_count * 8, 18)  # Max 18 point deduction
+    # 5. Financial health
+    risk_factors["financial_health"] = model.financial_points(factors.financial_health_score)
+    lap = observe_factor("financial_health", lap)
     
-    # Deduct for CVEs (less severe)
-    score -= min(cve_count * 2, 7)  # Max 7 point deduction
+    # Calculate overall score
+    overall_score = sum(risk_factors.values())
     
-    return max(score, 0)
+    # Determine risk level
+    risk_level = determine_risk_level(overall_score, model)
+    
+    # Generate recommendations
+    recommendations = generate_recommendations(factors, risk_factors, overall_score, model)
+    observe_factor("recommendations", lap)
+    
+    return RiskScoreResponse(
+        vendor_id=factors.vendor_id,
+        overall_risk_score=overall_score,
+        risk_level=risk_level,
+        risk_factors=risk_factors,
+        recommendations=recommendations,
+        calculated_at=datetime.utcnow().isoformat(),
+        scoring_model_version=model.version
+    )
 
-def determine_risk_level(score: int) -> RiskLevel:
-    """Determine risk level from overall score"""
-    if score <= 20:
-        return RiskLevel.CRITICAL
-    elif score <= 40:
-        return RiskLevel.HIGH
-    elif score <= 60:
-        return RiskLevel.MEDIUM
-    elif score <= 80:
-        return RiskLevel.LOW
+# Per-vendor scoring runs in microseconds, so its stage histograms are looked up once
+scoring_stages = {
+    step: telemetry.stage_series(f"score_{step}")
+    for step in (
+        "company_maturity", "security_posture", "incident_history", "online_reputation", "financial_health",
+        "recommendations",
+    )
+}
+
+def observe_factor(step: str, start: float) -> float:
+    """Record the time since start as a per-vendor scoring stage; returns now"""
+    now = time.perf_counter()
+    scoring_stages[step].observe(now - start)
+    return now
+
+def observe_batch_factor(factor: str, seconds: float) -> None:
+    telemetry.observe_stage(f"batch_score_{factor}", seconds)
+
+def score_vendor_fast(factors: VendorRiskFactors, model: CompiledModel) -> RiskScoreResponse:
+    """
+    score_vendor for the single-vendor fast path
+
+    Same result and the same per-factor stage timings, built without the
+    per-factor helper calls or response validation, and with memoized
+    recommendations.
+    """
+    lap = time.perf_counter()
+    maturity = model.maturity_score(factors.company_age_years, factors.employee_count)
+    lap = observe_factor("company_maturity", lap)
+    security = model.security_score(factors.has_ssl, factors.compliance_certifications)
+    lap = observe_factor("security_posture", lap)
+    incidents = model.incident_score(factors.breach_count, factors.cve_count)
+    lap = observe_factor("incident_history", lap)
+    reputation = model.reputation_points(factors.domain_reputation_score)
+    lap = observe_factor("online_reputation", lap)
+    financial = model.financial_points(factors.financial_health_score)
+    lap = observe_factor("financial_health", lap)
+    risk_factors = {
+        "company_maturity": maturity,
+        "security_posture": security,
+        "incident_history": incidents,
+        "online_reputation": reputation,
+        "financial_health": financial,
+    }
+    overall_score = maturity + security + incidents + reputation + financial
+    recommendations = recommendation_cache.get(factors, risk_factors, overall_score, model)
+    observe_factor("recommendations", lap)
+    return RiskScoreResponse.model_construct(
+        vendor_id=factors.vendor_id,
+        overall_risk_score=overall_score,
+        risk_level=RISK_LEVEL_BY_NAME[model.level_names[model.risk_level_index(overall_score)]],
+        risk_factors=risk_factors,
+        recommendations=recommendations,
+        calculated_at=datetime.utcnow().isoformat(),
+        scoring_model_version=model.version
+    )
+
+def score_vendor_incremental(factors: VendorRiskFactors, score=score_vendor) -> RiskScoreResponse:
+    """score (score_vendor by default), returning the stored result if the vendor's fingerprint is unchanged"""
+    model = scoring_models.current()
+    fingerprint = incremental.factors_fingerprint(factors.model_dump_json(), model.fingerprint)
+    result = score_store.get(factors.vendor_id, fingerprint)
+    if result is None:
+        start = time.perf_counter()
+        result = score(factors, model)
+        score_store.record_compute(time.perf_counter() - start)
+        score_store.put(factors.vendor_id, fingerprint, result)
+        record_scores([result])
     else:
-        return RiskLevel.MINIMAL
+        record_stored_scores([result])
+    return result
+
+@app.post("/api/calculate/batch", response_model=BatchRiskResponse)
+async def calculate_risk_scores_batch(request: BatchRiskRequest):
+    """
+    Calculate risk scores for many vendors at once
+
+    Factors are loaded into columns and scored with array operations;
+    results are identical to calling /api/calculate once per vendor.
+    Only vendors whose factors changed since they were last scored are
+    recomputed.
+    """
+    try:
+        vendors = request.vendors
+        logger.info(f"Calculating batch risk scores for {len(vendors)} vendors")
+        return BatchRiskResponse(count=len(vendors), results=score_vendor_batch_incremental(vendors))
+
+    except Exception as e:
+        logger.error(f"Error calculating batch risk scores: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error calculating risk: {str(e)}")
+
+def score_vendor_batch_incremental(vendors: List[VendorRiskFactors]) -> List[RiskScoreResponse]:
+    """score_vendor_batch over only the vendors whose fingerprints changed"""
+    model = scoring_models.current()
+    fingerprints = [
+        incremental.factors_fingerprint(f.model_dump_json(), model.fingerprint) for f in vendors
+    ]
+    results = [score_store.get(f.vendor_id, fp) for f, fp in zip(vendors, fingerprints)]
+    changed = [i for i, result in enumerate(results) if result is None]
+    if changed:
+        start = time.perf_counter()
+        scored = score_vendor_batch([vendors[i] for i in changed], model)
+        score_store.record_compute(time.perf_counter() - start)
+        for i, result in zip(changed, scored):
+            results[i] = result
+            score_store.put(vendors[i].vendor_id, fingerprints[i], result)
+        record_scores(scored)
+    if len(changed) < len(vendors):
+        recomputed = set(changed)
+        record_stored_scores([result for i, result in enumerate(results) if i not in recomputed])
+    return results
+
+def record_scores(results: List[RiskScoreResponse]) -> None:
+    """Feed newly computed results to the score history and drift alerts"""
+    if history is not None:
+        history.append(results)
+    alerts.evaluate(results)
+
+def record_stored_scores(results: List[RiskScoreResponse]) -> None:
+    """Add results served again from the store to the score history, marked as such; they cannot drift"""
+    if history is not None:
+        history.append(results, from_store=True)
+
+def score_vendor_batch(vendors: List[VendorRiskFactors], model: Optional[CompiledModel] = None) -> List[RiskScoreResponse]:
+    """Score a list of vendors column-wise with the batch_scoring kernel"""
+    model = model or scoring_models.current()
+    with telemetry.stage("batch_score_columns"):
+        columns = batch_scoring.FactorColumns(vendors)
+    scores = batch_scoring.factor_scores(model, columns, observe_batch_factor)
+    maturity = scores["company_maturity"]
+    security = scores["security_posture"]
+    incident = scores["incident_history"]
+    reputation = scores["online_reputation"]
+    financial = scores["financial_health"]
+
+    overall = maturity + security + incident + reputation + financial
+    level_indices = batch_scoring.risk_level_indices(model, overall)
+    levels = [RISK_LEVEL_BY_NAME[name] for name in model.level_names]
+
+    calculated_at = datetime.utcnow().isoformat()
+    results = []
+    start = time.perf_counter()
+    for factors, m, s, i, r, f, score, level in zip(
+        vendors,
+        maturity.tolist(),
+        security.tolist(),
+        incident.tolist(),
+        reputation.tolist(),
+        financial.tolist(),
+        overall.tolist(),
+        level_indices.tolist(),
+    ):
+        risk_factors = {
+            "company_maturity": m,
+            "security_posture": s,
+            "incident_history": i,
+            "online_reputation": r,
+            "financial_health": f,
+        }
+        # Kernel output is already range-checked, so skip per-row model validation
+        results.append(RiskScoreResponse.model_construct(
+            vendor_id=factors.vendor_id,
+            overall_risk_score=score,
+            risk_level=levels[level],
+            risk_factors=risk_factors,
+            recommendations=generate_recommendations(factors, risk_factors, score, model),
+            calculated_at=calculated_at,
+            scoring_model_version=model.version
+        ))
+    telemetry.observe_stage("batch_score_results", time.perf_counter() - start)
+    return results
+
+@app.post("/api/calculate/stream")
+async def calculate_risk_scores_stream(request: Request):
+    """
+    Score a streamed body of vendor rows, answering row by row
+
+    The body is NDJSON (one VendorRiskFactors object per line) unless sent as
+    `Content-Type: text/csv`, in which case it is CSV with a header row and
+    certifications separated by ';'. The response is NDJSON: one
+    RiskScoreResponse per valid row, or {"row", "vendor_id", "errors"} for a
+    row that could not be scored. A bad row never aborts the stream.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("text/csv"):
+        rows = streaming.iter_csv_rows(streaming.iter_lines(request.stream()))
+    else:
+        rows = streaming.iter_ndjson_rows(streaming.iter_lines(request.stream()))
+    logger.info(f"Streaming risk scores ({content_type or 'application/x-ndjson'})")
+    return streaming.DuplexStreamingResponse(stream_scores(rows), media_type="application/x-ndjson")
+
+async def stream_scores(rows: AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]) -> AsyncIterator[str]:
+    """Validate and score parsed rows, yielding one NDJSON line each"""
+    scored = failed = 0
+    async for row, data, error in rows:
+        errors = [error] if error else []
+        if not errors:
+            try:
+                yield score_vendor_incremental(VendorRiskFactors.model_validate(data)).model_dump_json() + "\n"
+                scored += 1
+                continue
+            except ValidationError as e:
+                errors = [f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()]
+            except Exception as e:
+                logger.error(f"Error calculating risk score for streamed row {row}: {str(e)}")
+                errors = [f"Error calculating risk: {str(e)}"]
+        failed += 1
+        vendor_id = data.get("vendor_id") if data else None
+        yield json.dumps({"row": row, "vendor_id": vendor_id, "errors": errors}) + "\n"
+    logger.info(f"Streamed risk scores: {scored} scored, {failed} failed")
+
+@app.post("/api/assess", response_model=AssessmentResponse)
+async def assess_vendor(factors: VendorRiskFactors):
+    """
+    Enrich the vendor's domain with the OSINT service, then score it
+
+    The enrichment's reputation_score becomes domain_reputation_score and a
+    conclusive TLS check replaces has_ssl; the other factors are scored as
+    given.
+    """
+    try:
+        logger.info(f"Assessing vendor {factors.vendor_id} ({factors.domain})")
+        start = time.perf_counter()
+        enrichment = await osint.enrich(factors.domain)
+        return pipeline.assessment(factors, enrichment, score_vendor_incremental, (time.perf_counter() - start) * 1000)
+
+    except pipeline.OsintUnavailable as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error assessing vendor {factors.vendor_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error assessing vendor: {str(e)}")
+
+@app.post("/api/assess/batch")
+async def assess_vendors_batch(request: AssessmentBatchRequest):
+    """
+    Enrich and score many vendors, streaming results as each one completes
+
+    Returns NDJSON, one AssessmentResponse per vendor in completion order.
+    Each distinct domain is enriched once through a single streamed OSINT
+    bulk request, and its vendors are scored as soon as it arrives, while the
+    remaining domains are still being enriched.
+    """
+    logger.info(f"Assessing {len(request.vendors)} vendors (concurrency {request.concurrency})")
+
+    async def stream():
+        async for result in pipeline.assess_stream(request.vendors, osint, score_vendor_incremental, request.concurrency):
+            yield AssessmentResponse.model_construct(**result).model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
-def generate_recommendations(factors: VendorRiskFactors, risk_factors: Dict[str, int], overall_score: int) -> List[str]:
+def calculate_maturity_score(company_age: Optional[int], employee_count: Optional[int], model: Optional[CompiledModel] = None) -> int:
+    """Calculate company maturity score from age and headcount brackets"""
+    return (model or scoring_models.current()).maturity_score(company_age, employee_count)
+
+def calculate_security_score(has_ssl: bool, certifications: List[str], model: Optional[CompiledModel] = None) -> int:
+    """Calculate security posture score from SSL and recognised certifications"""
+    return (model or scoring_models.current()).security_score(has_ssl, certifications)
+
+def calculate_certification_points(certifications: List[str], model: Optional[CompiledModel] = None) -> int:
+    """Sum points for recognised certifications (uncapped)"""
+    return (model or scoring_models.current()).cert_matcher.total_points(certifications)
+
+def calculate_incident_score(breach_count: int, cve_count: int, model: Optional[CompiledModel] = None) -> int:
+    """Calculate incident history score: full points less breach and CVE deductions"""
+    return (model or scoring_models.current()).incident_score(breach_count, cve_count)
+
+def determine_risk_level(score: int, model: Optional[CompiledModel] = None) -> RiskLevel:
+    """Determine risk level from overall score"""
+    model = model or scoring_models.current()
+    return RISK_LEVEL_BY_NAME[model.level_names[model.risk_level_index(score)]]
+
+def generate_recommendations(factors: VendorRiskFactors, risk_factors: Dict[str, int], overall_score: int, model: Optional[CompiledModel] = None) -> List[str]:
     """Generate actionable recommendations based on risk assessment"""
+    thresholds = (model or scoring_models.current()).recommendations
     recommendations = []
     
-    if overall_score <= 40:
+    if overall_score <= thresholds.high_priority_max_score:
         recommendations.append("🚨 HIGH PRIORITY: Conduct immediate security audit before proceeding")
     
-    if risk_factors["security_posture"] < 15:
+    if risk_factors["security_posture"] < thresholds.security_posture_below:
         recommendations.append("Request security certification documentation (ISO27001, SOC2)")
     
     if not factors.has_ssl:
@@ -217,16 +521,16 @@ def generate_recommendations(factors: VendorRiskFactors, risk_factors: Dict[str,
     if factors.breach_count > 0:
         recommendations.append(f"Review {factors.breach_count} past data breach(es) and remediation measures")
     
-    if factors.cve_count > 5:
+    if factors.cve_count > thresholds.cve_count_above:
         recommendations.append(f"High CVE count ({factors.cve_count}) - verify patch management processes")
     
-    if risk_factors["company_maturity"] < 10:
+    if risk_factors["company_maturity"] < thresholds.company_maturity_below:
         recommendations.append("Young company - consider more frequent reviews")
     
     if len(factors.compliance_certifications) == 0:
         recommendations.append("No compliance certifications found - request evidence of security practices")
     
-    if overall_score >= 80:
+    if overall_score >= thresholds.low_risk_min_score:
         recommendations.append("✅ Low risk vendor - standard monitoring recommended")
     
     if not recommendations:
@@ -234,6 +538,242 @@ def generate_recommendations(factors: VendorRiskFactors, risk_factors: Dict[str,
     
     return recommendations
 
+# Distinct recommendation outcomes for the fast path, per scoring model
+recommendation_cache = fast_path.RecommendationCache(generate_recommendations)
+
+def calculate_risk_score_encoded(factors: VendorRiskFactors) -> bytes:
+    """/api/calculate on the fast path: the response as JSON bytes"""
+    # Formatted only when INFO is enabled
+    logger.info("Calculating risk score for vendor: %s", factors.vendor_id)
+    return fast_path.encode_score(score_vendor_incremental(factors, score_vendor_fast))
+
+scoring_models = ModelRegistry(SCORING_MODEL_PATH, SCORING_MODEL_CHECK_INTERVAL)
+
+# Serve /api/calculate through the fast path (the regular route still documents
+# it and answers invalid requests); set CALCULATE_FAST_PATH=false to disable
+CALCULATE_FAST_PATH = os.getenv("CALCULATE_FAST_PATH", "true").lower() in ("1", "true", "yes")
+if CALCULATE_FAST_PATH:
+    calculate_route = next(
+        route for route in app.router.routes if getattr(route, "endpoint", None) is calculate_risk_score
+    )
+    app.router.routes.insert(
+        0, fast_path.FastJsonRoute(calculate_route, VendorRiskFactors, calculate_risk_score_encoded)
+    )
+
+@app.get("/api/model")
+async def get_scoring_model():
+    """Active scoring model configuration"""
+    model = scoring_models.current()
+    return {"version": model.version, "fingerprint": model.fingerprint, "config": model.config}
+
+@app.put("/api/model")
+async def install_scoring_model(config: ScoringModelConfig):
+    """
+    Replace the scoring model without restarting
+
+    The model is validated and compiled before it is written to the model
+    file; other workers pick it up on their next file check.
+    """
+    try:
+        model = scoring_models.install(config)
+        return {"version": model.version, "fingerprint": model.fingerprint}
+    except Exception as e:
+        logger.error(f"Error installing scoring model: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error installing scoring model: {str(e)}")
+
+@app.post("/api/model/reload")
+async def reload_scoring_model():
+    """Reload the scoring model file now instead of waiting for the next check"""
+    model = scoring_models.reload()
+    return {"version": model.version, "fingerprint": model.fingerprint}
+
+@app.put("/api/simulation/portfolio")
+async def load_simulation_portfolio(request: PortfolioRequest):
+    """Load (replace) the portfolio that simulations run against"""
+    try:
+        logger.info(f"Loading simulation portfolio of {len(request.vendors)} vendors")
+        await asyncio.to_thread(portfolio.load, request.vendors)
+        return portfolio.stats()
+
+    except Exception as e:
+        logger.error(f"Error loading simulation portfolio: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error loading portfolio: {str(e)}")
+
+@app.get("/api/simulation/portfolio")
+async def simulation_portfolio_stats():
+    """Size and load time of the simulation portfolio"""
+    return portfolio.stats()
+
+@app.post("/api/simulation/run", response_model=simulation.SimulationResponse)
+async def simulate_portfolio(request: simulation.SimulationRequest):
+    """
+    Score the loaded portfolio under alternative scoring configurations
+
+    Each scenario is the active scoring model with overrides applied. The
+    response gives, per scenario, the risk level distribution and its shift
+    from the active model, plus the vendors whose risk level changes.
+    """
+    columns = portfolio.columns
+    if columns is None:
+        raise HTTPException(status_code=409, detail="No portfolio loaded; PUT /api/simulation/portfolio first")
+    try:
+        logger.info(f"Simulating {len(request.scenarios)} scenarios over {len(columns)} vendors")
+        return await asyncio.to_thread(simulation.run_simulation, scoring_models.current(), columns, request)
+
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running simulation: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error running simulation: {str(e)}")
+
+@app.get("/api/assess/stats")
+async def assessment_stats():
+    """OSINT requests made by the assessment pipeline and how many failed"""
+    return osint.stats()
+
+@app.get("/api/incremental/stats")
+async def incremental_stats():
+    """Stored-result hit ratio and estimated scoring time saved"""
+    model = scoring_models.current()
+    return {"model_version": model.version, "model_fingerprint": model.fingerprint, **score_store.stats()}
+
+def running_history() -> score_history.ScoreHistory:
+    if history is None or not history.running:
+        raise HTTPException(status_code=503, detail="Score history is not enabled")
+    return history
+
+@app.get("/api/history/vendors/{vendor_id}", response_model=score_history.VendorHistoryResponse)
+async def vendor_score_history(
+    vendor_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=100000)
+):
+    """A vendor's recorded scores between since and until, oldest first"""
+    store = running_history()
+    try:
+        return await asyncio.to_thread(store.vendor_history, vendor_id, since, until, limit)
+
+    except Exception as e:
+        logger.error(f"Error reading score history for {vendor_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reading score history: {str(e)}")
+
+@app.get("/api/history/portfolio", response_model=score_history.PortfolioSnapshotResponse)
+async def portfolio_score_history(as_of: Optional[datetime] = None):
+    """Every vendor's latest recorded score at or before as_of (default now)"""
+    store = running_history()
+    try:
+        return await asyncio.to_thread(store.portfolio_as_of, as_of)
+
+    except Exception as e:
+        logger.error(f"Error reading portfolio score history: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reading score history: {str(e)}")
+
+@app.get("/api/history/movers", response_model=score_history.MoversResponse)
+async def score_movers(
+    start: datetime,
+    end: Optional[datetime] = None,
+    direction: str = Query("down", pattern="^(down|up|any)$"),
+    limit: int = Query(20, ge=1, le=10000)
+):
+    """
+    Vendors whose score changed most between start and end (default now)
+
+    Each vendor's score at a moment is its latest recorded score at or before
+    it; vendors first scored after start are not included. direction=down
+    lists the largest drops (riskier), up the largest rises, any both.
+    """
+    store = running_history()
+    try:
+        return await asyncio.to_thread(store.movers, start, end, direction, limit)
+
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reading score movers: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reading score history: {str(e)}")
+
+@app.get("/api/history/stats")
+async def score_history_stats():
+    """Rows appended, written, pending and dropped, and flush timing"""
+    if history is None:
+        return {"enabled": False}
+    return {"enabled": True, **history.stats()}
+
+@app.get("/api/alerts")
+async def recent_alerts(after: Optional[int] = Query(None, ge=0), limit: int = Query(100, ge=1, le=10000)):
+    """
+    Drift alerts with id > after, oldest first (default: the latest `limit`)
+
+    Poll with after set to the last id received.
+    """
+    if after is None:
+        after = max(0, alerts.last_id - limit)
+    events, skipped = alerts.since(after, limit)
+    return {"last_event_id": alerts.last_id, "skipped": skipped, "events": events}
+
+@app.get("/api/alerts/stream")
+async def stream_alerts(request: Request, types: Optional[str] = None):
+    """
+    Server-sent events, one per drift alert as it is raised
+
+    Each event has the alert id as its SSE id; reconnecting with
+    Last-Event-ID resumes after it while it is still buffered. types is an
+    optional comma-separated filter (risk_level_changed, score_drop).
+    """
+    wanted = set(types.split(",")) if types else None
+    if wanted and not wanted <= set(drift_alerts.EVENT_TYPES):
+        raise HTTPException(status_code=422, detail=f"types must be among {', '.join(drift_alerts.EVENT_TYPES)}")
+    last_event_id = request.headers.get("last-event-id")
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    async def stream():
+        async for batch in alerts.subscribe(after):
+            if batch is None:
+                yield ": keepalive\n\n"
+                continue
+            yield "".join(
+                f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                for event in batch
+                if wanted is None or event["type"] in wanted
+            )
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/alerts/stats")
+async def alert_stats():
+    """Vendors tracked, scores evaluated, alerts raised and webhook delivery"""
+    return {
+        **alerts.stats(),
+        "webhook": alert_webhook.stats() if alert_webhook is not None else None,
+    }
+
+def collect_engine_metrics() -> List[instrumentation.Family]:
+    """Score store, score history, drift alert and OSINT client counters, read at scrape time"""
+    store = score_store.stats()
+    families = [
+        *instrumentation.cache_families("scores", store, ("hits", "misses"), "vendors"),
+        ("grc_drift_alerts_total", "counter", "Drift alerts raised, by type",
+         [({"type": event}, count) for event, count in alerts.counts.items()]),
+        ("grc_osint_requests_total", "counter", "Requests made to the OSINT service", [({}, osint.requests)]),
+        ("grc_osint_errors_total", "counter", "Failed requests to the OSINT service", [({}, osint.errors)]),
+    ]
+    if history is not None:
+        recorded = history.stats()
+        families += [
+            ("grc_score_history_written_total", "counter", "Scores written to the score history", [({}, recorded["written"])]),
+            ("grc_score_history_dropped_total", "counter", "Scores dropped because the history writer fell behind", [({}, recorded["dropped"])]),
+            ("grc_score_history_pending", "gauge", "Scores waiting to be written to the score history", [({}, recorded["pending"])]),
+        ]
+    return families
+
+telemetry.collect(collect_engine_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, scoring stage and store metrics in the Prometheus text format"""
+    return PlainTextResponse(telemetry.render(), media_type=instrumentation.CONTENT_TYPE)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -243,10 +783,42 @@ async def root():
         "endpoints": [
             "/health",
             "/api/calculate",
+            "/api/calculate/batch",
+            "/api/calculate/stream",
+            "/api/assess",
+            "/api/assess/batch",
+            "/api/assess/stats",
+            "/api/incremental/stats",
+            "/api/history/vendors/{vendor_id}",
+            "/api/history/portfolio",
+            "/api/history/movers",
+            "/api/history/stats",
+            "/api/alerts",
+            "/api/alerts/stream",
+            "/api/alerts/stats",
+            "/api/model",
+            "/api/model/reload",
+            "/api/simulation/portfolio",
+            "/api/simulation/run",
+            "/metrics",
             "/docs"
         ]
     }
 
+def preload() -> None:
+    """
+    Load now what the service otherwise loads on first use
+
+    grc_shared/gunicorn.conf.py calls this in the master process, after the module (and
+    with it the compiled scoring model) is imported, so forked workers share
+    httpx, used by the OSINT client and the drift webhook, and the OpenAPI
+    schema behind /docs.
+    """
+    import httpx  # noqa: F401
+    app.openapi()
+
 if __name__ == "__main__":
     import uvicorn
+    # LOG_LEVEL=WARNING drops the per-request INFO lines
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
     uvicorn.run(app, host="0.0.0.0", port=5002)
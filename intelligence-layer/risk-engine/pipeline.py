@@ -0,0 +1,175 @@
+"""
+Assessment pipeline: OSINT enrichment chained into risk scoring
+
+The risk engine calls the OSINT service over a pool of keep-alive
+connections and scores in-process, replacing the enrich -> copy
+reputation_score -> calculate round trips of the n8n workflows. A batch is
+enriched with one streamed /api/enrich/bulk request; each vendor is scored
+as soon as its domain's enrichment line arrives, while the OSINT service
+keeps enriching the rest.
+"""
+import json
+import logging
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentSummary(BaseModel):
+    """The parts of an OSINT enrichment the assessment used or reports"""
+    domain: str
+    reputation_score: Optional[int] = None
+    degraded: bool = False
+    degraded_lookups: List[str] = []
+    whois_data: Optional[Dict[str, Any]] = None
+    dns_records: Optional[Dict[str, Any]] = None
+    ssl_info: Optional[Dict[str, Any]] = None
+    has_ssl: Optional[bool] = None
+    lookup_timings_ms: Optional[Dict[str, float]] = None
+    cache_expires_at: Optional[str] = None
+    last_updated: Optional[str] = None
+
+
+class OsintUnavailable(Exception):
+    """The OSINT service could not be reached or answered with an error"""
+
+
+class OsintClient:
+    """
+    Pooled keep-alive HTTP client for the OSINT service
+
+    The httpx client (and httpx itself) is created on the first request, so
+    a risk engine that only scores never imports it.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 30.0, max_connections: int = 20, transport: Optional["httpx.AsyncBaseTransport"] = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+        self._client: Optional["httpx.AsyncClient"] = None
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def enrich(self, domain: str) -> Dict[str, Any]:
+        import httpx
+        self.requests += 1
+        try:
+            response = await self.client.post("/api/enrich", json={"domain": domain})
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise OsintUnavailable(f"OSINT enrichment failed for {domain}: {str(e)}") from e
+
+    async def enrich_stream(self, domains: List[str], concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+        """Bulk enrichment results (with `error` set on failure) in completion order"""
+        import httpx
+        self.requests += 1
+        try:
+            async with self.client.stream(
+                "POST", "/api/enrich/bulk", json={"domains": domains, "concurrency": concurrency}
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        yield json.loads(line)
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise OsintUnavailable(f"OSINT bulk enrichment failed: {str(e)}") from e
+
+    def stats(self) -> Dict[str, Any]:
+        return {"osint_url": self.base_url, "requests": self.requests, "errors": self.errors}
+
+
+def enriched_factors(factors: Any, enrichment: Dict[str, Any]) -> Any:
+    """
+    Vendor factors with the enrichment's reputation score as
+    domain_reputation_score and, when the TLS check was conclusive, its has_ssl
+
+    A degraded enrichment (a WHOIS server or resolver was down) has no
+    reputation score, so the vendor's own domain_reputation_score stays.
+    """
+    update = {}
+    if enrichment.get("reputation_score") is not None:
+        update["domain_reputation_score"] = enrichment["reputation_score"]
+    if enrichment.get("has_ssl") is not None:
+        update["has_ssl"] = enrichment["has_ssl"]
+    return factors.model_copy(update=update) if update else factors
+
+
+def assessment(factors: Any, enrichment: Optional[Dict[str, Any]], score: Callable[[Any], Any], enrich_ms: Optional[float], error: Optional[str] = None) -> Dict[str, Any]:
+    """Score the enriched factors; result keyed like AssessmentResponse"""
+    risk = score_ms = None
+    if enrichment is not None:
+        start = time.perf_counter()
+        risk = score(enriched_factors(factors, enrichment))
+        score_ms = round((time.perf_counter() - start) * 1000, 3)
+    return {
+        "vendor_id": factors.vendor_id,
+        "domain": factors.domain,
+        "enrichment": EnrichmentSummary(**enrichment) if enrichment is not None else None,
+        "risk": risk,
+        "error": error,
+        "timings_ms": {
+            "enrich": round(enrich_ms, 2) if enrich_ms is not None else None,
+            "score": score_ms,
+        },
+        "assessed_at": datetime.utcnow().isoformat(),
+    }
+
+
+async def assess_stream(vendors: List[Any], osint: OsintClient, score: Callable[[Any], Any], concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Enrich each distinct domain once and score its vendors as its result arrives
+
+    Yields one assessment per vendor, in completion order. A domain whose
+    enrichment failed gives its vendors an assessment with error set and no
+    score; if the OSINT service fails mid-stream, so do all remaining vendors.
+    """
+    by_domain: Dict[str, List[Any]] = {}
+    for factors in vendors:
+        by_domain.setdefault(factors.domain, []).append(factors)
+    start = time.perf_counter()
+    try:
+        async for enrichment in osint.enrich_stream(list(by_domain), concurrency):
+            waiting = by_domain.pop(enrichment.get("domain"), [])
+            error = enrichment.pop("error", None)
+            enrich_ms = (time.perf_counter() - start) * 1000
+            for factors in waiting:
+                if error:
+                    yield assessment(factors, None, score, enrich_ms, f"Enrichment failed: {error}")
+                else:
+                    yield assessment(factors, enrichment, score, enrich_ms)
+    except OsintUnavailable as e:
+        logger.error(str(e))
+        error = str(e)
+    else:
+        error = "OSINT service returned no result for this domain"
+    for waiting in by_domain.values():
+        for factors in waiting:
+            yield assessment(factors, None, score, None, error)
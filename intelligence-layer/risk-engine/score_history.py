@@ -0,0 +1,464 @@
+"""
+Append-only score history
+
+Every RiskScoreResponse the engine returns is buffered and written to the
+history database by a background thread in batches, one transaction per
+flush. A row holds the overall score, level, model version and the five
+factor scores (not the recommendations), with calculated_at as integer
+milliseconds since the epoch, indexed by (vendor_id, calculated_at).
+
+Results served again from the incremental store (the vendor's factors and
+the model are unchanged) are recorded too, marked from_store. Their
+calculated_at is when they were served, so the history shows each
+assessment at its own time; the score itself comes from the vendor's last
+row without the mark. Histories created before the column existed get it
+when opened.
+
+Queries: one vendor's history over a time range, the portfolio as of a
+moment (each vendor's latest row at or before it, found with one index probe
+per vendor), and the biggest movers between two moments.
+
+SQLite is the local backend; a postgresql:// URL keeps the history in the
+deployed Postgres instead (requires psycopg).
+"""
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+FACTOR_NAMES = ("company_maturity", "security_posture", "incident_history", "online_reputation", "financial_health")
+COLUMNS = ("vendor_id", "calculated_at", "overall_risk_score", "risk_level", "scoring_model_version") + FACTOR_NAMES + ("from_store",)
+MOVER_DIRECTIONS = ("down", "up", "any")
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class ScoreHistoryEntry(BaseModel):
+    """One stored score"""
+    vendor_id: str
+    calculated_at: str
+    overall_risk_score: int
+    risk_level: str
+    scoring_model_version: Optional[str] = None
+    risk_factors: Dict[str, int]
+    from_store: bool = Field(False, description="Served again from the stored result of an earlier computation")
+
+
+class VendorHistoryResponse(BaseModel):
+    """A vendor's scores over a time range, oldest first"""
+    vendor_id: str
+    count: int
+    entries: List[ScoreHistoryEntry]
+
+
+class PortfolioSnapshotResponse(BaseModel):
+    """Each vendor's latest score at or before as_of"""
+    as_of: str
+    count: int
+    risk_levels: Dict[str, int]
+    vendors: List[ScoreHistoryEntry]
+
+
+class ScoreMover(BaseModel):
+    """A vendor's score at the start and end of a period"""
+    vendor_id: str
+    start_score: int
+    end_score: int
+    score_delta: int
+    start_risk_level: str
+    end_risk_level: str
+    start_calculated_at: str
+    end_calculated_at: str
+
+
+class MoversResponse(BaseModel):
+    """Vendors whose score changed most between two moments"""
+    start: str
+    end: str
+    direction: str
+    count: int
+    movers: List[ScoreMover]
+
+
+def to_millis(value: Any) -> int:
+    """Milliseconds since the epoch for a datetime or ISO string; naive values are UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def from_millis(millis: int) -> str:
+    return (EPOCH + timedelta(milliseconds=millis)).isoformat()
+
+
+def history_row(result: Any, served_at: Optional[int] = None) -> Tuple:
+    """Row tuple, in COLUMNS order, for a RiskScoreResponse; served_at (millis) marks one served from the store"""
+    factors = result.risk_factors
+    return (
+        result.vendor_id,
+        to_millis(result.calculated_at) if served_at is None else served_at,
+        result.overall_risk_score,
+        getattr(result.risk_level, "value", result.risk_level),
+        result.scoring_model_version,
+        *(factors.get(name, 0) for name in FACTOR_NAMES),
+        0 if served_at is None else 1,
+    )
+
+
+def entry_dict(row: Tuple) -> Dict[str, Any]:
+    return {
+        "vendor_id": row[0],
+        "calculated_at": from_millis(row[1]),
+        "overall_risk_score": row[2],
+        "risk_level": row[3],
+        "scoring_model_version": row[4],
+        "risk_factors": dict(zip(FACTOR_NAMES, row[5:5 + len(FACTOR_NAMES)])),
+        "from_store": bool(row[5 + len(FACTOR_NAMES)]),
+    }
+
+
+class SqlHistoryBackend:
+    """
+    Shared SQL for the history backends
+
+    Subclasses give the schema, the placeholder style, a connect() and
+    latest_join(): a join from score_history_vendors v to each vendor's
+    latest row at or before one placeholder.
+    """
+
+    placeholder = "?"
+    schema: Tuple[str, ...] = ()
+    insert_vendor_sql = ""
+
+    def __init__(self):
+        self._write_connection = None
+        self._read_connection = None
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+
+    def connect(self):
+        raise NotImplementedError
+
+    def latest_join(self, alias: str) -> str:
+        raise NotImplementedError
+
+    def open(self) -> None:
+        self._write_connection = self.connect()
+        self._read_connection = self.connect()
+        with self._write_lock:
+            cursor = self._write_connection.cursor()
+            for statement in self.schema:
+                cursor.execute(statement)
+            cursor.execute("SELECT * FROM score_history LIMIT 0")
+            if "from_store" not in [column[0] for column in cursor.description]:
+                cursor.execute("ALTER TABLE score_history ADD COLUMN from_store SMALLINT NOT NULL DEFAULT 0")
+            self._write_connection.commit()
+
+    def close(self) -> None:
+        for connection in (self._write_connection, self._read_connection):
+            if connection is not None:
+                connection.close()
+        self._write_connection = self._read_connection = None
+
+    def write(self, rows: List[Tuple]) -> None:
+        """Append rows in one transaction"""
+        p = self.placeholder
+        insert = f"INSERT INTO score_history ({', '.join(COLUMNS)}) VALUES ({', '.join([p] * len(COLUMNS))})"
+        with self._write_lock:
+            connection = self._write_connection
+            try:
+                cursor = connection.cursor()
+                cursor.executemany(insert, rows)
+                cursor.executemany(self.insert_vendor_sql, sorted({(row[0],) for row in rows}))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+    def _query(self, sql: str, params: Tuple) -> List[Tuple]:
+        with self._read_lock:
+            cursor = self._read_connection.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            # End the read transaction so the next query sees new flushes
+            self._read_connection.commit()
+            return rows
+
+    def vendor_history(self, vendor_id: str, since: int, until: int, limit: int) -> List[Tuple]:
+        p = self.placeholder
+        return self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM score_history"
+            f" WHERE vendor_id = {p} AND calculated_at >= {p} AND calculated_at <= {p}"
+            f" ORDER BY calculated_at, id LIMIT {p}",
+            (vendor_id, since, until, limit),
+        )
+
+    def as_of(self, at: int) -> List[Tuple]:
+        return self._query(
+            f"SELECT {', '.join(f'h.{column}' for column in COLUMNS)}"
+            f" FROM score_history_vendors v {self.latest_join('h')} ORDER BY v.vendor_id",
+            (at,),
+        )
+
+    def movers(self, start: int, end: int, direction: str, limit: int) -> List[Tuple]:
+        delta = "e.overall_risk_score - s.overall_risk_score"
+        condition, order = {
+            "down": (f"{delta} < 0", f"{delta} ASC"),
+            "up": (f"{delta} > 0", f"{delta} DESC"),
+            "any": (f"{delta} <> 0", f"ABS({delta}) DESC"),
+        }[direction]
+        # One pass over the vendors, probing the index once for each end of the period
+        return self._query(
+            f"SELECT v.vendor_id, s.overall_risk_score, e.overall_risk_score, {delta},"
+            f" s.risk_level, e.risk_level, s.calculated_at, e.calculated_at"
+            f" FROM score_history_vendors v {self.latest_join('s')} {self.latest_join('e')}"
+            f" WHERE {condition} ORDER BY {order}, v.vendor_id LIMIT {self.placeholder}",
+            (start, end, limit),
+        )
+
+
+HISTORY_COLUMN_TYPES = (
+    "vendor_id TEXT NOT NULL, calculated_at BIGINT NOT NULL, overall_risk_score SMALLINT NOT NULL,"
+    " risk_level TEXT NOT NULL, scoring_model_version TEXT, "
+    + ", ".join(f"{name} SMALLINT NOT NULL" for name in FACTOR_NAMES)
+    + ", from_store SMALLINT NOT NULL DEFAULT 0"
+)
+
+
+class SqliteHistoryBackend(SqlHistoryBackend):
+    placeholder = "?"
+    schema = (
+        f"CREATE TABLE IF NOT EXISTS score_history (id INTEGER PRIMARY KEY, {HISTORY_COLUMN_TYPES})",
+        # Secondary indexes carry the rowid, so this also orders ties by id
+        "CREATE INDEX IF NOT EXISTS score_history_vendor_time ON score_history (vendor_id, calculated_at)",
+        "CREATE TABLE IF NOT EXISTS score_history_vendors (vendor_id TEXT PRIMARY KEY) WITHOUT ROWID",
+    )
+    insert_vendor_sql = "INSERT OR IGNORE INTO score_history_vendors (vendor_id) VALUES (?)"
+
+    def latest_join(self, alias: str) -> str:
+        return (
+            f"JOIN score_history {alias} ON {alias}.id = ("
+            "SELECT id FROM score_history WHERE vendor_id = v.vendor_id AND calculated_at <= ?"
+            " ORDER BY calculated_at DESC, id DESC LIMIT 1)"
+        )
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+
+class PostgresHistoryBackend(SqlHistoryBackend):
+    placeholder = "%s"
+    schema = (
+        f"CREATE TABLE IF NOT EXISTS score_history (id BIGSERIAL PRIMARY KEY, {HISTORY_COLUMN_TYPES})",
+        "CREATE INDEX IF NOT EXISTS score_history_vendor_time ON score_history (vendor_id, calculated_at, id)",
+        "CREATE TABLE IF NOT EXISTS score_history_vendors (vendor_id TEXT PRIMARY KEY)",
+    )
+    insert_vendor_sql = "INSERT INTO score_history_vendors (vendor_id) VALUES (%s) ON CONFLICT DO NOTHING"
+
+    def latest_join(self, alias: str) -> str:
+        return (
+            "CROSS JOIN LATERAL ("
+            f"SELECT {', '.join(COLUMNS)} FROM score_history WHERE vendor_id = v.vendor_id AND calculated_at <= %s"
+            f" ORDER BY calculated_at DESC, id DESC LIMIT 1) {alias}"
+        )
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+
+    def connect(self):
+        import psycopg
+        return psycopg.connect(self.url)
+
+
+def open_backend(url: str) -> SqlHistoryBackend:
+    """Backend for a sqlite:///path or postgresql:// URL"""
+    if url.startswith("sqlite:///"):
+        return SqliteHistoryBackend(url[len("sqlite:///"):])
+    if url.startswith(("postgresql://", "postgres://")):
+        return PostgresHistoryBackend(url)
+    raise ValueError(f"Unsupported score history URL: {url}")
+
+
+class ScoreHistory:
+    """
+    Buffered writer and query front end for a history backend
+
+    append() only queues rows while the writer thread runs (between start()
+    and stop()). Up to max_pending rows wait for the database; if it stays
+    unavailable beyond that, further rows are dropped and counted.
+    """
+
+    def __init__(self, backend: SqlHistoryBackend, batch_size: int = 1000, flush_interval: float = 1.0, max_pending: int = 100000):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.write_errors = 0
+        self.flush_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        self.backend.open()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="score-history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the writer thread, write what is pending and close the backend"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Score history: {len(self._pending)} rows not written at shutdown: {str(e)}")
+        self.backend.close()
+
+    def append(self, results: Iterable[Any], from_store: bool = False) -> None:
+        """Queue results; from_store ones were served again now from an earlier computation"""
+        if self._thread is None:
+            return
+        served_at = to_millis(datetime.utcnow()) if from_store else None
+        rows = [history_row(result, served_at) for result in results]
+        with self._lock:
+            room = self.max_pending - len(self._pending)
+            if len(rows) > room:
+                self.dropped += len(rows) - max(room, 0)
+                logger.warning(f"Score history buffer full, dropped {len(rows) - max(room, 0)} rows")
+                rows = rows[:max(room, 0)]
+            self._pending.extend(rows)
+            self.appended += len(rows)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def flush(self) -> int:
+        """Write pending rows in one transaction; on failure they are kept for the next flush"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            start = time.perf_counter()
+            try:
+                self.backend.write(rows)
+            except Exception:
+                self.write_errors += 1
+                with self._lock:
+                    self._pending[:0] = rows
+                raise
+            self.flush_seconds += time.perf_counter() - start
+            self.flushes += 1
+            self.written += len(rows)
+            return len(rows)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error writing score history: {str(e)}")
+
+    # Queries flush first, so they see every result scored before the call
+
+    def vendor_history(self, vendor_id: str, since: Optional[datetime], until: Optional[datetime], limit: int) -> Dict[str, Any]:
+        self.flush()
+        rows = self.backend.vendor_history(
+            vendor_id,
+            to_millis(since) if since else 0,
+            to_millis(until) if until else 2 ** 62,
+            limit,
+        )
+        entries = [entry_dict(row) for row in rows]
+        return {"vendor_id": vendor_id, "count": len(entries), "entries": entries}
+
+    def latest_states(self) -> List[Tuple[str, int, str]]:
+        """(vendor_id, score, risk_level) of each vendor's latest stored row"""
+        self.flush()
+        return [(row[0], row[2], row[3]) for row in self.backend.as_of(2 ** 62)]
+
+    def portfolio_as_of(self, as_of: Optional[datetime]) -> Dict[str, Any]:
+        self.flush()
+        at = to_millis(as_of or datetime.utcnow())
+        vendors = [entry_dict(row) for row in self.backend.as_of(at)]
+        levels: Dict[str, int] = {}
+        for vendor in vendors:
+            levels[vendor["risk_level"]] = levels.get(vendor["risk_level"], 0) + 1
+        return {"as_of": from_millis(at), "count": len(vendors), "risk_levels": levels, "vendors": vendors}
+
+    def movers(self, start: datetime, end: Optional[datetime], direction: str, limit: int) -> Dict[str, Any]:
+        if direction not in MOVER_DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(MOVER_DIRECTIONS)}")
+        self.flush()
+        start_at = to_millis(start)
+        end_at = to_millis(end or datetime.utcnow())
+        if end_at < start_at:
+            raise ValueError("end must not be before start")
+        movers = [
+            {
+                "vendor_id": row[0],
+                "start_score": row[1],
+                "end_score": row[2],
+                "score_delta": row[3],
+                "start_risk_level": row[4],
+                "end_risk_level": row[5],
+                "start_calculated_at": from_millis(row[6]),
+                "end_calculated_at": from_millis(row[7]),
+            }
+            for row in self.backend.movers(start_at, end_at, direction, limit)
+        ]
+        return {
+            "start": from_millis(start_at),
+            "end": from_millis(end_at),
+            "direction": direction,
+            "count": len(movers),
+            "movers": movers,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "backend": type(self.backend).__name__,
+            "running": self.running,
+            "appended": self.appended,
+            "written": self.written,
+            "pending": pending,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "write_errors": self.write_errors,
+            "flush_seconds_avg": round(self.flush_seconds / self.flushes, 4) if self.flushes else 0.0,
+        }
@@ -0,0 +1,326 @@
+"""
+Versioned scoring model: config schema, compiler and hot-reload registry
+
+The scoring model (factor weights, brackets, deductions, certification
+catalog, risk level cutoffs and recommendation thresholds) lives in a JSON
+file. compile_model() turns it into a CompiledModel: bisect bracket tables,
+flat lookup tables for small integer domains and closures that bind them as
+locals, plus NumPy copies of the same tables for the batch kernel.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Callable, List, Literal, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+
+from cert_matcher import CertificationMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class Bracket(BaseModel):
+    """Points for values >= min (up to the next bracket)"""
+    min: int = Field(..., ge=1)
+    points: int = Field(..., ge=0)
+
+
+class BracketTable(BaseModel):
+    """Bracketed points for a count; 0 or missing scores unknown_points"""
+    unknown_points: int = Field(..., ge=0)
+    brackets: List[Bracket] = Field(..., min_length=1)
+
+    @model_validator(mode="after")
+    def check_unique_mins(self):
+        if len({b.min for b in self.brackets}) != len(self.brackets):
+            raise ValueError("bracket mins must be unique")
+        return self
+
+
+class CompanyMaturityConfig(BaseModel):
+    max_points: int = Field(..., ge=0)
+    age_years: BracketTable
+    employee_count: BracketTable
+
+
+class CertificationConfig(BaseModel):
+    name: str = Field(..., min_length=1)
+    points: int = Field(..., ge=0)
+    aliases: List[str] = Field(default_factory=list)
+
+
+class SecurityPostureConfig(BaseModel):
+    max_points: int = Field(..., ge=0)
+    ssl_points: int = Field(..., ge=0)
+    certifications: List[CertificationConfig]
+
+    @model_validator(mode="after")
+    def check_unique_names(self):
+        if len({c.name for c in self.certifications}) != len(self.certifications):
+            raise ValueError("certification names must be unique")
+        return self
+
+
+class Deduction(BaseModel):
+    points_each: int = Field(..., ge=0)
+    max_deduction: int = Field(..., ge=0)
+
+
+class IncidentHistoryConfig(BaseModel):
+    max_points: int = Field(..., ge=0)
+    breach: Deduction
+    cve: Deduction
+
+
+class ScaledScoreConfig(BaseModel):
+    """0-100 input scaled to max_points; missing or 0 counts as unknown_score"""
+    max_points: int = Field(..., ge=0)
+    unknown_score: int = Field(..., ge=0, le=100)
+
+
+class RiskLevelCutoff(BaseModel):
+    level: Literal["critical", "high", "medium", "low", "minimal"]
+    max_score: int = Field(..., ge=0, le=100)
+
+
+class RecommendationThresholds(BaseModel):
+    high_priority_max_score: int
+    security_posture_below: int
+    cve_count_above: int
+    company_maturity_below: int
+    low_risk_min_score: int
+
+
+class ScoringModelConfig(BaseModel):
+    """Complete scoring model, as stored in the model file"""
+    version: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    company_maturity: CompanyMaturityConfig
+    security_posture: SecurityPostureConfig
+    incident_history: IncidentHistoryConfig
+    online_reputation: ScaledScoreConfig
+    financial_health: ScaledScoreConfig
+    risk_levels: List[RiskLevelCutoff] = Field(..., min_length=1)
+    recommendations: RecommendationThresholds
+
+    @model_validator(mode="after")
+    def check_score_range(self):
+        total = self.max_total_points
+        if total > 100:
+            raise ValueError(f"factor max_points sum to {total}; the overall score is capped at 100")
+        cutoffs = [c.max_score for c in self.risk_levels]
+        if cutoffs != sorted(set(cutoffs)):
+            raise ValueError("risk_levels must have strictly increasing max_score")
+        if cutoffs[-1] < total:
+            raise ValueError(f"risk_levels must cover scores up to {total}")
+        return self
+
+    @property
+    def max_total_points(self) -> int:
+        return (
+            self.company_maturity.max_points
+            + self.security_posture.max_points
+            + self.incident_history.max_points
+            + self.online_reputation.max_points
+            + self.financial_health.max_points
+        )
+
+
+def bracket_table(table: BracketTable) -> Tuple[List[int], List[int]]:
+    """(thresholds, points) where points[bisect_right(thresholds, value)] scores value"""
+    brackets = sorted(table.brackets, key=lambda b: b.min)
+    return [b.min for b in brackets], [0] + [b.points for b in brackets]
+
+
+def deduction_saturation(deduction: Deduction) -> int:
+    """Smallest count at which the deduction reaches its maximum"""
+    if deduction.points_each == 0:
+        return 0
+    return -(-deduction.max_deduction // deduction.points_each)
+
+
+class CompiledModel:
+    """Evaluation plan for one ScoringModelConfig"""
+
+    def __init__(self, config: ScoringModelConfig):
+        self.config = config
+        self.version = config.version
+        self.fingerprint = hashlib.blake2b(
+            config.model_dump_json().encode(), digest_size=16
+        ).hexdigest()
+        self.max_total_points = config.max_total_points
+
+        maturity = config.company_maturity
+        self.age_thresholds, self.age_points = bracket_table(maturity.age_years)
+        self.employee_thresholds, self.employee_points = bracket_table(maturity.employee_count)
+
+        security = config.security_posture
+        self.cert_matcher = CertificationMatcher(
+            {c.name: c.points for c in security.certifications},
+            {c.name: c.aliases for c in security.certifications},
+        )
+
+        # Incident score for every (breaches, cves) pair up to saturation, row-major
+        incident = config.incident_history
+        self.breach_saturation = deduction_saturation(incident.breach)
+        self.cve_saturation = deduction_saturation(incident.cve)
+        self.incident_table = [
+            max(
+                incident.max_points
+                - min(b * incident.breach.points_each, incident.breach.max_deduction)
+                - min(c * incident.cve.points_each, incident.cve.max_deduction),
+                0,
+            )
+            for b in range(self.breach_saturation + 1)
+            for c in range(self.cve_saturation + 1)
+        ]
+
+        # Scaled points for every 0-100 input; index 0 holds the unknown score
+        self.reputation_table = self._scaled_table(config.online_reputation)
+        self.financial_table = self._scaled_table(config.financial_health)
+
+        # Index into level_names for every reachable overall score
+        self.level_names = [c.level for c in config.risk_levels]
+        cutoffs = [c.max_score for c in config.risk_levels]
+        self.level_table = [bisect_left(cutoffs, score) for score in range(self.max_total_points + 1)]
+
+        self.recommendations = config.recommendations
+
+        self.maturity_score = self._compile_maturity(maturity.max_points)
+        self.security_score = self._compile_security(security.ssl_points, security.max_points)
+        self.incident_score = self._compile_incident()
+        self.reputation_points = self._compile_lookup(self.reputation_table)
+        self.financial_points = self._compile_lookup(self.financial_table)
+        self.risk_level_index = self._compile_lookup(self.level_table)
+
+        # Column-wise copies for the batch kernel
+        self.age_thresholds_array = np.array(self.age_thresholds, dtype=np.int64)
+        self.age_points_array = np.array(self.age_points, dtype=np.int64)
+        self.employee_thresholds_array = np.array(self.employee_thresholds, dtype=np.int64)
+        self.employee_points_array = np.array(self.employee_points, dtype=np.int64)
+        self.incident_table_array = np.array(self.incident_table, dtype=np.int64)
+        self.reputation_table_array = np.array(self.reputation_table, dtype=np.int64)
+        self.financial_table_array = np.array(self.financial_table, dtype=np.int64)
+        self.level_table_array = np.array(self.level_table, dtype=np.int64)
+
+    @staticmethod
+    def _scaled_table(scaled: ScaledScoreConfig) -> List[int]:
+        table = [int((score / 100) * scaled.max_points) for score in range(101)]
+        table[0] = int((scaled.unknown_score / 100) * scaled.max_points)
+        return table
+
+    def _compile_maturity(self, cap: int) -> Callable[[Optional[int], Optional[int]], int]:
+        age_thresholds, age_points = self.age_thresholds, self.age_points
+        age_unknown = self.config.company_maturity.age_years.unknown_points
+        employee_thresholds, employee_points = self.employee_thresholds, self.employee_points
+        employee_unknown = self.config.company_maturity.employee_count.unknown_points
+
+        def maturity_score(company_age, employee_count, bisect=bisect_right):
+            return min(
+                (age_points[bisect(age_thresholds, company_age)] if company_age else age_unknown)
+                + (employee_points[bisect(employee_thresholds, employee_count)] if employee_count else employee_unknown),
+                cap,
+            )
+        return maturity_score
+
+    def _compile_security(self, ssl_points: int, cap: int) -> Callable[[bool, List[str]], int]:
+        total_points = self.cert_matcher.total_points
+
+        def security_score(has_ssl, certifications):
+            return min((ssl_points if has_ssl else 0) + total_points(certifications), cap)
+        return security_score
+
+    def _compile_incident(self) -> Callable[[int, int], int]:
+        table = self.incident_table
+        breach_saturation, cve_saturation = self.breach_saturation, self.cve_saturation
+        stride = cve_saturation + 1
+
+        def incident_score(breach_count, cve_count):
+            return table[min(breach_count, breach_saturation) * stride + min(cve_count, cve_saturation)]
+        return incident_score
+
+    @staticmethod
+    def _compile_lookup(table: List[int]) -> Callable[[Optional[int]], int]:
+        def lookup(value):
+            return table[value or 0]
+        return lookup
+
+
+def compile_model(config: ScoringModelConfig) -> CompiledModel:
+    return CompiledModel(config)
+
+
+def load_model_config(path: str) -> ScoringModelConfig:
+    with open(path, encoding="utf-8") as f:
+        return ScoringModelConfig.model_validate(json.load(f))
+
+
+class ModelRegistry:
+    """
+    Holds the active CompiledModel and keeps it in sync with the model file
+
+    install() validates, compiles and atomically writes a new model. Other
+    worker processes pick the change up by checking the file's mtime at most
+    every check_interval seconds, so a swap never requires a restart. A file
+    that fails to load is logged and the current model kept.
+    """
+
+    def __init__(self, path: str, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self.model = compile_model(load_model_config(path))
+        self._next_check = time.monotonic() + check_interval
+
+    def current(self) -> CompiledModel:
+        """Active model, reloading first if the file changed since the last check"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            try:
+                if os.stat(self.path).st_mtime_ns != self._mtime:
+                    self.reload()
+            except OSError as e:
+                logger.warning(f"Cannot stat scoring model {self.path}: {str(e)}")
+        return self.model
+
+    def reload(self) -> CompiledModel:
+        """Recompile from the model file; keeps the current model if it is invalid"""
+        with self._lock:
+            try:
+                # Recorded before loading, so a broken file is reported once, not on every check
+                self._mtime = os.stat(self.path).st_mtime_ns
+                model = compile_model(load_model_config(self.path))
+            except Exception as e:
+                logger.error(f"Keeping scoring model {self.model.version}; reload failed: {str(e)}")
+                return self.model
+            if model.fingerprint != self.model.fingerprint:
+                logger.info(f"Scoring model {self.model.version} -> {model.version}")
+            self.model = model
+            return model
+
+    def install(self, config: ScoringModelConfig) -> CompiledModel:
+        """Compile config, persist it to the model file and make it active"""
+        model = compile_model(config)
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".scoring_model.", suffix=".json")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(config.model_dump(exclude_none=True), f, indent=2)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._mtime = os.stat(self.path).st_mtime_ns
+            logger.info(f"Scoring model {self.model.version} -> {model.version} (installed)")
+            self.model = model
+            return model
@@ -0,0 +1,218 @@
+"""
+Portfolio what-if simulation
+
+The portfolio's factors are loaded once into FactorColumns. A sweep then
+scores every vendor under the active model and under each scenario (the
+active model config with overrides applied) using the batch_scoring kernel,
+and reports how the risk level distribution shifts and which vendors change
+level. Per scenario the work is a handful of array operations over the whole
+portfolio, plus certification matching once per distinct certification list.
+"""
+import copy
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+import batch_scoring
+from scoring_model import CompiledModel, ScoringModelConfig, compile_model
+
+class SimulationScenario(BaseModel):
+    """One alternative scoring configuration, expressed relative to the active model"""
+    name: str = Field(..., min_length=1)
+    overrides: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Partial scoring model config merged into the active one (objects merge, lists replace)",
+    )
+    certification_points: Dict[str, int] = Field(
+        default_factory=dict, description="Points per catalog certification name, e.g. {\"FedRAMP\": 20}"
+    )
+    required_certifications: List[str] = Field(
+        default_factory=list, description="Catalog names every vendor must hold, e.g. [\"FedRAMP\"]"
+    )
+    required_certification_level: Literal["critical", "high", "medium", "low", "minimal"] = Field(
+        "high", description="Best risk level a vendor missing a required certification can reach"
+    )
+
+
+class SimulationRequest(BaseModel):
+    scenarios: List[SimulationScenario] = Field(..., min_length=1, max_length=500)
+    max_changed_vendors: int = Field(100, ge=0, le=50000, description="Changed vendors listed per scenario")
+
+
+class LevelChange(BaseModel):
+    vendor_id: str
+    from_level: str
+    to_level: str
+    from_score: int
+    to_score: int
+
+
+class ScenarioResult(BaseModel):
+    name: str
+    scoring_model_version: str
+    distribution: Dict[str, int]
+    shift: Dict[str, int]
+    mean_score: float
+    changed_count: int
+    improved_count: int
+    worsened_count: int
+    changed_vendors: List[LevelChange]
+
+
+class SimulationResponse(BaseModel):
+    vendor_count: int
+    baseline_model_version: str
+    baseline_distribution: Dict[str, int]
+    baseline_mean_score: float
+    scenarios: List[ScenarioResult]
+    elapsed_ms: float
+
+
+def merge_overrides(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Recursively merge overrides into a copy of base; non-dict values replace"""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_overrides(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def scenario_config(base: ScoringModelConfig, scenario: SimulationScenario) -> ScoringModelConfig:
+    """Active config with a scenario's overrides applied; raises ValueError if invalid"""
+    data = merge_overrides(base.model_dump(), scenario.overrides)
+    if "version" not in scenario.overrides:
+        data["version"] = f"{base.version}+{scenario.name}"
+
+    catalog = {c["name"]: c for c in data["security_posture"]["certifications"]}
+    for name, points in scenario.certification_points.items():
+        if name not in catalog:
+            raise ValueError(f"unknown certification {name!r}")
+        catalog[name]["points"] = points
+    for name in scenario.required_certifications:
+        if name not in catalog:
+            raise ValueError(f"unknown required certification {name!r}")
+
+    return ScoringModelConfig.model_validate(data)
+
+
+class PortfolioStore:
+    """The loaded portfolio's FactorColumns; replaced wholesale on each load"""
+
+    def __init__(self):
+        self.columns: Optional[batch_scoring.FactorColumns] = None
+        self.loaded_at: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def load(self, factors: Iterable[Any]) -> batch_scoring.FactorColumns:
+        columns = batch_scoring.FactorColumns(factors)
+        with self._lock:
+            self.columns = columns
+            self.loaded_at = datetime.utcnow().isoformat()
+        return columns
+
+    def clear(self) -> None:
+        with self._lock:
+            self.columns = None
+            self.loaded_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        columns = self.columns
+        return {
+            "vendors": len(columns) if columns is not None else 0,
+            "distinct_certification_lists": len(columns.certification_lists) if columns is not None else 0,
+            "loaded_at": self.loaded_at,
+        }
+
+
+# Riskiest first; levels are compared by rank, so scenarios may move cutoffs freely
+LEVEL_NAMES = ["critical", "high", "medium", "low", "minimal"]
+LEVEL_RANK = {name: rank for rank, name in enumerate(LEVEL_NAMES)}
+
+
+class _Evaluation:
+    """Overall score and risk level rank for every vendor under one model"""
+
+    def __init__(self, model: CompiledModel, columns: batch_scoring.FactorColumns):
+        self.scores = sum(batch_scoring.factor_scores(model, columns).values())
+        rank_by_index = np.array([LEVEL_RANK[name] for name in model.level_names])
+        self.ranks = rank_by_index[batch_scoring.risk_level_indices(model, self.scores)]
+
+    def distribution(self) -> Dict[str, int]:
+        counts = np.bincount(self.ranks, minlength=len(LEVEL_NAMES))
+        return dict(zip(LEVEL_NAMES, counts.tolist()))
+
+    def mean_score(self) -> float:
+        return round(float(self.scores.mean()), 2) if len(self.scores) else 0.0
+
+
+def run_simulation(
+    base_model: CompiledModel,
+    columns: batch_scoring.FactorColumns,
+    request: SimulationRequest,
+) -> SimulationResponse:
+    """Evaluate every scenario against the baseline model over the whole portfolio"""
+    start = time.perf_counter()
+    baseline = _Evaluation(base_model, columns)
+    baseline_distribution = baseline.distribution()
+
+    results = []
+    for scenario in request.scenarios:
+        try:
+            config = scenario_config(base_model.config, scenario)
+        except ValueError as e:
+            raise ValueError(f"Scenario {scenario.name!r}: {str(e)}") from e
+        model = compile_model(config)
+        evaluation = _Evaluation(model, columns)
+        if scenario.required_certifications:
+            # Vendors missing a required certification can do no better than the configured level
+            missing = _missing_required(model, columns, scenario.required_certifications)
+            cap = LEVEL_RANK[scenario.required_certification_level]
+            evaluation.ranks = np.where(missing, np.minimum(evaluation.ranks, cap), evaluation.ranks)
+
+        distribution = evaluation.distribution()
+        changed = np.flatnonzero(evaluation.ranks != baseline.ranks)
+        results.append(ScenarioResult(
+            name=scenario.name,
+            scoring_model_version=model.version,
+            distribution=distribution,
+            shift={name: distribution[name] - baseline_distribution[name] for name in LEVEL_NAMES},
+            mean_score=evaluation.mean_score(),
+            changed_count=len(changed),
+            improved_count=int(np.count_nonzero(evaluation.ranks > baseline.ranks)),
+            worsened_count=int(np.count_nonzero(evaluation.ranks < baseline.ranks)),
+            changed_vendors=[
+                LevelChange(
+                    vendor_id=columns.vendor_ids[i],
+                    from_level=LEVEL_NAMES[baseline.ranks[i]],
+                    to_level=LEVEL_NAMES[evaluation.ranks[i]],
+                    from_score=int(baseline.scores[i]),
+                    to_score=int(evaluation.scores[i]),
+                )
+                for i in changed[:request.max_changed_vendors].tolist()
+            ],
+        ))
+
+    return SimulationResponse(
+        vendor_count=len(columns),
+        baseline_model_version=base_model.version,
+        baseline_distribution=baseline_distribution,
+        baseline_mean_score=baseline.mean_score(),
+        scenarios=results,
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+
+
+def _missing_required(model: CompiledModel, columns: batch_scoring.FactorColumns, required: List[str]) -> np.ndarray:
+    """Per vendor: True if any required catalog certification is absent"""
+    matched = [model.cert_matcher.match(cert) for cert in columns.certification_strings]
+    held = np.ones(len(columns.certification_lists), dtype=bool)
+    for name in set(required):
+        is_name = np.fromiter((m == name for m in matched), dtype=np.int64, count=len(matched))
+        held &= columns.per_list_sum(is_name) > 0
+    return ~held[columns.certification_codes]
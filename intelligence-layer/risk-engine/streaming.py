@@ -0,0 +1,153 @@
+"""
+Incremental row readers for streamed bulk scoring
+
+Request bodies are consumed chunk by chunk and split into rows without ever
+holding more than one row (bounded by MAX_ROW_BYTES) in memory.
+"""
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+
+MAX_ROW_BYTES = 1024 * 1024
+
+# CSV cells holding a list (compliance_certifications) use this separator
+CSV_LIST_SEPARATOR = ";"
+CSV_LIST_FIELDS = {"compliance_certifications"}
+
+
+class RowTooLarge(Exception):
+    """A single row exceeded MAX_ROW_BYTES"""
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator keeps reading the request body
+
+    Starlette's StreamingResponse watches for client disconnects by consuming
+    receive() itself, which would swallow request body chunks that are still
+    being read. Here the body iterator owns receive(), and a disconnect
+    surfaces as ClientDisconnect from request.stream().
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except ClientDisconnect:
+            return
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_bytes: int = MAX_ROW_BYTES) -> AsyncIterator[Any]:
+    """
+    Split a chunked byte stream into decoded lines
+
+    Yields str lines (without the line terminator), or a RowTooLarge instance
+    in place of a line that outgrew max_bytes; the rest of that line is skipped.
+    """
+    buffer = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_bytes:
+                        buffer.clear()
+                        oversized = True
+                break
+            if oversized:
+                oversized = False
+                yield RowTooLarge(f"Row exceeds {max_bytes} bytes")
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_bytes:
+                    yield RowTooLarge(f"Row exceeds {max_bytes} bytes")
+                else:
+                    yield buffer.rstrip(b"\r").decode("utf-8", errors="replace")
+            buffer.clear()
+            start = end + 1
+    if oversized:
+        yield RowTooLarge(f"Row exceeds {max_bytes} bytes")
+    elif buffer:
+        yield buffer.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[Any]) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Yield (row_number, data, error) for each non-blank NDJSON line"""
+    row = 0
+    async for line in lines:
+        row += 1
+        if isinstance(line, RowTooLarge):
+            yield row, None, str(line)
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield row, None, "Expected a JSON object"
+            continue
+        yield row, data, None
+
+
+async def iter_csv_rows(lines: AsyncIterator[Any]) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Yield (row_number, data, error) for each CSV record after the header
+
+    Quoted fields may span lines; physical lines are joined until quotes balance.
+    Empty cells are dropped so model defaults apply.
+    """
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    pending_size = 0
+    row = 0
+    async for line in lines:
+        if isinstance(line, RowTooLarge):
+            pending, pending_size = [], 0
+            if header is not None:
+                row += 1
+                yield row, None, str(line)
+            continue
+        pending.append(line)
+        pending_size += len(line)
+        if pending_size > MAX_ROW_BYTES:
+            pending, pending_size = [], 0
+            row += 1
+            yield row, None, f"Row exceeds {MAX_ROW_BYTES} bytes"
+            continue
+        record = "\n".join(pending)
+        if record.count('"') % 2:
+            continue
+        pending, pending_size = [], 0
+        if not record.strip():
+            continue
+        cells = next(csv.reader([record]))
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        row += 1
+        if len(cells) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(cells)}"
+            continue
+        data: Dict[str, Any] = {}
+        for name, cell in zip(header, cells):
+            cell = cell.strip()
+            if not cell:
+                continue
+            if name in CSV_LIST_FIELDS:
+                data[name] = [item.strip() for item in cell.split(CSV_LIST_SEPARATOR) if item.strip()]
+            else:
+                data[name] = cell
+        yield row, data, None
+    if pending:
+        row += 1
+        yield row, None, "Unterminated quoted field"
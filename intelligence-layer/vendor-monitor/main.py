@@ -0,0 +1,215 @@
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import asyncio
+import logging
+import os
+from grc_shared import instrumentation
+from grc_shared.portfolio_client import PortfolioIndexClient
+from grc_shared.risk_factors import VendorRiskFactors
+from scheduler import RISK_LEVELS, ReassessmentScheduler, RiskEngineClient, parse_intervals
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Risk engine the vendors are re-assessed by (OSINT enrichment, then scoring)
+RISK_ENGINE_URL = os.getenv("RISK_ENGINE_URL", "http://localhost:5002")
+
+# Dashboard portfolio index that new scores are pushed to; empty pushes nowhere
+PORTFOLIO_INDEX_URL = os.getenv("PORTFOLIO_INDEX_URL", "")
+
+# Global re-assessment budget: vendors per minute across all batches, and burst
+MONITOR_ASSESSMENTS_PER_MINUTE = float(os.getenv("MONITOR_ASSESSMENTS_PER_MINUTE", "60"))
+MONITOR_BURST = float(os.getenv("MONITOR_BURST", "100"))
+
+# Seconds between assessments of a stable vendor per risk level, e.g. "critical=1800,low=604800"
+MONITOR_INTERVALS = parse_intervals(os.getenv("MONITOR_INTERVALS", ""))
+
+# Request rates and latencies, batch timings and queue depth and lag for /metrics
+telemetry = instrumentation.ServiceMetrics("vendor-monitor")
+dispatch_lag = telemetry.histogram(
+    "grc_monitor_dispatch_lag_seconds",
+    "How long past its due time each vendor was dispatched",
+    buckets=(1.0, 10.0, 60.0, 300.0, 900.0, 3600.0, 4 * 3600.0, 12 * 3600.0, 86400.0, 3 * 86400.0),
+)
+
+scheduler = ReassessmentScheduler(
+    RiskEngineClient(
+        RISK_ENGINE_URL,
+        timeout=float(os.getenv("RISK_ENGINE_TIMEOUT", "300")),
+        max_connections=int(os.getenv("RISK_ENGINE_MAX_CONNECTIONS", "4")),
+    ),
+    intervals=MONITOR_INTERVALS,
+    rate=MONITOR_ASSESSMENTS_PER_MINUTE / 60,
+    burst=MONITOR_BURST,
+    batch_size=int(os.getenv("MONITOR_BATCH_SIZE", "100")),
+    max_in_flight=int(os.getenv("MONITOR_BATCHES_IN_FLIGHT", "2")),
+    enrich_concurrency=int(os.getenv("MONITOR_ENRICH_CONCURRENCY", "50")),
+    volatility_window=int(os.getenv("MONITOR_VOLATILITY_WINDOW", "5")),
+    volatility_scale=float(os.getenv("MONITOR_VOLATILITY_SCALE", "10")),
+    min_interval=float(os.getenv("MONITOR_MIN_INTERVAL", "300")),
+    retry_delay=float(os.getenv("MONITOR_RETRY_DELAY", "60")),
+    observe_stage=telemetry.observe_stage,
+    observe_lag=dispatch_lag.observe,
+    portfolio=PortfolioIndexClient(PORTFOLIO_INDEX_URL) if PORTFOLIO_INDEX_URL else None,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    dispatcher = asyncio.create_task(scheduler.run())
+    yield
+    dispatcher.cancel()
+    await asyncio.gather(dispatcher, return_exceptions=True)
+    await scheduler.risk_engine.aclose()
+    if scheduler.portfolio is not None:
+        await scheduler.portfolio.aclose()
+
+app = FastAPI(
+    title="Vendor Monitor",
+    description="Adaptive re-assessment of vendors by risk level and data staleness",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(instrumentation.MetricsMiddleware, metrics=telemetry)
+
+class MonitoredVendor(VendorRiskFactors):
+    """A vendor's risk factors, as scored by the risk engine, and optionally its last assessment"""
+    domain: str = Field(..., min_length=1, description="Domain re-enriched on every assessment")
+    risk_level: Optional[str] = Field(None, description=f"Level of the last assessment: {', '.join(RISK_LEVELS)}")
+    overall_risk_score: Optional[int] = Field(None, ge=0, le=100, description="Score of the last assessment")
+    last_assessed_at: Optional[datetime] = Field(None, description="When it was last assessed; without it the vendor is due now")
+
+class MonitoredVendorsRequest(BaseModel):
+    """Vendors to register or update"""
+    vendors: List[MonitoredVendor] = Field(..., min_length=1, max_length=100000)
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return {
+        "status": "healthy",
+        "service": "vendor-monitor",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.post("/api/vendors")
+async def register_vendors(request: MonitoredVendorsRequest):
+    """
+    Register vendors for monitoring, or update their factors
+
+    New vendors are due now unless their last assessment is given; a known
+    vendor whose factors changed is re-assessed as soon as the budget allows.
+    """
+    try:
+        added = 0
+        for vendor in request.vendors:
+            assessed_at = vendor.last_assessed_at
+            if assessed_at is not None and assessed_at.tzinfo is None:
+                assessed_at = assessed_at.replace(tzinfo=timezone.utc)
+            factors = vendor.model_dump(exclude={"risk_level", "overall_risk_score", "last_assessed_at"}, exclude_none=True)
+            added += scheduler.upsert(
+                factors,
+                vendor.risk_level,
+                assessed_at.timestamp() if assessed_at is not None else None,
+                vendor.overall_risk_score,
+            )
+        logger.info(f"Registered {len(request.vendors)} vendors ({added} new)")
+        return {"registered": len(request.vendors), "added": added, "vendors": len(scheduler.vendors)}
+
+    except Exception as e:
+        logger.error(f"Error registering vendors: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error registering vendors: {str(e)}")
+
+@app.get("/api/vendors/{vendor_id}")
+async def get_vendor(vendor_id: str):
+    """A vendor's risk level, recent scores, volatility and next due time"""
+    schedule = scheduler.vendor(vendor_id)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail=f"Vendor {vendor_id} is not monitored")
+    return schedule
+
+@app.delete("/api/vendors/{vendor_id}")
+async def remove_vendor(vendor_id: str):
+    """Stop monitoring a vendor"""
+    if not scheduler.remove(vendor_id):
+        raise HTTPException(status_code=404, detail=f"Vendor {vendor_id} is not monitored")
+    return {"vendor_id": vendor_id, "removed": True}
+
+@app.post("/api/vendors/{vendor_id}/reassess")
+async def reassess_vendor(vendor_id: str):
+    """Make a vendor due now; it is dispatched as soon as the budget allows"""
+    if not scheduler.reassess_now(vendor_id):
+        raise HTTPException(status_code=404, detail=f"Vendor {vendor_id} is not monitored")
+    return scheduler.vendor(vendor_id)
+
+@app.get("/api/schedule")
+async def get_schedule(limit: int = Query(20, ge=0, le=1000, description="Upcoming vendors to list")):
+    """Queue depth, lag, budget and the next vendors to be re-assessed"""
+    try:
+        return {
+            **scheduler.stats(),
+            "intervals_seconds": scheduler.intervals,
+            "upcoming": scheduler.upcoming(limit),
+        }
+
+    except Exception as e:
+        logger.error(f"Error reading the schedule: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error reading the schedule: {str(e)}")
+
+def collect_monitor_metrics() -> List[instrumentation.Family]:
+    """Queue depth and lag, vendors per level and assessment counters, read at scrape time"""
+    queue = scheduler.queue_stats()
+    client = scheduler.risk_engine.stats()
+    families = [
+        ("grc_monitor_queue_depth", "gauge", "Vendors waiting for their next assessment", [({}, queue["queue_depth"])]),
+        ("grc_monitor_due", "gauge", "Vendors past their due time and not yet dispatched", [({}, queue["due"])]),
+        ("grc_monitor_lag_seconds", "gauge", "How far past its due time the most overdue vendor is", [({}, queue["lag_seconds"])]),
+        ("grc_monitor_in_flight", "gauge", "Vendors being re-assessed", [({}, queue["in_flight"])]),
+        ("grc_monitor_vendors", "gauge", "Monitored vendors, by last risk level",
+         [({"risk_level": level}, count) for level, count in scheduler.level_counts().items()]),
+        ("grc_monitor_assessments_total", "counter", "Re-assessments finished, by result",
+         [({"result": "assessed"}, scheduler.assessed), ({"result": "failed"}, scheduler.failed)]),
+        ("grc_monitor_budget_tokens", "gauge", "Assessments the budget allows right now", [({}, scheduler.budget.refill())]),
+        ("grc_risk_engine_requests_total", "counter", "Requests made to the risk engine", [({}, client["requests"])]),
+        ("grc_risk_engine_errors_total", "counter", "Failed requests to the risk engine", [({}, client["errors"])]),
+    ]
+    if scheduler.portfolio is not None:
+        portfolio = scheduler.portfolio.stats()
+        families += [
+            ("grc_portfolio_index_vendors_pushed_total", "counter", "Vendor scores sent to the portfolio index",
+             [({}, portfolio["vendors_pushed"])]),
+            ("grc_portfolio_index_errors_total", "counter", "Failed updates of the portfolio index", [({}, portfolio["errors"])]),
+        ]
+    return families
+
+telemetry.collect(collect_monitor_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, batch, queue and lag metrics in the Prometheus text format"""
+    return PlainTextResponse(telemetry.render(), media_type=instrumentation.CONTENT_TYPE)
+
+@app.get("/")
+async def root():
+    """Root endpoint"""
+    return {
+        "service": "Vendor Monitor",
+        "version": "1.0.0",
+        "endpoints": [
+            "/health",
+            "/api/vendors",
+            "/api/vendors/{vendor_id}",
+            "/api/vendors/{vendor_id}/reassess",
+            "/api/schedule",
+            "/metrics",
+            "/docs"
+        ]
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=5005)
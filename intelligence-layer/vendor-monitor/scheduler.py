@@ -0,0 +1,512 @@
+"""
+Adaptive re-assessment scheduling
+
+Every registered vendor has a due time, and vendors wait in a heap ordered by
+it (earliest deadline first, ties to the higher risk level). After an
+assessment the vendor is due again after the interval for its risk level,
+shortened by its score volatility - the mean change between its recent
+scores - as interval / (1 + volatility / volatility_scale). Re-enriching
+before the OSINT service's cached WHOIS/DNS/TLS lookups expire would only
+return the same data, so the due time is pushed back to the first of those
+expiries, though never past max_staleness after the assessment.
+
+Due vendors are dispatched in batches through the risk engine's
+/api/assess/batch (OSINT enrichment, then scoring), within a token-bucket
+budget of assessments per second shared by all batches. Each result
+reschedules its vendor; a failed vendor is retried after a delay that doubles
+up to its level's interval.
+
+With a portfolio index client, each batch's new scores are pushed to the
+dashboard's portfolio index with one POST /api/portfolio/vendors. Scores the
+index did not take are kept, one per vendor, and sent with the next batch's;
+the index's failures never fail an assessment.
+
+Updating or removing a vendor leaves its old heap entry behind, marked stale
+by a version number; the heap is rebuilt once stale entries outnumber live
+ones.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from grc_shared.portfolio_client import PortfolioIndexClient, PortfolioIndexUnavailable, portfolio_vendor
+
+logger = logging.getLogger(__name__)
+
+RISK_LEVELS = ("critical", "high", "medium", "low", "minimal")
+# Seconds between assessments of a stable vendor, per risk level
+DEFAULT_INTERVALS = {
+    "critical": 3600.0,
+    "high": 6 * 3600.0,
+    "medium": 24 * 3600.0,
+    "low": 3 * 24 * 3600.0,
+    "minimal": 7 * 24 * 3600.0,
+}
+
+# (due_at, level rank, sequence, version, vendor_id)
+HeapEntry = Tuple[float, int, int, int, str]
+
+
+def parse_intervals(spec: str) -> Dict[str, float]:
+    """Parse "critical=1800,low=604800" into DEFAULT_INTERVALS with those levels replaced"""
+    intervals = dict(DEFAULT_INTERVALS)
+    for item in spec.split(","):
+        if "=" in item:
+            level, seconds = item.split("=", 1)
+            level = level.strip().lower()
+            if level not in intervals:
+                raise ValueError(f"Unknown risk level in intervals: {level}")
+            intervals[level] = float(seconds)
+    return intervals
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds for a naive UTC ISO timestamp, as the services send them"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+class RiskEngineUnavailable(Exception):
+    """The risk engine could not be reached or answered with an error"""
+
+
+class RiskEngineClient:
+    """Pooled keep-alive HTTP client for the risk engine's assessment pipeline"""
+
+    def __init__(self, base_url: str, timeout: float = 300.0, max_connections: int = 4, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self.requests = 0
+        self.errors = 0
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def assess(self, vendors: List[Dict[str, Any]], concurrency: int) -> List[Dict[str, Any]]:
+        """AssessmentResponse dicts from /api/assess/batch, in completion order"""
+        self.requests += 1
+        try:
+            async with self.client.stream(
+                "POST", "/api/assess/batch", json={"vendors": vendors, "concurrency": concurrency}
+            ) as response:
+                response.raise_for_status()
+                return [json.loads(line) async for line in response.aiter_lines() if line]
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise RiskEngineUnavailable(f"Risk engine assessment failed: {str(e)}") from e
+
+    def stats(self) -> Dict[str, Any]:
+        return {"risk_engine_url": self.base_url, "requests": self.requests, "errors": self.errors}
+
+
+class Budget:
+    """Token bucket of `rate` assessments per second up to `burst`; take() never waits"""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def refill(self) -> float:
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def take(self, wanted: int) -> int:
+        """Up to wanted whole tokens, as many as are available"""
+        taken = min(wanted, int(self.refill()))
+        self.tokens -= taken
+        return taken
+
+
+class VendorSchedule:
+    """A vendor's factors, assessment history and next due time"""
+    __slots__ = (
+        "factors", "risk_level", "score", "scores", "assessed_at", "cache_expires_at",
+        "due_at", "version", "in_flight", "changed", "failures", "last_error",
+    )
+
+    def __init__(self, factors: Dict[str, Any], window: int):
+        self.factors = factors
+        self.risk_level: Optional[str] = None
+        self.score: Optional[int] = None
+        self.scores: Deque[int] = deque(maxlen=window)
+        self.assessed_at: Optional[float] = None
+        self.cache_expires_at: Optional[float] = None
+        self.due_at = 0.0
+        self.version = 0
+        self.in_flight = False
+        # Factors updated while an assessment was in flight
+        self.changed = False
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def volatility(self) -> float:
+        """Mean absolute change between consecutive recent scores"""
+        scores = self.scores
+        if len(scores) < 2:
+            return 0.0
+        return sum(abs(scores[i] - scores[i - 1]) for i in range(1, len(scores))) / (len(scores) - 1)
+
+
+class ReassessmentScheduler:
+    """Keeps registered vendors in due-time order and re-assesses them within a budget"""
+
+    def __init__(
+        self,
+        risk_engine: RiskEngineClient,
+        intervals: Optional[Dict[str, float]] = None,
+        rate: float = 1.0,
+        burst: Optional[float] = None,
+        batch_size: int = 500,
+        max_in_flight: int = 2,
+        enrich_concurrency: int = 50,
+        volatility_window: int = 5,
+        volatility_scale: float = 10.0,
+        min_interval: float = 300.0,
+        max_staleness: Optional[float] = None,
+        retry_delay: float = 60.0,
+        tick: float = 1.0,
+        clock: Callable[[], float] = time.time,
+        observe_stage=None,
+        observe_lag=None,
+        portfolio: Optional[PortfolioIndexClient] = None,
+    ):
+        self.risk_engine = risk_engine
+        self.portfolio = portfolio
+        self.intervals = intervals or dict(DEFAULT_INTERVALS)
+        self.rank = {level: i for i, level in enumerate(RISK_LEVELS)}
+        self.budget = Budget(rate, burst if burst is not None else max(1.0, float(batch_size)), clock)
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.enrich_concurrency = enrich_concurrency
+        self.volatility_window = volatility_window
+        self.volatility_scale = volatility_scale
+        self.min_interval = min_interval
+        self.max_staleness = max_staleness if max_staleness is not None else 2 * max(self.intervals.values())
+        self.retry_delay = retry_delay
+        self.tick = tick
+        self.clock = clock
+        self.observe_stage = observe_stage or (lambda stage, seconds: None)
+        self.observe_lag = observe_lag or (lambda seconds: None)
+        self.vendors: Dict[str, VendorSchedule] = {}
+        self.heap: List[HeapEntry] = []
+        self.sequence = 0
+        self.batches: "set[asyncio.Task]" = set()
+        self.in_flight = 0
+        self.assessed = 0
+        self.failed = 0
+        # Portfolio index entries not pushed yet, by vendor id
+        self.unpushed: Dict[str, Dict[str, Any]] = {}
+        self._wake = asyncio.Event()
+
+    # Registration
+
+    def upsert(self, vendor: Dict[str, Any], risk_level: Optional[str] = None, assessed_at: Optional[float] = None, score: Optional[int] = None) -> bool:
+        """
+        Register a vendor, or update its factors; True if it was new
+
+        A new vendor is due now unless its last assessment (risk_level and
+        assessed_at) is given. Changed factors make a known vendor due now.
+        """
+        vendor_id = vendor["vendor_id"]
+        now = self.clock()
+        schedule = self.vendors.get(vendor_id)
+        if schedule is not None:
+            if schedule.factors == vendor:
+                return False
+            schedule.factors = vendor
+            if schedule.in_flight:
+                schedule.changed = True
+            else:
+                self._push(schedule, now)
+                self._wake.set()
+            return False
+
+        schedule = self.vendors[vendor_id] = VendorSchedule(vendor, self.volatility_window)
+        if risk_level in self.rank and assessed_at is not None:
+            schedule.risk_level = risk_level
+            schedule.assessed_at = assessed_at
+            if score is not None:
+                schedule.score = score
+                schedule.scores.append(score)
+            self._push(schedule, self.next_due(schedule))
+        else:
+            self._push(schedule, now)
+            self._wake.set()
+        return True
+
+    def remove(self, vendor_id: str) -> bool:
+        schedule = self.vendors.pop(vendor_id, None)
+        if schedule is None:
+            return False
+        self.unpushed.pop(vendor_id, None)
+        # Its heap entry is now stale
+        schedule.version += 1
+        self._compact()
+        return True
+
+    def reassess_now(self, vendor_id: str) -> bool:
+        """Make a vendor due now; False if it is not registered"""
+        schedule = self.vendors.get(vendor_id)
+        if schedule is None:
+            return False
+        if schedule.in_flight:
+            schedule.changed = True
+        else:
+            self._push(schedule, self.clock())
+        self._wake.set()
+        return True
+
+    # Due times
+
+    def interval(self, schedule: VendorSchedule) -> float:
+        """Seconds between assessments for the vendor's level and volatility"""
+        base = self.intervals.get(schedule.risk_level, min(self.intervals.values()))
+        return max(self.min_interval, base / (1 + schedule.volatility() / self.volatility_scale))
+
+    def next_due(self, schedule: VendorSchedule) -> float:
+        due = schedule.assessed_at + self.interval(schedule)
+        if schedule.cache_expires_at is not None and schedule.cache_expires_at > due:
+            due = min(schedule.cache_expires_at, schedule.assessed_at + self.max_staleness)
+        return due
+
+    def _push(self, schedule: VendorSchedule, due_at: float) -> None:
+        schedule.version += 1
+        schedule.due_at = due_at
+        self.sequence += 1
+        rank = self.rank.get(schedule.risk_level, len(RISK_LEVELS))
+        heapq.heappush(self.heap, (due_at, rank, self.sequence, schedule.version, schedule.factors["vendor_id"]))
+        self._compact()
+
+    def _live(self, entry: HeapEntry) -> bool:
+        schedule = self.vendors.get(entry[4])
+        return schedule is not None and schedule.version == entry[3] and not schedule.in_flight
+
+    def _compact(self) -> None:
+        if len(self.heap) > 2 * len(self.vendors) + 64:
+            self.heap = [entry for entry in self.heap if self._live(entry)]
+            heapq.heapify(self.heap)
+
+    def _pop_due(self, now: float, limit: int) -> List[VendorSchedule]:
+        due = []
+        heap = self.heap
+        while heap and len(due) < limit:
+            entry = heap[0]
+            if not self._live(entry):
+                heapq.heappop(heap)
+                continue
+            if entry[0] > now:
+                break
+            heapq.heappop(heap)
+            schedule = self.vendors[entry[4]]
+            schedule.in_flight = True
+            self.observe_lag(now - entry[0])
+            due.append(schedule)
+        return due
+
+    def _peek(self) -> Optional[HeapEntry]:
+        heap = self.heap
+        while heap and not self._live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    # Dispatch
+
+    async def run(self) -> None:
+        """Dispatch due vendors until cancelled"""
+        try:
+            while True:
+                self.dispatch()
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.tick)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in self.batches:
+                task.cancel()
+            await asyncio.gather(*self.batches, return_exceptions=True)
+
+    def dispatch(self) -> int:
+        """Start batches of due vendors while the budget and batch slots allow; returns vendors started"""
+        started = 0
+        now = self.clock()
+        while len(self.batches) < self.max_in_flight:
+            entry = self._peek()
+            if entry is None or entry[0] > now:
+                break
+            tokens = self.budget.take(self.batch_size)
+            if not tokens:
+                break
+            batch = self._pop_due(now, tokens)
+            # Tokens for vendors that turned out not to be due go back
+            self.budget.tokens += tokens - len(batch)
+            if not batch:
+                break
+            task = asyncio.create_task(self.assess_batch(batch))
+            self.batches.add(task)
+            task.add_done_callback(self._batch_done)
+            started += len(batch)
+        return started
+
+    def _batch_done(self, task: asyncio.Task) -> None:
+        self.batches.discard(task)
+        # A slot is free: dispatch again without waiting for the tick
+        self._wake.set()
+
+    async def assess_batch(self, batch: List[VendorSchedule]) -> None:
+        self.in_flight += len(batch)
+        start = time.perf_counter()
+        results: Dict[str, Dict[str, Any]] = {}
+        error = None
+        try:
+            for assessment in await self.risk_engine.assess([schedule.factors for schedule in batch], self.enrich_concurrency):
+                results[assessment["vendor_id"]] = assessment
+        except RiskEngineUnavailable as e:
+            logger.error(str(e))
+            error = str(e)
+        finally:
+            self.in_flight -= len(batch)
+            self.observe_stage("monitor_assess_batch", time.perf_counter() - start)
+        now = self.clock()
+        for schedule in batch:
+            assessment = results.get(schedule.factors["vendor_id"])
+            if assessment is None:
+                self.apply(schedule, None, error or "No result from the risk engine", now)
+            else:
+                self.apply(schedule, assessment["risk"], assessment["error"], now, assessment.get("enrichment"))
+        await self.push_portfolio()
+
+    def apply(self, schedule: VendorSchedule, risk: Optional[Dict[str, Any]], error: Optional[str], now: float, enrichment: Optional[Dict[str, Any]] = None) -> None:
+        """Record an assessment result (or failure) and reschedule the vendor"""
+        schedule.in_flight = False
+        if self.vendors.get(schedule.factors["vendor_id"]) is not schedule:
+            # Removed while in flight
+            return
+        if risk is None:
+            self.failed += 1
+            schedule.failures += 1
+            schedule.last_error = error
+            retry = min(self.retry_delay * 2 ** (schedule.failures - 1), self.interval(schedule))
+            self._push(schedule, now if schedule.changed else now + retry)
+            schedule.changed = False
+            return
+        self.assessed += 1
+        schedule.failures = 0
+        schedule.last_error = None
+        schedule.risk_level = risk["risk_level"]
+        schedule.score = risk["overall_risk_score"]
+        schedule.scores.append(schedule.score)
+        schedule.assessed_at = now
+        schedule.cache_expires_at = parse_timestamp((enrichment or {}).get("cache_expires_at"))
+        self._push(schedule, now if schedule.changed else self.next_due(schedule))
+        schedule.changed = False
+        if self.portfolio is not None:
+            # No name: the index keeps the one it has
+            vendor_id = schedule.factors["vendor_id"]
+            self.unpushed[vendor_id] = portfolio_vendor(
+                vendor_id, None, schedule.factors["domain"], schedule.score, schedule.risk_level, risk["calculated_at"],
+            )
+
+    async def push_portfolio(self) -> None:
+        """Send the scores applied since the last push to the portfolio index"""
+        if self.portfolio is None or not self.unpushed:
+            return
+        vendors, self.unpushed = self.unpushed, {}
+        try:
+            await self.portfolio.upsert(list(vendors.values()))
+        except PortfolioIndexUnavailable as e:
+            logger.warning(f"Portfolio index update skipped, retrying with the next batch: {str(e)}")
+            # Scores applied meanwhile are newer than these
+            self.unpushed = {**vendors, **self.unpushed}
+
+    # Reporting
+
+    def queue_stats(self) -> Dict[str, Any]:
+        """Queue depth, vendors due now and how overdue the most overdue one is"""
+        now = self.clock()
+        waiting = due = 0
+        oldest: Optional[float] = None
+        for schedule in self.vendors.values():
+            if schedule.in_flight:
+                continue
+            waiting += 1
+            if schedule.due_at <= now:
+                due += 1
+                if oldest is None or schedule.due_at < oldest:
+                    oldest = schedule.due_at
+        return {
+            "vendors": len(self.vendors),
+            "queue_depth": waiting,
+            "due": due,
+            "in_flight": self.in_flight,
+            "lag_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+        }
+
+    def level_counts(self) -> Dict[str, int]:
+        counts = {level: 0 for level in (*RISK_LEVELS, "unassessed")}
+        for schedule in self.vendors.values():
+            counts[schedule.risk_level or "unassessed"] += 1
+        return counts
+
+    def vendor(self, vendor_id: str) -> Optional[Dict[str, Any]]:
+        schedule = self.vendors.get(vendor_id)
+        if schedule is None:
+            return None
+        return {
+            "vendor_id": vendor_id,
+            "domain": schedule.factors.get("domain"),
+            "risk_level": schedule.risk_level,
+            "overall_risk_score": schedule.score,
+            "recent_scores": list(schedule.scores),
+            "volatility": round(schedule.volatility(), 2),
+            "interval_seconds": round(self.interval(schedule), 1),
+            "assessed_at": timestamp(schedule.assessed_at),
+            "cache_expires_at": timestamp(schedule.cache_expires_at),
+            "due_at": timestamp(schedule.due_at),
+            "in_flight": schedule.in_flight,
+            "failures": schedule.failures,
+            "last_error": schedule.last_error,
+        }
+
+    def upcoming(self, limit: int) -> List[Dict[str, Any]]:
+        """The next vendors to be dispatched, in order"""
+        entries = heapq.nsmallest(limit, (entry for entry in self.heap if self._live(entry)))
+        return [self.vendor(entry[4]) for entry in entries]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.queue_stats(),
+            "by_level": self.level_counts(),
+            "assessed": self.assessed,
+            "failed": self.failed,
+            "budget_per_second": self.budget.rate,
+            "budget_tokens": round(self.budget.refill(), 2),
+            "batches_in_flight": len(self.batches),
+            "risk_engine": self.risk_engine.stats(),
+            "portfolio_index": self.portfolio.stats() if self.portfolio is not None else None,
+        }
+
+
+def timestamp(value: Optional[float]) -> Optional[str]:
+    """Naive UTC ISO timestamp, as the services report them"""
+    if value is None:
+        return None
+    return datetime.utcfromtimestamp(value).isoformat()
@@ -0,0 +1,56 @@
+"""
+Shared setup for the service tests
+
+Puts the repository root (for grc_shared) and each service's directory on
+sys.path, so tests import a service's modules by their plain names, as the
+service itself does. Every service has its own main.py: load_service imports
+one under a name of its own. Run from the repository root:
+
+    python -m pytest tests
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = {
+    "osint": "intelligence-layer/osint-service",
+    "risk_engine": "intelligence-layer/risk-engine",
+    "vendor_monitor": "intelligence-layer/vendor-monitor",
+    "eramba_sync": "intelligence-layer/eramba-sync",
+    "reports": "experience-layer/reports",
+    "portfolio_index": "experience-layer/portfolio-index",
+}
+
+sys.path.insert(0, ROOT)
+for directory in SERVICES.values():
+    sys.path.insert(0, os.path.join(ROOT, directory))
+
+# No score history and no report cache in the source tree while testing
+os.environ["SCORE_HISTORY_URL"] = ""
+os.environ.setdefault("REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "grc-report-cache-tests"))
+
+_loaded = {}
+
+
+def load_service(service: str, **environment: str):
+    """A service's main.py, imported once per service and environment under its own module name"""
+    key = (service, tuple(sorted(environment.items())))
+    if key not in _loaded:
+        saved = {name: os.environ.get(name) for name in environment}
+        os.environ.update(environment)
+        try:
+            name = f"{service}_main_{len(_loaded)}"
+            spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, SERVICES[service], "main.py"))
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            spec.loader.exec_module(module)
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        _loaded[key] = module
+    return _loaded[key]
@@ -0,0 +1,147 @@
+"""TlsCollector's status for each combination of handshake outcomes, and how long it is cached"""
+import asyncio
+import ssl
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.x509.oid import NameOID
+
+from tls_collector import DETERMINED, TlsCollector, cache_ttl
+
+DAY = 86400
+
+
+def certificate(days_left: float) -> bytes:
+    """DER of a self-signed certificate for vendor.example.com expiring days_left from now"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "vendor.example.com")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=365))
+        .not_valid_after(now + timedelta(days=days_left))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("vendor.example.com")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    return cert.public_bytes(Encoding.DER)
+
+
+VALID_CERT = certificate(90)
+EXPIRED_CERT = certificate(-3)
+
+
+def verification_error(message: str) -> ssl.SSLCertVerificationError:
+    error = ssl.SSLCertVerificationError(1, f"[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed: {message}")
+    error.verify_message = message
+    return error
+
+
+class FakeCollector(TlsCollector):
+    """Answers each handshake from a table: the verified one, then the TLS 1.2 and 1.3 probes"""
+
+    def __init__(self, verified, tls12, tls13):
+        super().__init__()
+        self.outcomes = {
+            id(self.verified_context): verified,
+            id(self.probe_contexts["TLSv1.2"]): tls12,
+            id(self.probe_contexts["TLSv1.3"]): tls13,
+        }
+
+    async def _handshake(self, host, port, server_hostname, context):
+        outcome = self.outcomes[id(context)]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def inspect(verified, tls12, tls13):
+    return asyncio.run(FakeCollector(verified, tls12, tls13).inspect("vendor.example.com"))
+
+
+def handshake(cert: bytes, version: str = "TLSv1.3"):
+    return cert, version, "TLS_AES_256_GCM_SHA384"
+
+
+def test_verified_handshake_is_valid():
+    info = inspect(handshake(VALID_CERT), handshake(VALID_CERT, "TLSv1.2"), handshake(VALID_CERT))
+    assert (info["status"], info["has_ssl"], info["chain_valid"], info["verify_error"]) == ("valid", True, True, None)
+    assert info["protocol_versions"] == ["TLSv1.2", "TLSv1.3"]
+    assert info["subject_alt_names"] == ["vendor.example.com"] and info["days_remaining"] in (89, 90)
+
+
+@pytest.mark.parametrize("cert, status", [(VALID_CERT, "invalid"), (EXPIRED_CERT, "expired")])
+def test_failed_verification_with_a_probe_certificate(cert, status):
+    info = inspect(verification_error("self-signed certificate"), ssl.SSLError("no protocols"), handshake(cert))
+    assert (info["status"], info["has_ssl"], info["chain_valid"]) == (status, False, False)
+    assert info["verify_error"] == "self-signed certificate"
+    assert info["protocol_versions"] == ["TLSv1.3"]
+
+
+@pytest.mark.parametrize("error", [
+    asyncio.TimeoutError(), ConnectionResetError(104, "Connection reset by peer"), ConnectionAbortedError(), OSError("boom"),
+])
+def test_verified_handshake_failing_for_another_reason_is_inconclusive(error):
+    info = inspect(error, handshake(VALID_CERT, "TLSv1.2"), handshake(VALID_CERT))
+    assert (info["status"], info["has_ssl"], info["chain_valid"]) == ("inconclusive", None, None)
+    assert info["verify_error"]
+    assert info["issuer"] == "CN=vendor.example.com"
+
+
+@pytest.mark.parametrize("error, status, has_ssl", [
+    (ConnectionRefusedError(), "no_tls", False),
+    (ssl.SSLError("wrong version number"), "handshake_failed", False),
+    (asyncio.IncompleteReadError(b"", 5), "handshake_failed", False),
+    (asyncio.TimeoutError(), "timeout", None),
+    (ConnectionAbortedError(), "timeout", None),
+    (ConnectionResetError(104, "Connection reset by peer"), "reset", None),
+    (OSError("Network is unreachable"), "error", None),
+])
+def test_no_handshake_completed(error, status, has_ssl):
+    info = inspect(error, error, error)
+    assert (info["status"], info["has_ssl"]) == (status, has_ssl)
+    assert info["error"] and "chain_valid" not in info
+
+
+def test_determined_statuses_are_exactly_those_with_has_ssl():
+    outcomes = [
+        inspect(handshake(VALID_CERT), handshake(VALID_CERT), handshake(VALID_CERT)),
+        inspect(verification_error("expired"), handshake(EXPIRED_CERT), handshake(EXPIRED_CERT)),
+        inspect(asyncio.TimeoutError(), handshake(VALID_CERT), handshake(VALID_CERT)),
+        inspect(ConnectionResetError(), ConnectionResetError(), ConnectionResetError()),
+        inspect(ConnectionRefusedError(), ConnectionRefusedError(), ConnectionRefusedError()),
+    ]
+    for info in outcomes:
+        assert (info["status"] in DETERMINED) == (info["has_ssl"] is not None)
+
+
+def valid_until(days: float):
+    return {"status": "valid", "not_after": (datetime.utcnow() + timedelta(days=days)).isoformat()}
+
+
+@pytest.mark.parametrize("info, expected", [
+    (valid_until(365), 7 * DAY),
+    (valid_until(3), 2 * DAY),
+    (valid_until(0.5), 600),
+    ({"status": "invalid"}, 600),
+    ({"status": "expired"}, 600),
+    ({"status": "no_tls"}, 600),
+    ({"status": "handshake_failed"}, 600),
+    ({"status": "inconclusive"}, None),
+    ({"status": "reset"}, None),
+    ({"status": "timeout"}, None),
+    ({"status": "error"}, None),
+])
+def test_cache_ttl(info, expected):
+    ttl = cache_ttl(info, max_ttl=7 * DAY, expiry_margin=DAY, recheck_ttl=600)
+    if expected is None:
+        assert ttl is None
+    else:
+        assert ttl == pytest.approx(expected, abs=5)
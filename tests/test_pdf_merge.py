@@ -0,0 +1,66 @@
+"""merge_pdfs concatenates report sections one at a time"""
+import os
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from pdf_merge import merge_pdfs
+
+
+def write_section(path: str, section: int, pages: int, outline: bool = False) -> None:
+    """A PDF whose pages share one font object and each say which section and page they are"""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for number in range(pages):
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Resources")] = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td (section {section} page {number}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content.flate_encode())
+    if outline:
+        title = writer.add_outline_item("Report", 0)
+        writer.add_outline_item("Summary", 0, parent=title)
+        writer.add_outline_item("Vendors", pages - 1, parent=title)
+    writer.add_metadata({"/Title": f"Section {section}"})
+    writer.write(path)
+
+
+def test_pages_outline_and_metadata_survive_the_merge(tmp_path):
+    paths = [str(tmp_path / f"section-{section}.pdf") for section in range(3)]
+    for section, path in enumerate(paths):
+        write_section(path, section, pages=4, outline=section == 0)
+    out_path = str(tmp_path / "report.pdf")
+
+    merge_pdfs(paths, out_path)
+
+    report = PdfReader(out_path, strict=True)
+    assert [page.extract_text() for page in report.pages] == [
+        f"section {section} page {number}" for section in range(3) for number in range(4)
+    ]
+    assert all(page["/Parent"] == report.trailer["/Root"]["/Pages"] for page in report.pages)
+    title, children = report.outline
+    assert title.title == "Report" and [item.title for item in children] == ["Summary", "Vendors"]
+    assert report.get_destination_page_number(children[1]) == 3
+    assert report.metadata.title == "Section 0"
+
+
+def test_shared_objects_are_copied_once_per_section(tmp_path):
+    paths = [str(tmp_path / f"section-{section}.pdf") for section in range(2)]
+    for section, path in enumerate(paths):
+        write_section(path, section, pages=5)
+    out_path = str(tmp_path / "report.pdf")
+
+    merge_pdfs(paths, out_path)
+
+    fonts = {page["/Resources"]["/Font"].raw_get("/F1").idnum for page in PdfReader(out_path).pages}
+    assert len(fonts) == 2
+
+
+def test_no_sections_is_an_empty_document(tmp_path):
+    out_path = str(tmp_path / "report.pdf")
+    merge_pdfs([], out_path)
+    assert os.path.getsize(out_path) > 0 and len(PdfReader(out_path).pages) == 0
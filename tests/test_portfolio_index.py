@@ -0,0 +1,146 @@
+"""PortfolioIndex: upserts, removals and pages agree with a plain scan of the vendors"""
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from portfolio_index import RISK_LEVELS, PortfolioIndex
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def score(vendor_id: str, risk_score: int, level: str = "medium", day: int = 1, **fields):
+    return {"vendor_id": vendor_id, "risk_score": risk_score, "risk_level": level,
+            "last_assessment": f"2026-01-{day:02d}T00:00:00", **fields}
+
+
+def expected_keys(index: PortfolioIndex, level=None):
+    """(score, vendor_id) of every vendor, by scanning the rows"""
+    return sorted(
+        (vendor["risk_score"], vendor["vendor_id"])
+        for vendor in map(index.vendor, index.rows)
+        if level is None or vendor["risk_level"] == level
+    )
+
+
+def assert_consistent(index: PortfolioIndex) -> None:
+    vendors = [index.vendor(vendor_id) for vendor_id in index.rows]
+    assert index.by_score == expected_keys(index)
+    for level in RISK_LEVELS:
+        assert index.by_level_score[index.level_index[level]] == expected_keys(index, level)
+    summary = index.summary()
+    assert summary["total_vendors"] == len(vendors)
+    assert summary["risk_levels"] == {level: sum(v["risk_level"] == level for v in vendors) for level in RISK_LEVELS}
+    assert sum(bucket["count"] for bucket in index.histogram(7)) == len(vendors)
+
+
+def test_upsert_adds_updates_and_keeps_unsent_fields():
+    index = PortfolioIndex(clock=Clock())
+    assert index.upsert([score("V1", 40, vendor_name="Acme", domain="acme.com")]) == \
+        {"added": 1, "updated": 0, "unchanged": 0, "stale": 0}
+    assert index.upsert([score("V1", 70, "low", day=2)])["updated"] == 1
+    assert index.vendor("V1") == {
+        "vendor_id": "V1", "vendor_name": "Acme", "domain": "acme.com", "risk_score": 70, "risk_level": "low",
+        "last_assessment": "2026-01-02T00:00:00.000", "updated_at": index.vendor("V1")["updated_at"],
+    }
+    assert_consistent(index)
+
+
+def test_stale_and_unchanged_rows_leave_the_version():
+    index = PortfolioIndex(clock=Clock())
+    index.upsert([score("V1", 40, day=5)])
+    version = index.version
+    assert index.upsert([score("V1", 90, "minimal", day=4)])["stale"] == 1
+    assert index.upsert([score("V1", 40, day=5)])["unchanged"] == 1
+    assert index.version == version and index.vendor("V1")["risk_score"] == 40
+
+
+def test_remove_moves_the_last_row_into_the_hole():
+    index = PortfolioIndex(clock=Clock())
+    index.upsert([score(f"V{number}", number, RISK_LEVELS[number % 5]) for number in range(5)])
+    assert index.remove("V1")
+    assert not index.remove("V1")
+    assert index.rows["V4"] == 1 and index.vendor("V1") is None
+    assert [v["vendor_id"] for v in index.page(limit=10)["vendors"]] == ["V0", "V2", "V3", "V4"]
+    assert_consistent(index)
+
+
+def test_replace_drops_vendors_not_sent():
+    index = PortfolioIndex(clock=Clock())
+    index.upsert([score("V1", 10), score("V2", 20)])
+    index.replace([score("V3", 30)])
+    assert list(index.rows) == ["V3"]
+    assert_consistent(index)
+
+
+@pytest.mark.parametrize("count", [10, 3000])
+def test_small_and_rebuilding_batches_index_alike(count):
+    vendors = [score(f"V{number}", number % 101, RISK_LEVELS[number % 5]) for number in range(count)]
+    index = PortfolioIndex(clock=Clock())
+    index.upsert(vendors)
+    assert_consistent(index)
+
+
+operations = st.lists(
+    st.one_of(
+        st.tuples(st.just("upsert"), st.integers(0, 30), st.integers(0, 100), st.sampled_from(RISK_LEVELS), st.integers(1, 28)),
+        st.tuples(st.just("remove"), st.integers(0, 30)),
+    ),
+    max_size=80,
+)
+
+
+@settings(max_examples=200, deadline=None)
+@given(operations=operations)
+def test_random_upserts_and_removals_stay_consistent(operations):
+    index = PortfolioIndex(clock=Clock())
+    for operation in operations:
+        if operation[0] == "upsert":
+            _, number, risk_score, level, day = operation
+            index.upsert([score(f"V{number}", risk_score, level, day)])
+        else:
+            index.remove(f"V{operation[1]}")
+    assert_consistent(index)
+
+
+@settings(max_examples=100, deadline=None)
+@given(
+    scores=st.lists(st.integers(0, 100), max_size=60),
+    level=st.none() | st.sampled_from(RISK_LEVELS),
+    descending=st.booleans(),
+    limit=st.integers(1, 15),
+    offset=st.integers(0, 70),
+)
+def test_walking_pages_visits_every_vendor_once_in_order(scores, level, descending, limit, offset):
+    index = PortfolioIndex(clock=Clock())
+    index.upsert([score(f"V{number}", value, RISK_LEVELS[number % 5]) for number, value in enumerate(scores)])
+    expected = expected_keys(index, level)
+    if descending:
+        expected.reverse()
+
+    walked, after = [], None
+    while True:
+        page = index.page(level=level, descending=descending, limit=limit, after=after)
+        assert page["total"] == len(expected)
+        walked += [(v["risk_score"], v["vendor_id"]) for v in page["vendors"]]
+        if page["next_after"] is None:
+            break
+        after = (page["next_after"]["score"], page["next_after"]["vendor_id"])
+    assert walked == expected
+
+    page = index.page(level=level, descending=descending, limit=limit, offset=offset)
+    assert [(v["risk_score"], v["vendor_id"]) for v in page["vendors"]] == expected[offset:offset + limit]
+
+
+def test_page_continues_after_a_removed_vendor():
+    index = PortfolioIndex(clock=Clock())
+    index.upsert([score(f"V{number}", number * 10) for number in range(6)])
+    first = index.page(limit=2)
+    index.remove("V1")
+    after = (first["next_after"]["score"], first["next_after"]["vendor_id"])
+    assert [v["vendor_id"] for v in index.page(limit=2, after=after)["vendors"]] == ["V2", "V3"]
@@ -0,0 +1,113 @@
+"""The column-wise batch kernels score exactly as the per-vendor path does"""
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from conftest import load_service
+
+import batch_scoring
+from scoring_model import CompiledModel, ScoringModelConfig
+
+CERTIFICATIONS = [
+    "ISO27001", "ISO/IEC 27001:2022", "SOC2", "SOC 2 Type II", "PCI-DSS", "HIPAA", "FedRAMP Moderate",
+    "HITRUST CSF", "NIST SP 800-53", "ISO 27017", "made-up cert", "",
+]
+
+optional_count = st.none() | st.integers(min_value=0, max_value=10 ** 7)
+optional_percent = st.none() | st.integers(min_value=0, max_value=100)
+factors = st.fixed_dictionaries(
+    {"vendor_id": st.text(min_size=1, max_size=8), "domain": st.just("vendor.example.com")},
+    optional={
+        "company_age_years": optional_count,
+        "employee_count": optional_count,
+        "has_ssl": st.booleans(),
+        "breach_count": st.integers(min_value=0, max_value=10 ** 7),
+        "cve_count": st.integers(min_value=0, max_value=10 ** 7),
+        "compliance_certifications": st.lists(st.sampled_from(CERTIFICATIONS), max_size=6),
+        "domain_reputation_score": optional_percent,
+        "financial_health_score": optional_percent,
+        "incident_history_score": optional_percent,
+    },
+)
+counts = st.lists(st.integers(min_value=0, max_value=batch_scoring.COLUMN_CAP), min_size=1, max_size=50)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return load_service("risk_engine")
+
+
+def stricter_model(engine) -> CompiledModel:
+    """The default model with other brackets, deductions, certification points and levels"""
+    config = engine.scoring_models.current().config.model_dump()
+    config["version"] = "test-strict"
+    config["company_maturity"]["age_years"]["brackets"] = [{"min": 20, "points": 10}, {"min": 3, "points": 4}]
+    config["incident_history"]["breach"] = {"points_each": 5, "max_deduction": 20}
+    config["incident_history"]["cve"] = {"points_each": 1, "max_deduction": 10}
+    config["security_posture"]["certifications"][0]["points"] = 12
+    config["online_reputation"]["unknown_score"] = 20
+    config["risk_levels"][2]["max_score"] = 65
+    return CompiledModel(ScoringModelConfig.model_validate(config))
+
+
+@pytest.fixture(scope="module", params=["default", "strict"])
+def model(request, engine):
+    return engine.scoring_models.current() if request.param == "default" else stricter_model(engine)
+
+
+def dump(results):
+    return [result.model_dump(exclude={"calculated_at"}) for result in results]
+
+
+@settings(max_examples=200, deadline=None)
+@given(batch=st.lists(factors, max_size=30))
+def test_batch_matches_per_vendor(engine, model, batch):
+    vendors = [engine.VendorRiskFactors(**body) for body in batch]
+    assert dump(engine.score_vendor_batch(vendors, model)) == dump(engine.score_vendor(v, model) for v in vendors)
+
+
+@settings(max_examples=100, deadline=None)
+@given(ages=counts, employees=counts)
+def test_maturity_kernel(model, ages, employees):
+    size = min(len(ages), len(employees))
+    ages, employees = ages[:size], employees[:size]
+    expected = [model.maturity_score(age, count) for age, count in zip(ages, employees)]
+    assert batch_scoring.maturity_scores(model, np.array(ages), np.array(employees)).tolist() == expected
+
+
+@settings(max_examples=100, deadline=None)
+@given(breaches=counts, cves=counts)
+def test_incident_kernel(model, breaches, cves):
+    size = min(len(breaches), len(cves))
+    breaches, cves = breaches[:size], cves[:size]
+    expected = [model.incident_score(b, c) for b, c in zip(breaches, cves)]
+    assert batch_scoring.incident_scores(model, np.array(breaches), np.array(cves)).tolist() == expected
+
+
+@settings(max_examples=100, deadline=None)
+@given(lists=st.lists(st.tuples(st.booleans(), st.lists(st.sampled_from(CERTIFICATIONS), max_size=6)), min_size=1, max_size=30))
+def test_security_kernel(engine, model, lists):
+    vendors = [
+        engine.VendorRiskFactors(vendor_id=str(i), domain="a.com", has_ssl=ssl, compliance_certifications=certs)
+        for i, (ssl, certs) in enumerate(lists)
+    ]
+    columns = batch_scoring.FactorColumns(vendors)
+    scores = batch_scoring.security_scores(model, columns.has_ssl, columns.certification_points(model))
+    assert scores.tolist() == [model.security_score(ssl, certs) for ssl, certs in lists]
+
+
+def test_every_reachable_score_gets_the_per_vendor_level(model):
+    overall = np.arange(model.max_total_points + 1)
+    levels = batch_scoring.risk_level_indices(model, overall).tolist()
+    assert levels == [model.risk_level_index(score) for score in range(model.max_total_points + 1)]
+
+
+def test_counts_past_the_column_cap_score_as_saturated(engine, model):
+    huge = engine.VendorRiskFactors(vendor_id="huge", domain="a.com", company_age_years=10 ** 12,
+                                    employee_count=10 ** 12, breach_count=10 ** 12, cve_count=10 ** 12)
+    assert dump(engine.score_vendor_batch([huge], model)) == dump([engine.score_vendor(huge, model)])
+
+
+def test_empty_batch(engine, model):
+    assert engine.score_vendor_batch([], model) == []
@@ -0,0 +1,81 @@
+"""CertificationMatcher finds the catalog entry a linear scan over the catalog would"""
+import os
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from conftest import ROOT, SERVICES
+
+from cert_matcher import MEMO_SIZE, CertificationMatcher, normalize
+from scoring_model import load_model_config
+
+CONFIG = load_model_config(os.path.join(ROOT, SERVICES["risk_engine"], "scoring_model.json"))
+SCORES = {c.name: c.points for c in CONFIG.security_posture.certifications}
+ALIASES = {c.name: c.aliases for c in CONFIG.security_posture.certifications}
+# Catalog names and aliases, with text around them and characters that overlap them
+FRAGMENTS = [*SCORES, *(alias for aliases in ALIASES.values() for alias in aliases), "ISO", "270", "SOC 2", " Type II", "-", "/", " ", "x"]
+
+
+def linear_match(certification: str):
+    """The first catalog entry with a name or alias inside the certification string"""
+    text = normalize(certification)
+    for name in SCORES:
+        if any(alias and alias in text for alias in map(normalize, [name, *ALIASES[name]])):
+            return name
+    return None
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return CertificationMatcher(SCORES, ALIASES)
+
+
+@pytest.mark.parametrize("certification, expected", [
+    ("ISO27001", "ISO27001"),
+    ("iso 27001", "ISO27001"),
+    ("ISO/IEC 27001:2022", "ISO27001"),
+    ("SOC 2 Type II", "SOC2"),
+    ("pci dss v4.0", "PCI-DSS"),
+    ("PCI Data Security Standard", "PCI-DSS"),
+    ("Federal Risk and Authorization Management Program (Moderate)", "FedRAMP"),
+    ("StateRAMP", "StateRAMP"),
+    ("NIST SP 800-53 Rev. 5", "NIST 800-53"),
+    ("ISO/IEC 27701", "ISO27701"),
+    # Entries listed first in the catalog win
+    ("SOC2 and ISO27001", "ISO27001"),
+    ("SOC 1", "SOC1"),
+    ("made-up cert", None),
+    ("", None),
+])
+def test_examples(matcher, certification, expected):
+    assert matcher.match(certification) == expected
+    assert matcher.certification_points(certification) == (SCORES[expected] if expected else 0)
+
+
+@settings(max_examples=1000, deadline=None)
+@given(st.lists(st.sampled_from(FRAGMENTS), max_size=5).map("".join) | st.text(max_size=30))
+def test_matches_the_linear_scan(matcher, certification):
+    assert matcher.match(certification) == linear_match(certification)
+
+
+@settings(max_examples=200, deadline=None)
+@given(st.lists(st.sampled_from(FRAGMENTS), max_size=8))
+def test_total_points_sums_each_string(matcher, certifications):
+    expected = sum(SCORES[name] for name in map(linear_match, certifications) if name)
+    # Twice: the second sum is served from the memo
+    assert matcher.total_points(certifications) == expected
+    assert matcher.total_points(certifications) == expected
+
+
+def test_memo_is_bounded():
+    matcher = CertificationMatcher(SCORES, ALIASES)
+    for number in range(MEMO_SIZE + 10):
+        matcher.certification_points(f"cert {number}")
+    assert len(matcher._memo) == MEMO_SIZE
+    assert matcher.certification_points(f"SOC2 {MEMO_SIZE + 20}") == SCORES["SOC2"]
+
+
+def test_empty_catalog():
+    matcher = CertificationMatcher({})
+    assert matcher.match("ISO27001") is None and matcher.total_points(["ISO27001"]) == 0
@@ -0,0 +1,113 @@
+"""The /api/calculate fast path answers exactly as the standard route does"""
+import json
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from conftest import load_service
+
+CERTIFICATIONS = ["ISO27001", "ISO/IEC 27001:2022", "SOC2", "SOC 2 Type II", "PCI-DSS", "HIPAA", "made-up cert", ""]
+TIMESTAMP = re.compile(rb'"calculated_at":"[^"]*"')
+FACTOR_STAGES = (
+    "company_maturity", "security_posture", "incident_history", "online_reputation", "financial_health",
+    "recommendations",
+)
+
+optional_count = st.none() | st.integers(min_value=0, max_value=10 ** 7)
+optional_percent = st.none() | st.integers(min_value=0, max_value=100)
+factors = st.fixed_dictionaries(
+    {"vendor_id": st.text(min_size=1, max_size=20), "domain": st.just("vendor.example.com")},
+    optional={
+        "company_age_years": optional_count,
+        "employee_count": optional_count,
+        "has_ssl": st.booleans(),
+        "breach_count": st.integers(min_value=0, max_value=10 ** 5),
+        "cve_count": st.integers(min_value=0, max_value=10 ** 6),
+        "compliance_certifications": st.lists(st.sampled_from(CERTIFICATIONS), max_size=5),
+        "domain_reputation_score": optional_percent,
+        "financial_health_score": optional_percent,
+        "incident_history_score": optional_percent,
+    },
+)
+# Out-of-range and mistyped values, for the requests the fast path hands back to the standard route
+invalid_value = st.sampled_from([-1, 101, "abc", "5", None, [], 1.5])
+
+
+@pytest.fixture(scope="module")
+def engines():
+    fast = load_service("risk_engine", CALCULATE_FAST_PATH="true")
+    standard = load_service("risk_engine", CALCULATE_FAST_PATH="false")
+    return TestClient(fast.app), TestClient(standard.app)
+
+
+def answer(client: TestClient, body: bytes, content_type: str = "application/json"):
+    response = client.post("/api/calculate", content=body, headers={"content-type": content_type})
+    return response.status_code, response.headers["content-type"], TIMESTAMP.sub(b"", response.content)
+
+
+@settings(max_examples=300, deadline=None)
+@given(body=factors)
+def test_valid_requests_answer_identically(engines, body):
+    fast, standard = engines
+    content = json.dumps(body).encode()
+    assert answer(fast, content) == answer(standard, content)
+
+
+@settings(max_examples=150, deadline=None)
+@given(body=factors, field=st.sampled_from(["breach_count", "cve_count", "domain_reputation_score", "has_ssl", "vendor_id"]),
+       value=invalid_value)
+def test_invalid_requests_get_the_standard_error(engines, body, field, value):
+    fast, standard = engines
+    content = json.dumps({**body, field: value}).encode()
+    assert answer(fast, content) == answer(standard, content)
+
+
+@pytest.mark.parametrize("content, content_type", [
+    (b"", "application/json"),
+    (b"{", "application/json"),
+    (b"[]", "application/json"),
+    (b'{"vendor_id": 1}', "application/json"),
+    (b'{"vendor_id": "V1", "domain": "a.com"}', "text/plain"),
+    (b'{"vendor_id": "V1", "domain": "a.com"}', "application/json; charset=utf-8"),
+])
+def test_malformed_requests_get_the_standard_response(engines, content, content_type):
+    fast, standard = engines
+    assert answer(fast, content, content_type) == answer(standard, content, content_type)
+
+
+@settings(max_examples=300, deadline=None)
+@given(
+    body=factors,
+    thresholds=st.fixed_dictionaries({
+        "high_priority_max_score": st.integers(0, 100),
+        "security_posture_below": st.integers(0, 30),
+        "cve_count_above": st.integers(0, 50),
+        "company_maturity_below": st.integers(0, 25),
+        "low_risk_min_score": st.integers(0, 100),
+    }),
+)
+def test_score_vendor_fast_matches_score_vendor(body, thresholds):
+    engine = load_service("risk_engine", CALCULATE_FAST_PATH="true")
+    config = engine.scoring_models.current().config
+    model = engine.CompiledModel(config.model_copy(update={
+        "recommendations": config.recommendations.model_copy(update=thresholds),
+    }))
+    vendor = engine.VendorRiskFactors(**body)
+    expected = engine.score_vendor(vendor, model).model_dump(exclude={"calculated_at"})
+    assert engine.score_vendor_fast(vendor, model).model_dump(exclude={"calculated_at"}) == expected
+
+
+def test_fast_path_times_every_factor(engines):
+    fast, _ = engines
+    engine = load_service("risk_engine", CALCULATE_FAST_PATH="true")
+
+    def observations():
+        return {stage: sum(engine.scoring_stages[stage].snapshot()[0]) for stage in FACTOR_STAGES}
+
+    before = observations()
+    response = fast.post("/api/calculate", json={"vendor_id": "timed-vendor", "domain": "timed.example.com"})
+    assert response.status_code == 200
+    assert observations() == {stage: count + 1 for stage, count in before.items()}
@@ -0,0 +1,90 @@
+"""ScoreStore and the incremental scoring paths built on it"""
+import pytest
+
+from conftest import load_service
+
+from incremental import ScoreStore, factors_fingerprint
+
+
+def test_hit_only_for_the_same_fingerprint():
+    store = ScoreStore()
+    store.put("V1", "a", "result a")
+    assert store.get("V1", "a") == "result a"
+    assert store.get("V1", "b") is None
+    assert store.get("V2", "a") is None
+    assert (store.hits, store.misses) == (1, 2)
+
+
+def test_put_replaces_the_vendor_entry():
+    store = ScoreStore()
+    store.put("V1", "a", "result a")
+    store.put("V1", "b", "result b")
+    assert store.get("V1", "a") is None and store.get("V1", "b") == "result b"
+    assert len(store.entries) == 1
+
+
+def test_least_recently_used_vendor_is_evicted():
+    store = ScoreStore(max_vendors=2)
+    store.put("V1", "a", 1)
+    store.put("V2", "a", 2)
+    store.get("V1", "a")
+    store.put("V3", "a", 3)
+    assert list(store.entries) == ["V1", "V3"]
+
+
+def test_stats_estimate_time_saved():
+    store = ScoreStore()
+    for vendor_id in ("V1", "V2"):
+        store.get(vendor_id, "a")
+        store.put(vendor_id, "a", vendor_id)
+    store.record_compute(0.5)
+    for _ in range(3):
+        store.get("V1", "a")
+    stats = store.stats()
+    assert stats["hits"] == 3 and stats["misses"] == 2 and stats["hit_ratio"] == 0.6
+    assert stats["time_saved_seconds"] == 0.75
+    store.clear()
+    assert store.stats()["vendors"] == 0
+
+
+def test_fingerprint_covers_factors_and_model():
+    assert factors_fingerprint('{"a":1}', "m1") == factors_fingerprint('{"a":1}', "m1")
+    assert factors_fingerprint('{"a":1}', "m1") != factors_fingerprint('{"a":2}', "m1")
+    assert factors_fingerprint('{"a":1}', "m1") != factors_fingerprint('{"a":1}', "m2")
+
+
+@pytest.fixture
+def engine():
+    engine = load_service("risk_engine")
+    engine.score_store.clear()
+    return engine
+
+
+def test_incremental_batch_recomputes_only_changed_vendors(engine):
+    vendors = [engine.VendorRiskFactors(vendor_id=f"V{number}", domain="a.com", breach_count=number) for number in range(4)]
+    first = engine.score_vendor_batch_incremental(vendors)
+    vendors[2] = vendors[2].model_copy(update={"breach_count": 9})
+    second = engine.score_vendor_batch_incremental(vendors)
+
+    assert [a is b for a, b in zip(first, second)] == [True, True, False, True]
+    assert second[2].risk_factors["incident_history"] < first[2].risk_factors["incident_history"]
+    assert engine.score_store.hits == 3
+
+
+def test_single_and_batch_share_the_store(engine):
+    vendor = engine.VendorRiskFactors(vendor_id="V1", domain="a.com", cve_count=3)
+    single = engine.score_vendor_incremental(vendor)
+    assert engine.score_vendor_batch_incremental([vendor])[0] is single
+
+
+def test_a_new_model_rescores(engine):
+    vendor = engine.VendorRiskFactors(vendor_id="V1", domain="a.com")
+    first = engine.score_vendor_incremental(vendor)
+    registry = engine.scoring_models
+    current = registry.model
+    registry.model = engine.CompiledModel(current.config.model_copy(update={"version": "test-next"}))
+    try:
+        second = engine.score_vendor_incremental(vendor)
+    finally:
+        registry.model = current
+    assert second is not first and second.scoring_model_version == "test-next"
@@ -0,0 +1,261 @@
+"""ReassessmentScheduler: the due-time heap, the budget and pushes to the portfolio index"""
+import asyncio
+
+import httpx
+
+from conftest import load_service
+from grc_shared.portfolio_client import PortfolioIndexClient
+from scheduler import DEFAULT_INTERVALS, Budget, ReassessmentScheduler, RiskEngineUnavailable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class RiskEngine:
+    """Assesses every vendor at the score and level set for it, or fails while failing is set"""
+
+    def __init__(self):
+        self.scores = {}
+        self.levels = {}
+        self.cache_expires_at = None
+        self.failing = False
+        self.batches = []
+
+    async def assess(self, vendors, concurrency):
+        self.batches.append([vendor["vendor_id"] for vendor in vendors])
+        if self.failing:
+            raise RiskEngineUnavailable("Risk engine assessment failed: connection refused")
+        return [{
+            "vendor_id": vendor["vendor_id"],
+            "risk": {
+                "vendor_id": vendor["vendor_id"],
+                "overall_risk_score": self.scores.get(vendor["vendor_id"], 50),
+                "risk_level": self.levels.get(vendor["vendor_id"], "medium"),
+                "calculated_at": "2026-01-01T00:00:00",
+            },
+            "enrichment": {"cache_expires_at": self.cache_expires_at} if self.cache_expires_at else None,
+            "error": None,
+        } for vendor in vendors]
+
+    def stats(self):
+        return {}
+
+
+class Index:
+    """The portfolio index service in process, reachable or not"""
+
+    def __init__(self):
+        self.service = load_service("portfolio_index")
+        self.service.index = self.service.PortfolioIndex()
+        self.reachable = True
+        app = httpx.ASGITransport(app=self.service.app)
+
+        async def handle(request):
+            if not self.reachable:
+                raise httpx.ConnectError("Connection refused", request=request)
+            return await app.handle_async_request(request)
+
+        self.client = PortfolioIndexClient("http://portfolio", transport=httpx.MockTransport(handle))
+
+    def score(self, vendor_id):
+        return (self.service.index.vendor(vendor_id) or {}).get("risk_score")
+
+
+def run_batch(scheduler: ReassessmentScheduler) -> None:
+    async def batch():
+        scheduler.dispatch()
+        await asyncio.gather(*scheduler.batches)
+    asyncio.run(batch())
+
+
+def new_scheduler(engine, index=None, clock=None, **options) -> ReassessmentScheduler:
+    options = {"rate": 1000.0, "burst": 1000.0, **options}
+    return ReassessmentScheduler(engine, clock=clock or Clock(), portfolio=index.client if index is not None else None, **options)
+
+
+def vendor(vendor_id: str, **factors):
+    return {"vendor_id": vendor_id, "domain": f"{vendor_id.lower()}.example.com", **factors}
+
+
+# Budget
+
+def test_budget_gives_what_it_has_without_waiting():
+    clock = Clock()
+    budget = Budget(rate=2.0, burst=10.0, clock=clock)
+    assert budget.take(4) == 4
+    assert budget.take(100) == 6
+    assert budget.take(1) == 0
+
+
+def test_budget_refills_at_its_rate_up_to_the_burst():
+    clock = Clock()
+    budget = Budget(rate=2.0, burst=10.0, clock=clock)
+    budget.take(10)
+    clock.advance(1.5)
+    assert budget.take(10) == 3
+    clock.advance(3600)
+    assert budget.take(100) == 10
+
+
+def test_dispatch_stays_within_the_budget():
+    engine, clock = RiskEngine(), Clock()
+    scheduler = new_scheduler(engine, clock=clock, rate=1.0, burst=3.0)
+    for number in range(10):
+        scheduler.upsert(vendor(f"V{number}"))
+    run_batch(scheduler)
+    assert sum(map(len, engine.batches)) == 3
+    clock.advance(2)
+    run_batch(scheduler)
+    assert sum(map(len, engine.batches)) == 5 and scheduler.assessed == 5
+
+
+def test_tokens_for_vendors_not_due_go_back():
+    engine, clock = RiskEngine(), Clock()
+    scheduler = new_scheduler(engine, clock=clock, rate=1.0, burst=5.0)
+    scheduler.upsert(vendor("V0"))
+    run_batch(scheduler)
+    assert engine.batches == [["V0"]] and scheduler.budget.tokens == 4
+
+
+# Heap
+
+def test_earliest_due_first_and_ties_to_the_higher_level():
+    engine, clock = RiskEngine(), Clock()
+    scheduler = new_scheduler(engine, clock=clock)
+    now = clock()
+    scheduler.upsert(vendor("low"), "low", now - DEFAULT_INTERVALS["low"] - 10)
+    scheduler.upsert(vendor("critical"), "critical", now - DEFAULT_INTERVALS["critical"] - 10)
+    scheduler.upsert(vendor("oldest"), "medium", now - DEFAULT_INTERVALS["medium"] - 500)
+    scheduler.upsert(vendor("not-due"), "minimal", now)
+    run_batch(scheduler)
+    assert engine.batches == [["oldest", "critical", "low"]]
+
+
+def test_next_due_by_level_volatility_and_cache_expiry():
+    engine, clock = RiskEngine(), Clock()
+    scheduler = new_scheduler(engine, clock=clock, volatility_scale=10.0, max_staleness=2 * 86400)
+    scheduler.upsert(vendor("V0"))
+    engine.levels["V0"] = "high"
+    run_batch(scheduler)
+    schedule = scheduler.vendors["V0"]
+    assert schedule.due_at == clock() + DEFAULT_INTERVALS["high"]
+
+    # A 10-point swing halves the interval
+    engine.scores["V0"] = 60
+    scheduler.reassess_now("V0")
+    run_batch(scheduler)
+    assert schedule.due_at == clock() + DEFAULT_INTERVALS["high"] / 2
+
+    # Cached enrichment pushes it back, up to max_staleness
+    engine.cache_expires_at = "2100-01-01T00:00:00"
+    scheduler.reassess_now("V0")
+    run_batch(scheduler)
+    assert schedule.due_at == clock() + 2 * 86400
+
+
+def test_min_interval_floor():
+    engine, clock = RiskEngine(), Clock()
+    scheduler = new_scheduler(engine, clock=clock, min_interval=3600.0, volatility_scale=0.01)
+    scheduler.upsert(vendor("V0"))
+    run_batch(scheduler)
+    engine.scores["V0"] = 90
+    scheduler.reassess_now("V0")
+    run_batch(scheduler)
+    assert scheduler.vendors["V0"].due_at == clock() + 3600.0
+
+
+def test_failures_retry_with_doubling_delays():
+    engine, clock = RiskEngine(), Clock()
+    scheduler = new_scheduler(engine, clock=clock, retry_delay=60.0)
+    scheduler.upsert(vendor("V0"))
+    engine.failing = True
+    delays = []
+    for _ in range(3):
+        run_batch(scheduler)
+        delays.append(scheduler.vendors["V0"].due_at - clock())
+        clock.advance(delays[-1])
+    assert delays == [60.0, 120.0, 240.0]
+    assert scheduler.vendors["V0"].last_error.startswith("Risk engine assessment failed")
+
+
+def test_changed_factors_make_a_vendor_due_now():
+    engine, clock = RiskEngine(), Clock()
+    scheduler = new_scheduler(engine, clock=clock)
+    assert scheduler.upsert(vendor("V0"), "low", clock())
+    assert not scheduler.upsert(vendor("V0"))
+    run_batch(scheduler)
+    assert engine.batches == []
+    assert not scheduler.upsert(vendor("V0", breach_count=2))
+    run_batch(scheduler)
+    assert engine.batches == [["V0"]]
+
+
+def test_removed_vendors_are_skipped_and_the_heap_compacted():
+    engine, clock = RiskEngine(), Clock()
+    scheduler = new_scheduler(engine, clock=clock)
+    for number in range(200):
+        scheduler.upsert(vendor(f"V{number}"))
+    for number in range(1, 200):
+        scheduler.remove(f"V{number}")
+    assert len(scheduler.heap) <= 2 * len(scheduler.vendors) + 64
+    run_batch(scheduler)
+    assert engine.batches == [["V0"]]
+    assert not scheduler.remove("V1")
+
+
+# Portfolio index
+
+
+def test_each_batch_pushes_its_scores():
+    engine, index = RiskEngine(), Index()
+    scheduler = new_scheduler(engine, index)
+    for number in range(3):
+        scheduler.upsert({"vendor_id": f"V{number}", "domain": f"v{number}.example.com"})
+    engine.scores = {"V0": 10, "V1": 20, "V2": 30}
+
+    run_batch(scheduler)
+
+    assert [index.score(f"V{number}") for number in range(3)] == [10, 20, 30]
+    assert index.client.requests == 1 and index.client.vendors_pushed == 3
+    assert scheduler.unpushed == {}
+
+
+def test_missed_scores_go_with_the_next_batch():
+    engine, index, clock = RiskEngine(), Index(), Clock()
+    scheduler = new_scheduler(engine, index, clock)
+    scheduler.upsert({"vendor_id": "V0", "domain": "v0.example.com"})
+    index.reachable = False
+    run_batch(scheduler)
+    assert index.score("V0") is None and set(scheduler.unpushed) == {"V0"}
+
+    index.reachable = True
+    scheduler.upsert({"vendor_id": "V1", "domain": "v1.example.com"})
+    run_batch(scheduler)
+    assert index.score("V0") == 50 and index.score("V1") == 50
+    assert scheduler.unpushed == {}
+
+
+def test_failed_assessments_push_nothing():
+    engine, index = RiskEngine(), Index()
+    scheduler = new_scheduler(engine, index)
+    scheduler.upsert({"vendor_id": "V0", "domain": "v0.example.com"})
+    engine.failing = True
+
+    run_batch(scheduler)
+
+    assert scheduler.failed == 1 and index.client.requests == 0
+
+
+def test_no_index_configured():
+    scheduler = new_scheduler(RiskEngine())
+    scheduler.upsert({"vendor_id": "V0", "domain": "v0.example.com"})
+    run_batch(scheduler)
+    assert scheduler.assessed == 1 and scheduler.unpushed == {}